@@ -0,0 +1,280 @@
+"""
+Batch CLI script to prepare, run, and process offline LLM generation batches.
+"""
+
+# imports
+import argparse
+import json
+from typing import Optional, Sequence
+
+# project
+from soli_data_generator.llm import AnnotatedTextGenerator, TextGenerator
+from soli_data_generator.llm.batch import (
+    process_batch_responses,
+    read_batch_requests,
+    read_batch_responses,
+    run_batch_requests,
+    write_batch_requests,
+)
+from soli_data_generator.llm.concurrency import AdaptiveLimiter, RateLimitedModel
+from soli_data_generator.llm.models import get_balanced_model, parse_endpoints
+from soli_data_generator.procedural import WeightedSampler, load_sampling_policies
+from soli_data_generator.procedural.stream import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    serialize_output,
+)
+
+
+def get_generator(
+    generation_type: str,
+    sampling_policies: Optional[str] = None,
+    correlated: bool = False,
+) -> TextGenerator | AnnotatedTextGenerator:
+    """
+    Create a generator without a model for building prompts or processing responses.
+
+    Args:
+    - generation_type (str): text or annotated
+    - sampling_policies (str): a JSON file of per-tag weighted sampling policies
+    - correlated (bool): whether to jointly draw related classes for co-occurring tags
+
+    Returns:
+    - TextGenerator | AnnotatedTextGenerator: the generator
+    """
+    sampler = None
+    if sampling_policies is not None:
+        sampler = WeightedSampler(load_sampling_policies(sampling_policies))
+
+    if generation_type == "text":
+        return TextGenerator(None, sampler=sampler, correlated=correlated)
+    if generation_type == "annotated":
+        return AnnotatedTextGenerator(None, sampler=sampler, correlated=correlated)
+    raise ValueError(
+        f"Invalid generation type: {generation_type}; must be 'text' or 'annotated'"
+    )
+
+
+def prepare(args: argparse.Namespace) -> None:
+    """
+    Build prompts into a batch request file.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    generator = get_generator(args.type, args.sampling_policies, args.correlated)
+    with open(args.output, "wt", encoding="utf-8") as output_file:
+        num_requests = write_batch_requests(
+            generator,
+            args.samples,
+            output_file,
+            model_name=args.model_name,
+            max_tokens=args.max_tokens,
+        )
+    print(f"Wrote {num_requests} batch requests to {args.output}")
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Complete a batch request file with a local or remote model.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    if args.concurrency < 1:
+        raise ValueError("--concurrency must be at least 1")
+    model = RateLimitedModel(
+        get_balanced_model(args.model, parse_endpoints(args.endpoint)),
+        limiter=AdaptiveLimiter(
+            initial_limit=min(4, args.concurrency), max_limit=args.concurrency
+        ),
+        max_retries=args.max_retries,
+    )
+    with (
+        open(args.input, "rt", encoding="utf-8") as input_file,
+        open(args.output, "wt", encoding="utf-8") as output_file,
+    ):
+        num_succeeded, num_failed = run_batch_requests(
+            model,
+            read_batch_requests(input_file),
+            output_file,
+            concurrency=args.concurrency,
+        )
+    print(
+        f"Completed {num_succeeded} batch requests ({num_failed} failed) to {args.output}"
+    )
+
+
+def process(args: argparse.Namespace) -> None:
+    """
+    Post-process a batch response file into samples.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    generator = get_generator(args.type, args.sampling_policies, args.correlated)
+    num_samples, num_failed = 0, 0
+    with (
+        open(args.input, "rt", encoding="utf-8") as input_file,
+        open(args.output, "at+", encoding="utf-8") as output_file,
+    ):
+        results = process_batch_responses(
+            generator,
+            read_batch_responses(input_file),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+        for custom_id, sample, error in results:
+            if error is not None:
+                print(f"Error in batch response {custom_id}: {error}")
+                num_failed += 1
+                continue
+            if isinstance(sample, str):
+                output_file.write(json.dumps(sample) + "\n")
+            else:
+                output_file.write(serialize_output(sample) + "\n")
+            num_samples += 1
+    print(f"Wrote {num_samples} samples to {args.output} ({num_failed} failed)")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Prepare, run, or process an offline generation batch.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator batch",
+        description="Build prompts into a batch request file and post-process completed batch responses.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # prepare
+    prepare_parser = subparsers.add_parser(
+        "prepare", help="build prompts into a batch request file"
+    )
+    prepare_parser.add_argument(
+        "--output",
+        type=str,
+        default="requests.jsonl",
+        help="the output batch request file",
+    )
+    prepare_parser.add_argument(
+        "--samples",
+        type=int,
+        default=10,
+        help="the number of prompts to build",
+    )
+    prepare_parser.add_argument(
+        "--model-name",
+        type=str,
+        required=True,
+        help="the model name written into each request",
+    )
+    prepare_parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="the maximum number of completion tokens per request",
+    )
+    prepare_parser.set_defaults(function=prepare)
+
+    # run
+    run_parser = subparsers.add_parser(
+        "run", help="complete a batch request file with a model"
+    )
+    run_parser.add_argument(
+        "--input",
+        type=str,
+        default="requests.jsonl",
+        help="the batch request file",
+    )
+    run_parser.add_argument(
+        "--output",
+        type=str,
+        default="responses.jsonl",
+        help="the output batch response file",
+    )
+    run_parser.add_argument(
+        "--model",
+        type=str,
+        default="vllm",
+        help="the AI model to use for text generation (vllm:name, openai:name, or anthropic:name)",
+    )
+    run_parser.add_argument(
+        "--endpoint",
+        type=str,
+        action="append",
+        default=None,
+        help="a model endpoint URL; repeat or comma-separate to balance requests across replicas",
+    )
+    run_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="the maximum number of in-flight model requests",
+    )
+    run_parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="the number of retries for rate limits, server errors, and timeouts",
+    )
+    run_parser.set_defaults(function=run)
+
+    # process
+    process_parser = subparsers.add_parser(
+        "process", help="post-process a batch response file into samples"
+    )
+    process_parser.add_argument(
+        "--input",
+        type=str,
+        default="responses.jsonl",
+        help="the batch response file",
+    )
+    process_parser.add_argument(
+        "--output",
+        type=str,
+        default="output.jsonl",
+        help="the output JSON file for the generated text",
+    )
+    process_parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="the number of worker processes for formatting annotated templates",
+    )
+    process_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_STREAM_CHUNK_SIZE,
+        help="the number of templates sent to a worker at a time",
+    )
+    process_parser.set_defaults(function=process)
+
+    # generation options shared by prepare and process
+    for subparser in (prepare_parser, process_parser):
+        subparser.add_argument(
+            "--type",
+            type=str,
+            default="annotated",
+            help="the type of generation (text or annotated)",
+        )
+        subparser.add_argument(
+            "--sampling-policies",
+            type=str,
+            default=None,
+            help="a JSON file of per-tag weighted sampling policies",
+        )
+        subparser.add_argument(
+            "--correlated",
+            action="store_true",
+            help="jointly draw related SOLI classes for co-occurring tags",
+        )
+
+    args = parser.parse_args(argv)
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Coordinator and worker CLI scripts for distributed template rendering.
+"""
+
+# imports
+import argparse
+import os
+from typing import Optional, Sequence
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.distributed import (
+    DEFAULT_LEASE_SECONDS,
+    WorkQueue,
+    iter_template_offsets,
+    merge_shards,
+    merge_stats,
+    run_worker,
+)
+from soli_data_generator.procedural.stream import DEFAULT_UNIT_SIZE
+
+
+def create(args: argparse.Namespace) -> None:
+    """
+    Split a template file into seeded work units in a new queue.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    input_format = args.input_format
+    if input_format == "auto":
+        input_format = "jsonl" if args.input.endswith(".jsonl") else "text"
+
+    # workers on other machines resolve paths from the shared mount
+    job = {
+        "input": os.path.abspath(args.input),
+        "input_format": input_format,
+        "field": args.field,
+        "output_dir": os.path.abspath(args.output_dir),
+        "seed": args.seed,
+        "renders": args.renders,
+        "spans": not args.no_spans,
+        "sampling_policies": (
+            os.path.abspath(args.sampling_policies)
+            if args.sampling_policies is not None
+            else None
+        ),
+        "correlated": args.correlated,
+        "stats": args.stats,
+    }
+    os.makedirs(job["output_dir"], exist_ok=True)
+
+    work_queue = WorkQueue(args.queue)
+    try:
+        num_units = work_queue.create_job(
+            job, iter_template_offsets(args.input), unit_size=args.unit_size
+        )
+        num_templates = work_queue.get_job()["num_templates"]
+    finally:
+        work_queue.close()
+    print(
+        f"Created {num_units} work units for {num_templates} templates in {args.queue}"
+    )
+
+
+def status(args: argparse.Namespace) -> None:
+    """
+    Print the unit counts by state.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    work_queue = WorkQueue(args.queue)
+    try:
+        progress = work_queue.progress()
+    finally:
+        work_queue.close()
+    print(
+        f"{progress['done']}/{progress['total']} units done, {progress['leased']} leased, "
+        f"{progress['expired']} expired, {progress['pending']} pending"
+    )
+
+
+def merge(args: argparse.Namespace) -> None:
+    """
+    Concatenate the finished shards in unit order.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    work_queue = WorkQueue(args.queue)
+    try:
+        with open(args.output, "wt", encoding="utf-8") as output_file:
+            num_shards = merge_shards(work_queue, output_file)
+        if args.stats is not None:
+            merge_stats(work_queue, SOLI()).write(args.stats)
+    finally:
+        work_queue.close()
+    print(f"Merged {num_shards} shards into {args.output}")
+
+
+def coordinator_main(argv: Optional[Sequence[str]] = None):
+    """
+    Create, inspect, or merge a distributed rendering job.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator coordinator",
+        description="Split a template file into seeded work units and merge the worker shards.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # create
+    create_parser = subparsers.add_parser(
+        "create", help="split a template file into seeded work units"
+    )
+    create_parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="the template file, on storage shared with the workers",
+    )
+    create_parser.add_argument(
+        "--input-format",
+        type=str,
+        default="auto",
+        choices=["auto", "text", "jsonl"],
+        help="one template per line (text) or JSON strings/objects (jsonl); auto uses jsonl for .jsonl files",
+    )
+    create_parser.add_argument(
+        "--field",
+        type=str,
+        default="template",
+        help="the template field of JSONL objects",
+    )
+    create_parser.add_argument(
+        "--output-dir",
+        type=str,
+        required=True,
+        help="the directory for the per-unit shards",
+    )
+    create_parser.add_argument(
+        "--seed",
+        type=int,
+        required=True,
+        help="the job seed; each unit's seed is derived from it",
+    )
+    create_parser.add_argument(
+        "--unit-size",
+        type=int,
+        default=DEFAULT_UNIT_SIZE,
+        help="the number of templates per work unit",
+    )
+    create_parser.add_argument(
+        "--renders",
+        type=int,
+        default=1,
+        help="the number of outputs to render per template",
+    )
+    create_parser.add_argument(
+        "--no-spans",
+        action="store_true",
+        help="write only the rendered text without span annotations",
+    )
+    create_parser.add_argument(
+        "--sampling-policies",
+        type=str,
+        default=None,
+        help="a JSON file of per-tag weighted sampling policies",
+    )
+    create_parser.add_argument(
+        "--correlated",
+        action="store_true",
+        help="jointly draw related SOLI classes for co-occurring tags",
+    )
+    create_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="write mergeable per-unit statistics next to each shard",
+    )
+    create_parser.set_defaults(function=create)
+
+    # status
+    status_parser = subparsers.add_parser("status", help="print the job progress")
+    status_parser.set_defaults(function=status)
+
+    # merge
+    merge_parser = subparsers.add_parser(
+        "merge", help="concatenate the finished shards in unit order"
+    )
+    merge_parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="the merged JSONL output file",
+    )
+    merge_parser.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="merge the per-unit statistics of a job created with --stats into this JSON report",
+    )
+    merge_parser.set_defaults(function=merge)
+
+    for subparser in (create_parser, status_parser, merge_parser):
+        subparser.add_argument(
+            "--queue",
+            type=str,
+            required=True,
+            help="the SQLite work queue database",
+        )
+
+    args = parser.parse_args(argv)
+    args.function(args)
+
+
+def worker_main(argv: Optional[Sequence[str]] = None):
+    """
+    Claim and render work units until the queue is drained.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator worker",
+        description="Claim seeded work units from a queue, render them, and write per-unit shards.",
+    )
+    parser.add_argument(
+        "--queue",
+        type=str,
+        required=True,
+        help="the SQLite work queue database",
+    )
+    parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=None,
+        help="the worker ID; defaults to the host name and process ID",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help="the lease duration in seconds; leases are renewed while a unit renders",
+    )
+    parser.add_argument(
+        "--max-units",
+        type=int,
+        default=None,
+        help="stop after completing this many units",
+    )
+    args = parser.parse_args(argv)
+
+    completed = run_worker(
+        args.queue,
+        worker=args.worker_id,
+        lease_seconds=args.lease,
+        max_units=args.max_units,
+    )
+    print(f"Completed {completed} work units")
@@ -0,0 +1,97 @@
+"""
+Export CLI script to convert annotated samples into token-level BIO labels.
+"""
+
+# imports
+import argparse
+import json
+import sys
+from typing import Iterator, Optional, Sequence, TextIO
+
+# project
+from soli_data_generator.export import (
+    TOKENIZERS,
+    iter_bio_examples,
+    write_bio_examples,
+)
+
+
+def read_samples(input_file: TextIO) -> Iterator[dict]:
+    """
+    Lazily read annotated samples from a JSONL file.
+
+    Args:
+    - input_file (TextIO): the open input file
+
+    Yields:
+    - dict: the next sample with text and spans
+    """
+    for line in input_file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record.get("text"), str) or "spans" not in record:
+            raise ValueError("Invalid sample record; expected text and spans")
+        yield record
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Convert annotated JSONL samples to the compact BIO array format.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator bio",
+        description="Convert annotated samples into token offsets and BIO labels.",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        default="-",
+        help="the annotated JSONL samples, or - for stdin",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="the binary BIO output file",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default="regex",
+        choices=sorted(TOKENIZERS),
+        help="split words and punctuation (regex) or only on whitespace",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="fail on spans that do not line up with token boundaries instead of widening them",
+    )
+    args = parser.parse_args(argv)
+
+    input_file = (
+        sys.stdin if args.input == "-" else open(args.input, "rt", encoding="utf-8")
+    )
+    try:
+        with open(args.output, "wb") as output_file:
+            counts = write_bio_examples(
+                iter_bio_examples(
+                    read_samples(input_file),
+                    tokenizer=TOKENIZERS[args.tokenizer],
+                    strict=args.strict,
+                ),
+                output_file,
+                tokenizer=args.tokenizer,
+            )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    print(
+        f"Wrote {counts['examples']} examples with {counts['tokens']} tokens to {args.output}; "
+        f"{counts['misaligned']} spans did not align with token boundaries",
+        file=sys.stderr,
+    )
@@ -4,28 +4,148 @@ Generation CLI script to wrap the TextGenerator or AnnotatedTextGenerator classe
 
 # imports
 import argparse
+import itertools
 import json
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 # packages
 import tqdm
-from alea_llm_client import AnthropicModel, OpenAIModel, VLLMModel
-from soli import OWLClass
 
 # project
+from soli_data_generator.cli import (
+    batch,
+    distributed,
+    export,
+    index,
+    library,
+    loadtest,
+    render,
+    serve,
+    stats,
+)
+from soli_data_generator.dedup import DEFAULT_DEDUP_CAPACITY, Deduplicator
+from soli_data_generator.index import DatasetIndexer, get_index_path
+from soli_data_generator.instrumentation import (
+    EXPORT_FORMATS,
+    NULL_METRICS,
+    Metrics,
+    PeriodicExporter,
+)
+from soli_data_generator.profiling import PROFILE_MODES, SampleProfiler
 from soli_data_generator.llm import AnnotatedTextGenerator, TextGenerator
+from soli_data_generator.llm.balancer import LoadBalancedModel
+from soli_data_generator.llm.budget import (
+    Budget,
+    BudgetExhausted,
+    UsageTracker,
+    read_manifest,
+    update_manifest,
+    write_manifest,
+)
+from soli_data_generator.llm.concurrency import (
+    AdaptiveLimiter,
+    RateLimitedModel,
+    iter_concurrent,
+    iter_sequential,
+)
+from soli_data_generator.llm.models import get_balanced_model, parse_endpoints
+from soli_data_generator.llm.pipeline import iter_pipeline
+from soli_data_generator.llm.text import PROCEDURAL_TYPES
+from soli_data_generator.procedural import (
+    AnnotatedSample,
+    ClassSampler,
+    CoverageSampler,
+    GraphRegistry,
+    WeightedSampler,
+    load_sampling_policies,
+)
+from soli_data_generator.procedural.template import SOLI_TAG_GETTERS
+from soli_data_generator.stats import DatasetStats
 
 
-def main():
+# subcommands run as `soli-data-generator <subcommand> [args]`
+SUBCOMMANDS = {
+    "batch": batch.main,
+    "bio": export.main,
+    "coordinator": distributed.coordinator_main,
+    "index": index.main,
+    "library": library.main,
+    "loadtest": loadtest.main,
+    "render": render.main,
+    "serve": serve.main,
+    "stats": stats.main,
+    "worker": distributed.worker_main,
+}
+
+
+def get_coverage(samplers: Iterable[CoverageSampler]) -> float:
     """
-    pipx-runnable main function for generating text from an AI model.
+    Get the fraction of tracked classes that have reached the coverage target across samplers.
+
+    Args:
+    - samplers (Iterable[CoverageSampler]): the coverage samplers, e.g. one per ontology version
+
+    Returns:
+    - float: the overall covered fraction
+    """
+    covered = total = 0
+    for sampler in samplers:
+        for tag_progress in sampler.progress().values():
+            covered += tag_progress["covered"]
+            total += tag_progress["total"]
+    return covered / total if total > 0 else 0.0
+
+
+def serialize_sample(
+    sample: str | dict | AnnotatedSample, fields: Optional[dict] = None
+) -> str:
+    """
+    Serialize a generated sample as a JSON line, with extra fields such as its ontology version.
+
+    Args:
+    - sample (str | dict | AnnotatedSample): the sample, as text, a dict, or a compact sample
+    - fields (dict): extra fields to add to the sample
+
+    Returns:
+    - str: the JSON line
+    """
+    if not fields:
+        if isinstance(sample, AnnotatedSample):
+            return sample.to_json() + "\n"
+        return json.dumps(sample) + "\n"
+
+    if isinstance(sample, str):
+        record = {"text": sample}
+    elif isinstance(sample, AnnotatedSample):
+        record = sample.to_dict()
+    else:
+        record = dict(sample)
+    record.update(fields)
+    return json.dumps(record) + "\n"
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser for LLM generation.
+
+    Returns:
+    - argparse.ArgumentParser: the parser
     """
-    # parse arguments
     parser = argparse.ArgumentParser(description="Generate text from an AI model.")
     parser.add_argument(
         "--model",
         type=str,
         default="vllm",
-        help="the AI model to use for text generation (vllm:name, openai:name, or anthropic:name)",
+        help="the AI model to use for text generation (vllm:name, openai:name, anthropic:name, or fake for canned responses)",
+    )
+    parser.add_argument(
+        "--endpoint",
+        type=str,
+        action="append",
+        default=None,
+        help="a model endpoint URL; repeat or comma-separate to balance requests across replicas",
     )
     parser.add_argument(
         "--type",
@@ -45,55 +165,795 @@ def main():
         default=10,
         help="the number of samples to generate",
     )
-    args = parser.parse_args()
-
-    # create the model
-    if args.model.startswith("vllm"):
-        if ":" in args.model:
-            _, model_name = args.model.split(":")
-            model = VLLMModel(model=model_name)
-        else:
-            model = VLLMModel()
-    elif args.model == "openai":
-        if ":" in args.model:
-            _, model_name = args.model.split(":")
-            model = OpenAIModel(model=model_name)
-        else:
-            model = OpenAIModel()
-    elif args.model == "anthropic":
-        if ":" in args.model:
-            _, model_name = args.model.split(":")
-            model = AnthropicModel(model=model_name)
-        else:
-            model = AnthropicModel()
-    else:
-        raise ValueError(f"Invalid model: {args.model}")
+    parser.add_argument(
+        "--coverage-target",
+        type=int,
+        default=None,
+        help="draw under-represented SOLI classes first and stop once every class has been drawn this many times",
+    )
+    parser.add_argument(
+        "--sampling-policies",
+        type=str,
+        default=None,
+        help="a JSON file of per-tag weighted sampling policies",
+    )
+    parser.add_argument(
+        "--correlated",
+        action="store_true",
+        help="jointly draw related SOLI classes for co-occurring tags",
+    )
+    parser.add_argument(
+        "--soli-version",
+        type=str,
+        action="append",
+        default=None,
+        help="a SOLI ontology version (GitHub branch or tag) to draw from; repeat to alternate samples across versions",
+    )
+    parser.add_argument(
+        "--graph-memory-mb",
+        type=float,
+        default=None,
+        help="the estimated memory ceiling for SOLI graphs held across versions; least recently used versions are evicted above it",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="record per-stage timings and throughput and print a summary at the end",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="periodically export metrics to this JSON or Prometheus (.prom) textfile; implies --metrics",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        type=str,
+        default=None,
+        choices=EXPORT_FORMATS,
+        help="the metrics file format; defaults to prometheus for .prom files and json otherwise",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="the minimum number of seconds between metrics file exports",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        choices=PROFILE_MODES,
+        help="profile sample generation and write reports next to the output file",
+    )
+    parser.add_argument(
+        "--profile-every",
+        type=int,
+        default=1,
+        help="profile only one sample out of every this many",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        help="the number of entries in the top-N profile reports",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="the maximum number of in-flight model requests; above 1, the in-flight limit adapts to latency and errors",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="build up to this many prompts ahead of the model calls on a producer thread; 0 builds each prompt before its call",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=None,
+        help="limit model requests per minute",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=float,
+        default=None,
+        help="limit model tokens per minute, estimated before each request and corrected from reported usage",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="the number of retries with jittered backoff for rate limits, server errors, and timeouts",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=None,
+        help="send a second request when the first takes longer than this many seconds",
+    )
+    parser.add_argument(
+        "--dedup",
+        type=str,
+        default=None,
+        choices=["drop", "flag"],
+        help="detect exact and near-duplicate samples and drop them or mark them with a duplicate field",
+    )
+    parser.add_argument(
+        "--dedup-exact-only",
+        action="store_true",
+        help="only detect exact duplicates of the normalized text",
+    )
+    parser.add_argument(
+        "--dedup-capacity",
+        type=int,
+        default=DEFAULT_DEDUP_CAPACITY,
+        help="the number of samples the fixed-size dedup filters are sized for",
+    )
+    parser.add_argument(
+        "--stop-duplicate-rate",
+        type=float,
+        default=None,
+        help="stop once the duplicate rate over the last --dedup-window samples reaches this fraction; implies --dedup flag",
+    )
+    parser.add_argument(
+        "--dedup-window",
+        type=int,
+        default=1000,
+        help="the number of recent samples for the rolling duplicate rate",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="write a sidecar index of samples by class, ancestor class, and tag next to the output",
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="write a JSON report of tag, class, label variant, and length statistics to this file",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="stop starting new requests once prompt plus completion tokens would exceed this budget",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="stop starting new requests after this many seconds",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="generate only the samples the output's resume manifest records as remaining, instead of --samples more",
+    )
+    return parser
 
-    # create the generator
-    if args.type == "text":
-        generator = TextGenerator(model)
-    elif args.type == "annotated":
-        generator = AnnotatedTextGenerator(model)
-    else:
+
+def get_requested_samples(args: argparse.Namespace) -> Tuple[Optional[dict], int]:
+    """
+    Read the output's resume manifest and work out the run's sample target.
+
+    The output is appended to, so the manifest carries the totals of earlier runs;
+    resuming keeps their target instead of adding --samples to it, and sets --samples
+    to the samples that remain.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+
+    Returns:
+    - tuple: the manifest or None, and the number of samples requested across runs
+    """
+    manifest = read_manifest(args.output)
+    requested_samples = args.samples
+    if manifest is not None:
+        requested_samples += manifest["written_samples"]
+        if args.resume:
+            requested_samples = manifest["requested_samples"]
+            args.samples = manifest["remaining_samples"]
+            print(
+                f"Resuming: {manifest['written_samples']} of {requested_samples} samples "
+                f"written over {manifest['runs']} runs; {args.samples} remaining"
+            )
+    elif args.resume:
+        raise ValueError(
+            f"--resume requires a manifest from an earlier run of {args.output}"
+        )
+    return manifest, requested_samples
+
+
+def create_instrumentation(
+    args: argparse.Namespace,
+) -> Tuple[Metrics, Optional[SampleProfiler]]:
+    """
+    Create the metrics and sample profiler requested by the arguments.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+
+    Returns:
+    - tuple: the metrics, or NULL_METRICS when disabled, and the profiler or None
+    """
+    metrics = NULL_METRICS
+    if args.metrics or args.metrics_file is not None:
+        metrics = Metrics()
+
+    profiler = None
+    if args.profile is not None:
+        profiler = SampleProfiler(
+            args.profile,
+            Path(args.output).with_suffix(""),
+            every=args.profile_every,
+            top_n=args.profile_top,
+        )
+    return metrics, profiler
+
+
+def create_model(
+    args: argparse.Namespace, metrics: Metrics, budget: Budget
+) -> RateLimitedModel:
+    """
+    Create the model, balanced across endpoints if more than one is given, and wrap it with
+    rate limits, an adaptive in-flight limit, retries, hedging, and the budget.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - metrics (Metrics): the metrics to record to
+    - budget (Budget): the token and time budget to reserve requests against
+
+    Returns:
+    - RateLimitedModel: the wrapped model
+    """
+    if args.concurrency < 1:
+        raise ValueError("--concurrency must be at least 1")
+    if args.prefetch < 0:
+        raise ValueError("--prefetch must be at least 0")
+    if args.profile is not None and (args.concurrency > 1 or args.prefetch > 0):
+        raise ValueError(
+            "--profile cannot be combined with --concurrency or --prefetch"
+        )
+
+    return RateLimitedModel(
+        get_balanced_model(args.model, parse_endpoints(args.endpoint)),
+        limiter=AdaptiveLimiter(
+            initial_limit=min(4, args.concurrency), max_limit=args.concurrency
+        ),
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        max_retries=args.max_retries,
+        hedge_after=args.hedge_after,
+        metrics=metrics,
+        budget=budget,
+    )
+
+
+def create_sampler(args: argparse.Namespace) -> Optional[ClassSampler]:
+    """
+    Create the coverage or weighted sampler requested by the arguments.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+
+    Returns:
+    - ClassSampler | None: the sampler, or None for uniform sampling
+    """
+    # text backgrounds only draw from the procedural types
+    if args.coverage_target is not None:
+        if args.sampling_policies is not None:
+            raise ValueError(
+                "--sampling-policies cannot be combined with --coverage-target"
+            )
+        coverage_tags = None
+        if args.type == "text":
+            coverage_tags = [tag for tag in PROCEDURAL_TYPES if tag in SOLI_TAG_GETTERS]
+        return CoverageSampler(target=args.coverage_target, tags=coverage_tags)
+
+    if args.sampling_policies is not None:
+        return WeightedSampler(load_sampling_policies(args.sampling_policies))
+    return None
+
+
+def create_generator(
+    args: argparse.Namespace, model: RateLimitedModel, metrics: Metrics
+) -> Tuple[
+    TextGenerator | AnnotatedTextGenerator,
+    Optional[GraphRegistry],
+    Dict[str, CoverageSampler],
+]:
+    """
+    Create the generator and its sampler, holding the graphs of every requested ontology version in one registry.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - model (RateLimitedModel): the model
+    - metrics (Metrics): the metrics to record to
+
+    Returns:
+    - tuple: the generator, the registry or None without --soli-version, and the coverage samplers to track
+    """
+    if args.type not in ("text", "annotated"):
         raise ValueError(
             f"Invalid generation type: {args.type}; must be 'text' or 'annotated'"
         )
 
-    # generate samples
-    with open(args.output, "at+", encoding="utf-8") as output_file:
-        for _ in tqdm.tqdm(range(args.samples)):
-            try:
-                sample = generator()
-                if args.type == "annotated":
-                    for span in sample["spans"]:
-                        if isinstance(span["owl_class"], OWLClass):
-                            span["owl_class"] = span["owl_class"].iri
-            except Exception as e:
-                print(f"Error generating sample: {str(e)}")
-                continue
-
-            output_file.write(json.dumps(sample) + "\n")
-            output_file.flush()
+    sampler = create_sampler(args)
+    registry = None
+    version_kwargs = {}
+    if args.soli_version:
+        if args.prefetch > 0:
+            raise ValueError("--soli-version cannot be combined with --prefetch")
+        registry = GraphRegistry(
+            max_bytes=(
+                int(args.graph_memory_mb * (1 << 20))
+                if args.graph_memory_mb is not None
+                else None
+            ),
+            sampler=sampler,
+            correlated=args.correlated,
+            compact_spans=args.type == "annotated",
+        )
+        version_kwargs["registry"] = registry
+        version_kwargs["github_repo_branch"] = args.soli_version[0]
+
+    if args.type == "text":
+        generator = TextGenerator(
+            model,
+            sampler=sampler,
+            correlated=args.correlated,
+            metrics=metrics,
+            **version_kwargs,
+        )
+    else:
+        generator = AnnotatedTextGenerator(
+            model,
+            sampler=sampler,
+            correlated=args.correlated,
+            metrics=metrics,
+            compact_spans=True,
+            **version_kwargs,
+        )
+    return generator, registry, get_coverage_samplers(args, sampler, registry)
+
+
+def get_coverage_samplers(
+    args: argparse.Namespace,
+    sampler: Optional[ClassSampler],
+    registry: Optional[GraphRegistry],
+) -> Dict[str, CoverageSampler]:
+    """
+    Get the coverage samplers to track, one per ontology version with a registry.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - sampler (ClassSampler): the sampler, or None for uniform sampling
+    - registry (GraphRegistry): the registry, or None without --soli-version
+
+    Returns:
+    - dict: the coverage sampler of each version, keyed by "" without a registry; empty without coverage sampling
+    """
+    if not isinstance(sampler, CoverageSampler):
+        return {}
+    if registry is None:
+        return {"": sampler}
+
+    # each version draws from its own copy of the sampler
+    return {version: registry.get_sampler(version) for version in args.soli_version}
+
+
+def iter_results(
+    args: argparse.Namespace,
+    generator: TextGenerator | AnnotatedTextGenerator,
+    profiler: Optional[SampleProfiler],
+    should_stop: Callable[[], bool],
+) -> Iterator[Tuple[Any, Optional[BaseException]]]:
+    """
+    Generate samples through the prefetch pipeline, concurrently, or one at a time.
+
+    With several ontology versions, samples alternate across them and each result is a
+    (sample, version) pair.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator
+    - profiler (SampleProfiler): the sample profiler, or None
+    - should_stop (Callable): returns True once no new requests should start
+
+    Returns:
+    - Iterator: the results and errors
+    """
+    versions = args.soli_version
+    sample_indices = itertools.count()
+
+    def generate_versioned_sample():
+        version = versions[next(sample_indices) % len(versions)]
+        return generator.generate(version=version), version
+
+    generate_one = generate_versioned_sample if versions else generator
+
+    def generate_sample():
+        if profiler is not None:
+            with profiler.sample():
+                return generate_one()
+        return generate_one()
+
+    if args.prefetch > 0:
+        return iter_pipeline(
+            generator,
+            args.samples,
+            args.concurrency,
+            prefetch=args.prefetch,
+            should_stop=should_stop,
+        )
+    if args.concurrency > 1:
+        return iter_concurrent(
+            generate_one, args.samples, args.concurrency, should_stop=should_stop
+        )
+    return iter_sequential(generate_sample, args.samples, should_stop=should_stop)
+
+
+class SampleSinks:
+    """
+    The duplicate detector, sidecar index, dataset statistics, and metrics exporter that written samples pass through.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        generator: TextGenerator | AnnotatedTextGenerator,
+        metrics: Metrics,
+    ):
+        """
+        Create the sinks requested by the arguments.
+
+        Args:
+        - args (argparse.Namespace): the parsed arguments; --stop-duplicate-rate sets --dedup to flag
+        - generator (TextGenerator | AnnotatedTextGenerator): the generator, whose graph resolves annotated classes
+        - metrics (Metrics): the metrics to record to
+        """
+        self.args = args
+        self.metrics = metrics
+        self.exporter = None
+        if args.metrics_file is not None:
+            self.exporter = PeriodicExporter(
+                metrics,
+                args.metrics_file,
+                export_format=args.metrics_format,
+                interval=args.metrics_interval,
+            )
+        graph = generator.graph if args.type == "annotated" else None
+
+        # set up duplicate detection
+        self.deduplicator = None
+        if args.stop_duplicate_rate is not None and args.dedup is None:
+            args.dedup = "flag"
+        if args.dedup is not None:
+            self.deduplicator = Deduplicator(
+                capacity=args.dedup_capacity,
+                near=not args.dedup_exact_only,
+                window=args.dedup_window,
+                metrics=metrics,
+            )
+
+        # index the samples already in the output file before appending
+        self.indexer = None
+        if args.index:
+            self.indexer = DatasetIndexer(graph)
+            if Path(args.output).exists():
+                with open(args.output, "rb") as existing_file:
+                    self.indexer.scan(existing_file)
+
+        # accumulate dataset statistics over the samples written in this run
+        self.dataset_stats = DatasetStats(graph) if args.stats is not None else None
+
+    def check_duplicate(
+        self, sample: str | dict | AnnotatedSample, fields: dict
+    ) -> bool:
+        """
+        Check a sample against the samples seen so far, flagging it in its extra fields if requested.
+
+        Args:
+        - sample (str | dict | AnnotatedSample): the sample
+        - fields (dict): the sample's extra fields, updated in place
+
+        Returns:
+        - bool: whether the sample should be dropped
+        """
+        if self.deduplicator is None:
+            return False
+        duplicate = self.deduplicator.check(
+            sample if isinstance(sample, str) else sample["text"]
+        )
+        if self.args.dedup == "flag":
+            fields["duplicate"] = duplicate
+        return duplicate is not None and self.args.dedup == "drop"
+
+    def add(self, sample: str | dict | AnnotatedSample, line: str) -> None:
+        """
+        Add a written sample to the index, statistics, and metrics.
+
+        Args:
+        - sample (str | dict | AnnotatedSample): the sample
+        - line (str): the JSON line written for it
+        """
+        if self.indexer is not None:
+            self.indexer.add(sample, len(line.encode("utf-8")))
+        if self.dataset_stats is not None:
+            self.dataset_stats.add(sample)
+        self.metrics.count("samples")
+        self.metrics.count(
+            "chars", len(sample if isinstance(sample, str) else sample["text"])
+        )
+        if self.exporter is not None:
+            self.exporter.maybe_export()
+
+    def is_duplicate_rate_reached(self) -> bool:
+        """
+        Check whether the rolling duplicate rate has reached --stop-duplicate-rate.
+
+        Returns:
+        - bool: whether generation should stop because diversity collapsed
+        """
+        return (
+            self.deduplicator is not None
+            and self.args.stop_duplicate_rate is not None
+            and self.deduplicator.is_window_full()
+            and self.deduplicator.recent_duplicate_rate()
+            >= self.args.stop_duplicate_rate
+        )
+
+    def write_reports(self) -> None:
+        """
+        Write the sidecar index and dataset statistics and print the duplicate summary.
+        """
+        if self.indexer is not None:
+            index_path = get_index_path(self.args.output)
+            self.indexer.write(index_path)
+            print(f"Indexed {len(self.indexer)} samples in {index_path}")
+
+        if self.dataset_stats is not None:
+            self.dataset_stats.write(self.args.stats)
+            print(
+                f"Wrote statistics for {self.dataset_stats.samples} samples to {self.args.stats}"
+            )
+
+        if self.deduplicator is not None:
+            dedup_stats = self.deduplicator.stats()
+            print(
+                f"Duplicates: {dedup_stats['duplicates']['exact']} exact, "
+                f"{dedup_stats['duplicates']['near']} near out of {dedup_stats['checked']} samples "
+                f"({dedup_stats['duplicate_rate']:.1%})"
+            )
+
+
+def write_samples(
+    args: argparse.Namespace,
+    results: Iterable[Tuple[Any, Optional[BaseException]]],
+    sinks: SampleSinks,
+    usage: UsageTracker,
+    coverage_samplers: Dict[str, CoverageSampler],
+) -> Tuple[int, Optional[str]]:
+    """
+    Write generated samples to the output as they arrive, until the results run out or a stop condition is met.
+
+    Samples are flushed as they are written, so an interrupted run loses none.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - results (Iterable[tuple]): the results and errors, with versions when --soli-version is given
+    - sinks (SampleSinks): the sinks written samples pass through
+    - usage (UsageTracker): the token usage, for the progress bar
+    - coverage_samplers (dict): the coverage samplers to stop on, by version
+
+    Returns:
+    - tuple: the number of samples written, and the stop reason or None if the results ran out
+    """
+    metrics = sinks.metrics
+    written_samples = 0
+    stop_reason = None
+    with open(args.output, "at+", encoding="utf-8", newline="\n") as output_file:
+        progress = tqdm.tqdm(results, total=args.samples)
+        try:
+            for sample, error in progress:
+                # calls queued before the budget ran out are refused, not failed
+                if isinstance(error, BudgetExhausted):
+                    stop_reason = error.reason
+                    continue
+                if error is not None:
+                    print(f"Error generating sample: {str(error)}")
+                    metrics.count("errors")
+                    continue
+
+                fields = {}
+                if args.soli_version:
+                    sample, fields["soli_version"] = sample
+
+                # drop or flag duplicates before they are written
+                if sinks.check_duplicate(sample, fields):
+                    continue
+
+                with metrics.timer("write"):
+                    line = serialize_sample(sample, fields)
+                    output_file.write(line)
+                    output_file.flush()
+                written_samples += 1
+                sinks.add(sample, line)
+                postfix = {"tokens": f"{usage.tokens_per_second():.0f}/s"}
+
+                # stop once diversity collapses
+                if sinks.is_duplicate_rate_reached():
+                    print(
+                        f"Duplicate rate over the last {args.dedup_window} samples reached "
+                        f"{sinks.deduplicator.recent_duplicate_rate():.1%}; stopping."
+                    )
+                    return written_samples, "duplicate_rate"
+
+                # report coverage and stop once the target is met in every version
+                if coverage_samplers:
+                    postfix["coverage"] = (
+                        f"{get_coverage(coverage_samplers.values()):.1%}"
+                    )
+                    if all(
+                        version_sampler.is_complete()
+                        for version_sampler in coverage_samplers.values()
+                    ):
+                        print(
+                            f"Coverage target of {args.coverage_target} reached for all drawn SOLI classes."
+                        )
+                        return written_samples, "coverage"
+                progress.set_postfix(postfix)
+        except KeyboardInterrupt:
+            print("Interrupted; stopping.")
+            return written_samples, "interrupted"
+    return written_samples, stop_reason
+
+
+# pylint: disable=too-many-arguments
+def record_run(
+    args: argparse.Namespace,
+    manifest: Optional[dict],
+    requested_samples: int,
+    written_samples: int,
+    usage: UsageTracker,
+    stop_reason: str,
+) -> None:
+    """
+    Print the token usage and record what this run wrote and spent so the next run can resume.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - manifest (dict): the manifest of earlier runs, or None
+    - requested_samples (int): the number of samples requested across runs
+    - written_samples (int): the number of samples this run wrote
+    - usage (UsageTracker): the token usage of this run
+    - stop_reason (str): why the run stopped
+    """
+    print(usage.format_summary())
+    if stop_reason in ("token_budget", "time_budget"):
+        print(f"Stopped after {written_samples} samples: {stop_reason} spent.")
+    manifest_path = write_manifest(
+        args.output,
+        update_manifest(
+            manifest,
+            args.output,
+            requested_samples,
+            written_samples,
+            usage,
+            stop_reason,
+        ),
+    )
+    print(f"Wrote resume manifest to {manifest_path}")
+
+
+def report_run(
+    args: argparse.Namespace,
+    model: RateLimitedModel,
+    registry: Optional[GraphRegistry],
+    profiler: Optional[SampleProfiler],
+    sinks: SampleSinks,
+) -> None:
+    """
+    Write the sink reports and print the registry, endpoint, profiling, and metrics summaries.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    - model (RateLimitedModel): the model
+    - registry (GraphRegistry): the registry, or None without --soli-version
+    - profiler (SampleProfiler): the sample profiler, or None
+    - sinks (SampleSinks): the sinks the samples were written through
+    """
+    sinks.write_reports()
+
+    # print the graphs held across ontology versions
+    if registry is not None:
+        registry_stats = registry.stats()
+        print(
+            f"SOLI versions: {', '.join(registry_stats['versions'])} held in "
+            f"{registry_stats['bytes'] / (1 << 20):.1f} MB; "
+            f"{registry_stats['loads']} loads, {registry_stats['evictions']} evictions"
+        )
+
+    # print the per-endpoint stats
+    if isinstance(model.model, LoadBalancedModel):
+        print(model.model.format_stats())
+
+    # write the profiling reports
+    if profiler is not None:
+        for report_name, report_path in profiler.write().items():
+            print(f"Wrote {args.profile} profile {report_name} to {report_path}")
+
+    # print and export the final metrics
+    if sinks.metrics.enabled:
+        print(sinks.metrics.format_summary())
+    if sinks.exporter is not None:
+        sinks.exporter.export()
+
+
+def print_coverage(coverage_samplers: Dict[str, CoverageSampler]) -> None:
+    """
+    Print the per-tag coverage summary, per version when there are several.
+
+    Args:
+    - coverage_samplers (dict): the coverage samplers by version
+    """
+    for version, version_sampler in coverage_samplers.items():
+        prefix = f"{version} " if version else ""
+        for tag, tag_progress in sorted(version_sampler.progress().items()):
+            print(
+                f"{prefix}{tag}: {tag_progress['covered']}/{tag_progress['total']} classes covered "
+                f"({tag_progress['fraction']:.1%})"
+            )
+
+
+def main():
+    """
+    pipx-runnable main function for generating text from an AI model.
+    """
+    # dispatch subcommands; plain flags run LLM generation
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
+    args = get_parser().parse_args()
+    manifest, requested_samples = get_requested_samples(args)
+    metrics, profiler = create_instrumentation(args)
+
+    # track token usage against the budgets
+    budget = Budget(
+        UsageTracker(), token_budget=args.token_budget, time_budget=args.time_budget
+    )
+    stop_reason = "completed"
+
+    def should_stop() -> bool:
+        nonlocal stop_reason
+        reason = budget.exhausted()
+        if reason is not None:
+            stop_reason = reason
+        return reason is not None
+
+    model = create_model(args, metrics, budget)
+    generator, registry, coverage_samplers = create_generator(args, model, metrics)
+    sinks = SampleSinks(args, generator, metrics)
+
+    written_samples, loop_reason = write_samples(
+        args,
+        iter_results(args, generator, profiler, should_stop),
+        sinks,
+        budget.usage,
+        coverage_samplers,
+    )
+    if loop_reason is not None:
+        stop_reason = loop_reason
+
+    record_run(
+        args, manifest, requested_samples, written_samples, budget.usage, stop_reason
+    )
+    report_run(args, model, registry, profiler, sinks)
+    print_coverage(coverage_samplers)
 
 
 if __name__ == "__main__":
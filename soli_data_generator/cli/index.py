@@ -0,0 +1,171 @@
+"""
+Index CLI script to build and query sidecar indexes over generated datasets.
+"""
+
+# imports
+import argparse
+import sys
+from typing import List, Optional, Sequence
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.index import DatasetIndex, index_dataset
+
+
+def resolve_classes(values: Sequence[str]) -> List[str]:
+    """
+    Resolve class arguments to IRIs, looking up anything that is not an IRI by label.
+
+    Args:
+    - values (Sequence[str]): the class IRIs or labels
+
+    Returns:
+    - list: the class IRIs
+    """
+    iris = [value for value in values if value.startswith("http")]
+    labels = [value for value in values if not value.startswith("http")]
+    if labels:
+        soli_graph = SOLI()
+        for label in labels:
+            matches = soli_graph.get_by_label(label)
+            if not matches:
+                raise ValueError(f"No SOLI class with label: {label}")
+            iris.extend(owl_class.iri for owl_class in matches)
+    return iris
+
+
+def build(args: argparse.Namespace) -> None:
+    """
+    Build the sidecar index of an existing dataset.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    num_samples = index_dataset(
+        args.dataset,
+        args.index,
+        soli_graph=None if args.no_ancestors else SOLI(),
+    )
+    print(f"Indexed {num_samples} samples from {args.dataset}")
+
+
+def query(args: argparse.Namespace) -> None:
+    """
+    Print the samples with every requested class and tag.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    classes = resolve_classes(args.owl_class or [])
+    with DatasetIndex(args.dataset, args.index) as index:
+        sample_ids = index.find(classes, args.tag or [], descendants=not args.exact)
+        if args.count:
+            print(len(sample_ids))
+            return
+        if args.limit is not None:
+            sample_ids = sample_ids[: args.limit]
+        for sample_id in sample_ids:
+            sys.stdout.write(index.get_line(sample_id).decode("utf-8").rstrip() + "\n")
+
+
+def info(args: argparse.Namespace) -> None:
+    """
+    Print the number of samples and keys in an index.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    with DatasetIndex(args.dataset, args.index) as index:
+        print(f"{len(index)} samples")
+        print(f"{index.num_keys} keys")
+        print(f"ancestors: {'yes' if index.has_ancestors else 'no'}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Build or query a dataset index.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator index",
+        description="Build and query sidecar indexes of samples by OWL class and tag.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # build
+    build_parser = subparsers.add_parser(
+        "build", help="index an existing JSONL dataset"
+    )
+    build_parser.add_argument("dataset", type=str, help="the JSONL dataset")
+    build_parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="the index file; defaults to the dataset path plus .sidx",
+    )
+    build_parser.add_argument(
+        "--no-ancestors",
+        action="store_true",
+        help="skip posting ancestor classes, so queries only match exact classes",
+    )
+    build_parser.set_defaults(function=build)
+
+    # query
+    query_parser = subparsers.add_parser(
+        "query", help="print the samples with every given class and tag"
+    )
+    query_parser.add_argument("dataset", type=str, help="the JSONL dataset")
+    query_parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="the index file; defaults to the dataset path plus .sidx",
+    )
+    query_parser.add_argument(
+        "--class",
+        dest="owl_class",
+        type=str,
+        action="append",
+        help="a required class IRI or label, matching its subclasses too; repeat for several",
+    )
+    query_parser.add_argument(
+        "--tag",
+        type=str,
+        action="append",
+        help="a required span tag; repeat for several",
+    )
+    query_parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="match only the given classes, not their subclasses",
+    )
+    query_parser.add_argument(
+        "--count",
+        action="store_true",
+        help="print the number of matching samples instead of the samples",
+    )
+    query_parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="the maximum number of samples to print",
+    )
+    query_parser.set_defaults(function=query)
+
+    # info
+    info_parser = subparsers.add_parser("info", help="print index statistics")
+    info_parser.add_argument("dataset", type=str, help="the JSONL dataset")
+    info_parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="the index file; defaults to the dataset path plus .sidx",
+    )
+    info_parser.set_defaults(function=info)
+
+    args = parser.parse_args(argv)
+    args.function(args)
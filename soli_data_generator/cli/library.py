@@ -0,0 +1,129 @@
+"""
+Library CLI script to build and query pre-parsed template libraries.
+"""
+
+# imports
+import argparse
+import sys
+from typing import Optional, Sequence
+
+# project
+from soli_data_generator.procedural.library import TemplateLibrary, build_library
+from soli_data_generator.procedural.stream import read_templates
+
+
+def build(args: argparse.Namespace) -> None:
+    """
+    Build a library file from a text or JSONL template file.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    input_format = args.input_format
+    if input_format == "auto":
+        input_format = "jsonl" if args.input.endswith(".jsonl") else "text"
+
+    input_file = (
+        sys.stdin if args.input == "-" else open(args.input, "rt", encoding="utf-8")
+    )
+    try:
+        num_templates = build_library(
+            read_templates(input_file, input_format, args.field), args.output
+        )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+    print(f"Wrote {num_templates} distinct templates to {args.output}")
+
+
+def find(args: argparse.Namespace) -> None:
+    """
+    Print the templates that use every requested tag.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    with TemplateLibrary(args.library) as library:
+        for template_id in library.find_by_tags(args.tag or []):
+            print(library.get_template(template_id))
+
+
+def info(args: argparse.Namespace) -> None:
+    """
+    Print the number of templates and the number using each tag.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    with TemplateLibrary(args.library) as library:
+        print(f"{len(library)} templates")
+        for tag in library.tags:
+            count = len(library.get_posting(tag))
+            if count:
+                print(f"{tag}: {count}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Build or query a template library.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator library",
+        description="Build and query pre-parsed, memory-mapped template libraries.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # build
+    build_parser = subparsers.add_parser(
+        "build", help="parse and deduplicate templates into a library file"
+    )
+    build_parser.add_argument(
+        "--input",
+        type=str,
+        default="-",
+        help="the template file, or - for stdin",
+    )
+    build_parser.add_argument(
+        "--input-format",
+        type=str,
+        default="auto",
+        choices=["auto", "text", "jsonl"],
+        help="one template per line (text) or JSON strings/objects (jsonl); auto uses jsonl for .jsonl files",
+    )
+    build_parser.add_argument(
+        "--field",
+        type=str,
+        default="template",
+        help="the template field of JSONL objects",
+    )
+    build_parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="the library file to write",
+    )
+    build_parser.set_defaults(function=build)
+
+    # find
+    find_parser = subparsers.add_parser(
+        "find", help="print the templates that use every given tag"
+    )
+    find_parser.add_argument("library", type=str, help="the library file")
+    find_parser.add_argument(
+        "--tag",
+        type=str,
+        action="append",
+        help="a required tag; repeat for several",
+    )
+    find_parser.set_defaults(function=find)
+
+    # info
+    info_parser = subparsers.add_parser("info", help="print library statistics")
+    info_parser.add_argument("library", type=str, help="the library file")
+    info_parser.set_defaults(function=info)
+
+    args = parser.parse_args(argv)
+    args.function(args)
@@ -0,0 +1,177 @@
+"""
+Load test CLI script to benchmark generation against fake LLM backends.
+"""
+
+# imports
+import argparse
+from typing import Optional, Sequence
+
+# project
+from soli_data_generator.llm.fake import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    FakeBackend,
+    create_fake_server,
+    get_fake_responses,
+)
+from soli_data_generator.loadtest import (
+    format_load_test,
+    run_load_test,
+    write_load_test,
+)
+
+
+def get_backend(args: argparse.Namespace) -> FakeBackend:
+    """
+    Create the fake backend from the parsed arguments.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+
+    Returns:
+    - FakeBackend: the backend
+    """
+    return FakeBackend(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        responses=get_fake_responses(args.responses),
+        seed=args.seed,
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Run a load test and print the report.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    reports = run_load_test(
+        targets=[target.strip() for target in args.target.split(",")],
+        concurrency_levels=[int(level) for level in args.concurrency.split(",")],
+        num_samples=args.samples,
+        backend=get_backend(args),
+        http=args.http,
+    )
+    print(format_load_test(reports))
+    if args.output is not None:
+        write_load_test(args.output, reports)
+        print(f"Wrote load test report to {args.output}")
+
+
+def serve(args: argparse.Namespace) -> None:
+    """
+    Serve the fake backend as an OpenAI-compatible endpoint until interrupted.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    server = create_fake_server(get_backend(args), host=args.host, port=args.port)
+    print(f"Serving fake completions on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Run a load test or serve a fake LLM endpoint.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator loadtest",
+        description="Load test generation against fake LLM backends.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # run
+    run_parser = subparsers.add_parser(
+        "run",
+        help="measure throughput, latency, and memory at several concurrency levels",
+    )
+    run_parser.add_argument(
+        "--target",
+        type=str,
+        default="text,annotated",
+        help="comma-separated targets: text, annotated, and cli",
+    )
+    run_parser.add_argument(
+        "--concurrency",
+        type=str,
+        default="1,4,16",
+        help="comma-separated concurrency levels",
+    )
+    run_parser.add_argument(
+        "--samples",
+        type=int,
+        default=200,
+        help="the number of samples per target and concurrency level",
+    )
+    run_parser.add_argument(
+        "--http",
+        action="store_true",
+        help="send in-process requests through the VLLM client to a local fake server",
+    )
+    run_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="write the level reports to this JSON file",
+    )
+    run_parser.set_defaults(function=run)
+
+    # serve
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve fake completions on an OpenAI-compatible endpoint"
+    )
+    serve_parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help="the host to bind",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="the port to bind",
+    )
+    serve_parser.set_defaults(function=serve)
+
+    for subparser in (run_parser, serve_parser):
+        subparser.add_argument(
+            "--latency",
+            type=str,
+            default="lognormal:0.05,0.5",
+            help="the request latency in seconds: a number, or uniform:low,high, normal:mean,stddev, lognormal:median,sigma, or exponential:mean",
+        )
+        subparser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="the fraction of requests that fail with 429 or 503",
+        )
+        subparser.add_argument(
+            "--responses",
+            type=str,
+            default=None,
+            help="a file of canned responses, one tagged template per line",
+        )
+        subparser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="the random seed for latencies, errors, and responses",
+        )
+
+    args = parser.parse_args(argv)
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Render CLI script to stream templates through the TemplateFormatter.
+"""
+
+# imports
+import argparse
+import sys
+from typing import Optional, Sequence
+
+# project
+from soli_data_generator.index import DatasetIndexer, get_index_path
+from soli_data_generator.procedural import TemplateFormatter, load_sampling_policies
+from soli_data_generator.procedural.library import LIBRARY_EXTENSION, TemplateLibrary
+from soli_data_generator.procedural.stream import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DEFAULT_UNIT_SIZE,
+    read_templates,
+    serialize_output,
+    stream_seeded,
+)
+from soli_data_generator.stats import DatasetStats
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Render templates from a file or stdin to JSONL.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator render",
+        description="Render SOLI/Faker templates from a file or stdin.",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        default="-",
+        help="the template file, or - for stdin",
+    )
+    parser.add_argument(
+        "--input-format",
+        type=str,
+        default="auto",
+        choices=["auto", "text", "jsonl", "library"],
+        help="one template per line (text), JSON strings/objects (jsonl), or a pre-parsed template library; auto uses the file extension",
+    )
+    parser.add_argument(
+        "--field",
+        type=str,
+        default="template",
+        help="the template field of JSONL objects",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="-",
+        help="the output JSONL file, or - for stdout",
+    )
+    parser.add_argument(
+        "--renders",
+        type=int,
+        default=1,
+        help="the number of outputs to render per template",
+    )
+    parser.add_argument(
+        "--no-spans",
+        action="store_true",
+        help="write only the rendered text without span annotations",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="the number of worker processes; 0 renders in the main process",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_STREAM_CHUNK_SIZE,
+        help="the number of templates sent to a worker at a time",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="render reproducibly, reseeding per unit of --unit-size templates; matches a distributed job with the same seed",
+    )
+    parser.add_argument(
+        "--unit-size",
+        type=int,
+        default=DEFAULT_UNIT_SIZE,
+        help="the number of templates per seeded unit",
+    )
+    parser.add_argument(
+        "--sampling-policies",
+        type=str,
+        default=None,
+        help="a JSON file of per-tag weighted sampling policies",
+    )
+    parser.add_argument(
+        "--correlated",
+        action="store_true",
+        help="jointly draw related SOLI classes for co-occurring tags",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="write a sidecar index of samples by class, ancestor class, and tag next to the output",
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="write a JSON report of tag, class, label variant, and length statistics to this file",
+    )
+    args = parser.parse_args(argv)
+
+    # resolve the input format
+    input_format = args.input_format
+    if input_format == "auto":
+        if args.input.endswith(LIBRARY_EXTENSION):
+            input_format = "library"
+        elif args.input.endswith(".jsonl"):
+            input_format = "jsonl"
+        else:
+            input_format = "text"
+
+    if args.seed is not None and args.workers > 0:
+        raise ValueError(
+            "--seed renders in the main process; it cannot be combined with --workers"
+        )
+    if args.index and args.output == "-":
+        raise ValueError("--index requires an --output file")
+
+    # create the formatter
+    policies = None
+    if args.sampling_policies is not None:
+        policies = load_sampling_policies(args.sampling_policies)
+    formatter = TemplateFormatter(
+        policies=policies, correlated=args.correlated, compact_spans=True
+    )
+
+    # library templates are already parsed, so they skip the tag pattern scan
+    library = None
+    input_file = None
+    if input_format == "library":
+        library = TemplateLibrary(args.input)
+        templates = library.iter_compiled()
+    else:
+        input_file = (
+            sys.stdin if args.input == "-" else open(args.input, "rt", encoding="utf-8")
+        )
+        templates = read_templates(input_file, input_format, args.field)
+    output_file = (
+        sys.stdout
+        if args.output == "-"
+        else open(args.output, "wt", encoding="utf-8", newline="\n")
+    )
+    indexer = DatasetIndexer(formatter.graph) if args.index else None
+    stats = DatasetStats(formatter.graph) if args.stats is not None else None
+    try:
+        if args.seed is not None:
+            outputs = stream_seeded(
+                formatter,
+                templates,
+                args.seed,
+                renders_per_template=args.renders,
+                spans=not args.no_spans,
+                unit_size=args.unit_size,
+            )
+        else:
+            outputs = formatter.stream(
+                templates,
+                renders_per_template=args.renders,
+                spans=not args.no_spans,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+            )
+        for output in outputs:
+            line = serialize_output(output) + "\n"
+            output_file.write(line)
+            if indexer is not None:
+                indexer.add(output, len(line.encode("utf-8")))
+            if stats is not None:
+                stats.add(output)
+        if indexer is not None:
+            indexer.write(get_index_path(args.output))
+        if stats is not None:
+            stats.write(args.stats)
+    finally:
+        if library is not None:
+            library.close()
+        if input_file is not None and input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
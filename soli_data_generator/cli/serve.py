@@ -0,0 +1,117 @@
+"""
+Serve CLI script to run the local render server.
+"""
+
+# imports
+import argparse
+import functools
+from typing import Optional, Sequence
+
+# project
+from soli_data_generator.procedural import TemplateFormatter, load_sampling_policies
+from soli_data_generator.procedural.registry import load_graph
+from soli_data_generator.server import (
+    DEFAULT_HOST,
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MAX_WAIT,
+    DEFAULT_PORT,
+    close_server,
+    create_server,
+)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Run the render server until interrupted.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator serve",
+        description="Serve SOLI/Faker template rendering over local HTTP.",
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help="the host to bind",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="the port to bind",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="a Unix socket path to bind instead of a TCP port",
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=DEFAULT_MAX_BATCH_SIZE,
+        help="the maximum number of outputs rendered per batch",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=DEFAULT_MAX_WAIT * 1000,
+        help="the milliseconds to wait for more requests to coalesce into a batch",
+    )
+    parser.add_argument(
+        "--sampling-policies",
+        type=str,
+        default=None,
+        help="a JSON file of per-tag weighted sampling policies",
+    )
+    parser.add_argument(
+        "--correlated",
+        action="store_true",
+        help="jointly draw related SOLI classes for co-occurring tags",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=None,
+        help="the seconds between reloading the ontology from upstream and refreshing the changed class pools; POST /refresh refreshes on request",
+    )
+    args = parser.parse_args(argv)
+
+    # load the graph once from the local cache
+    policies = None
+    if args.sampling_policies is not None:
+        policies = load_sampling_policies(args.sampling_policies)
+    formatter = TemplateFormatter(
+        policies=policies, correlated=args.correlated, compact_spans=True
+    )
+
+    server = create_server(
+        formatter,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        reloader=functools.partial(
+            load_graph, formatter.graph.github_repo_branch, use_cache=False
+        ),
+        refresh_interval=args.refresh_interval,
+    )
+    if args.socket is not None:
+        print(f"Serving on unix:{args.socket}")
+    else:
+        print(f"Serving on http://{args.host}:{server.server_address[1]}/")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_server(server)
+
+
+if __name__ == "__main__":
+    main()
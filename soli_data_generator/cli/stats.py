@@ -0,0 +1,97 @@
+"""
+Stats CLI script to report on existing datasets and merge per-run statistics.
+"""
+
+# imports
+import argparse
+import json
+from typing import Optional, Sequence
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.stats import DatasetStats
+
+
+def build(args: argparse.Namespace) -> None:
+    """
+    Accumulate the statistics of existing JSONL datasets.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    stats = DatasetStats(None if args.no_graph else SOLI())
+    for path in args.dataset:
+        with open(path, "rt", encoding="utf-8") as input_file:
+            stats.update(json.loads(line) for line in input_file if line.strip())
+    stats.write(args.output, top=args.top)
+    print(f"Wrote statistics for {stats.samples} samples to {args.output}")
+
+
+def merge(args: argparse.Namespace) -> None:
+    """
+    Merge statistics files from several runs, workers, or shards.
+
+    Args:
+    - args (argparse.Namespace): the parsed arguments
+    """
+    stats = DatasetStats(None if args.no_graph else SOLI())
+    for path in args.stats:
+        stats.merge(DatasetStats.read(path))
+    stats.write(args.output, top=args.top)
+    print(f"Merged statistics for {stats.samples} samples into {args.output}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Build or merge dataset statistics.
+
+    Args:
+    - argv (Sequence[str]): the command line arguments; defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog="soli-data-generator stats",
+        description="Report tag, class, label variant, and length statistics of datasets.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # build
+    build_parser = subparsers.add_parser(
+        "build", help="accumulate the statistics of JSONL datasets"
+    )
+    build_parser.add_argument(
+        "dataset", type=str, nargs="+", help="the JSONL dataset files"
+    )
+    build_parser.set_defaults(function=build)
+
+    # merge
+    merge_parser = subparsers.add_parser(
+        "merge", help="merge statistics files written by --stats"
+    )
+    merge_parser.add_argument(
+        "stats", type=str, nargs="+", help="the statistics files to merge"
+    )
+    merge_parser.set_defaults(function=merge)
+
+    for subparser in (build_parser, merge_parser):
+        subparser.add_argument(
+            "--output",
+            type=str,
+            required=True,
+            help="the JSON report file",
+        )
+        subparser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="the number of most frequent classes to list per tag",
+        )
+        subparser.add_argument(
+            "--no-graph",
+            action="store_true",
+            help="skip loading the SOLI graph, omitting label variants and class coverage",
+        )
+
+    args = parser.parse_args(argv)
+    args.function(args)
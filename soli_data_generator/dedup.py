@@ -0,0 +1,380 @@
+"""
+Streaming exact and near-duplicate filtering for generated samples.
+
+Exact duplicates are detected with a Bloom filter over a hash of the normalized text.
+Near duplicates are detected with MinHash signatures over word shingles, split into LSH
+bands; each band's hashes go into their own Bloom filter, so a sample is a near
+duplicate when any band matches a band of an earlier sample.  Nothing per sample is
+kept beyond the filter bits, so memory is fixed by the capacity: about 1.8 MB per
+million samples for each filter at the default error rate.
+
+With b bands of r rows, two samples with Jaccard similarity s share a band with
+probability 1 - (1 - s^r)^b, so the similarity threshold is roughly (1 / b)^(1 / r).
+Both checks are probabilistic: at capacity, Bloom false positives flag about the error
+rate of unique samples as exact duplicates and about bands times the error rate as near
+duplicates.
+"""
+
+# imports
+import hashlib
+import math
+import random
+import re
+import threading
+from collections import deque
+from typing import Deque, List, Optional
+
+# project
+from soli_data_generator.instrumentation import NULL_METRICS, Metrics
+
+# default number of samples each filter is sized for
+DEFAULT_DEDUP_CAPACITY = 1_000_000
+
+# default false positive rate of each filter at capacity
+DEFAULT_DEDUP_ERROR_RATE = 0.001
+
+# default MinHash signature length and LSH bands, for a similarity threshold near 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 8
+
+# default number of words per shingle
+DEFAULT_SHINGLE_SIZE = 3
+
+# Mersenne prime modulus for the MinHash permutations
+MINHASH_PRIME = (1 << 61) - 1
+
+# duplicate kinds
+DUPLICATE_KINDS = ("exact", "near")
+
+RE_WHITESPACE = re.compile(r"\s+")
+RE_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for exact duplicate detection by case-folding and collapsing whitespace.
+
+    Args:
+    - text (str): the text
+
+    Returns:
+    - str: the normalized text
+    """
+    return RE_WHITESPACE.sub(" ", text.casefold()).strip()
+
+
+def hash_text(text: str) -> int:
+    """
+    Get a stable 64-bit hash of a string.
+
+    Args:
+    - text (str): the string
+
+    Returns:
+    - int: the hash
+    """
+    return int.from_bytes(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def get_shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> List[str]:
+    """
+    Get the distinct word shingles of a text.
+
+    Args:
+    - text (str): the text
+    - size (int): the number of words per shingle
+
+    Returns:
+    - list: the shingles; texts shorter than size yield a single shingle
+    """
+    words = RE_WORD.findall(text.casefold())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return list(
+        dict.fromkeys(
+            " ".join(words[index : index + size])
+            for index in range(len(words) - size + 1)
+        )
+    )
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 64-bit hashes, using double hashing.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_DEDUP_CAPACITY,
+        error_rate: float = DEFAULT_DEDUP_ERROR_RATE,
+    ):
+        """
+        Size the filter for a number of items at a false positive rate.
+
+        Args:
+        - capacity (int): the number of items the filter is sized for
+        - error_rate (float): the false positive rate at capacity
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def get_positions(self, key: int) -> List[int]:
+        """
+        Get the bit positions for a hash.
+
+        Args:
+        - key (int): the 64-bit hash
+
+        Returns:
+        - list: the bit positions
+        """
+        first = key & 0xFFFFFFFF
+        second = (key >> 32) | 1
+        return [
+            (first + index * second) % self.num_bits for index in range(self.num_hashes)
+        ]
+
+    def __contains__(self, key: int) -> bool:
+        """
+        Check whether a hash may have been added.
+
+        Args:
+        - key (int): the 64-bit hash
+
+        Returns:
+        - bool: False if the hash was never added; True if it probably was
+        """
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(key)
+        )
+
+    def add(self, key: int) -> bool:
+        """
+        Add a hash to the filter.
+
+        Args:
+        - key (int): the 64-bit hash
+
+        Returns:
+        - bool: whether the hash was probably already present
+        """
+        present = True
+        for position in self.get_positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                present = False
+                self.bits[position >> 3] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles with seeded universal hash permutations.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 0,
+    ):
+        """
+        Draw the hash permutations.
+
+        Args:
+        - num_perm (int): the signature length
+        - shingle_size (int): the number of words per shingle
+        - seed (int): the seed for the permutations
+        """
+        if num_perm < 1:
+            raise ValueError("num_perm must be at least 1")
+
+        rng = random.Random(seed)
+        self.shingle_size = shingle_size
+        self.permutations = [
+            (rng.randrange(1, MINHASH_PRIME), rng.randrange(MINHASH_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        """
+        Get the MinHash signature of a text.
+
+        Args:
+        - text (str): the text
+
+        Returns:
+        - list: the minimum permuted shingle hash for each permutation
+        """
+        hashes = [
+            hash_text(shingle) for shingle in get_shingles(text, self.shingle_size)
+        ]
+        return [
+            min((a * value + b) % MINHASH_PRIME for value in hashes)
+            for a, b in self.permutations
+        ]
+
+
+class Deduplicator:
+    """
+    Streaming exact and near-duplicate detector with a rolling duplicate rate.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_DEDUP_CAPACITY,
+        error_rate: float = DEFAULT_DEDUP_ERROR_RATE,
+        near: bool = True,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        window: int = 1000,
+        metrics: Metrics = NULL_METRICS,
+    ):
+        """
+        Create the exact filter and, if requested, the LSH band filters.
+
+        Args:
+        - capacity (int): the number of samples each filter is sized for
+        - error_rate (float): the false positive rate of each filter at capacity
+        - near (bool): whether to detect near duplicates as well as exact duplicates
+        - num_perm (int): the MinHash signature length
+        - bands (int): the number of LSH bands; must divide num_perm
+        - shingle_size (int): the number of words per shingle
+        - window (int): the number of recent samples for the rolling duplicate rate
+        - metrics (Metrics): the metrics to record duplicate counters to
+        """
+        if near and num_perm % bands != 0:
+            raise ValueError("bands must divide num_perm")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.exact = BloomFilter(capacity, error_rate)
+        self.hasher = (
+            MinHasher(num_perm=num_perm, shingle_size=shingle_size) if near else None
+        )
+        self.rows = num_perm // bands
+        self.bands = [
+            BloomFilter(capacity, error_rate) for _ in range(bands if near else 0)
+        ]
+        self.metrics = metrics
+        self.recent: Deque[bool] = deque(maxlen=window)
+        self.checked = 0
+        self.duplicates = {kind: 0 for kind in DUPLICATE_KINDS}
+        self.lock = threading.Lock()
+
+    def get_band_keys(self, text: str) -> List[int]:
+        """
+        Hash each LSH band of a text's MinHash signature.
+
+        Args:
+        - text (str): the text
+
+        Returns:
+        - list: one hash per band, salted by the band index
+        """
+        signature = self.hasher.signature(text)
+        return [
+            hash_text(
+                f"{band}:"
+                + ",".join(
+                    map(str, signature[band * self.rows : (band + 1) * self.rows])
+                )
+            )
+            for band in range(len(self.bands))
+        ]
+
+    def check(self, text: str) -> Optional[str]:
+        """
+        Check a sample against every earlier sample and add it to the index.
+
+        Args:
+        - text (str): the sample text
+
+        Returns:
+        - str | None: exact or near if the sample is a duplicate, otherwise None
+        """
+        with self.metrics.timer("dedup"):
+            exact_key = hash_text(normalize_text(text))
+            band_keys = self.get_band_keys(text) if self.hasher is not None else []
+
+            with self.lock:
+                kind = None
+                if self.exact.add(exact_key):
+                    kind = "exact"
+                # add every band, even for a match, so later variants still collide
+                near_match = False
+                for band_filter, band_key in zip(self.bands, band_keys):
+                    near_match = band_filter.add(band_key) or near_match
+                if kind is None and near_match:
+                    kind = "near"
+
+                self.checked += 1
+                self.recent.append(kind is not None)
+                if kind is not None:
+                    self.duplicates[kind] += 1
+
+        self.metrics.count("dedup_checked")
+        if kind is not None:
+            self.metrics.count(f"duplicates_{kind}")
+        return kind
+
+    def duplicate_rate(self) -> float:
+        """
+        Get the fraction of all checked samples that were duplicates.
+
+        Returns:
+        - float: the duplicate rate
+        """
+        with self.lock:
+            if self.checked == 0:
+                return 0.0
+            return sum(self.duplicates.values()) / self.checked
+
+    def recent_duplicate_rate(self) -> float:
+        """
+        Get the fraction of duplicates among the most recent samples.
+
+        Returns:
+        - float: the duplicate rate over the rolling window
+        """
+        with self.lock:
+            if not self.recent:
+                return 0.0
+            return sum(self.recent) / len(self.recent)
+
+    def is_window_full(self) -> bool:
+        """
+        Check whether the rolling window has seen enough samples to be meaningful.
+
+        Returns:
+        - bool: whether the window is full
+        """
+        with self.lock:
+            return len(self.recent) == self.recent.maxlen
+
+    def stats(self) -> dict:
+        """
+        Summarize the checked samples and duplicates by kind.
+
+        Returns:
+        - dict: the checked count, duplicate counts, and overall and recent duplicate rates
+        """
+        return {
+            "checked": self.checked,
+            "duplicates": dict(self.duplicates),
+            "duplicate_rate": self.duplicate_rate(),
+            "recent_duplicate_rate": self.recent_duplicate_rate(),
+        }
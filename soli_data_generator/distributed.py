@@ -0,0 +1,535 @@
+"""
+Distributed template rendering with a SQLite-backed work queue.
+
+A coordinator splits the templates in an input file into work units of `unit_size`
+templates, each with a seed derived from the job seed and the unit index, and records
+them with the job settings in a SQLite database on shared storage.  Workers claim units
+under a time-limited lease, render them, write one shard per unit, and mark the unit
+done; units whose lease expires are handed to the next worker that asks.
+
+Each unit reseeds the formatter before rendering, so the merged shards are identical to
+a single-node `render --seed` run with the same seed and unit size, regardless of how
+many workers took part or which units were retried.
+
+SQLite relies on POSIX file locks, so the queue database must live on a filesystem with
+working locks (local disks and most NFSv4 mounts).
+"""
+
+# imports
+import io
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural.stream import (
+    DEFAULT_UNIT_SIZE,
+    get_unit_seed,
+    read_templates,
+    render_seeded_unit,
+    serialize_output,
+)
+from soli_data_generator.procedural.template import TemplateFormatter
+from soli_data_generator.stats import DatasetStats
+
+# default lease duration, in seconds
+DEFAULT_LEASE_SECONDS = 300.0
+
+# seconds to wait for the database lock
+SQLITE_TIMEOUT = 60.0
+
+# unit states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);
+"""
+
+
+def iter_template_offsets(path: str | Path) -> Iterator[int]:
+    """
+    Iterate over the byte offset of each template line in a file, skipping blank lines.
+
+    Args:
+    - path (str | Path): the template file
+
+    Yields:
+    - int: the byte offset of the next template line
+    """
+    offset = 0
+    with open(path, "rb") as input_file:
+        for line in input_file:
+            if line.strip():
+                yield offset
+            offset += len(line)
+
+
+def read_unit_lines(path: str | Path, offset: int, count: int) -> List[str]:
+    """
+    Read the template lines of a work unit.
+
+    Args:
+    - path (str | Path): the template file
+    - offset (int): the byte offset of the unit's first template line
+    - count (int): the number of template lines in the unit
+
+    Returns:
+    - list: the template lines
+    """
+    lines: List[str] = []
+    with open(path, "rb") as binary_file:
+        binary_file.seek(offset)
+        with io.TextIOWrapper(binary_file, encoding="utf-8") as input_file:
+            for line in input_file:
+                if len(lines) == count:
+                    break
+                if line.strip():
+                    lines.append(line)
+    return lines
+
+
+def get_shard_path(output_dir: str | Path, unit_index: int) -> Path:
+    """
+    Get the shard path for a work unit.
+
+    Args:
+    - output_dir (str | Path): the shard directory
+    - unit_index (int): the unit index
+
+    Returns:
+    - Path: the shard path
+    """
+    return Path(output_dir) / f"part-{unit_index:06d}.jsonl"
+
+
+def get_stats_path(output_dir: str | Path, unit_index: int) -> Path:
+    """
+    Get the statistics path for a work unit.
+
+    Args:
+    - output_dir (str | Path): the shard directory
+    - unit_index (int): the unit index
+
+    Returns:
+    - Path: the statistics path, next to the shard
+    """
+    return Path(output_dir) / f"part-{unit_index:06d}.stats.json"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of seeded work units with leases.
+    """
+
+    def __init__(self, path: str | Path, clock=time.time):
+        """
+        Open the queue database, creating its tables if needed.
+
+        Args:
+        - path (str | Path): the database path
+        - clock (Callable): the wall clock used for leases, in seconds
+        """
+        self.path = str(path)
+        self.clock = clock
+        self.connection = sqlite3.connect(
+            self.path, timeout=SQLITE_TIMEOUT, isolation_level=None
+        )
+        self.connection.executescript(QUEUE_SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self.connection.close()
+
+    def create_job(
+        self,
+        job: Dict[str, Any],
+        offsets: Iterable[int],
+        unit_size: int = DEFAULT_UNIT_SIZE,
+    ) -> int:
+        """
+        Record the job settings and split its templates into work units.
+
+        Args:
+        - job (dict): the job settings, including the input path and seed
+        - offsets (Iterable[int]): the byte offset of every template in the input
+        - unit_size (int): the number of templates per unit
+
+        Returns:
+        - int: the number of units
+        """
+        if unit_size < 1:
+            raise ValueError("unit_size must be at least 1")
+        if self.get_job():
+            raise ValueError(f"Work queue {self.path} already has a job")
+
+        # record the offset of the first template of each unit
+        unit_offsets = []
+        num_templates = 0
+        for num_templates, offset in enumerate(offsets, start=1):
+            if (num_templates - 1) % unit_size == 0:
+                unit_offsets.append(offset)
+        units = [
+            (
+                unit_index,
+                unit_index * unit_size,
+                min((unit_index + 1) * unit_size, num_templates),
+                offset,
+                get_unit_seed(job["seed"], unit_index),
+                PENDING,
+            )
+            for unit_index, offset in enumerate(unit_offsets)
+        ]
+
+        job = dict(job, unit_size=unit_size, num_templates=num_templates)
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT INTO job (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in job.items()],
+            )
+            self.connection.executemany(
+                "INSERT INTO units (id, start, end, offset, seed, status) VALUES (?, ?, ?, ?, ?, ?)",
+                units,
+            )
+        return len(units)
+
+    def get_job(self) -> Dict[str, Any]:
+        """
+        Get the job settings.
+
+        Returns:
+        - dict: the job settings, or an empty dict if no job was created
+        """
+        return {
+            key: json.loads(value)
+            for key, value in self.connection.execute("SELECT key, value FROM job")
+        }
+
+    def claim(
+        self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next pending unit, or a unit whose lease has expired.
+
+        Args:
+        - worker (str): the worker ID
+        - lease_seconds (float): the lease duration
+
+        Returns:
+        - dict: the unit's index, template range, offset, and seed, or None if none are available
+        """
+        now = self.clock()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            row = self.connection.execute(
+                "SELECT id, start, end, offset, seed FROM units "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE units SET status = ?, worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (LEASED, worker, now + lease_seconds, row[0]),
+            )
+        return dict(zip(("index", "start", "end", "offset", "seed"), row))
+
+    def renew(
+        self, unit_index: int, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> bool:
+        """
+        Extend a lease held by a worker.
+
+        Args:
+        - unit_index (int): the unit index
+        - worker (str): the worker ID
+        - lease_seconds (float): the new lease duration from now
+
+        Returns:
+        - bool: True if the worker still held the lease
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE units SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (self.clock() + lease_seconds, unit_index, worker, LEASED),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, unit_index: int, worker: str) -> bool:
+        """
+        Mark a leased unit as done.
+
+        Args:
+        - unit_index (int): the unit index
+        - worker (str): the worker ID
+
+        Returns:
+        - bool: True if the worker still held the lease
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE units SET status = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, unit_index, worker, LEASED),
+            )
+        return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """
+        Count the units by state; leased units whose lease has expired count as expired.
+
+        Returns:
+        - dict: the unit counts by state, and the total
+        """
+        counts = {PENDING: 0, LEASED: 0, "expired": 0, DONE: 0}
+        now = self.clock()
+        for status, expired, count in self.connection.execute(
+            "SELECT status, status = ? AND lease_expires < ?, COUNT(*) "
+            "FROM units GROUP BY 1, 2",
+            (LEASED, now),
+        ):
+            counts["expired" if expired else status] += count
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def get_unit_indices(self) -> List[int]:
+        """
+        Get every unit index in order.
+
+        Returns:
+        - list: the unit indices
+        """
+        return [
+            row[0]
+            for row in self.connection.execute("SELECT id FROM units ORDER BY id")
+        ]
+
+
+class LeaseKeeper:
+    """
+    Background thread that renews a worker's lease until stopped.
+    """
+
+    def __init__(
+        self,
+        queue_path: str | Path,
+        unit_index: int,
+        worker: str,
+        lease_seconds: float,
+    ):
+        """
+        Initialize the lease keeper.
+
+        Args:
+        - queue_path (str | Path): the queue database path
+        - unit_index (int): the leased unit index
+        - worker (str): the worker ID
+        - lease_seconds (float): the lease duration, renewed every third of it
+        """
+        self.queue_path = queue_path
+        self.unit_index = unit_index
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self) -> None:
+        """
+        Renew the lease every third of its duration.
+        """
+        # sqlite connections cannot be shared across threads
+        work_queue = WorkQueue(self.queue_path)
+        try:
+            while not self.stop_event.wait(self.lease_seconds / 3):
+                if not work_queue.renew(
+                    self.unit_index, self.worker, self.lease_seconds
+                ):
+                    return
+        finally:
+            work_queue.close()
+
+    def __enter__(self) -> "LeaseKeeper":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop_event.set()
+        self.thread.join()
+
+
+def get_worker_id() -> str:
+    """
+    Get a worker ID unique to this host and process.
+
+    Returns:
+    - str: the worker ID
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_unit(
+    formatter: TemplateFormatter, job: Dict[str, Any], unit: Dict[str, Any]
+) -> Path:
+    """
+    Render a work unit into its shard, replacing the shard atomically.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter
+    - job (dict): the job settings
+    - unit (dict): the claimed unit
+
+    Returns:
+    - Path: the shard path
+    """
+    lines = read_unit_lines(job["input"], unit["offset"], unit["end"] - unit["start"])
+    templates = list(read_templates(lines, job["input_format"], job["field"]))
+
+    shard_path = get_shard_path(job["output_dir"], unit["index"])
+    temp_path = shard_path.with_name(f".{shard_path.name}.{get_worker_id()}.tmp")
+    stats = DatasetStats(formatter.graph) if job.get("stats") else None
+    with open(temp_path, "wt", encoding="utf-8") as output_file:
+        for output in render_seeded_unit(
+            formatter, templates, unit["seed"], job["renders"], job["spans"]
+        ):
+            output_file.write(serialize_output(output) + "\n")
+            if stats is not None:
+                stats.add(output)
+
+    # per-unit statistics are replaced on retry, so merging them never double counts
+    if stats is not None:
+        stats_path = get_stats_path(job["output_dir"], unit["index"])
+        temp_stats_path = stats_path.with_name(
+            f".{stats_path.name}.{get_worker_id()}.tmp"
+        )
+        stats.write(str(temp_stats_path))
+        os.replace(temp_stats_path, stats_path)
+    os.replace(temp_path, shard_path)
+    return shard_path
+
+
+def run_worker(
+    queue_path: str | Path,
+    formatter: Optional[TemplateFormatter] = None,
+    worker: Optional[str] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    max_units: Optional[int] = None,
+) -> int:
+    """
+    Claim and render units until the queue has none left.
+
+    Args:
+    - queue_path (str | Path): the queue database path
+    - formatter (TemplateFormatter): the formatter; defaults to one built from the job settings
+    - worker (str): the worker ID; defaults to the host name and process ID
+    - lease_seconds (float): the lease duration
+    - max_units (int): stop after this many units
+
+    Returns:
+    - int: the number of units this worker completed
+    """
+    worker = worker or get_worker_id()
+    work_queue = WorkQueue(queue_path)
+    try:
+        job = work_queue.get_job()
+        if not job:
+            raise ValueError(f"Work queue {queue_path} has no job")
+        if formatter is None:
+            formatter = TemplateFormatter(
+                correlated=job["correlated"], compact_spans=True
+            )
+            if job.get("sampling_policies") is not None:
+                formatter.load_policies(job["sampling_policies"])
+        Path(job["output_dir"]).mkdir(parents=True, exist_ok=True)
+
+        completed = 0
+        while max_units is None or completed < max_units:
+            unit = work_queue.claim(worker, lease_seconds)
+            if unit is None:
+                break
+            with LeaseKeeper(queue_path, unit["index"], worker, lease_seconds):
+                run_unit(formatter, job, unit)
+            if work_queue.complete(unit["index"], worker):
+                completed += 1
+        return completed
+    finally:
+        work_queue.close()
+
+
+def merge_shards(work_queue: WorkQueue, output_file: TextIO) -> int:
+    """
+    Concatenate the unit shards in unit order.
+
+    Args:
+    - work_queue (WorkQueue): the queue
+    - output_file (TextIO): the open output file
+
+    Returns:
+    - int: the number of shards merged
+    """
+    progress = work_queue.progress()
+    if progress[DONE] != progress["total"]:
+        raise ValueError(
+            f"Cannot merge: {progress[DONE]} of {progress['total']} units are done"
+        )
+
+    output_dir = work_queue.get_job()["output_dir"]
+    unit_indices = work_queue.get_unit_indices()
+    for unit_index in unit_indices:
+        with open(
+            get_shard_path(output_dir, unit_index), "rt", encoding="utf-8"
+        ) as shard:
+            for line in shard:
+                output_file.write(line)
+    return len(unit_indices)
+
+
+def merge_stats(
+    work_queue: WorkQueue, soli_graph: Optional[SOLI] = None
+) -> DatasetStats:
+    """
+    Merge the per-unit statistics of a job run with stats enabled.
+
+    Args:
+    - work_queue (WorkQueue): the queue
+    - soli_graph (SOLI): the graph for class coverage in the merged report
+
+    Returns:
+    - DatasetStats: the statistics of the whole job
+    """
+    job = work_queue.get_job()
+    if not job.get("stats"):
+        raise ValueError("The job was created without --stats")
+
+    stats = DatasetStats(soli_graph)
+    for unit_index in work_queue.get_unit_indices():
+        stats.merge(
+            DatasetStats.read(str(get_stats_path(job["output_dir"], unit_index)))
+        )
+    return stats
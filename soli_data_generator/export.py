@@ -0,0 +1,335 @@
+"""
+Token-level BIO label export for annotated samples.
+
+Annotated samples carry character spans; NER training needs token offsets and one BIO
+label per token.  Samples are tokenized with a pluggable tokenizer, a function from text
+to (start, end) token offsets, and each span is mapped onto its tokens by binary search
+over the token offsets, so a sample costs O((tokens + spans) log tokens) with no
+per-character pass.  Spans whose boundaries fall inside a token are reported as
+misaligned, and either rejected or widened to the tokens they overlap.
+
+Labels use a fixed vocabulary over every template tag, O = 0, B-tag = 2i + 1 and
+I-tag = 2i + 2, so label IDs are stable across exports.  Exports are written in a
+compact binary format: a JSON header line with the label names, then one record per
+sample of little-endian uint32 text length and token count, the UTF-8 text, and the
+uint32 token starts, uint32 token ends, and uint16 labels.
+"""
+
+# imports
+import bisect
+import json
+import re
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# project
+from soli_data_generator.procedural.spans import AnnotatedSample
+from soli_data_generator.procedural.template import get_all_tags
+
+# tokenizer functions map text to (start, end) token offsets
+Tokenizer = Callable[[str], List[Tuple[int, int]]]
+
+# default tokenizer patterns
+RE_REGEX_TOKEN = re.compile(r"\w+|[^\w\s]")
+RE_WHITESPACE_TOKEN = re.compile(r"\S+")
+
+# binary format identifier and version
+BIO_FORMAT = "soli-bio"
+BIO_FORMAT_VERSION = 1
+
+# record header: text byte length and token count
+RECORD_HEADER = struct.Struct("<II")
+
+
+def regex_tokenizer(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into word and punctuation tokens.
+
+    Args:
+    - text (str): the text
+
+    Returns:
+    - list: the (start, end) token offsets
+    """
+    return [match.span() for match in RE_REGEX_TOKEN.finditer(text)]
+
+
+def whitespace_tokenizer(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text on whitespace.
+
+    Args:
+    - text (str): the text
+
+    Returns:
+    - list: the (start, end) token offsets
+    """
+    return [match.span() for match in RE_WHITESPACE_TOKEN.finditer(text)]
+
+
+# built-in tokenizers by name
+TOKENIZERS: Dict[str, Tokenizer] = {
+    "regex": regex_tokenizer,
+    "whitespace": whitespace_tokenizer,
+}
+
+
+def get_bio_labels() -> List[str]:
+    """
+    Get the BIO label names, indexed by label ID.
+
+    Returns:
+    - list: O, then B- and I- labels for every template tag
+    """
+    labels = ["O"]
+    for tag in get_all_tags():
+        labels.extend((f"B-{tag}", f"I-{tag}"))
+    return labels
+
+
+# label names and IDs
+BIO_LABELS = get_bio_labels()
+BIO_LABEL_IDS = {label: label_id for label_id, label in enumerate(BIO_LABELS)}
+
+
+class BIOExample:
+    """
+    A tokenized sample with one BIO label ID per token.
+    """
+
+    __slots__ = ("text", "starts", "ends", "labels", "misaligned")
+
+    def __init__(
+        self,
+        text: str,
+        starts: array,
+        ends: array,
+        labels: array,
+        misaligned: int = 0,
+    ):
+        """
+        Store the token arrays of a sample.
+
+        Args:
+        - text (str): the sample text
+        - starts (array): the uint32 token start offsets
+        - ends (array): the uint32 token end offsets
+        - labels (array): the uint16 label IDs
+        - misaligned (int): the number of spans that did not line up with token boundaries
+        """
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.labels = labels
+        self.misaligned = misaligned
+
+    def get_tokens(self) -> List[str]:
+        """
+        Get the token strings.
+
+        Returns:
+        - list: the tokens
+        """
+        return [self.text[start:end] for start, end in zip(self.starts, self.ends)]
+
+    def get_label_names(self) -> List[str]:
+        """
+        Get the BIO label names.
+
+        Returns:
+        - list: the label name of each token
+        """
+        return [BIO_LABELS[label_id] for label_id in self.labels]
+
+
+def get_sample_spans(
+    sample: dict | AnnotatedSample,
+) -> Tuple[str, List[Tuple[int, int, str]]]:
+    """
+    Get the text and (start, end, tag) spans of an annotated sample.
+
+    Args:
+    - sample (dict | AnnotatedSample): the sample, as a dict or a compact sample
+
+    Returns:
+    - tuple: the text and its spans
+    """
+    if isinstance(sample, AnnotatedSample):
+        return sample.text, list(zip(sample.starts, sample.ends, sample.tags))
+    return sample["text"], [
+        (span["start"], span["end"], span["tag"]) for span in sample["spans"]
+    ]
+
+
+def label_sample(
+    sample: dict | AnnotatedSample,
+    tokenizer: Tokenizer = regex_tokenizer,
+    strict: bool = False,
+) -> BIOExample:
+    """
+    Tokenize a sample and label its tokens.
+
+    Args:
+    - sample (dict | AnnotatedSample): the annotated sample
+    - tokenizer (Tokenizer): the function from text to token offsets
+    - strict (bool): whether to raise on spans that do not line up with token boundaries
+
+    Returns:
+    - BIOExample: the token offsets and labels
+    """
+    text, spans = get_sample_spans(sample)
+    offsets = tokenizer(text)
+    starts = array("I", (start for start, _ in offsets))
+    ends = array("I", (end for _, end in offsets))
+    labels = array("H", bytes(2 * len(offsets)))
+
+    misaligned = 0
+    for span_start, span_end, tag in spans:
+        # the tokens inside the span
+        first = bisect.bisect_left(starts, span_start)
+        last = bisect.bisect_right(ends, span_end)
+        aligned = (
+            first < last and starts[first] == span_start and ends[last - 1] == span_end
+        )
+        if not aligned:
+            misaligned += 1
+            if strict:
+                raise ValueError(
+                    f"Span {span_start}:{span_end} ({tag}) does not align with token "
+                    f"boundaries in: {text!r}"
+                )
+            # widen to the tokens the span overlaps
+            first = bisect.bisect_right(ends, span_start)
+            last = bisect.bisect_left(starts, span_end)
+            if first >= last:
+                continue
+
+        begin_id = BIO_LABEL_IDS.get(f"B-{tag}")
+        if begin_id is None:
+            raise ValueError(f"Unknown span tag: {tag}")
+        labels[first] = begin_id
+        for index in range(first + 1, last):
+            labels[index] = begin_id + 1
+
+    return BIOExample(text, starts, ends, labels, misaligned)
+
+
+def iter_bio_examples(
+    samples: Iterable[dict | AnnotatedSample],
+    tokenizer: Tokenizer = regex_tokenizer,
+    strict: bool = False,
+) -> Iterator[BIOExample]:
+    """
+    Lazily label a stream of annotated samples.
+
+    Args:
+    - samples (Iterable[dict | AnnotatedSample]): the annotated samples
+    - tokenizer (Tokenizer): the function from text to token offsets
+    - strict (bool): whether to raise on spans that do not line up with token boundaries
+
+    Yields:
+    - BIOExample: the token offsets and labels of each sample
+    """
+    for sample in samples:
+        yield label_sample(sample, tokenizer, strict)
+
+
+def to_little_endian(values: array) -> bytes:
+    """
+    Get the little-endian bytes of an array.
+
+    Args:
+    - values (array): the array
+
+    Returns:
+    - bytes: the array bytes in little-endian order
+    """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_little_endian(typecode: str, data: bytes) -> array:
+    """
+    Read an array from little-endian bytes.
+
+    Args:
+    - typecode (str): the array type code
+    - data (bytes): the array bytes
+
+    Returns:
+    - array: the array
+    """
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def write_bio_examples(
+    examples: Iterable[BIOExample], output_file: BinaryIO, tokenizer: str = "regex"
+) -> Dict[str, int]:
+    """
+    Write labeled examples in the compact binary format.
+
+    Args:
+    - examples (Iterable[BIOExample]): the labeled examples
+    - output_file (BinaryIO): the open binary output file
+    - tokenizer (str): the tokenizer name recorded in the header
+
+    Returns:
+    - dict: the number of examples, tokens, and misaligned spans written
+    """
+    header = {
+        "format": BIO_FORMAT,
+        "version": BIO_FORMAT_VERSION,
+        "tokenizer": tokenizer,
+        "labels": BIO_LABELS,
+    }
+    output_file.write(json.dumps(header).encode("utf-8") + b"\n")
+
+    counts = {"examples": 0, "tokens": 0, "misaligned": 0}
+    for example in examples:
+        text = example.text.encode("utf-8")
+        output_file.write(RECORD_HEADER.pack(len(text), len(example.labels)))
+        output_file.write(text)
+        output_file.write(to_little_endian(example.starts))
+        output_file.write(to_little_endian(example.ends))
+        output_file.write(to_little_endian(example.labels))
+        counts["examples"] += 1
+        counts["tokens"] += len(example.labels)
+        counts["misaligned"] += example.misaligned
+    return counts
+
+
+def read_bio_examples(input_file: BinaryIO) -> Iterator[BIOExample]:
+    """
+    Lazily read labeled examples from the compact binary format.
+
+    Args:
+    - input_file (BinaryIO): the open binary input file
+
+    Yields:
+    - BIOExample: the labeled examples
+    """
+    header = json.loads(input_file.readline())
+    if header.get("format") != BIO_FORMAT:
+        raise ValueError("Invalid BIO export; missing format header")
+    if header["labels"] != BIO_LABELS:
+        raise ValueError("BIO export labels do not match this version's label set")
+
+    while record_header := input_file.read(RECORD_HEADER.size):
+        if len(record_header) < RECORD_HEADER.size:
+            raise ValueError("Truncated BIO export record")
+        text_length, num_tokens = RECORD_HEADER.unpack(record_header)
+        text = input_file.read(text_length).decode("utf-8")
+        starts = from_little_endian("I", input_file.read(4 * num_tokens))
+        ends = from_little_endian("I", input_file.read(4 * num_tokens))
+        labels = from_little_endian("H", input_file.read(2 * num_tokens))
+        if len(labels) != num_tokens:
+            raise ValueError("Truncated BIO export record")
+        yield BIOExample(text, starts, ends, labels)
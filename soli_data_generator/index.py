@@ -0,0 +1,496 @@
+"""
+Sidecar inverted indexes over generated JSONL datasets.
+
+While a dataset is written, a DatasetIndexer records the byte offset of every sample and
+posts its ID under each span's OWL class IRI, each span tag, and, given the SOLI graph,
+every ancestor IRI of each class.  A query for all samples under a class is then one
+posting lookup instead of a scan of the file, and only the matching lines are parsed.
+
+Layout, little-endian, with every section aligned to 8 bytes:
+
+ - magic, format version, and header length, then a JSON header with the sample and
+   key counts, the indexed data size, and the section offsets
+ - sample offsets: num_samples + 1 uint64 byte offsets, so sample i is the line between
+   offsets i and i + 1
+ - keys: per key, sorted by key, the offset and length of the key string and the offset
+   and length of its posting list, for binary search
+ - postings: sorted uint32 sample IDs
+ - key strings: a kind character (c for class, t for tag, a for ancestor) and the value
+"""
+
+# imports
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# packages
+from soli import SOLI, OWLClass
+
+# project
+from soli_data_generator.procedural.library import PREAMBLE, pad
+from soli_data_generator.procedural.spans import AnnotatedSample
+
+# file identifier and format version
+INDEX_MAGIC = b"SOLIIDX\x00"
+INDEX_VERSION = 1
+
+# key record: key string offset, key string length, posting count, and posting offset
+KEY_RECORD = struct.Struct("<QIIQ")
+
+# default index file extension, appended to the dataset path
+INDEX_EXTENSION = ".sidx"
+
+# key kinds
+KEY_KINDS = {"class": "c", "tag": "t", "ancestor": "a"}
+
+
+def get_index_path(data_path: str) -> str:
+    """
+    Get the default sidecar index path of a dataset.
+
+    Args:
+    - data_path (str): the JSONL dataset path
+
+    Returns:
+    - str: the index path
+    """
+    return data_path + INDEX_EXTENSION
+
+
+def get_sample_classes(
+    sample: str | dict | AnnotatedSample,
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Get the (tag, class IRI) pairs of a sample's spans.
+
+    Args:
+    - sample (str | dict | AnnotatedSample): the sample, as text, a dict, or a compact sample
+
+    Returns:
+    - list: the tag and IRI of each span; text samples have none
+    """
+    if isinstance(sample, str):
+        return []
+    if isinstance(sample, AnnotatedSample):
+        return list(zip(sample.tags, sample.iris))
+
+    pairs = []
+    for span in sample.get("spans") or []:
+        owl_class = span.get("owl_class")
+        if isinstance(owl_class, OWLClass):
+            owl_class = owl_class.iri
+        pairs.append((span["tag"], owl_class))
+    return pairs
+
+
+class DatasetIndexer:
+    """
+    Accumulates the offsets and postings of a dataset as it is written.
+    """
+
+    def __init__(self, soli_graph: Optional[SOLI] = None, position: int = 0):
+        """
+        Start an empty index.
+
+        Args:
+        - soli_graph (SOLI): the graph to post ancestor IRIs from; without it, only classes and tags are indexed
+        - position (int): the byte offset of the first sample
+        """
+        self.graph = soli_graph
+        self.offsets = array("Q", [position])
+        self.postings: Dict[str, array] = {}
+        self.ancestors: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of indexed samples.
+
+        Returns:
+        - int: the number of samples
+        """
+        return len(self.offsets) - 1
+
+    def get_ancestors(self, iri: str) -> Tuple[str, ...]:
+        """
+        Get the distinct strict ancestor IRIs of a class, cached per IRI.
+
+        Args:
+        - iri (str): the class IRI
+
+        Returns:
+        - tuple: the ancestor IRIs
+        """
+        ancestors = self.ancestors.get(iri)
+        if ancestors is None:
+            parents = dict.fromkeys(
+                parent.iri for parent in self.graph.get_parents(iri)
+            )
+            parents.pop(iri, None)
+            ancestors = self.ancestors[iri] = tuple(parents)
+        return ancestors
+
+    def add(self, sample: str | dict | AnnotatedSample, size: int) -> int:
+        """
+        Index the next sample in the dataset.
+
+        Args:
+        - sample (str | dict | AnnotatedSample): the sample
+        - size (int): the byte length of the sample's line, including its newline
+
+        Returns:
+        - int: the sample ID
+        """
+        sample_id = len(self.offsets) - 1
+        self.offsets.append(self.offsets[-1] + size)
+
+        keys = set()
+        for tag, iri in get_sample_classes(sample):
+            keys.add("t" + tag)
+            if iri is None:
+                continue
+            keys.add("c" + iri)
+            if self.graph is not None:
+                keys.update("a" + ancestor for ancestor in self.get_ancestors(iri))
+
+        for key in keys:
+            posting = self.postings.get(key)
+            if posting is None:
+                posting = self.postings[key] = array("I")
+            posting.append(sample_id)
+        return sample_id
+
+    def scan(self, input_file: BinaryIO) -> int:
+        """
+        Index every sample in an existing JSONL file.
+
+        Args:
+        - input_file (BinaryIO): the dataset, open in binary mode at the first sample
+
+        Returns:
+        - int: the number of samples indexed
+        """
+        count = 0
+        for line in input_file:
+            if line.strip():
+                self.add(json.loads(line), len(line))
+                count += 1
+            else:
+                # keep blank lines inside the previous sample's range
+                self.offsets[-1] += len(line)
+        return count
+
+    def write(self, path: str) -> None:
+        """
+        Write the index file.
+
+        Args:
+        - path (str): the output index path
+        """
+        keys = sorted(self.postings, key=lambda key: key.encode("utf-8"))
+        strings = [key.encode("utf-8") for key in keys]
+
+        # lay out the sections after the header
+        sizes = {
+            "offsets": len(self.offsets) * 8,
+            "keys": len(keys) * KEY_RECORD.size,
+            "postings": sum(len(posting) for posting in self.postings.values()) * 4,
+            "strings": sum(len(string) for string in strings),
+        }
+        header = {
+            "num_samples": len(self),
+            "num_keys": len(keys),
+            "data_size": self.offsets[-1],
+            "ancestors": self.graph is not None,
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        # the offsets depend on the header size, which depends on the offsets
+        offsets: Dict[str, int] = {}
+        while True:
+            position = PREAMBLE.size + len(header_bytes)
+            for section, size in sizes.items():
+                position += -position % 8
+                offsets[section] = position
+                position += size
+            candidate = json.dumps({**header, "offsets": offsets}).encode("utf-8")
+            stable = len(candidate) == len(header_bytes)
+            header_bytes = candidate
+            if stable:
+                break
+
+        with open(path, "wb") as output_file:
+            output_file.write(
+                PREAMBLE.pack(INDEX_MAGIC, INDEX_VERSION, len(header_bytes))
+            )
+            output_file.write(header_bytes)
+            position = PREAMBLE.size + len(header_bytes)
+
+            # sample offsets
+            position = pad(output_file, position)
+            output_file.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+            position += sizes["offsets"]
+
+            # keys
+            position = pad(output_file, position)
+            string_offset = offsets["strings"]
+            posting_offset = offsets["postings"]
+            for key, string in zip(keys, strings):
+                count = len(self.postings[key])
+                output_file.write(
+                    KEY_RECORD.pack(string_offset, len(string), count, posting_offset)
+                )
+                string_offset += len(string)
+                posting_offset += 4 * count
+            position += sizes["keys"]
+
+            # postings, already sorted since samples are added in order
+            position = pad(output_file, position)
+            for key in keys:
+                posting = self.postings[key]
+                output_file.write(struct.pack(f"<{len(posting)}I", *posting))
+            position += sizes["postings"]
+
+            position = pad(output_file, position)
+            for string in strings:
+                output_file.write(string)
+
+
+def index_dataset(
+    data_path: str,
+    index_path: Optional[str] = None,
+    soli_graph: Optional[SOLI] = None,
+) -> int:
+    """
+    Build the sidecar index of an existing JSONL dataset.
+
+    Args:
+    - data_path (str): the JSONL dataset path
+    - index_path (str): the output index path; defaults to the dataset path plus .sidx
+    - soli_graph (SOLI): the graph to post ancestor IRIs from
+
+    Returns:
+    - int: the number of samples indexed
+    """
+    indexer = DatasetIndexer(soli_graph)
+    with open(data_path, "rb") as input_file:
+        count = indexer.scan(input_file)
+    indexer.write(index_path or get_index_path(data_path))
+    return count
+
+
+class DatasetIndex:
+    """
+    A memory-mapped sidecar index with lookups by class, ancestor, and tag.
+    """
+
+    def __init__(self, data_path: str, index_path: Optional[str] = None):
+        """
+        Open and map a dataset and its index.
+
+        Args:
+        - data_path (str): the JSONL dataset path
+        - index_path (str): the index path; defaults to the dataset path plus .sidx
+        """
+        self.data_path = data_path
+        self.index_path = index_path or get_index_path(data_path)
+        with open(self.index_path, "rb") as input_file:
+            self.map = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = PREAMBLE.unpack_from(self.map, 0)
+        if magic != INDEX_MAGIC:
+            self.map.close()
+            raise ValueError(f"Not a dataset index: {self.index_path}")
+        if version != INDEX_VERSION:
+            self.map.close()
+            raise ValueError(f"Unsupported dataset index version: {version}")
+
+        header = json.loads(self.map[PREAMBLE.size : PREAMBLE.size + header_length])
+        self.num_samples: int = header["num_samples"]
+        self.num_keys: int = header["num_keys"]
+        self.has_ancestors: bool = header["ancestors"]
+        self.offsets: Dict[str, int] = header["offsets"]
+
+        # the index only covers the data it was built for
+        data_size = os.path.getsize(data_path)
+        if data_size != header["data_size"]:
+            self.map.close()
+            raise ValueError(
+                f"Dataset index is stale: indexed {header['data_size']} bytes, "
+                f"but {data_path} has {data_size}"
+            )
+        self.data: Optional[mmap.mmap] = None
+        if data_size > 0:
+            with open(data_path, "rb") as data_file:
+                self.data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """
+        Get the number of indexed samples.
+
+        Returns:
+        - int: the number of samples
+        """
+        return self.num_samples
+
+    def __enter__(self) -> "DatasetIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmap the dataset and index files.
+        """
+        self.map.close()
+        if self.data is not None:
+            self.data.close()
+
+    def get_key(self, position: int) -> bytes:
+        """
+        Read the key string at a position in the sorted key table.
+
+        Args:
+        - position (int): the key position
+
+        Returns:
+        - bytes: the key string
+        """
+        string_offset, string_length, _, _ = KEY_RECORD.unpack_from(
+            self.map, self.offsets["keys"] + position * KEY_RECORD.size
+        )
+        return self.map[string_offset : string_offset + string_length]
+
+    def get_posting(self, kind: str, value: str) -> array:
+        """
+        Get the sorted IDs of the samples posted under a key.
+
+        Args:
+        - kind (str): class, tag, or ancestor
+        - value (str): the class IRI or tag
+
+        Returns:
+        - array: the sample IDs, as unsigned 32-bit integers; empty for unknown keys
+        """
+        if kind not in KEY_KINDS:
+            raise ValueError(
+                f"Invalid key kind: {kind}; must be one of {list(KEY_KINDS)}"
+            )
+        key = (KEY_KINDS[kind] + value).encode("utf-8")
+
+        # binary search the sorted key table
+        low, high = 0, self.num_keys
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        posting = array("I")
+        if low == self.num_keys or self.get_key(low) != key:
+            return posting
+
+        _, _, count, posting_offset = KEY_RECORD.unpack_from(
+            self.map, self.offsets["keys"] + low * KEY_RECORD.size
+        )
+        posting.frombytes(self.map[posting_offset : posting_offset + 4 * count])
+        if sys.byteorder == "big":
+            posting.byteswap()
+        return posting
+
+    def find(
+        self,
+        classes: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        descendants: bool = True,
+    ) -> List[int]:
+        """
+        Find the samples with a span of every given class and every given tag.
+
+        Args:
+        - classes (Iterable[str]): the required class IRIs
+        - tags (Iterable[str]): the required span tags
+        - descendants (bool): whether a span of a subclass also matches a class
+
+        Returns:
+        - list: the matching sample IDs, in dataset order
+        """
+        classes = list(dict.fromkeys(classes))
+        if classes and descendants and not self.has_ancestors:
+            raise ValueError(
+                "Dataset index was built without the SOLI graph; "
+                "only exact class matches are available"
+            )
+
+        matches: List[set] = []
+        for iri in classes:
+            samples = set(self.get_posting("class", iri))
+            if descendants:
+                samples.update(self.get_posting("ancestor", iri))
+            matches.append(samples)
+        for tag in dict.fromkeys(tags):
+            matches.append(set(self.get_posting("tag", tag)))
+        if not matches:
+            return list(range(self.num_samples))
+
+        # intersect starting from the smallest match set
+        matches.sort(key=len)
+        sample_ids = matches[0]
+        for samples in matches[1:]:
+            sample_ids = sample_ids & samples
+            if not sample_ids:
+                break
+        return sorted(sample_ids)
+
+    def get_line(self, sample_id: int) -> bytes:
+        """
+        Read the raw JSON line of a sample.
+
+        Args:
+        - sample_id (int): the sample ID
+
+        Returns:
+        - bytes: the sample's line
+        """
+        if not 0 <= sample_id < self.num_samples:
+            raise ValueError(f"Invalid sample ID: {sample_id}")
+        start, end = struct.unpack_from(
+            "<QQ", self.map, self.offsets["offsets"] + 8 * sample_id
+        )
+        return self.data[start:end]
+
+    def get_sample(self, sample_id: int) -> dict | str:
+        """
+        Read and parse a sample.
+
+        Args:
+        - sample_id (int): the sample ID
+
+        Returns:
+        - dict | str: the parsed sample
+        """
+        return json.loads(self.get_line(sample_id))
+
+    def query(
+        self,
+        classes: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        descendants: bool = True,
+    ) -> Iterator[dict | str]:
+        """
+        Lazily read the samples matching a query, parsing only the matching lines.
+
+        Args:
+        - classes (Iterable[str]): the required class IRIs
+        - tags (Iterable[str]): the required span tags
+        - descendants (bool): whether a span of a subclass also matches a class
+
+        Yields:
+        - dict | str: the matching samples, in dataset order
+        """
+        for sample_id in self.find(classes, tags, descendants):
+            yield self.get_sample(sample_id)
@@ -0,0 +1,445 @@
+"""
+Lightweight instrumentation for generation runs.
+
+A Metrics instance records per-stage timers with latency histograms and named counters,
+and reports throughput over the life of the run.  Generators default to NULL_METRICS,
+whose timers and counters are shared no-ops, so instrumentation costs nothing unless a
+Metrics instance is passed in.
+"""
+
+# imports
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# default histogram bucket upper bounds, in seconds
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+# prefix for exported Prometheus metric names
+PROMETHEUS_PREFIX = "soli_data_generator"
+
+# export formats
+EXPORT_FORMATS = ("json", "prometheus")
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with count, sum, min, and max.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+        - buckets (Sequence[float]): the sorted bucket upper bounds, in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record a duration.
+
+        Args:
+        - seconds (float): the duration in seconds
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile from the buckets, interpolating linearly within a bucket.
+
+        Args:
+        - q (float): the quantile in [0, 1]
+
+        Returns:
+        - float: the estimated duration in seconds, or 0.0 if the histogram is empty
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                fraction = (rank - cumulative) / bucket_count
+                estimate = lower + (upper - lower) * fraction
+                return min(max(estimate, self.min), self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        Summarize the histogram.
+
+        Returns:
+        - dict: the count, sum, mean, min, max, p50, p90, and p99 in seconds
+        """
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class StageTimer:
+    """
+    Context manager that records the duration of a stage in a Metrics instance.
+    """
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        """
+        Initialize the timer.
+
+        Args:
+        - metrics (Metrics): the metrics to record to
+        - stage (str): the stage name
+        """
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.count(f"{self.stage}_errors")
+
+
+class Metrics:
+    """
+    Per-stage timers, latency histograms, and counters for a generation run.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize empty metrics and start the run clock.
+
+        Args:
+        - buckets (Sequence[float]): the histogram bucket upper bounds, in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def timer(self, stage: str) -> StageTimer:
+        """
+        Get a context manager that times a stage.
+
+        Args:
+        - stage (str): the stage name
+
+        Returns:
+        - StageTimer: the timer
+        """
+        return StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record a duration for a stage.
+
+        Args:
+        - stage (str): the stage name
+        - seconds (float): the duration in seconds
+        """
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+        - name (str): the counter name
+        - value (float): the increment
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Get the wall-clock time since the metrics were created.
+
+        Returns:
+        - float: the elapsed time in seconds
+        """
+        return time.perf_counter() - self.start
+
+    def summary(self) -> dict:
+        """
+        Summarize the stages, counters, and per-second rates of every counter.
+
+        Returns:
+        - dict: the elapsed time, stage histograms, counters, and rates
+        """
+        elapsed = self.elapsed
+        with self.lock:
+            return {
+                "start_time": self.start_time,
+                "elapsed": elapsed,
+                "stages": {
+                    stage: histogram.to_dict()
+                    for stage, histogram in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "rates": {
+                    f"{name}_per_second": value / elapsed if elapsed > 0 else 0.0
+                    for name, value in self.counters.items()
+                },
+            }
+
+    def format_summary(self) -> str:
+        """
+        Format the summary as a human-readable table.
+
+        Returns:
+        - str: the summary text
+        """
+        summary = self.summary()
+        lines = [f"Elapsed: {summary['elapsed']:.2f}s"]
+        if summary["stages"]:
+            lines.append(
+                f"{'stage':<16} {'count':>8} {'total':>10} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10}"
+            )
+            for stage, stats in summary["stages"].items():
+                lines.append(
+                    f"{stage:<16} {stats['count']:>8} {stats['sum']:>9.2f}s "
+                    f"{stats['mean'] * 1000:>8.1f}ms {stats['p50'] * 1000:>8.1f}ms "
+                    f"{stats['p90'] * 1000:>8.1f}ms {stats['p99'] * 1000:>8.1f}ms"
+                )
+        for name, value in summary["counters"].items():
+            rate = summary["rates"][f"{name}_per_second"]
+            lines.append(f"{name}: {value:g} ({rate:.2f}/s)")
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+        - str: the metrics text
+        """
+        summary = self.summary()
+        lines: List[str] = []
+
+        name = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent in each generation stage.")
+        lines.append(f"# TYPE {name} histogram")
+        with self.lock:
+            for stage, histogram in self.stages.items():
+                cumulative = 0
+                for bucket, bucket_count in zip(
+                    histogram.buckets + (float("inf"),), histogram.counts
+                ):
+                    cumulative += bucket_count
+                    upper = "+Inf" if bucket == float("inf") else f"{bucket:g}"
+                    lines.append(
+                        f'{name}_bucket{{stage="{stage}",le="{upper}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+        for counter, value in summary["counters"].items():
+            counter_name = f"{PROMETHEUS_PREFIX}_{get_metric_name(counter)}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            lines.append(f"{counter_name} {value:g}")
+
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_elapsed_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_elapsed_seconds {summary['elapsed']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str | Path, export_format: Optional[str] = None) -> None:
+        """
+        Atomically write the metrics to a JSON or Prometheus textfile.
+
+        Args:
+        - path (str | Path): the output path
+        - export_format (str): json or prometheus; defaults to prometheus for .prom files and json otherwise
+        """
+        path = Path(path)
+        export_format = export_format or get_export_format(path)
+        if export_format == "json":
+            content = json.dumps(self.summary(), indent=2)
+        elif export_format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            raise ValueError(
+                f"Invalid metrics format: {export_format}; must be one of {EXPORT_FORMATS}"
+            )
+
+        # write then rename so readers such as the node exporter never see partial files
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(content, encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+class NullStageTimer:
+    """
+    No-op stage timer.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NullStageTimer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
+
+
+class NullMetrics(Metrics):
+    """
+    Disabled metrics; every method is a no-op.
+    """
+
+    enabled = False
+
+    def __init__(self):
+        """
+        Initialize the disabled metrics.
+        """
+        super().__init__()
+        self.timer_instance = NullStageTimer()
+
+    def timer(self, stage: str) -> NullStageTimer:  # type: ignore[override]
+        return self.timer_instance
+
+    def observe(self, stage: str, seconds: float) -> None:
+        return None
+
+    def count(self, name: str, value: float = 1) -> None:
+        return None
+
+
+# shared disabled metrics
+NULL_METRICS = NullMetrics()
+
+
+class PeriodicExporter:
+    """
+    Export metrics to a file at most once per interval.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        path: str | Path,
+        export_format: Optional[str] = None,
+        interval: float = 10.0,
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+        - metrics (Metrics): the metrics to export
+        - path (str | Path): the output path
+        - export_format (str): json or prometheus; defaults by file extension
+        - interval (float): the minimum number of seconds between exports
+        """
+        self.metrics = metrics
+        self.path = Path(path)
+        self.export_format = export_format or get_export_format(self.path)
+        if self.export_format not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Invalid metrics format: {self.export_format}; must be one of {EXPORT_FORMATS}"
+            )
+        self.interval = interval
+        self.last_export = 0.0
+
+    def maybe_export(self) -> bool:
+        """
+        Export the metrics if the interval has passed since the last export.
+
+        Returns:
+        - bool: whether the metrics were exported
+        """
+        now = time.perf_counter()
+        if self.last_export and now - self.last_export < self.interval:
+            return False
+        self.export()
+        return True
+
+    def export(self) -> None:
+        """
+        Export the metrics now.
+        """
+        self.metrics.export(self.path, self.export_format)
+        self.last_export = time.perf_counter()
+
+
+def get_export_format(path: str | Path) -> str:
+    """
+    Get the default export format for a metrics file.
+
+    Args:
+    - path (str | Path): the output path
+
+    Returns:
+    - str: prometheus for .prom files, json otherwise
+    """
+    return "prometheus" if str(path).endswith(".prom") else "json"
+
+
+def get_metric_name(name: str) -> str:
+    """
+    Normalize a counter name to a valid Prometheus metric name component.
+
+    Args:
+    - name (str): the counter name
+
+    Returns:
+    - str: the normalized name
+    """
+    return re.sub(r"[^a-zA-Z0-9_]+", "_", name).strip("_").lower()
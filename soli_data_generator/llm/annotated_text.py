@@ -4,7 +4,8 @@ Generate annotated text from a context based on SOLI or Faker entities.
 
 # imports
 import random
-from typing import Optional
+import threading
+from typing import Optional, Sequence, Tuple
 
 # packages
 from alea_llm_client.llms import BaseAIModel
@@ -14,6 +15,11 @@ from soli import SOLI, SOLI_TYPE_IRIS
 from soli_data_generator.llm.text import MAX_TEXT_LENGTH, MIN_TEXT_LENGTH
 
 # project
+from soli_data_generator.instrumentation import NULL_METRICS, Metrics
+from soli_data_generator.llm.balancer import LoadBalancedModel
+from soli_data_generator.procedural.registry import GraphRegistry
+from soli_data_generator.procedural.sampling import ClassSampler
+from soli_data_generator.procedural.spans import AnnotatedSample
 from soli_data_generator.procedural.template import (
     TemplateFormatter,
     get_all_tags,
@@ -36,7 +42,7 @@ class AnnotatedTextGenerator:
     # pylint: disable=too-many-arguments
     def __init__(
         self,
-        model: BaseAIModel,
+        model: Optional[BaseAIModel | Sequence[BaseAIModel]],
         min_types: int = 1,
         max_types: int = 3,
         min_text_length: int = MIN_TEXT_LENGTH,
@@ -47,20 +53,33 @@ class AnnotatedTextGenerator:
         github_repo_name: Optional[str] = "soli",
         github_repo_branch: Optional[str] = "1.0.0",
         use_cache: bool = True,
+        sampler: Optional[ClassSampler] = None,
+        correlated: bool = False,
+        metrics: Optional[Metrics] = None,
+        registry: Optional[GraphRegistry] = None,
+        compact_spans: bool = False,
     ):
         """
         Initialize the TemplateFormatter from the SOLI knowledge graph.
 
         Args:
-        - model (BaseAIModel): the AI model to use for text generation
+        - model (BaseAIModel | Sequence[BaseAIModel]): the AI model to use for text generation, or one model per endpoint to balance requests across; None when only building prompts or processing batch responses
         - source_type (str): the source type for the SOLI knowledge graph
         - github_repo_owner (str): the owner of the GitHub repository
         - github_repo_name (str): the name of the GitHub repository
         - github_repo_branch (str): the branch of the GitHub repository
         - use_cache (bool): whether to use the cache for the SOLI knowledge graph
+        - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+        - correlated (bool): whether to jointly draw related classes for co-occurring SOLI tags
+        - metrics (Metrics): the metrics to record per-stage timings to; disabled by default
+        - registry (GraphRegistry): a registry to take the graph of github_repo_branch from, and of other versions per sample; its formatters' sampling options replace sampler, correlated, and compact_spans
+        - compact_spans (bool): whether samples are AnnotatedSample objects with span IRIs instead of dicts with OWL classes
         """
-        # set the model
+        # set the model, balancing across endpoints if given several
+        if isinstance(model, (list, tuple)):
+            model = LoadBalancedModel(model)
         self.model = model
+        self.metrics = metrics if metrics is not None else NULL_METRICS
 
         # set params
         self.min_types = min_types
@@ -68,32 +87,99 @@ class AnnotatedTextGenerator:
         self.min_text_length = min_text_length
         self.max_text_length = max_text_length
 
-        # create the SOLI graph
-        self.graph = SOLI(
-            source_type=source_type,
-            http_url=http_url,
-            github_repo_owner=github_repo_owner,
-            github_repo_name=github_repo_name,
-            github_repo_branch=github_repo_branch,
-            use_cache=use_cache,
-        )
+        # share the graph and formatter of the default version from the registry,
+        # whose lock serializes sampling across the generators using it
+        self.registry = registry
+        self.version = github_repo_branch
+        if registry is not None:
+            entry = registry.get(github_repo_branch)
+            self.graph = entry.graph
+            self.formatter = entry.formatter
+            self.lock = entry.lock
+        else:
+            # create the SOLI graph
+            self.graph = SOLI(
+                source_type=source_type,
+                http_url=http_url,
+                github_repo_owner=github_repo_owner,
+                github_repo_name=github_repo_name,
+                github_repo_branch=github_repo_branch,
+                use_cache=use_cache,
+            )
+
+            # create the formatter over the same graph
+            self.formatter = TemplateFormatter(
+                soli_graph=self.graph,
+                sampler=sampler,
+                correlated=correlated,
+                compact_spans=compact_spans,
+            )
+
+            # serialize sampling so that concurrent calls only overlap in the model call
+            self.lock = threading.Lock()
+
+    def get_entry(
+        self, version: Optional[str] = None
+    ) -> Tuple[SOLI, TemplateFormatter, threading.Lock]:
+        """
+        Get the graph, formatter, and sampling lock of an ontology version.
+
+        Args:
+        - version (str): the ontology version from the registry, or None for the default version
+
+        Returns:
+        - tuple: the graph, formatter, and lock
+        """
+        if version is None:
+            # the formatter's graph stays current when the version is refreshed
+            return self.formatter.graph, self.formatter, self.lock
+        if self.registry is None:
+            raise ValueError("Sampling from a version requires a GraphRegistry")
+        entry = self.registry.get(version)
+        return entry.graph, entry.formatter, entry.lock
 
-    def get_soli_examples(self, max_depth: int = 3, num_examples: int = 5) -> dict:
+    def refresh(self, graph: Optional[SOLI] = None) -> dict:
+        """
+        Update the default version to its current upstream graph, rebuilding only the class pools it changes.
+
+        Args:
+        - graph (SOLI): the updated graph; required without a registry, and loaded by the registry's reloader by default otherwise
+
+        Returns:
+        - dict: the IRIs of the added, removed, and changed classes, and the refreshed tags
+        """
+        if self.registry is not None:
+            diff = self.registry.refresh(self.version, graph)
+        elif graph is None:
+            raise ValueError("Refreshing without a GraphRegistry requires the graph")
+        else:
+            diff = self.formatter.refresh(graph)
+        self.graph = self.formatter.graph
+        return diff
+
+    def get_soli_examples(
+        self,
+        max_depth: int = 3,
+        num_examples: int = 5,
+        graph: Optional[SOLI] = None,
+    ) -> dict:
         """
         Get a random sample of SOLI class examples by tag.
 
         Args:
         - max_depth (int): the maximum depth to search for examples
         - num_examples (int): the number of examples to return
+        - graph (SOLI): the graph to draw from; defaults to the generator's graph
 
         Returns:
         - dict: the examples by tag
         """
+        graph = graph if graph is not None else self.graph
         examples = {}
         for tag, tag_iri in SOLI_TYPE_IRIS.items():
             tag_name = normalize_soli_tag(tag.value)
             examples[tag_name] = []
-            tag_examples = self.graph.get_children(tag_iri, max_depth=max_depth)
+            tag_examples = graph.get_children(tag_iri, max_depth=max_depth)
             for owl_class in random.sample(
                 tag_examples, k=min(num_examples, len(tag_examples))
             ):
@@ -106,21 +192,30 @@ class AnnotatedTextGenerator:
 
         return examples
 
-    def generate(self) -> dict:
+    def build_prompt(self, version: Optional[str] = None) -> str:
         """
-        Generate text procedurally from SOLI or Faker entities.
+        Build a prompt asking the model for a tagged legal text template.
+
+        Args:
+        - version (str): the ontology version to draw from, or None for the default version
 
         Returns:
-        - str: the generated text
+        - str: the prompt
         """
-        # get the document type
-        document_type = random.choice(self.graph.get_document_artifacts(max_depth=3))
+        graph, _, lock = self.get_entry(version)
+        with lock:
+            # get the document type
+            document_type = random.choice(graph.get_document_artifacts(max_depth=3))
+
+            # get the tag examples
+            with self.metrics.timer("examples"):
+                tag_examples = self.get_soli_examples(graph=graph)
 
         # generate the prompt
-        prompt = format_prompt(
+        return format_prompt(
             {
                 "examples": "\n".join(ANNOTATED_EXAMPLES),
-                "tag_examples": self.get_soli_examples(),
+                "tag_examples": tag_examples,
                 "tags": get_all_tags(),
                 "instructions": format_instructions(
                     [
@@ -134,13 +229,42 @@ class AnnotatedTextGenerator:
             }
         )
 
+    def process_response(
+        self, text: str, version: Optional[str] = None
+    ) -> dict | AnnotatedSample:
+        """
+        Post-process a model response by formatting its template with span annotations.
+
+        Args:
+        - text (str): the model response text
+        - version (str): the ontology version to fill the template from, or None for the default version
+
+        Returns:
+        - dict | AnnotatedSample: the formatted text with span annotations
+        """
+        _, formatter, lock = self.get_entry(version)
+        with lock, self.metrics.timer("format_spans"):
+            return formatter.format_spans(text)
+
+    def generate(self, version: Optional[str] = None) -> dict | AnnotatedSample:
+        """
+        Generate text procedurally from SOLI or Faker entities.
+
+        Args:
+        - version (str): the ontology version to draw from, or None for the default version
+
+        Returns:
+        - str: the generated text
+        """
+        prompt = self.build_prompt(version)
+
         # get the template
-        template = self.model.chat(prompt).text
-        template_formatter = TemplateFormatter()
+        with self.metrics.timer("chat"):
+            template = self.model.chat(prompt).text
 
-        return template_formatter.format_spans(template)
+        return self.process_response(template, version)
 
-    def __call__(self, *args, **kwargs) -> dict:
+    def __call__(self, *args, **kwargs) -> dict | AnnotatedSample:
         """
         Generate text procedurally from SOLI or Faker entities.
 
@@ -0,0 +1,288 @@
+"""
+Least-outstanding-requests load balancing across model endpoints.
+
+LoadBalancedModel sends each `chat` call to the healthy endpoint with the fewest
+requests in flight.  Endpoints that fail repeatedly with connection errors, timeouts,
+or server errors are ejected for a cooldown period, after which a single probe
+request decides whether they rejoin the pool or are ejected again for longer.
+"""
+
+# imports
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# packages
+from alea_llm_client.llms import BaseAIModel
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.llm.concurrency import get_error_status, is_transient_error
+
+# consecutive failures before an endpoint is ejected
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# initial and maximum ejection periods, in seconds
+DEFAULT_EJECT_SECONDS = 10.0
+MAX_EJECT_SECONDS = 300.0
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """
+    Check whether an error indicates an unhealthy endpoint.
+
+    Rate limits are transient but mean the endpoint is up, so they do not count.
+
+    Args:
+    - error (BaseException): the error raised by the model
+
+    Returns:
+    - bool: True for connection errors, timeouts, and server errors
+    """
+    return is_transient_error(error) and get_error_status(error) != 429
+
+
+class Endpoint:
+    """
+    Health and throughput state for one model endpoint.
+    """
+
+    def __init__(self, model: BaseAIModel, name: Optional[str] = None):
+        """
+        Initialize the endpoint state.
+
+        Args:
+        - model (BaseAIModel): the model for the endpoint
+        - name (str): the endpoint name for reports; defaults to the model endpoint URL
+        """
+        self.model = model
+        self.name = name or getattr(model, "endpoint", None) or repr(model)
+        self.outstanding = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until: Optional[float] = None
+        self.eject_seconds = DEFAULT_EJECT_SECONDS
+        self.probing = False
+
+    def is_available(self, now: float) -> bool:
+        """
+        Check whether the endpoint can take a request.
+
+        Args:
+        - now (float): the current monotonic time
+
+        Returns:
+        - bool: True if healthy, or if its ejection has expired and no probe is in flight
+        """
+        if self.ejected_until is None:
+            return True
+        return now >= self.ejected_until and not self.probing
+
+    def to_dict(self, elapsed: float) -> dict:
+        """
+        Summarize the endpoint.
+
+        Args:
+        - elapsed (float): the seconds since the balancer was created
+
+        Returns:
+        - dict: the request counts, health, mean latency, and throughput
+        """
+        return {
+            "name": self.name,
+            "healthy": self.ejected_until is None,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "mean_latency": (
+                self.total_latency / self.successes if self.successes else 0.0
+            ),
+            "requests_per_second": self.successes / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class LoadBalancedModel:
+    """
+    Spread `chat` calls across several models with least-outstanding-requests
+    balancing and passive health checks.  Other attributes are delegated to the first
+    model.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[BaseAIModel],
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        eject_seconds: float = DEFAULT_EJECT_SECONDS,
+        max_eject_seconds: float = MAX_EJECT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the balancer.
+
+        Args:
+        - models (Sequence[BaseAIModel]): the models, one per endpoint
+        - failure_threshold (int): the consecutive failures before an endpoint is ejected
+        - eject_seconds (float): the first ejection period, doubled on each failed probe
+        - max_eject_seconds (float): the longest ejection period
+        - clock (Callable): the monotonic clock, in seconds
+        """
+        if len(models) == 0:
+            raise ValueError("LoadBalancedModel requires at least one model")
+
+        self.endpoints = [Endpoint(model) for model in models]
+        for endpoint in self.endpoints:
+            endpoint.eject_seconds = eject_seconds
+        self.failure_threshold = failure_threshold
+        self.initial_eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.next_index = 0
+        self.clock = clock
+        self.start = clock()
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not set on the balancer
+        return getattr(self.endpoints[0].model, name)
+
+    def select(self) -> Endpoint:
+        """
+        Choose the endpoint for the next request and mark it outstanding.
+
+        Ties are broken round-robin.  If every endpoint is ejected, the one whose
+        ejection ends first is used.
+
+        Returns:
+        - Endpoint: the selected endpoint
+        """
+        with self.lock:
+            now = self.clock()
+            # rotate the starting point so ties are spread round-robin
+            count = len(self.endpoints)
+            candidates = [
+                self.endpoints[(self.next_index + offset) % count]
+                for offset in range(count)
+            ]
+            candidates = [
+                endpoint for endpoint in candidates if endpoint.is_available(now)
+            ]
+            if candidates:
+                endpoint = min(candidates, key=lambda endpoint: endpoint.outstanding)
+                self.next_index = (self.endpoints.index(endpoint) + 1) % count
+            else:
+                endpoint = min(
+                    self.endpoints,
+                    key=lambda endpoint: (endpoint.ejected_until, endpoint.outstanding),
+                )
+
+            # an ejected endpoint gets a single probe request
+            if endpoint.ejected_until is not None:
+                endpoint.probing = True
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def record(
+        self, endpoint: Endpoint, latency: float, error: Optional[BaseException]
+    ) -> None:
+        """
+        Record the outcome of a request and update the endpoint's health.
+
+        Args:
+        - endpoint (Endpoint): the endpoint
+        - latency (float): the request latency in seconds
+        - error (BaseException): the error raised, or None on success
+        """
+        with self.lock:
+            endpoint.outstanding -= 1
+            probe = endpoint.probing
+            endpoint.probing = False
+
+            if error is None or not is_endpoint_failure(error):
+                if error is None:
+                    endpoint.successes += 1
+                    endpoint.total_latency += latency
+                endpoint.consecutive_failures = 0
+                endpoint.ejected_until = None
+                endpoint.eject_seconds = self.initial_eject_seconds
+                return
+
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if probe:
+                # failed probe: eject again for longer
+                endpoint.eject_seconds = min(
+                    self.max_eject_seconds, endpoint.eject_seconds * 2
+                )
+                self.eject(endpoint)
+            elif (
+                endpoint.ejected_until is None
+                and endpoint.consecutive_failures >= self.failure_threshold
+            ):
+                self.eject(endpoint)
+
+    def eject(self, endpoint: Endpoint) -> None:
+        """
+        Eject an endpoint for its current ejection period; must be called with the lock held.
+
+        Args:
+        - endpoint (Endpoint): the endpoint
+        """
+        endpoint.ejections += 1
+        endpoint.ejected_until = self.clock() + endpoint.eject_seconds
+
+    def chat(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        """
+        Send a chat request to the selected endpoint.
+
+        Args:
+        - *args: the chat positional arguments
+        - **kwargs: the chat keyword arguments
+
+        Returns:
+        - ModelResponse: the model response
+        """
+        endpoint = self.select()
+        start = time.perf_counter()
+        try:
+            response = endpoint.model.chat(*args, **kwargs)
+        except Exception as error:
+            self.record(endpoint, time.perf_counter() - start, error)
+            raise
+        self.record(endpoint, time.perf_counter() - start, None)
+        return response
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the per-endpoint request counts, health, latency, and throughput.
+
+        Returns:
+        - list: the stats for each endpoint
+        """
+        with self.lock:
+            elapsed = self.clock() - self.start
+            return [endpoint.to_dict(elapsed) for endpoint in self.endpoints]
+
+    def format_stats(self) -> str:
+        """
+        Format the per-endpoint stats as a human-readable table.
+
+        Returns:
+        - str: the stats text
+        """
+        lines = [
+            f"{'endpoint':<40} {'requests':>9} {'ok':>7} {'failed':>7} {'mean':>9} {'req/s':>8}  status"
+        ]
+        for stats in self.stats():
+            lines.append(
+                f"{stats['name']:<40} {stats['requests']:>9} {stats['successes']:>7} "
+                f"{stats['failures']:>7} {stats['mean_latency'] * 1000:>7.0f}ms "
+                f"{stats['requests_per_second']:>8.2f}  "
+                f"{'healthy' if stats['healthy'] else 'ejected'}"
+            )
+        return "\n".join(lines)
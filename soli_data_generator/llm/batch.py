@@ -0,0 +1,296 @@
+"""
+Offline batch generation: build prompt files, then post-process completed responses.
+
+Batch generation separates prompt construction from inference:
+
+ 1. `write_batch_requests` builds prompts from a generator into a JSONL request file in
+    the OpenAI batch format, which the OpenAI Batch API and `vllm run-batch` accept as-is.
+ 2. The requests are completed offline, or locally with `run_batch_requests`.
+ 3. `process_batch_responses` reads the completed responses and post-processes them in
+    bulk, formatting annotated templates in worker processes when requested.
+"""
+
+# imports
+import json
+import threading
+from collections import deque
+from typing import Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# packages
+from alea_llm_client.llms import BaseAIModel
+
+# project
+from soli_data_generator.llm.annotated_text import AnnotatedTextGenerator
+from soli_data_generator.llm.concurrency import iter_concurrent, iter_sequential
+from soli_data_generator.llm.text import TextGenerator
+from soli_data_generator.procedural.stream import DEFAULT_STREAM_CHUNK_SIZE
+
+# the request URL for chat completion batch requests
+BATCH_CHAT_URL = "/v1/chat/completions"
+
+# the custom ID prefix for batch requests
+DEFAULT_ID_PREFIX = "sample"
+
+
+def build_batch_request(
+    custom_id: str,
+    prompt: str,
+    model_name: str,
+    max_tokens: Optional[int] = None,
+) -> dict:
+    """
+    Build a chat completion batch request.
+
+    Args:
+    - custom_id (str): the request ID used to match the response
+    - prompt (str): the user prompt
+    - model_name (str): the model name
+    - max_tokens (int): the maximum number of completion tokens; defaults to the backend's limit
+
+    Returns:
+    - dict: the batch request
+    """
+    body: dict[str, Any] = {
+        "model": model_name,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    if max_tokens is not None:
+        body["max_tokens"] = max_tokens
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_CHAT_URL,
+        "body": body,
+    }
+
+
+def write_batch_requests(
+    generator: TextGenerator | AnnotatedTextGenerator,
+    num_samples: int,
+    output_file: TextIO,
+    model_name: str,
+    max_tokens: Optional[int] = None,
+    id_prefix: str = DEFAULT_ID_PREFIX,
+) -> int:
+    """
+    Build prompts from a generator and write them as batch requests.
+
+    Args:
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator to build prompts with
+    - num_samples (int): the number of requests to write
+    - output_file (TextIO): the open JSONL request file
+    - model_name (str): the model name
+    - max_tokens (int): the maximum number of completion tokens per request
+    - id_prefix (str): the custom ID prefix
+
+    Returns:
+    - int: the number of requests written
+    """
+    width = len(str(max(num_samples - 1, 0)))
+    for index in range(num_samples):
+        request = build_batch_request(
+            f"{id_prefix}-{index:0{width}d}",
+            generator.build_prompt(),
+            model_name,
+            max_tokens=max_tokens,
+        )
+        output_file.write(json.dumps(request) + "\n")
+    return num_samples
+
+
+def read_batch_requests(input_file: TextIO) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily read the prompts from a batch request file.
+
+    Args:
+    - input_file (TextIO): the open JSONL request file
+
+    Yields:
+    - tuple: the custom ID and the prompt
+    """
+    for line in input_file:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        messages = request["body"]["messages"]
+        yield request["custom_id"], messages[-1]["content"]
+
+
+def get_response_text(record: dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the completion text from a batch response record.
+
+    Supports the OpenAI and vLLM batch output format, the Anthropic message batch result
+    format, and plain `{"custom_id": ..., "text": ...}` records.
+
+    Args:
+    - record (dict): the response record
+
+    Returns:
+    - tuple: the completion text, or None, and the error message, or None
+    """
+    # plain text records
+    if "text" in record:
+        return record["text"], None
+
+    # anthropic message batch results
+    if "result" in record:
+        result = record["result"]
+        if result.get("type") != "succeeded":
+            return None, json.dumps(result.get("error") or result.get("type"))
+        return (
+            "".join(
+                block.get("text", "")
+                for block in result["message"]["content"]
+                if block.get("type") == "text"
+            ),
+            None,
+        )
+
+    # openai and vllm batch output
+    if record.get("error"):
+        return None, json.dumps(record["error"])
+    response = record.get("response") or {}
+    if response.get("status_code", 200) != 200:
+        return (
+            None,
+            f"HTTP {response['status_code']}: {json.dumps(response.get('body'))}",
+        )
+    try:
+        return response["body"]["choices"][0]["message"]["content"], None
+    except (KeyError, IndexError, TypeError):
+        return None, f"Invalid batch response: {json.dumps(record)}"
+
+
+def read_batch_responses(
+    input_file: TextIO,
+) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Lazily read the completions from a batch response file.
+
+    Args:
+    - input_file (TextIO): the open JSONL response file
+
+    Yields:
+    - tuple: the custom ID, the completion text or None, and the error message or None
+    """
+    for line in input_file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        text, error = get_response_text(record)
+        yield record.get("custom_id"), text, error
+
+
+def process_batch_responses(
+    generator: TextGenerator | AnnotatedTextGenerator,
+    responses: Iterable[Tuple[str, Optional[str], Optional[str]]],
+    workers: int = 0,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> Iterator[Tuple[str, Optional[str | dict], Optional[str]]]:
+    """
+    Post-process completed batch responses into samples.
+
+    Annotated templates are formatted with span annotations through the generator's
+    formatter stream, in worker processes if `workers` is above 0.  Successful samples
+    are yielded in response order, followed by the failed responses.
+
+    Args:
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator that built the prompts
+    - responses (Iterable[tuple]): the custom IDs, completion texts, and error messages
+    - workers (int): the number of worker processes for formatting; 0 formats in this process
+    - chunk_size (int): the number of templates sent to a worker at a time
+
+    Yields:
+    - tuple: the custom ID, the sample or None, and the error message or None
+    """
+    failures: List[Tuple[str, str]] = []
+    pending: deque = deque()
+
+    def iter_texts() -> Iterator[str]:
+        for custom_id, text, error in responses:
+            if error is not None or text is None:
+                failures.append((custom_id, error or "Empty response"))
+                continue
+            pending.append(custom_id)
+            yield text
+
+    if isinstance(generator, AnnotatedTextGenerator):
+        samples = generator.formatter.stream(
+            iter_texts(), spans=True, workers=workers, chunk_size=chunk_size
+        )
+    else:
+        samples = (generator.process_response(text) for text in iter_texts())
+
+    for sample in samples:
+        yield pending.popleft(), sample, None
+
+    for custom_id, error in failures:
+        yield custom_id, None, error
+
+
+def run_batch_requests(
+    model: BaseAIModel,
+    requests: Iterable[Tuple[str, str]],
+    output_file: TextIO,
+    concurrency: int = 1,
+) -> Tuple[int, int]:
+    """
+    Complete batch requests with a model and write the responses in batch output format.
+
+    This is a local stand-in for a batch API or an offline vLLM run.
+
+    Args:
+    - model (BaseAIModel): the model
+    - requests (Iterable[tuple]): the custom IDs and prompts
+    - output_file (TextIO): the open JSONL response file
+    - concurrency (int): the maximum number of concurrent requests
+
+    Returns:
+    - tuple: the number of successful and failed requests
+    """
+    requests = list(requests)
+    remaining = iter(requests)
+    lock = threading.Lock()
+
+    def complete() -> Tuple[str, str | Exception]:
+        with lock:
+            custom_id, prompt = next(remaining)
+        try:
+            return custom_id, model.chat(prompt).text
+        except Exception as error:  # pylint: disable=broad-except
+            return custom_id, error
+
+    if concurrency > 1:
+        results = iter_concurrent(complete, len(requests), concurrency)
+    else:
+        results = iter_sequential(complete, len(requests))
+
+    num_succeeded, num_failed = 0, 0
+    for (custom_id, outcome), _ in results:
+        if isinstance(outcome, Exception):
+            record = {
+                "custom_id": custom_id,
+                "response": None,
+                "error": {"message": str(outcome)},
+            }
+            num_failed += 1
+        else:
+            record = {
+                "custom_id": custom_id,
+                "response": {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": outcome},
+                            }
+                        ]
+                    },
+                },
+                "error": None,
+            }
+            num_succeeded += 1
+        output_file.write(json.dumps(record) + "\n")
+    return num_succeeded, num_failed
@@ -0,0 +1,418 @@
+"""
+Token accounting and token and time budgets for LLM generation runs.
+
+A UsageTracker records the prompt and completion tokens of every model call, from the
+response's usage metadata when the backend reports it and from a characters-per-token
+estimate otherwise.  Calls register their estimated cost while in flight, so a Budget
+can stop a run before the calls already started would exceed the token budget.
+
+Runs that stop early, for a budget or an interruption, leave a resume manifest next to
+the output recording what was written and spent, so the next run can pick up the
+remaining samples.
+"""
+
+# imports
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# packages
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# rough characters per token for estimating tokens when usage is not reported
+CHARS_PER_TOKEN = 4
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Args:
+    - text (str): the text
+
+    Returns:
+    - int: the estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_usage_counts(response: ModelResponse) -> Optional[Tuple[int, int]]:
+    """
+    Get the prompt and completion tokens of a response from its usage metadata.
+
+    Args:
+    - response (ModelResponse): the model response
+
+    Returns:
+    - tuple | None: the prompt and completion tokens, or None if the usage is not reported
+    """
+    usage = (response.metadata or {}).get("usage") or {}
+
+    # OpenAI-style and Anthropic-style token counts
+    prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+    completion_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+    if prompt_tokens is None and completion_tokens is None:
+        if "total_tokens" in usage:
+            return 0, int(usage["total_tokens"])
+        return None
+    return int(prompt_tokens or 0), int(completion_tokens or 0)
+
+
+def get_prompt_text(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    """
+    Get the text of a chat request, for estimating its prompt tokens.
+
+    Args:
+    - args (tuple): the chat positional arguments
+    - kwargs (dict): the chat keyword arguments
+
+    Returns:
+    - str: the concatenated prompt text
+    """
+    parts = [str(arg) for arg in args]
+    parts.extend(str(message) for message in kwargs.get("messages", []))
+    return "".join(parts)
+
+
+class UsageTracker:
+    """
+    Thread-safe running totals of model calls and tokens, with in-flight reservations.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Start the totals at zero.
+
+        Args:
+        - clock (Callable): the monotonic clock, in seconds
+        """
+        self.clock = clock
+        self.started = clock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_requests = 0
+        self.in_flight_tokens = 0
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> None:
+        """
+        Register the estimated tokens of a call that is about to be sent.
+
+        Args:
+        - tokens (int): the estimated tokens
+        """
+        with self.lock:
+            self.in_flight_tokens += tokens
+
+    def release(self, tokens: int) -> None:
+        """
+        Drop the reservation of a call that failed.
+
+        Args:
+        - tokens (int): the reserved tokens
+        """
+        with self.lock:
+            self.in_flight_tokens -= tokens
+
+    def record(
+        self,
+        response: ModelResponse,
+        prompt: str,
+        reserved: int = 0,
+    ) -> Tuple[int, int]:
+        """
+        Record the tokens of a completed call and drop its reservation.
+
+        Args:
+        - response (ModelResponse): the model response
+        - prompt (str): the prompt text, for the estimate when usage is not reported
+        - reserved (int): the tokens reserved for the call
+
+        Returns:
+        - tuple: the prompt and completion tokens recorded
+        """
+        counts = get_usage_counts(response)
+        estimated = counts is None
+        if counts is None:
+            counts = (
+                estimate_text_tokens(prompt),
+                estimate_text_tokens(response.text or ""),
+            )
+        with self.lock:
+            self.in_flight_tokens -= reserved
+            self.requests += 1
+            self.prompt_tokens += counts[0]
+            self.completion_tokens += counts[1]
+            if estimated:
+                self.estimated_requests += 1
+        return counts
+
+    @property
+    def total_tokens(self) -> int:
+        """
+        Get the tokens used by completed calls.
+
+        Returns:
+        - int: the prompt plus completion tokens
+        """
+        return self.prompt_tokens + self.completion_tokens
+
+    def elapsed(self) -> float:
+        """
+        Get the seconds since tracking started.
+
+        Returns:
+        - float: the elapsed seconds
+        """
+        return self.clock() - self.started
+
+    def tokens_per_second(self) -> float:
+        """
+        Get the cumulative token throughput.
+
+        Returns:
+        - float: the tokens per second since tracking started
+        """
+        elapsed = self.elapsed()
+        return self.total_tokens / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the usage.
+
+        Returns:
+        - dict: the request and token counts, throughput, and mean tokens per request
+        """
+        with self.lock:
+            requests = self.requests
+            prompt_tokens = self.prompt_tokens
+            completion_tokens = self.completion_tokens
+            estimated_requests = self.estimated_requests
+        total_tokens = prompt_tokens + completion_tokens
+        return {
+            "requests": requests,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "estimated_requests": estimated_requests,
+            "tokens_per_request": total_tokens / requests if requests else 0.0,
+            "tokens_per_second": self.tokens_per_second(),
+            "elapsed": self.elapsed(),
+        }
+
+    def format_summary(self) -> str:
+        """
+        Format the usage as one line.
+
+        Returns:
+        - str: the summary text
+        """
+        summary = self.summary()
+        line = (
+            f"Tokens: {summary['prompt_tokens']} prompt + {summary['completion_tokens']} "
+            f"completion = {summary['total_tokens']} over {summary['requests']} requests "
+            f"({summary['tokens_per_second']:.1f}/s)"
+        )
+        if summary["estimated_requests"]:
+            line += f"; {summary['estimated_requests']} requests estimated"
+        return line
+
+
+class BudgetExhausted(Exception):
+    """
+    Raised when a model call is refused because a budget is spent.
+    """
+
+    def __init__(self, reason: str):
+        """
+        Args:
+        - reason (str): token_budget or time_budget
+        """
+        super().__init__(f"{reason} exhausted")
+        self.reason = reason
+
+
+class Budget:
+    """
+    Token and wall-clock limits for a generation run.
+    """
+
+    def __init__(
+        self,
+        usage: UsageTracker,
+        token_budget: Optional[int] = None,
+        time_budget: Optional[float] = None,
+    ):
+        """
+        Set the limits.
+
+        Args:
+        - usage (UsageTracker): the usage of the run
+        - token_budget (int): the maximum prompt plus completion tokens, or None for no limit
+        - time_budget (float): the maximum seconds to start new calls, or None for no limit
+        """
+        if token_budget is not None and token_budget < 1:
+            raise ValueError("token_budget must be at least 1")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("time_budget must be positive")
+        self.usage = usage
+        self.token_budget = token_budget
+        self.time_budget = time_budget
+
+    def check(self, tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Check whether a call may be started.  The caller must hold the usage lock.
+
+        Args:
+        - tokens (int): the estimated tokens of the call, or None for the mean per call
+
+        Returns:
+        - str | None: token_budget or time_budget if that budget is spent, otherwise None
+        """
+        if self.time_budget is not None and self.usage.elapsed() >= self.time_budget:
+            return "time_budget"
+        if self.token_budget is not None:
+            used = self.usage.total_tokens
+            requests = self.usage.requests
+            expected = used / requests if requests else (tokens or 0)
+            if used + self.usage.in_flight_tokens + expected > self.token_budget:
+                return "token_budget"
+        return None
+
+    def exhausted(self) -> Optional[str]:
+        """
+        Check whether another call should be scheduled.
+
+        A call is not scheduled once the tokens used and reserved by calls in flight,
+        plus the mean tokens per call so far, would exceed the token budget.  Calls
+        already in flight are allowed to finish, so a time budget can be overrun by up
+        to one call's latency.
+
+        Returns:
+        - str | None: token_budget or time_budget if that budget is spent, otherwise None
+        """
+        with self.usage.lock:
+            return self.check()
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Reserve the estimated tokens of a call that is about to be sent, or refuse it.
+
+        Schedulers stop submitting calls once the budget is exhausted, but calls they
+        queued earlier may still reach the model; checking and reserving atomically
+        here keeps those from overrunning the budget.
+
+        Args:
+        - tokens (int): the estimated tokens of the call
+
+        Raises:
+        - BudgetExhausted: if the budget is spent
+        """
+        with self.usage.lock:
+            reason = self.check(tokens)
+            if reason is not None:
+                raise BudgetExhausted(reason)
+            self.usage.in_flight_tokens += tokens
+
+
+def get_manifest_path(output_path: str) -> str:
+    """
+    Get the resume manifest path of a generation output.
+
+    Args:
+    - output_path (str): the output JSONL path
+
+    Returns:
+    - str: the manifest path
+    """
+    return str(Path(output_path).with_suffix("")) + ".manifest.json"
+
+
+def read_manifest(output_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the resume manifest of a generation output.
+
+    Args:
+    - output_path (str): the output JSONL path
+
+    Returns:
+    - dict | None: the manifest, or None if the output has none
+    """
+    manifest_path = get_manifest_path(output_path)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "rt", encoding="utf-8") as input_file:
+        return json.load(input_file)
+
+
+def write_manifest(output_path: str, manifest: Dict[str, Any]) -> str:
+    """
+    Atomically write the resume manifest of a generation output.
+
+    Args:
+    - output_path (str): the output JSONL path
+    - manifest (dict): the manifest
+
+    Returns:
+    - str: the manifest path
+    """
+    manifest_path = get_manifest_path(output_path)
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "wt", encoding="utf-8") as output_file:
+        json.dump(manifest, output_file, indent=2)
+    os.replace(temp_path, manifest_path)
+    return manifest_path
+
+
+def update_manifest(
+    previous: Optional[Dict[str, Any]],
+    output_path: str,
+    requested_samples: int,
+    written_samples: int,
+    usage: UsageTracker,
+    stop_reason: str,
+) -> Dict[str, Any]:
+    """
+    Add a run to the resume manifest of a generation output.
+
+    Args:
+    - previous (dict | None): the manifest of the earlier runs, or None for a first run
+    - output_path (str): the output JSONL path
+    - requested_samples (int): the number of samples the job should produce across runs
+    - written_samples (int): the number of samples written by this run
+    - usage (UsageTracker): the usage of this run
+    - stop_reason (str): why this run stopped
+
+    Returns:
+    - dict: the manifest with cumulative samples and usage
+    """
+    totals = {
+        key: (previous or {}).get("usage", {}).get(key, 0)
+        for key in (
+            "requests",
+            "prompt_tokens",
+            "completion_tokens",
+            "total_tokens",
+            "estimated_requests",
+            "elapsed",
+        )
+    }
+    summary = usage.summary()
+    for key in totals:
+        totals[key] += summary[key]
+
+    written_samples += (previous or {}).get("written_samples", 0)
+    return {
+        "output": os.path.abspath(output_path),
+        "requested_samples": requested_samples,
+        "written_samples": written_samples,
+        "remaining_samples": max(0, requested_samples - written_samples),
+        "runs": (previous or {}).get("runs", 0) + 1,
+        "stop_reason": stop_reason,
+        "usage": totals,
+    }
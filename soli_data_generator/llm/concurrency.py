@@ -0,0 +1,666 @@
+"""
+Adaptive concurrency, rate limiting, retries, and hedging for LLM calls.
+
+RateLimitedModel wraps a BaseAIModel and gates each `chat` call through:
+ - token buckets for requests/min and tokens/min
+ - an AIMD limiter on in-flight requests, which grows while latency stays near its
+   observed baseline and halves on overload signals (429s, 5xx, timeouts) or when
+   latency degrades
+ - retries with full-jitter exponential backoff for transient errors
+ - optional hedged requests, sent when the first attempt is slower than a delay
+"""
+
+# imports
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# packages
+import httpx
+from alea_llm_client.core.exceptions import ALEAAuthenticationError
+from alea_llm_client.llms import BaseAIModel
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.instrumentation import NULL_METRICS, Metrics
+from soli_data_generator.llm.budget import (
+    CHARS_PER_TOKEN,
+    Budget,
+    UsageTracker,
+    get_prompt_text,
+)
+
+# HTTP status codes that signal a transient, retryable failure
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# status codes in error messages from the model client, e.g. "Server error '503 ...'"
+RE_STATUS_CODE = re.compile(r"\b(?P<status>[1-5][0-9]{2})\s+[A-Z][A-Za-z ]+")
+
+# message fragments for transient errors that carry no status code
+TRANSIENT_MESSAGES = ("timed out", "timeout", "connect", "connection", "temporarily")
+
+# default completion tokens reserved per request before the actual usage is known
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def get_error_status(error: BaseException) -> Optional[int]:
+    """
+    Get the HTTP status code behind a model error, if any.
+
+    Args:
+    - error (BaseException): the error raised by the model
+
+    Returns:
+    - int | None: the HTTP status code
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, httpx.HTTPStatusError):
+            return current.response.status_code
+        match = RE_STATUS_CODE.search(str(current))
+        if match is not None:
+            return int(match.group("status"))
+        current = current.__cause__
+    return None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Check whether a model error is transient and worth retrying.
+
+    Args:
+    - error (BaseException): the error raised by the model
+
+    Returns:
+    - bool: True for rate limits, server errors, timeouts, and connection errors
+    """
+    if isinstance(error, ALEAAuthenticationError):
+        return False
+
+    status = get_error_status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, (httpx.TimeoutException, httpx.TransportError)):
+            return True
+        if isinstance(current, (TimeoutError, ConnectionError)):
+            return True
+        message = str(current).lower()
+        if any(fragment in message for fragment in TRANSIENT_MESSAGES):
+            return True
+        current = current.__cause__
+    return False
+
+
+def get_usage_tokens(response: ModelResponse) -> Optional[int]:
+    """
+    Get the total tokens used by a response from its usage metadata.
+
+    Args:
+    - response (ModelResponse): the model response
+
+    Returns:
+    - int | None: the total tokens, or None if the usage is not reported
+    """
+    usage = (response.metadata or {}).get("usage") or {}
+    if "total_tokens" in usage:
+        return int(usage["total_tokens"])
+
+    # OpenAI-style and Anthropic-style token counts
+    tokens = 0
+    found = False
+    for key in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens"):
+        if key in usage:
+            tokens += int(usage[key])
+            found = True
+    return tokens if found else None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that refills continuously at a per-minute rate.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize a full bucket.
+
+        Args:
+        - rate_per_minute (float): the refill rate, in tokens per minute
+        - capacity (float): the bucket size; defaults to one minute of tokens
+        - clock (Callable): the monotonic clock, in seconds
+        - sleep (Callable): the function used to wait for tokens
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(rate_per_minute)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self) -> None:
+        """
+        Add the tokens accrued since the last update; must be called with the lock held.
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Take tokens if available.
+
+        Requests larger than the capacity are allowed once the bucket is full, so a
+        single oversized request cannot block forever.
+
+        Args:
+        - amount (float): the number of tokens
+
+        Returns:
+        - float: 0.0 if the tokens were taken, otherwise the seconds until they will be available
+        """
+        with self.lock:
+            self.refill()
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take tokens, waiting until they are available.
+
+        Args:
+        - amount (float): the number of tokens
+
+        Returns:
+        - float: the total seconds waited
+        """
+        waited = 0.0
+        while (delay := self.try_acquire(amount)) > 0:
+            self.sleep(delay)
+            waited += delay
+        return waited
+
+    def adjust(self, amount: float) -> None:
+        """
+        Debit (positive) or credit (negative) tokens after the fact, e.g. once the actual
+        usage of a request is known.  The balance may go negative.
+
+        Args:
+        - amount (float): the number of tokens to debit
+        """
+        with self.lock:
+            self.refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on the number of in-flight requests.
+
+    Each success within `latency_tolerance` times the baseline latency adds
+    `increase / limit` to the limit (about `increase` per round trip at full load);
+    overload errors and degraded latency multiply the limit by `decrease_factor`, at
+    most once per baseline latency so that one burst of failures counts once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        baseline_smoothing: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+        - initial_limit (int): the starting in-flight limit
+        - min_limit (int): the lowest in-flight limit
+        - max_limit (int): the highest in-flight limit
+        - increase (float): the additive increase per round trip
+        - decrease_factor (float): the multiplicative decrease on overload
+        - latency_tolerance (float): the latency, relative to the baseline, treated as overload
+        - baseline_smoothing (float): the weight of new samples in the baseline latency
+        - clock (Callable): the monotonic clock, in seconds
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min <= initial <= max")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.baseline_smoothing = baseline_smoothing
+        self.clock = clock
+        self.baseline: Optional[float] = None
+        self.in_flight = 0
+        self.last_decrease = float("-inf")
+        self.condition = threading.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        """
+        Get the current whole-request limit.
+
+        Returns:
+        - int: the in-flight limit
+        """
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for an in-flight slot.
+
+        Args:
+        - timeout (float): the maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+        - bool: whether a slot was acquired
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.in_flight < self.current_limit, timeout
+            ):
+                return False
+            self.in_flight += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        """
+        Take an in-flight slot only if one is free.
+
+        Returns:
+        - bool: whether a slot was acquired
+        """
+        return self.acquire(timeout=0)
+
+    def release(
+        self, latency: Optional[float] = None, overloaded: bool = False
+    ) -> None:
+        """
+        Release a slot and update the limit from the request outcome.
+
+        Args:
+        - latency (float): the request latency in seconds, or None if not measured
+        - overloaded (bool): whether the request failed with an overload signal
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.decrease()
+            elif latency is not None:
+                if self.baseline is None:
+                    self.baseline = latency
+                if latency > self.baseline * self.latency_tolerance:
+                    self.decrease()
+                else:
+                    self.limit = min(
+                        self.max_limit, self.limit + self.increase / self.limit
+                    )
+                # let the baseline drift so a lasting change in latency is not
+                # treated as overload forever
+                self.baseline += self.baseline_smoothing * (latency - self.baseline)
+            self.condition.notify_all()
+
+    def decrease(self) -> None:
+        """
+        Multiplicatively decrease the limit; must be called with the lock held.
+        """
+        now = self.clock()
+        if self.baseline is not None and now - self.last_decrease < self.baseline:
+            return
+        self.last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+
+
+class RateLimitedModel:
+    """
+    Wrapper around a BaseAIModel that rate-limits, adaptively bounds, retries, and
+    optionally hedges `chat` calls.  Other attributes are delegated to the model.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(
+        self,
+        model: BaseAIModel,
+        limiter: Optional[AdaptiveLimiter] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        completion_tokens: int = DEFAULT_COMPLETION_TOKENS,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        hedge_after: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        usage: Optional[UsageTracker] = None,
+        budget: Optional[Budget] = None,
+    ):
+        """
+        Initialize the wrapper.
+
+        Args:
+        - model (BaseAIModel): the model to wrap
+        - limiter (AdaptiveLimiter): the in-flight limiter; defaults to an AdaptiveLimiter
+        - requests_per_minute (float): the request rate limit, or None for no limit
+        - tokens_per_minute (float): the token rate limit, or None for no limit
+        - completion_tokens (int): the completion tokens reserved per request until usage is known
+        - max_retries (int): the number of retries for transient errors
+        - backoff_base (float): the backoff ceiling for the first retry, in seconds
+        - backoff_max (float): the maximum backoff ceiling, in seconds
+        - hedge_after (float): send a second request if the first takes longer than this many seconds
+        - metrics (Metrics): the metrics to record attempts, retries, and hedges to
+        - rng (random.Random): the random source for backoff jitter
+        - sleep (Callable): the function used to wait between retries
+        - usage (UsageTracker): the tracker to record the tokens of every call to
+        - budget (Budget): the budget that calls must fit in; defaults the usage to its tracker
+        """
+        self.model = model
+        self.limiter = limiter if limiter is not None else AdaptiveLimiter()
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.rng = rng if rng is not None else random
+        self.sleep = sleep
+        self.budget = budget
+        self.usage = usage if usage is not None or budget is None else budget.usage
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.executor_lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not set on the wrapper
+        return getattr(self.model, name)
+
+    def estimate_tokens(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> int:
+        """
+        Estimate the tokens a chat request will use before it is sent.
+
+        Args:
+        - args (tuple): the chat positional arguments
+        - kwargs (dict): the chat keyword arguments
+
+        Returns:
+        - int: the estimated prompt plus completion tokens
+        """
+        chars = len(get_prompt_text(args, kwargs))
+        completion_tokens = kwargs.get("max_tokens", self.completion_tokens)
+        return chars // CHARS_PER_TOKEN + int(completion_tokens)
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Get the full-jitter backoff before a retry.
+
+        Args:
+        - attempt (int): the zero-based attempt that failed
+
+        Returns:
+        - float: the seconds to wait
+        """
+        return self.rng.uniform(
+            0, min(self.backoff_max, self.backoff_base * (2**attempt))
+        )
+
+    def chat(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        """
+        Send a chat request through the rate limits, limiter, retries, and hedging.
+
+        Args:
+        - *args: the chat positional arguments
+        - **kwargs: the chat keyword arguments
+
+        Returns:
+        - ModelResponse: the model response
+
+        Raises:
+        - BudgetExhausted: if the budget is spent before the call is sent
+        """
+        for attempt in range(self.max_retries + 1):
+            estimated_tokens = self.estimate_tokens(args, kwargs)
+            if self.budget is not None:
+                self.budget.acquire(estimated_tokens)
+            elif self.usage is not None:
+                self.usage.reserve(estimated_tokens)
+            if self.request_bucket is not None:
+                self.request_bucket.acquire()
+            if self.token_bucket is not None:
+                self.token_bucket.acquire(estimated_tokens)
+
+            try:
+                response = (
+                    self.chat_hedged(*args, **kwargs)
+                    if self.hedge_after is not None
+                    else self.chat_once(*args, **kwargs)
+                )
+            except Exception as error:  # pylint: disable=broad-except
+                if self.usage is not None:
+                    self.usage.release(estimated_tokens)
+                if not is_transient_error(error) or attempt == self.max_retries:
+                    raise
+                self.metrics.count("retries")
+                self.sleep(self.get_backoff(attempt))
+                continue
+
+            # reconcile the token estimate with the reported usage
+            if self.token_bucket is not None:
+                usage_tokens = get_usage_tokens(response)
+                if usage_tokens is not None:
+                    self.token_bucket.adjust(usage_tokens - estimated_tokens)
+
+            # account the call's tokens, estimating them if the usage is not reported
+            if self.usage is not None:
+                prompt_tokens, completion_tokens = self.usage.record(
+                    response, get_prompt_text(args, kwargs), estimated_tokens
+                )
+                self.metrics.count("prompt_tokens", prompt_tokens)
+                self.metrics.count("completion_tokens", completion_tokens)
+            return response
+
+        # unreachable; the last attempt either returns or raises
+        raise RuntimeError("Retry loop exited without a response")
+
+    def chat_once(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        """
+        Send a single chat request within an in-flight slot.
+
+        Args:
+        - *args: the chat positional arguments
+        - **kwargs: the chat keyword arguments
+
+        Returns:
+        - ModelResponse: the model response
+        """
+        self.limiter.acquire()
+        return self.call_model(*args, **kwargs)
+
+    def call_model(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        """
+        Call the model in an already-acquired slot, then release it with the outcome.
+
+        Args:
+        - *args: the chat positional arguments
+        - **kwargs: the chat keyword arguments
+
+        Returns:
+        - ModelResponse: the model response
+        """
+        start = time.perf_counter()
+        try:
+            response = self.model.chat(*args, **kwargs)
+        except Exception as error:
+            latency = time.perf_counter() - start
+            overloaded = is_transient_error(error)
+            self.limiter.release(None if overloaded else latency, overloaded)
+            self.metrics.count("overloaded" if overloaded else "failed_requests")
+            raise
+
+        latency = time.perf_counter() - start
+        self.limiter.release(latency)
+        self.metrics.observe("request", latency)
+        return response
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the executor used for hedged requests, creating it on first use.
+
+        Returns:
+        - ThreadPoolExecutor: the executor
+        """
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=2 * self.limiter.max_limit,
+                    thread_name_prefix="hedge",
+                )
+            return self.executor
+
+    def chat_hedged(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        """
+        Send a chat request and, if it is slower than `hedge_after`, a second one; the
+        first successful response wins.  The hedge is only sent if the limiter has a
+        free slot, so hedging never exceeds the in-flight limit.
+
+        Args:
+        - *args: the chat positional arguments
+        - **kwargs: the chat keyword arguments
+
+        Returns:
+        - ModelResponse: the first successful model response
+        """
+        executor = self.get_executor()
+        self.limiter.acquire()
+        futures = [executor.submit(self.call_model, *args, **kwargs)]
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done and self.limiter.try_acquire():
+            self.metrics.count("hedges")
+            futures.append(executor.submit(self.call_model, *args, **kwargs))
+
+        return self.get_first_result(futures)
+
+    def get_first_result(self, futures: list) -> ModelResponse:
+        """
+        Wait for the first successful future, raising the last error if all fail.
+
+        Args:
+        - futures (list): the request futures
+
+        Returns:
+        - ModelResponse: the first successful response
+        """
+        pending = set(futures)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self.metrics.count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error  # type: ignore[misc]
+
+    def close(self) -> None:
+        """
+        Shut down the hedging executor without waiting for losing requests.
+        """
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor = None
+
+
+def iter_sequential(
+    function: Callable[[], Any],
+    num_calls: int,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[Optional[Any], Optional[BaseException]]]:
+    """
+    Call a function num_calls times in this thread, yielding results or errors.
+
+    Args:
+    - function (Callable): the function to call
+    - num_calls (int): the number of calls
+    - should_stop (Callable): checked before each call; no more calls are made once it returns True
+
+    Yields:
+    - tuple: the result and None, or None and the raised error
+    """
+    for _ in range(num_calls):
+        if should_stop is not None and should_stop():
+            return
+        try:
+            yield function(), None
+        except Exception as error:  # pylint: disable=broad-except
+            yield None, error
+
+
+def iter_concurrent(
+    function: Callable[[], Any],
+    num_calls: int,
+    max_workers: int,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[Optional[Any], Optional[BaseException]]]:
+    """
+    Run a function num_calls times on a thread pool, yielding results as they complete.
+
+    At most 2 * max_workers calls are queued at once.
+
+    Args:
+    - function (Callable): the function to call
+    - num_calls (int): the number of calls
+    - max_workers (int): the number of threads
+    - should_stop (Callable): checked before each call is submitted; once it returns True, no more calls are submitted and the calls in flight are drained
+
+    Yields:
+    - tuple: the result and None, or None and the raised error
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: set = set()
+        submitted = 0
+        while submitted < num_calls or pending:
+            while submitted < num_calls and len(pending) < 2 * max_workers:
+                if should_stop is not None and should_stop():
+                    num_calls = submitted
+                    break
+                pending.add(executor.submit(function))
+                submitted += 1
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                yield (None, error) if error is not None else (future.result(), None)
@@ -0,0 +1,557 @@
+"""
+Fake LLM backends for tests and load tests that need no real model.
+
+A FakeBackend answers prompts with canned tagged templates after a latency drawn from a
+configurable distribution, and fails a configurable fraction of requests with transient
+status codes.  FakeModel puts a backend behind the BaseAIModel interface in-process, and
+the fake server exposes one as an OpenAI-compatible HTTP endpoint, so the real VLLMModel
+client can be pointed at it with --endpoint.
+
+Endpoints:
+ - POST /v1/chat/completions and /v1/completions: OpenAI-style completions with usage
+ - GET /health: status and uptime
+ - GET /stats: request counts and latency histograms as JSON
+"""
+
+# imports
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# packages
+from alea_llm_client.core.exceptions import ALEAModelError
+from alea_llm_client.llms.models.base_ai_model import (
+    BaseAIModel,
+    JSONModelResponse,
+    ModelResponse,
+)
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.llm.budget import estimate_text_tokens
+
+# default address for the fake server
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# canned responses: tagged templates that AnnotatedTextGenerator renders into spans
+FAKE_RESPONSES = (
+    "This <|document_artifact|> was filed on <|date|> by <|name|> before the <|forums_and_venues|>.",
+    "On or about <|date|>, <|company|> retained <|name|> for advice on <|area_of_law|>.",
+    "<|company|>, a <|industry|> leader, is located in <|location|>.",
+    "<|name|> of <|company|> signed the <|document_artifact|> in <|location|> on <|date|>.",
+    "The <|governmental_body|> reviewed the <|service|> provided by <|company|> under <|area_of_law|>.",
+)
+
+# status codes returned for injected errors, with their reason phrases
+FAKE_ERROR_STATUSES = {
+    429: "Too Many Requests",
+    503: "Service Unavailable",
+}
+
+# latency distributions and their parameters, in seconds
+LATENCY_DISTRIBUTIONS = {
+    "fixed": ("seconds",),
+    "uniform": ("low", "high"),
+    "normal": ("mean", "stddev"),
+    "lognormal": ("median", "sigma"),
+    "exponential": ("mean",),
+}
+
+
+class LatencyDistribution:
+    """
+    A distribution of simulated request latencies, clamped at zero.
+    """
+
+    def __init__(self, kind: str = "fixed", params: Sequence[float] = (0.0,)):
+        """
+        Initialize the distribution.
+
+        Args:
+        - kind (str): fixed, uniform, normal, lognormal, or exponential
+        - params (Sequence[float]): the distribution parameters, as in LATENCY_DISTRIBUTIONS
+        """
+        if kind not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Invalid latency distribution: {kind}; expected one of {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        if len(params) != len(LATENCY_DISTRIBUTIONS[kind]):
+            raise ValueError(
+                f"{kind} latency takes {', '.join(LATENCY_DISTRIBUTIONS[kind])}"
+            )
+        if any(param < 0 for param in params):
+            raise ValueError("latency parameters must not be negative")
+        self.kind = kind
+        self.params = tuple(float(param) for param in params)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a latency specification such as 0.2, uniform:0.1,0.5, or lognormal:0.2,0.6.
+
+        Args:
+        - spec (str): the distribution name and comma-separated parameters; a bare number is fixed
+
+        Returns:
+        - LatencyDistribution: the distribution
+        """
+        kind, _, params = spec.partition(":")
+        if not params:
+            kind, params = "fixed", kind
+        try:
+            values = [float(param) for param in params.split(",")]
+        except ValueError as error:
+            raise ValueError(f"Invalid latency: {spec}") from error
+        return cls(kind, values)
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw a latency.
+
+        Args:
+        - rng (random.Random): the random source
+
+        Returns:
+        - float: the latency in seconds
+        """
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.params))
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * math.exp(rng.gauss(0.0, sigma)) if median > 0 else 0.0
+        mean = self.params[0]
+        return rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(f'{param:g}' for param in self.params)}"
+
+
+class FakeResult:
+    """
+    The outcome of one fake request: its latency and either a response or an error status.
+    """
+
+    __slots__ = ("latency", "status", "text", "prompt_tokens", "completion_tokens")
+
+    def __init__(
+        self,
+        latency: float,
+        status: int,
+        text: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+    ):
+        """
+        Initialize the result.
+
+        Args:
+        - latency (float): the seconds to wait before answering
+        - status (int): 200, or the HTTP status code of an injected error
+        - text (str): the response text; empty for errors
+        - prompt_tokens (int): the estimated prompt tokens
+        - completion_tokens (int): the estimated completion tokens
+        """
+        self.latency = latency
+        self.status = status
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    @property
+    def error_message(self) -> str:
+        """
+        Get the error message in the form the model clients report HTTP errors.
+
+        Returns:
+        - str: the error message
+        """
+        reason = FAKE_ERROR_STATUSES.get(self.status, "Error")
+        return f"Server error '{self.status} {reason}' from fake backend"
+
+
+class FakeBackend:
+    """
+    Thread-safe source of canned responses, latencies, and injected errors.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyDistribution | str] = None,
+        error_rate: float = 0.0,
+        responses: Sequence[str] = FAKE_RESPONSES,
+        error_statuses: Sequence[int] = tuple(FAKE_ERROR_STATUSES),
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+        - latency (LatencyDistribution | str): the latency distribution or its specification; defaults to no latency
+        - error_rate (float): the fraction of requests that fail
+        - responses (Sequence[str]): the canned responses, drawn uniformly
+        - error_statuses (Sequence[int]): the status codes of injected errors, drawn uniformly
+        - seed (int): the random seed for reproducible latencies, errors, and responses
+        """
+        if isinstance(latency, str):
+            latency = LatencyDistribution.parse(latency)
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+        if not responses:
+            raise ValueError("responses must not be empty")
+        self.latency = latency if latency is not None else LatencyDistribution()
+        self.error_rate = error_rate
+        self.responses = list(responses)
+        self.error_statuses = list(error_statuses)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def next_result(self, prompt: str) -> FakeResult:
+        """
+        Draw the outcome of a request.
+
+        Args:
+        - prompt (str): the prompt text, for the token counts
+
+        Returns:
+        - FakeResult: the latency and response or error status
+        """
+        with self.lock:
+            latency = self.latency.sample(self.rng)
+            failed = self.error_rate > 0 and self.rng.random() < self.error_rate
+            status = self.rng.choice(self.error_statuses) if failed else 200
+            text = "" if failed else self.rng.choice(self.responses)
+        return FakeResult(
+            latency,
+            status,
+            text,
+            estimate_text_tokens(prompt),
+            estimate_text_tokens(text),
+        )
+
+
+def get_messages_text(messages: Sequence[Any]) -> str:
+    """
+    Get the text of chat messages, for the prompt token estimate.
+
+    Args:
+    - messages (Sequence): the chat messages, as dicts with content or strings
+
+    Returns:
+    - str: the concatenated message contents
+    """
+    return "".join(
+        str(message.get("content", "")) if isinstance(message, dict) else str(message)
+        for message in messages
+    )
+
+
+class FakeModel(BaseAIModel):
+    """
+    In-process model that answers from a FakeBackend, with no network access.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake",
+        endpoint: Optional[str] = None,
+        backend: Optional[FakeBackend] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the model.
+
+        Args:
+        - model (str): the model name reported in responses
+        - endpoint (str): ignored; accepted so the model can be created like the real clients
+        - backend (FakeBackend): the backend to answer from; defaults to canned responses with no latency or errors
+        - sleep (Callable): the function used to wait out the latency
+        - **kwargs: passed to FakeBackend when no backend is given
+        """
+        self.backend = backend if backend is not None else FakeBackend(**kwargs)
+        self.sleep = sleep
+        super().__init__(
+            api_key="fake", model=model, endpoint=endpoint, ignore_cache=True
+        )
+
+    def _initialize_client(self) -> None:
+        return None
+
+    def _initialize_async_client(self) -> None:
+        return None
+
+    def get_api_key(self) -> str:
+        return "fake"
+
+    def format(self, args: Any, kwargs: Any) -> str:
+        """
+        Get the prompt text of a request.
+
+        Args:
+        - args (tuple): the positional arguments
+        - kwargs (dict): the keyword arguments
+
+        Returns:
+        - str: the prompt text
+        """
+        return "".join(str(arg) for arg in args) + get_messages_text(
+            kwargs.get("messages", [])
+        )
+
+    def get_response(self, result: FakeResult) -> ModelResponse:
+        """
+        Convert a backend result to a response, raising injected errors.
+
+        Args:
+        - result (FakeResult): the backend result
+
+        Returns:
+        - ModelResponse: the response with OpenAI-style usage
+        """
+        if result.status != 200:
+            raise ALEAModelError(f"Error in request: {result.error_message}")
+        return ModelResponse(
+            choices=[result.text],
+            metadata={
+                "model": self.model,
+                "usage": {
+                    "prompt_tokens": result.prompt_tokens,
+                    "completion_tokens": result.completion_tokens,
+                    "total_tokens": result.prompt_tokens + result.completion_tokens,
+                },
+            },
+            text=result.text,
+        )
+
+    def _chat(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        result = self.backend.next_result(self.format(args, kwargs))
+        self.sleep(result.latency)
+        return self.get_response(result)
+
+    def _complete(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        return self._chat(*args, **kwargs)
+
+    async def _chat_async(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        result = self.backend.next_result(self.format(args, kwargs))
+        await asyncio.sleep(result.latency)
+        return self.get_response(result)
+
+    async def _complete_async(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        return await self._chat_async(*args, **kwargs)
+
+    def _json(self, *args: Any, **kwargs: Any) -> JSONModelResponse:
+        response = self._chat(*args, **kwargs)
+        return JSONModelResponse(
+            choices=response.choices,
+            metadata=response.metadata,
+            text=json.dumps({"text": response.text}),
+            data={"text": response.text},
+        )
+
+    async def _json_async(self, *args: Any, **kwargs: Any) -> JSONModelResponse:
+        return self._json(*args, **kwargs)
+
+    def _pydantic(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError("FakeModel does not support pydantic responses")
+
+    async def _pydantic_async(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError("FakeModel does not support pydantic responses")
+
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler for the OpenAI-compatible fake server.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        # request logging is replaced by the /stats endpoint
+        pass
+
+    def send_json(self, status: int, payload: dict) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+        - status (int): the HTTP status code
+        - payload (dict): the response payload
+        """
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve the health and stats endpoints.
+        """
+        metrics = self.server.metrics
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok", "uptime": metrics.elapsed})
+        elif self.path == "/stats":
+            self.send_json(200, metrics.summary())
+        else:
+            self.send_json(404, {"error": {"message": f"Not found: {self.path}"}})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Serve the chat and text completion endpoints.
+        """
+        # drain the body first so that the connection can be reused
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path not in ("/v1/chat/completions", "/v1/completions"):
+            self.send_json(404, {"error": {"message": f"Not found: {self.path}"}})
+            return
+
+        metrics = self.server.metrics
+        with metrics.timer("request"):
+            try:
+                request = json.loads(body or b"{}")
+            except json.JSONDecodeError as error:
+                metrics.count("bad_requests")
+                self.send_json(400, {"error": {"message": f"Invalid JSON: {error}"}})
+                return
+
+            chat = self.path == "/v1/chat/completions"
+            prompt = (
+                get_messages_text(request.get("messages", []))
+                if chat
+                else str(request.get("prompt", ""))
+            )
+            result = self.server.backend.next_result(prompt)
+            time.sleep(result.latency)
+
+            if result.status != 200:
+                metrics.count("errors")
+                self.send_json(
+                    result.status, {"error": {"message": result.error_message}}
+                )
+                return
+
+            metrics.count("requests")
+            choice = (
+                {"index": 0, "message": {"role": "assistant", "content": result.text}}
+                if chat
+                else {"index": 0, "text": result.text}
+            )
+            choice["finish_reason"] = "stop"
+            self.send_json(
+                200,
+                {
+                    "id": "fake-completion",
+                    "object": "chat.completion" if chat else "text_completion",
+                    "model": request.get("model", "fake"),
+                    "choices": [choice],
+                    "usage": {
+                        "prompt_tokens": result.prompt_tokens,
+                        "completion_tokens": result.completion_tokens,
+                        "total_tokens": result.prompt_tokens + result.completion_tokens,
+                    },
+                },
+            )
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    """
+    Threaded OpenAI-compatible fake server on a TCP port.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class: type,
+        backend: FakeBackend,
+        metrics: Metrics,
+    ):
+        """
+        Bind the server and attach the backend it answers from.
+
+        Args:
+        - server_address (tuple): the (host, port) pair to bind
+        - handler_class (type): the request handler class
+        - backend (FakeBackend): the backend to answer from
+        - metrics (Metrics): the metrics to record to
+        """
+        super().__init__(server_address, handler_class)
+        self.backend = backend
+        self.metrics = metrics
+
+
+def create_fake_server(
+    backend: Optional[FakeBackend] = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    metrics: Optional[Metrics] = None,
+) -> FakeHTTPServer:
+    """
+    Create a fake server, ready for serve_forever.
+
+    Args:
+    - backend (FakeBackend): the backend to answer from; defaults to canned responses with no latency or errors
+    - host (str): the TCP host to bind
+    - port (int): the TCP port to bind; 0 picks a free port
+    - metrics (Metrics): the metrics to record to
+
+    Returns:
+    - FakeHTTPServer: the server
+    """
+    return FakeHTTPServer(
+        (host, port),
+        FakeRequestHandler,
+        backend if backend is not None else FakeBackend(),
+        metrics if metrics is not None else Metrics(),
+    )
+
+
+def start_fake_server(
+    backend: Optional[FakeBackend] = None,
+    host: str = DEFAULT_HOST,
+    port: int = 0,
+) -> Tuple[FakeHTTPServer, str]:
+    """
+    Start a fake server on a background thread.
+
+    Args:
+    - backend (FakeBackend): the backend to answer from
+    - host (str): the TCP host to bind
+    - port (int): the TCP port to bind; 0 picks a free port
+
+    Returns:
+    - tuple: the server, to shutdown and server_close when done, and its endpoint URL
+    """
+    server = create_fake_server(backend, host=host, port=port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def get_fake_responses(path: Optional[str]) -> List[str]:
+    """
+    Load canned responses from a file of one response per line, or use the defaults.
+
+    Args:
+    - path (str): the response file, or None for FAKE_RESPONSES
+
+    Returns:
+    - list: the responses
+    """
+    if path is None:
+        return list(FAKE_RESPONSES)
+    with open(path, "rt", encoding="utf-8") as input_file:
+        return [line.rstrip("\n") for line in input_file if line.strip()]
@@ -0,0 +1,83 @@
+"""
+Create AI models from command line model specifications.
+"""
+
+# imports
+from typing import Optional, Sequence
+
+# packages
+from alea_llm_client import AnthropicModel, OpenAIModel, VLLMModel
+from alea_llm_client.llms import BaseAIModel
+
+# project
+from soli_data_generator.llm.balancer import LoadBalancedModel
+from soli_data_generator.llm.fake import FakeModel
+
+# model classes by provider name
+MODEL_CLASSES = {
+    "vllm": VLLMModel,
+    "openai": OpenAIModel,
+    "anthropic": AnthropicModel,
+    "fake": FakeModel,
+}
+
+
+def get_model(model_spec: str, endpoint: Optional[str] = None) -> BaseAIModel:
+    """
+    Create a model from a model specification.
+
+    Args:
+    - model_spec (str): vllm, openai, anthropic, or fake, optionally followed by :model_name
+    - endpoint (str): the API endpoint URL; defaults to the client's default endpoint
+
+    Returns:
+    - BaseAIModel: the model
+    """
+    provider, _, model_name = model_spec.partition(":")
+    if provider not in MODEL_CLASSES:
+        raise ValueError(f"Invalid model: {model_spec}")
+
+    kwargs = {}
+    if model_name:
+        kwargs["model"] = model_name
+    if endpoint is not None:
+        kwargs["endpoint"] = endpoint
+    return MODEL_CLASSES[provider](**kwargs)
+
+
+def parse_endpoints(endpoint_args: Optional[Sequence[str]]) -> list[str]:
+    """
+    Parse repeated, comma-separated endpoint arguments.
+
+    Args:
+    - endpoint_args (Sequence[str]): the endpoint arguments
+
+    Returns:
+    - list: the endpoint URLs
+    """
+    return [
+        endpoint.strip()
+        for endpoint_list in endpoint_args or []
+        for endpoint in endpoint_list.split(",")
+        if endpoint.strip()
+    ]
+
+
+def get_balanced_model(
+    model_spec: str, endpoints: Sequence[str]
+) -> BaseAIModel | LoadBalancedModel:
+    """
+    Create a model, balanced across endpoints if more than one is given.
+
+    Args:
+    - model_spec (str): the model specification
+    - endpoints (Sequence[str]): the endpoint URLs; empty for the client's default endpoint
+
+    Returns:
+    - BaseAIModel | LoadBalancedModel: the model
+    """
+    if len(endpoints) > 1:
+        return LoadBalancedModel(
+            [get_model(model_spec, endpoint) for endpoint in endpoints]
+        )
+    return get_model(model_spec, endpoints[0] if endpoints else None)
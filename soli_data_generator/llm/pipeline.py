@@ -0,0 +1,185 @@
+"""
+Bounded generation pipeline: prompt build -> inference -> render -> write.
+
+A PromptQueue builds prompts ahead of time on a producer thread, so that model calls
+never wait on graph traversal, template formatting, or Faker calls.  `iter_pipeline`
+feeds the prefetched prompts to a pool of inference threads and renders each
+response on the consuming thread as it completes, leaving the caller to write it.
+
+The producer is a thread rather than a process so that sampler state, such as
+coverage counts, stays shared with the rest of the run.
+"""
+
+# imports
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+# project
+from soli_data_generator.instrumentation import NULL_METRICS, Metrics
+
+# default number of prompts built ahead of the inference stage
+DEFAULT_PREFETCH = 16
+
+# seconds between checks for a closed queue while blocked
+POLL_INTERVAL = 0.1
+
+# marks the end of the prompt stream
+END_OF_PROMPTS = object()
+
+
+class PromptQueue:
+    """
+    Bounded queue of prompts built ahead of time on a producer thread.
+    """
+
+    def __init__(
+        self,
+        build_prompt: Callable[[], str],
+        num_prompts: int,
+        max_size: int = DEFAULT_PREFETCH,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the queue and start the producer thread.
+
+        Args:
+        - build_prompt (Callable): the function that builds one prompt
+        - num_prompts (int): the number of prompts to build
+        - max_size (int): the maximum number of prompts built ahead of the consumer
+        - metrics (Metrics): the metrics to record consumer wait times to; disabled by default
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.build_prompt = build_prompt
+        self.num_prompts = num_prompts
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        self.thread.start()
+
+    def put(self, item: Any) -> bool:
+        """
+        Put an item on the queue, blocking until there is room or the queue is closed.
+
+        Args:
+        - item (Any): the item
+
+        Returns:
+        - bool: True if the item was queued, False if the queue was closed
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self) -> None:
+        """
+        Build prompts until num_prompts are queued or the queue is closed.
+        """
+        for _ in range(self.num_prompts):
+            try:
+                item = (self.build_prompt(), None)
+            except Exception as error:  # pylint: disable=broad-except
+                item = (None, error)
+            if not self.put(item):
+                return
+        self.put(END_OF_PROMPTS)
+
+    def __iter__(self) -> Iterator[Tuple[Optional[str], Optional[BaseException]]]:
+        """
+        Iterate over the prompts as they are built.
+
+        Yields:
+        - tuple: the prompt and None, or None and the error raised building it
+        """
+        while True:
+            with self.metrics.timer("prompt_wait"):
+                item = self.queue.get()
+            if item is END_OF_PROMPTS:
+                return
+            yield item
+
+    def close(self) -> None:
+        """
+        Stop the producer thread and discard any prefetched prompts.
+        """
+        self.stop_event.set()
+        self.thread.join()
+
+
+def iter_pipeline(
+    generator: Any,
+    num_samples: int,
+    max_workers: int = 1,
+    prefetch: int = DEFAULT_PREFETCH,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[Optional[Any], Optional[BaseException]]]:
+    """
+    Generate samples through a bounded prompt build -> inference -> render pipeline.
+
+    Prompts are prefetched on a producer thread, model calls run on max_workers threads
+    with at most 2 * max_workers in flight, and responses are rendered on the calling
+    thread in completion order.
+
+    Args:
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator
+    - num_samples (int): the number of samples to generate
+    - max_workers (int): the number of inference threads
+    - prefetch (int): the maximum number of prompts built ahead of inference
+    - should_stop (Callable): checked before each prompt is sent; once it returns True, prefetched prompts are discarded and the calls in flight are drained
+
+    Yields:
+    - tuple: the sample and None, or None and the error raised by any stage
+    """
+    metrics = generator.metrics
+
+    def infer(prompt: str) -> str:
+        with metrics.timer("chat"):
+            return generator.model.chat(prompt).text
+
+    def render(future: Future) -> Tuple[Optional[Any], Optional[BaseException]]:
+        error = future.exception()
+        if error is not None:
+            return None, error
+        try:
+            return generator.process_response(future.result()), None
+        except Exception as render_error:  # pylint: disable=broad-except
+            return None, render_error
+
+    prompts = PromptQueue(
+        generator.build_prompt, num_samples, max_size=prefetch, metrics=metrics
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            remaining = iter(prompts)
+            exhausted = False
+            pending: set = set()
+            while not exhausted or pending:
+                # keep the inference stage full from the prompt queue
+                while not exhausted and len(pending) < 2 * max_workers:
+                    if should_stop is not None and should_stop():
+                        exhausted = True
+                        break
+                    item = next(remaining, None)
+                    if item is None:
+                        exhausted = True
+                    elif item[1] is not None:
+                        yield None, item[1]
+                    else:
+                        pending.add(executor.submit(infer, item[0]))
+                if not pending:
+                    continue
+
+                # render responses as they complete
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield render(future)
+    finally:
+        prompts.close()
@@ -4,13 +4,18 @@ Generate text from a context based on SOLI or Faker entities.
 
 # imports
 import random
-from typing import Optional
+import threading
+from typing import Optional, Sequence, Tuple
 
 # packages
 from alea_llm_client.llms import BaseAIModel
 from soli import SOLI
 
 # project
+from soli_data_generator.instrumentation import NULL_METRICS, Metrics
+from soli_data_generator.llm.balancer import LoadBalancedModel
+from soli_data_generator.procedural.registry import GraphRegistry
+from soli_data_generator.procedural.sampling import ClassSampler
 from soli_data_generator.procedural.template import (
     TemplateFormatter,
     get_random_owl_label,
@@ -86,12 +91,16 @@ def get_random_background(
     soli_graph: SOLI,
     min_types: int = 1,
     max_types: int = 3,
+    formatter: Optional[TemplateFormatter] = None,
 ) -> str:
     """
     Sample a random subset of tags, then populate the tag template with background.
 
     Args:
     - soli_graph (SOLI): the SOLI graph to use for sampling
+    - min_types (int): the minimum number of tags to sample
+    - max_types (int): the maximum number of tags to sample
+    - formatter (TemplateFormatter): the formatter to populate the template with; defaults to one over soli_graph
 
     Returns:
     - str: the populated background text
@@ -111,8 +120,9 @@ def get_random_background(
     background_template += f"Document Type: {get_random_owl_label(document_type)}\n"
 
     # format it
-    t = TemplateFormatter()
-    return t(background_template)
+    if formatter is None:
+        formatter = TemplateFormatter(soli_graph=soli_graph)
+    return formatter(background_template)
 
 
 def get_random_instructions(
@@ -151,7 +161,7 @@ class TextGenerator:
     # pylint: disable=too-many-arguments
     def __init__(
         self,
-        model: BaseAIModel,
+        model: Optional[BaseAIModel | Sequence[BaseAIModel]],
         min_types: int = 1,
         max_types: int = 3,
         min_text_length: int = MIN_TEXT_LENGTH,
@@ -162,20 +172,31 @@ class TextGenerator:
         github_repo_name: Optional[str] = "soli",
         github_repo_branch: Optional[str] = "1.0.0",
         use_cache: bool = True,
+        sampler: Optional[ClassSampler] = None,
+        correlated: bool = False,
+        metrics: Optional[Metrics] = None,
+        registry: Optional[GraphRegistry] = None,
     ):
         """
         Initialize the TemplateFormatter from the SOLI knowledge graph.
 
         Args:
-        - model (BaseAIModel): the AI model to use for text generation
+        - model (BaseAIModel | Sequence[BaseAIModel]): the AI model to use for text generation, or one model per endpoint to balance requests across; None when only building prompts or processing batch responses
         - source_type (str): the source type for the SOLI knowledge graph
         - github_repo_owner (str): the owner of the GitHub repository
         - github_repo_name (str): the name of the GitHub repository
         - github_repo_branch (str): the branch of the GitHub repository
         - use_cache (bool): whether to use the cache for the SOLI knowledge graph
+        - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+        - correlated (bool): whether to jointly draw related classes for co-occurring SOLI tags
+        - metrics (Metrics): the metrics to record per-stage timings to; disabled by default
+        - registry (GraphRegistry): a registry to take the graph of github_repo_branch from, and of other versions per sample; its formatters' sampling options replace sampler and correlated
         """
-        # set the model
+        # set the model, balancing across endpoints if given several
+        if isinstance(model, (list, tuple)):
+            model = LoadBalancedModel(model)
         self.model = model
+        self.metrics = metrics if metrics is not None else NULL_METRICS
 
         # set params
         self.min_types = min_types
@@ -183,37 +204,128 @@ class TextGenerator:
         self.min_text_length = min_text_length
         self.max_text_length = max_text_length
 
-        # create the SOLI graph
-        self.graph = SOLI(
-            source_type=source_type,
-            http_url=http_url,
-            github_repo_owner=github_repo_owner,
-            github_repo_name=github_repo_name,
-            github_repo_branch=github_repo_branch,
-            use_cache=use_cache,
-        )
-
-    def generate(self) -> str:
+        # share the graph and formatter of the default version from the registry,
+        # whose lock serializes sampling across the generators using it
+        self.registry = registry
+        self.version = github_repo_branch
+        if registry is not None:
+            entry = registry.get(github_repo_branch)
+            self.graph = entry.graph
+            self.formatter = entry.formatter
+            self.lock = entry.lock
+        else:
+            # create the SOLI graph
+            self.graph = SOLI(
+                source_type=source_type,
+                http_url=http_url,
+                github_repo_owner=github_repo_owner,
+                github_repo_name=github_repo_name,
+                github_repo_branch=github_repo_branch,
+                use_cache=use_cache,
+            )
+
+            # create the formatter over the same graph
+            self.formatter = TemplateFormatter(
+                soli_graph=self.graph, sampler=sampler, correlated=correlated
+            )
+
+            # serialize sampling so that concurrent calls only overlap in the model call
+            self.lock = threading.Lock()
+
+    def get_entry(
+        self, version: Optional[str] = None
+    ) -> Tuple[SOLI, TemplateFormatter, threading.Lock]:
+        """
+        Get the graph, formatter, and sampling lock of an ontology version.
+
+        Args:
+        - version (str): the ontology version from the registry, or None for the default version
+
+        Returns:
+        - tuple: the graph, formatter, and lock
+        """
+        if version is None:
+            # the formatter's graph stays current when the version is refreshed
+            return self.formatter.graph, self.formatter, self.lock
+        if self.registry is None:
+            raise ValueError("Sampling from a version requires a GraphRegistry")
+        entry = self.registry.get(version)
+        return entry.graph, entry.formatter, entry.lock
+
+    def refresh(self, graph: Optional[SOLI] = None) -> dict:
+        """
+        Update the default version to its current upstream graph, rebuilding only the class pools it changes.
+
+        Args:
+        - graph (SOLI): the updated graph; required without a registry, and loaded by the registry's reloader by default otherwise
+
+        Returns:
+        - dict: the IRIs of the added, removed, and changed classes, and the refreshed tags
+        """
+        if self.registry is not None:
+            diff = self.registry.refresh(self.version, graph)
+        elif graph is None:
+            raise ValueError("Refreshing without a GraphRegistry requires the graph")
+        else:
+            diff = self.formatter.refresh(graph)
+        self.graph = self.formatter.graph
+        return diff
+
+    def build_prompt(self, version: Optional[str] = None) -> str:
+        """
+        Build a prompt from random background information and drafting instructions.
+
+        Args:
+        - version (str): the ontology version to draw from, or None for the default version
+
+        Returns:
+        - str: the prompt
+        """
+        graph, formatter, lock = self.get_entry(version)
+        with lock, self.metrics.timer("background"):
+            prompt = get_random_background(
+                soli_graph=graph,
+                min_types=self.min_types,
+                max_types=self.max_types,
+                formatter=formatter,
+            )
+            prompt += "\n"
+            prompt += get_random_instructions(
+                min_length=self.min_text_length,
+                max_length=self.max_text_length,
+            )
+        return prompt
+
+    def process_response(self, text: str, version: Optional[str] = None) -> str:
+        """
+        Post-process a model response into a sample.
+
+        Args:
+        - text (str): the model response text
+        - version (str): the ontology version the prompt was drawn from
+
+        Returns:
+        - str: the generated text
+        """
+        return text
+
+    def generate(self, version: Optional[str] = None) -> str:
         """
         Generate text procedurally from SOLI or Faker entities.
 
+        Args:
+        - version (str): the ontology version to draw from, or None for the default version
+
         Returns:
         - str: the generated text
         """
-        # combine random background information with random drafting instructions
-        prompt = get_random_background(
-            soli_graph=self.graph,
-            min_types=self.min_types,
-            max_types=self.max_types,
-        )
-        prompt += "\n"
-        prompt += get_random_instructions(
-            min_length=self.min_text_length,
-            max_length=self.max_text_length,
-        )
+        prompt = self.build_prompt(version)
 
         # return text from the model generation
-        return self.model.chat(prompt).text
+        with self.metrics.timer("chat"):
+            text = self.model.chat(prompt).text
+
+        return self.process_response(text, version)
 
     def __call__(self, *args, **kwargs) -> str:
         """
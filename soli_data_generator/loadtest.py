@@ -0,0 +1,404 @@
+"""
+End-to-end load tests of the generation pipeline against fake LLM backends.
+
+Each run generates a fixed number of samples at several concurrency levels and reports
+samples per second, per-sample latency percentiles, retries, errors, and peak memory.
+The text and annotated targets drive TextGenerator and AnnotatedTextGenerator in this
+process through the same RateLimitedModel and scheduler as the CLI, against an
+in-process FakeModel or, with http, the real VLLMModel client and a local fake server.
+The cli target runs the generate CLI in a subprocess against a local fake server, so
+its throughput includes process start-up and loading the SOLI graph.
+
+Peak memory is a process-lifetime high-water mark, so each in-process level runs in a
+child forked from the process holding the warm generator.  Its peak covers the
+inherited generator and that level alone, and later levels can report less than
+earlier ones.
+"""
+
+# imports
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+# packages
+from alea_llm_client import VLLMModel
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.llm import AnnotatedTextGenerator, TextGenerator
+from soli_data_generator.llm.concurrency import (
+    AdaptiveLimiter,
+    RateLimitedModel,
+    iter_concurrent,
+    iter_sequential,
+)
+from soli_data_generator.llm.fake import FakeBackend, FakeModel, start_fake_server
+
+# load test targets
+LOAD_TEST_TARGETS = ("text", "annotated", "cli")
+
+# generator classes of the in-process targets
+GENERATOR_CLASSES = {
+    "text": TextGenerator,
+    "annotated": AnnotatedTextGenerator,
+}
+
+
+def get_rss_mb(usage: resource.struct_rusage) -> float:
+    """
+    Get the peak resident set size from resource usage.
+
+    Args:
+    - usage (resource.struct_rusage): the resource usage
+
+    Returns:
+    - float: the peak RSS in MiB
+    """
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss * scale / (1 << 20)
+
+
+def get_level_report(
+    target: str,
+    concurrency: int,
+    summary: Dict[str, Any],
+    elapsed: float,
+    latency_stage: str,
+    peak_rss_mb: float,
+) -> Dict[str, Any]:
+    """
+    Summarize one concurrency level of a load test.
+
+    Args:
+    - target (str): the load test target
+    - concurrency (int): the concurrency level
+    - summary (dict): the metrics summary of the level
+    - elapsed (float): the wall-clock seconds of the level
+    - latency_stage (str): the metrics stage holding the per-sample latency
+    - peak_rss_mb (float): the peak RSS in MiB of the process that ran the level
+
+    Returns:
+    - dict: the samples, errors, throughput, latency percentiles, retries, and memory
+    """
+    counters = summary["counters"]
+    samples = int(counters.get("samples", 0))
+    latency = summary["stages"].get(latency_stage, {})
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "samples": samples,
+        "errors": int(counters.get("errors", 0)),
+        "retries": int(counters.get("retries", 0)),
+        "elapsed": elapsed,
+        "samples_per_second": samples / elapsed if elapsed > 0 else 0.0,
+        "latency": {
+            key: latency.get(key, 0.0) for key in ("mean", "p50", "p90", "p99", "max")
+        },
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_generator_level(
+    generator: TextGenerator | AnnotatedTextGenerator,
+    model: Any,
+    target: str,
+    concurrency: int,
+    num_samples: int,
+) -> Dict[str, Any]:
+    """
+    Generate samples in this process at one concurrency level.
+
+    Args:
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator, reused across levels
+    - model (BaseAIModel): the fake or fake-served model
+    - target (str): the load test target
+    - concurrency (int): the number of generation threads
+    - num_samples (int): the number of samples to generate
+
+    Returns:
+    - dict: the level report
+    """
+    metrics = Metrics()
+    generator.metrics = metrics
+    generator.model = RateLimitedModel(
+        model,
+        limiter=AdaptiveLimiter(
+            initial_limit=min(4, concurrency), max_limit=concurrency
+        ),
+        metrics=metrics,
+    )
+
+    def generate_sample() -> Any:
+        with metrics.timer("sample"):
+            return generator()
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        results = iter_concurrent(generate_sample, num_samples, concurrency)
+    else:
+        results = iter_sequential(generate_sample, num_samples)
+    for _, error in results:
+        metrics.count("errors" if error is not None else "samples")
+    elapsed = time.perf_counter() - start
+    generator.model.close()
+
+    return get_level_report(
+        target,
+        concurrency,
+        metrics.summary(),
+        elapsed,
+        "sample",
+        get_rss_mb(resource.getrusage(resource.RUSAGE_SELF)),
+    )
+
+
+# pylint: disable=too-many-arguments
+def send_level_report(
+    connection: Connection,
+    generator: TextGenerator | AnnotatedTextGenerator,
+    model: Any,
+    target: str,
+    concurrency: int,
+    num_samples: int,
+) -> None:
+    """
+    Run one in-process level and send its report, or the error that stopped it, to the parent.
+
+    Args:
+    - connection (Connection): the sending end of the pipe to the parent
+    - generator (TextGenerator | AnnotatedTextGenerator): the generator inherited from the parent
+    - model (BaseAIModel): the fake or fake-served model
+    - target (str): the load test target
+    - concurrency (int): the number of generation threads
+    - num_samples (int): the number of samples to generate
+    """
+    try:
+        report = run_generator_level(generator, model, target, concurrency, num_samples)
+        connection.send((report, None))
+    except Exception as error:  # pylint: disable=broad-except
+        connection.send((None, f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+def run_forked_level(
+    generator: TextGenerator | AnnotatedTextGenerator,
+    model: Any,
+    target: str,
+    concurrency: int,
+    num_samples: int,
+) -> Dict[str, Any]:
+    """
+    Generate samples at one concurrency level in a forked child of this process.
+
+    The child starts with its own peak RSS, so the level's peak is not masked by the
+    peaks of earlier levels.
+
+    Args:
+    - generator (TextGenerator | AnnotatedTextGenerator): the warm generator, reused across levels
+    - model (BaseAIModel): the fake or fake-served model
+    - target (str): the load test target
+    - concurrency (int): the number of generation threads
+    - num_samples (int): the number of samples to generate
+
+    Returns:
+    - dict: the level report
+    """
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=send_level_report,
+        args=(sender, generator, model, target, concurrency, num_samples),
+    )
+    process.start()
+    sender.close()
+    try:
+        report, error = receiver.recv()
+    except EOFError:
+        report, error = None, "the level process exited without a report"
+    finally:
+        receiver.close()
+        process.join()
+    if error is not None:
+        raise RuntimeError(f"{target} load test level failed: {error}")
+    return report
+
+
+def run_cli_level(
+    endpoint: str,
+    concurrency: int,
+    num_samples: int,
+    work_dir: str,
+    sample_type: str = "annotated",
+) -> Dict[str, Any]:
+    """
+    Run the generate CLI in a subprocess at one concurrency level.
+
+    Args:
+    - endpoint (str): the fake server endpoint URL
+    - concurrency (int): the CLI --concurrency
+    - num_samples (int): the number of samples to generate
+    - work_dir (str): the directory for the output and metrics files
+    - sample_type (str): the CLI --type
+
+    Returns:
+    - dict: the level report
+    """
+    output_path = os.path.join(work_dir, f"cli-{concurrency}.jsonl")
+    metrics_path = os.path.join(work_dir, f"cli-{concurrency}.metrics.json")
+    command = [
+        sys.executable,
+        "-m",
+        "soli_data_generator.cli.generate",
+        "--model",
+        "vllm:fake",
+        "--endpoint",
+        endpoint,
+        "--type",
+        sample_type,
+        "--samples",
+        str(num_samples),
+        "--concurrency",
+        str(concurrency),
+        "--output",
+        output_path,
+        "--metrics-file",
+        metrics_path,
+    ]
+
+    # the CLI's progress bar and client logs go to a file, so a full pipe cannot stall it
+    log_path = os.path.join(work_dir, f"cli-{concurrency}.log")
+    start = time.perf_counter()
+    with open(log_path, "wb") as log_file:
+        process = subprocess.Popen(  # pylint: disable=consider-using-with
+            command, stdout=subprocess.DEVNULL, stderr=log_file
+        )
+        # wait4 gives the resource usage of this child alone
+        _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        with open(log_path, "rt", encoding="utf-8", errors="replace") as log_file:
+            log = log_file.read()
+        raise RuntimeError(
+            f"generate CLI exited with status {process.returncode}:\n{log[-2000:]}"
+        )
+
+    # the CLI exports its metrics, timing each model call including retries as chat
+    with open(metrics_path, "rt", encoding="utf-8") as input_file:
+        summary = json.load(input_file)
+    return get_level_report(
+        "cli", concurrency, summary, elapsed, "chat", get_rss_mb(usage)
+    )
+
+
+def run_load_test(
+    targets: Sequence[str],
+    concurrency_levels: Sequence[int],
+    num_samples: int,
+    backend: FakeBackend,
+    http: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Run a load test over targets and concurrency levels.
+
+    Args:
+    - targets (Sequence[str]): the targets from LOAD_TEST_TARGETS
+    - concurrency_levels (Sequence[int]): the concurrency levels to run each target at
+    - num_samples (int): the number of samples per level
+    - backend (FakeBackend): the fake backend answering every request
+    - http (bool): whether in-process targets call a local fake server through VLLMModel instead of FakeModel
+
+    Returns:
+    - list: the level reports, in run order
+    """
+    for target in targets:
+        if target not in LOAD_TEST_TARGETS:
+            raise ValueError(
+                f"Invalid target: {target}; expected one of {', '.join(LOAD_TEST_TARGETS)}"
+            )
+    if not concurrency_levels or min(concurrency_levels) < 1:
+        raise ValueError("concurrency levels must be at least 1")
+    if num_samples < 1:
+        raise ValueError("num_samples must be at least 1")
+
+    # the fake server shares the backend, so its latencies and errors match FakeModel's
+    server, endpoint = None, None
+    if http or "cli" in targets:
+        server, endpoint = start_fake_server(backend)
+
+    reports = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for target in targets:
+                if target == "cli":
+                    for concurrency in concurrency_levels:
+                        reports.append(
+                            run_cli_level(endpoint, concurrency, num_samples, work_dir)
+                        )
+                    continue
+
+                model = (
+                    VLLMModel(model="fake", endpoint=endpoint, ignore_cache=True)
+                    if http
+                    else FakeModel(backend=backend)
+                )
+                generator = GENERATOR_CLASSES[target](model)
+                for concurrency in concurrency_levels:
+                    reports.append(
+                        run_forked_level(
+                            generator, model, target, concurrency, num_samples
+                        )
+                    )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    return reports
+
+
+def format_load_test(reports: Sequence[Dict[str, Any]]) -> str:
+    """
+    Format level reports as a table.
+
+    Args:
+    - reports (Sequence[dict]): the level reports
+
+    Returns:
+    - str: the table text
+    """
+    lines = [
+        f"{'target':<10} {'conc':>5} {'samples':>8} {'errors':>7} {'retries':>8} "
+        f"{'samples/s':>10} {'p50':>9} {'p90':>9} {'p99':>9} {'rss':>9}"
+    ]
+    for report in reports:
+        latency = report["latency"]
+        lines.append(
+            f"{report['target']:<10} {report['concurrency']:>5} {report['samples']:>8} "
+            f"{report['errors']:>7} {report['retries']:>8} "
+            f"{report['samples_per_second']:>10.1f} {latency['p50'] * 1000:>7.1f}ms "
+            f"{latency['p90'] * 1000:>7.1f}ms {latency['p99'] * 1000:>7.1f}ms "
+            f"{report['peak_rss_mb']:>7.1f}MB"
+        )
+    return "\n".join(lines)
+
+
+def write_load_test(path: str | Path, reports: Sequence[Dict[str, Any]]) -> None:
+    """
+    Write level reports as JSON.
+
+    Args:
+    - path (str | Path): the output path
+    - reports (Sequence[dict]): the level reports
+    """
+    with open(path, "wt", encoding="utf-8") as output_file:
+        json.dump(list(reports), output_file, indent=2)
@@ -3,7 +3,33 @@ Procedural, non-LLM generation techniques.
 """
 
 # local imports
-from .template import TemplateFormatter
+from .enumeration import TemplateSpace
+from .registry import GraphRegistry
+from .relations import CorrelatedSampler, RelationIndex, get_relation_index
+from .sampling import (
+    ClassSampler,
+    CoverageSampler,
+    SamplingPolicy,
+    WeightedSampler,
+    load_sampling_policies,
+)
+from .spans import AnnotatedSample
+from .template import CompiledTemplate, TemplateFormatter, compile_template
 
 # re-export
-__all__ = ["TemplateFormatter"]
+__all__ = [
+    "TemplateFormatter",
+    "CompiledTemplate",
+    "compile_template",
+    "TemplateSpace",
+    "AnnotatedSample",
+    "ClassSampler",
+    "CoverageSampler",
+    "SamplingPolicy",
+    "WeightedSampler",
+    "load_sampling_policies",
+    "CorrelatedSampler",
+    "RelationIndex",
+    "get_relation_index",
+    "GraphRegistry",
+]
@@ -0,0 +1,279 @@
+"""
+Random-access enumeration of a template's SOLI value space.
+
+The SOLI slots of a template span a mixed-radix space over the formatter's cached
+class pools: one digit per slot, with radix equal to the size of the slot's pool.  When
+the formatter draws distinct values, slots sharing a tag use the falling radices n,
+n - 1, ..., so each digit picks among the classes not already used by the tag's earlier
+slots and every index maps to a valid combination.
+
+Any index can be unranked and rendered directly, so disjoint index ranges can be
+handed to independent workers without materializing the Cartesian product.  Indices
+are mapped to positions in the space by one of three orderings:
+
+ - lexicographic: position i is the i-th combination, varying the last slot fastest
+ - permuted: a seeded affine bijection of [0, size), spreading nearby indices apart
+ - halton: a low-discrepancy Halton point per index, mapped onto the digits; this
+   covers the space evenly for any prefix of indices but is not a bijection, so
+   distinct indices can repeat a combination
+
+Labels are chosen per index from a seed, so an index renders the same text on every
+call.  Faker slots are not part of the space and are sampled as usual from the
+formatter's random sources.
+"""
+
+# imports
+import math
+import random
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# packages
+from soli import OWLClass
+
+# project
+from soli_data_generator.procedural.sampling import (
+    get_owl_label_choices,
+    group_slots,
+)
+from soli_data_generator.procedural.stream import get_unit_seed
+from soli_data_generator.procedural.template import (
+    SOLI_TAG_GETTERS,
+    CompiledTemplate,
+    get_faker_owl_class,
+    sample_faker_slots,
+)
+
+# supported index orderings
+ENUMERATION_ORDERINGS = ("lexicographic", "permuted", "halton")
+
+
+def get_primes(count: int) -> List[int]:
+    """
+    Get the first primes, used as the Halton bases.
+
+    Args:
+    - count (int): the number of primes
+
+    Returns:
+    - list: the first count primes
+    """
+    primes: List[int] = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def get_radical_inverse(index: int, base: int) -> float:
+    """
+    Reflect the base-b digits of an index about the radix point.
+
+    Args:
+    - index (int): the non-negative index
+    - base (int): the base
+
+    Returns:
+    - float: the radical inverse in [0, 1)
+    """
+    inverse = 0.0
+    scale = 1.0 / base
+    while index > 0:
+        index, digit = divmod(index, base)
+        inverse += digit * scale
+        scale /= base
+    return inverse
+
+
+class TemplateSpace:
+    """
+    The mixed-radix space of SOLI class combinations for a template.
+    """
+
+    def __init__(
+        self,
+        formatter: Any,
+        template: str | CompiledTemplate,
+        ordering: str = "lexicographic",
+        seed: int = 0,
+    ):
+        """
+        Build the space of a template over the formatter's class pools.
+
+        Args:
+        - formatter (TemplateFormatter): the formatter providing the graph, pools, and distinct setting
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
+        - ordering (str): lexicographic, permuted, or halton
+        - seed (int): the seed for the permutation and the per-index label choice
+        """
+        if ordering not in ENUMERATION_ORDERINGS:
+            raise ValueError(
+                f"Invalid ordering: {ordering}; expected one of {', '.join(ENUMERATION_ORDERINGS)}"
+            )
+
+        self.formatter = formatter
+        self.compiled = formatter.get_compiled(template)
+        self.ordering = ordering
+        self.seed = seed
+
+        # one digit per SOLI slot, grouped by tag
+        soli_slots = [
+            key for key in self.compiled.pattern_map if key[0] in SOLI_TAG_GETTERS
+        ]
+        self.groups: List[Tuple[List[Tuple[str, str]], List[OWLClass]]] = []
+        self.radices: List[int] = []
+        for tag, tag_slots in group_slots(soli_slots).items():
+            pool = formatter.get_pool(tag)
+            if formatter.distinct and len(tag_slots) > len(pool):
+                raise ValueError(
+                    f"Cannot enumerate {len(tag_slots)} distinct values from {len(pool)} {tag} classes"
+                )
+            self.groups.append((tag_slots, pool))
+            for position in range(len(tag_slots)):
+                self.radices.append(
+                    len(pool) - position if formatter.distinct else len(pool)
+                )
+
+        self.size = math.prod(self.radices)
+        if self.size == 0:
+            raise ValueError(
+                f"Template has an empty SOLI class pool: {self.compiled.template}"
+            )
+
+        self.faker_slots = [
+            key for key in self.compiled.pattern_map if key[0] not in SOLI_TAG_GETTERS
+        ]
+
+        # the seeded affine bijection (a * index + b) mod size
+        rng = random.Random(seed)
+        self.multiplier = 1
+        self.offset = 0
+        if ordering == "permuted" and self.size > 1:
+            self.multiplier = rng.randrange(1, self.size)
+            while math.gcd(self.multiplier, self.size) != 1:
+                self.multiplier = rng.randrange(1, self.size)
+            self.offset = rng.randrange(self.size)
+
+        self.bases = get_primes(len(self.radices)) if ordering == "halton" else []
+
+    def get_digits(self, index: int) -> List[int]:
+        """
+        Map an index to its mixed-radix digits under the space's ordering.
+
+        Args:
+        - index (int): the index in [0, size)
+
+        Returns:
+        - list: one digit per SOLI slot
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(
+                f"Index {index} out of range for space of size {self.size}"
+            )
+
+        if self.ordering == "halton":
+            # skip the origin, which every base maps to zero
+            return [
+                int(get_radical_inverse(index + 1, base) * radix)
+                for base, radix in zip(self.bases, self.radices)
+            ]
+
+        position = (self.multiplier * index + self.offset) % self.size
+        digits = [0] * len(self.radices)
+        for digit_index in range(len(self.radices) - 1, -1, -1):
+            position, digits[digit_index] = divmod(position, self.radices[digit_index])
+        return digits
+
+    def get_classes(self, index: int) -> Dict[Tuple[str, str], OWLClass]:
+        """
+        Unrank an index into the SOLI class for each slot.
+
+        Args:
+        - index (int): the index in [0, size)
+
+        Returns:
+        - dict: the OWL class for each SOLI slot
+        """
+        digits = iter(self.get_digits(index))
+        classes = {}
+        for tag_slots, pool in self.groups:
+            used: List[int] = []
+            for slot in tag_slots:
+                choice = next(digits)
+                if self.formatter.distinct:
+                    # the digit counts among the classes not used by earlier slots
+                    for used_index in sorted(used):
+                        if used_index <= choice:
+                            choice += 1
+                    used.append(choice)
+                classes[slot] = pool[choice]
+        return classes
+
+    def render(self, index: int, spans: bool = True) -> str | dict:
+        """
+        Render the combination at an index.
+
+        Args:
+        - index (int): the index in [0, size)
+        - spans (bool): whether to return span annotations with the output
+
+        Returns:
+        - str | dict: the formatted template
+        """
+        classes = self.get_classes(index)
+        rng = random.Random(get_unit_seed(self.seed, index))
+
+        value_map: Dict[Tuple[str, str], Dict] = {
+            slot: {
+                "value": rng.choice(get_owl_label_choices(owl_class))[1],
+                "owl_class": owl_class,
+            }
+            for slot, owl_class in classes.items()
+        }
+        state = self.formatter.get_state()
+        for slot, value in sample_faker_slots(
+            self.faker_slots,
+            distinct=self.formatter.distinct,
+            faker=state.faker,
+            rng=state.rng,
+        ).items():
+            value_map[slot] = {
+                "value": value,
+                "owl_class": get_faker_owl_class(slot[0], self.formatter.graph),
+            }
+
+        if spans and self.formatter.compact_spans:
+            return self.compiled.render_compact(value_map)
+        if spans:
+            return self.compiled.render_spans(value_map)
+        return self.compiled.render(
+            {slot: value["value"] for slot, value in value_map.items()}
+        )
+
+    def iter_range(
+        self, start: int = 0, stop: Optional[int] = None, spans: bool = True
+    ) -> Iterator[str | dict]:
+        """
+        Lazily render the combinations at indices [start, stop).
+
+        Args:
+        - start (int): the first index
+        - stop (int): the end index; defaults to the size of the space
+        - spans (bool): whether to yield span annotations with each output
+
+        Yields:
+        - str | dict: the formatted templates, in index order
+        """
+        stop = self.size if stop is None else min(stop, self.size)
+        for index in range(start, stop):
+            yield self.render(index, spans)
+
+    def __iter__(self) -> Iterator[str | dict]:
+        """
+        Lazily render every combination in the space.
+
+        Yields:
+        - dict: the formatted templates with span annotations
+        """
+        return self.iter_range()
@@ -0,0 +1,516 @@
+"""
+Pre-parsed, memory-mapped template libraries.
+
+A library file stores each distinct template once with its slots already parsed, so
+workers can load tens of thousands of templates without scanning them with the tag
+pattern.  The file is memory-mapped and read in place: opening it only parses a small
+header, and templates are decoded on access.
+
+Layout, little-endian, with every section aligned to 8 bytes:
+
+ - magic, format version, and header length, then a JSON header with the tag and index
+   names and the section offsets
+ - templates: per template, its 16-byte content hash, the byte and character offsets
+   and lengths of its UTF-8 text, and its first slot and slot count
+ - slots: per slot, the character offsets of its tag markup, a tag ID, and an index ID
+ - hash index: (hash, template ID) records sorted by hash, for binary search
+ - tag index: per tag, the offset and length of a sorted posting list of template IDs
+ - postings and text
+"""
+
+# imports
+import hashlib
+import itertools
+import json
+import mmap
+import re
+import struct
+import sys
+from array import array
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# project
+from soli_data_generator.procedural.template import (
+    RE_PATTERN_MAP,
+    CompiledTemplate,
+    get_all_tags,
+)
+
+# file identifier and format version
+LIBRARY_MAGIC = b"SOLITPL\x00"
+LIBRARY_VERSION = 1
+
+# preamble: magic, version, and header length
+PREAMBLE = struct.Struct("<8sII")
+
+# template record: hash, text byte offset, text character offset, text byte length,
+# text character length, first slot, and slot count
+TEMPLATE_RECORD = struct.Struct("<16sQQIIII")
+
+# slot record: markup start and end characters, tag ID, and index ID (0 for no index)
+SLOT_RECORD = struct.Struct("<IIHH")
+
+# hash index record: hash and template ID
+HASH_RECORD = struct.Struct("<16sI")
+
+# tag index record: posting list offset and length
+TAG_RECORD = struct.Struct("<QI4x")
+
+# default library file extension
+LIBRARY_EXTENSION = ".stpl"
+
+
+def get_template_hash(template: str) -> bytes:
+    """
+    Get the content hash of a template.
+
+    Args:
+    - template (str): the template string
+
+    Returns:
+    - bytes: the 16-byte hash
+    """
+    return hashlib.blake2b(template.encode("utf-8"), digest_size=16).digest()
+
+
+def pad(output_file: BinaryIO, position: int) -> int:
+    """
+    Pad a file to the next multiple of 8 bytes.
+
+    Args:
+    - output_file (BinaryIO): the open output file
+    - position (int): the current position
+
+    Returns:
+    - int: the aligned position
+    """
+    padding = -position % 8
+    output_file.write(b"\0" * padding)
+    return position + padding
+
+
+def build_library(
+    templates: Iterable[str], path: str, pattern: re.Pattern = RE_PATTERN_MAP
+) -> int:
+    """
+    Parse and deduplicate templates and write them as a library file.
+
+    Args:
+    - templates (Iterable[str]): the template strings
+    - path (str): the output library path
+    - pattern (re.Pattern): the compiled regex pattern for matching SOLI tags
+
+    Returns:
+    - int: the number of distinct templates written
+    """
+    tags = get_all_tags()
+    tag_ids = {tag: tag_id for tag_id, tag in enumerate(tags)}
+    indices: List[str] = []
+    index_ids: Dict[str, int] = {}
+
+    # parse each distinct template once
+    hashes: List[bytes] = []
+    texts: List[bytes] = []
+    char_lengths: List[int] = []
+    slots: List[Tuple[int, int, int, int]] = []
+    template_slots: List[Tuple[int, int]] = []
+    postings: List[List[int]] = [[] for _ in tags]
+    seen = set()
+    for template in templates:
+        template_hash = get_template_hash(template)
+        if template_hash in seen:
+            continue
+        seen.add(template_hash)
+
+        template_id = len(hashes)
+        first_slot = len(slots)
+        template_tags = set()
+        for match in pattern.finditer(template):
+            tag, index = match.group("tag"), match.group("index")
+            index_id = 0
+            if index is not None:
+                if index not in index_ids:
+                    index_ids[index] = len(indices) + 1
+                    indices.append(index)
+                index_id = index_ids[index]
+            slots.append((match.start(), match.end(), tag_ids[tag], index_id))
+            template_tags.add(tag_ids[tag])
+        for tag_id in sorted(template_tags):
+            postings[tag_id].append(template_id)
+
+        hashes.append(template_hash)
+        texts.append(template.encode("utf-8"))
+        char_lengths.append(len(template))
+        template_slots.append((first_slot, len(slots) - first_slot))
+
+    # lay out the sections after the header
+    sizes = {
+        "templates": len(hashes) * TEMPLATE_RECORD.size,
+        "slots": len(slots) * SLOT_RECORD.size,
+        "hashes": len(hashes) * HASH_RECORD.size,
+        "tags": len(tags) * TAG_RECORD.size,
+        "postings": sum(len(posting) for posting in postings) * 4,
+        "text": sum(len(text) for text in texts),
+    }
+    header = {
+        "num_templates": len(hashes),
+        "num_slots": len(slots),
+        "tags": tags,
+        "indices": indices,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    # the offsets depend on the header size, which depends on the offsets
+    offsets: Dict[str, int] = {}
+    while True:
+        position = PREAMBLE.size + len(header_bytes)
+        for section, size in sizes.items():
+            position += -position % 8
+            offsets[section] = position
+            position += size
+        candidate = json.dumps({**header, "offsets": offsets}).encode("utf-8")
+        stable = len(candidate) == len(header_bytes)
+        header_bytes = candidate
+        if stable:
+            break
+
+    with open(path, "wb") as output_file:
+        output_file.write(
+            PREAMBLE.pack(LIBRARY_MAGIC, LIBRARY_VERSION, len(header_bytes))
+        )
+        output_file.write(header_bytes)
+        position = PREAMBLE.size + len(header_bytes)
+
+        # templates
+        position = pad(output_file, position)
+        text_offset = offsets["text"]
+        char_offset = 0
+        for template_hash, text, char_length, (first_slot, slot_count) in zip(
+            hashes, texts, char_lengths, template_slots
+        ):
+            output_file.write(
+                TEMPLATE_RECORD.pack(
+                    template_hash,
+                    text_offset,
+                    char_offset,
+                    len(text),
+                    char_length,
+                    first_slot,
+                    slot_count,
+                )
+            )
+            text_offset += len(text)
+            char_offset += char_length
+        position += sizes["templates"]
+
+        # slots
+        position = pad(output_file, position)
+        for slot in slots:
+            output_file.write(SLOT_RECORD.pack(*slot))
+        position += sizes["slots"]
+
+        # hash index
+        position = pad(output_file, position)
+        for template_id in sorted(range(len(hashes)), key=hashes.__getitem__):
+            output_file.write(HASH_RECORD.pack(hashes[template_id], template_id))
+        position += sizes["hashes"]
+
+        # tag index and postings
+        position = pad(output_file, position)
+        posting_offset = offsets["postings"]
+        for posting in postings:
+            output_file.write(TAG_RECORD.pack(posting_offset, len(posting)))
+            posting_offset += 4 * len(posting)
+        position += sizes["tags"]
+
+        position = pad(output_file, position)
+        for posting in postings:
+            output_file.write(struct.pack(f"<{len(posting)}I", *posting))
+        position += sizes["postings"]
+
+        position = pad(output_file, position)
+        for text in texts:
+            output_file.write(text)
+
+    return len(hashes)
+
+
+class TemplateLibrary:
+    """
+    A memory-mapped library of pre-parsed templates with hash and tag indexes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and map a library file.
+
+        Args:
+        - path (str): the library path
+        """
+        self.path = path
+        with open(path, "rb") as input_file:
+            self.map = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = PREAMBLE.unpack_from(self.map, 0)
+        if magic != LIBRARY_MAGIC:
+            self.map.close()
+            raise ValueError(f"Not a template library: {path}")
+        if version != LIBRARY_VERSION:
+            self.map.close()
+            raise ValueError(f"Unsupported template library version: {version}")
+
+        header = json.loads(self.map[PREAMBLE.size : PREAMBLE.size + header_length])
+        self.num_templates: int = header["num_templates"]
+        self.num_slots: int = header["num_slots"]
+        self.tags: List[str] = header["tags"]
+        self.tag_ids = {tag: tag_id for tag_id, tag in enumerate(self.tags)}
+        self.indices: List[Optional[str]] = [None] + header["indices"]
+        self.offsets: Dict[str, int] = header["offsets"]
+
+    def __len__(self) -> int:
+        """
+        Get the number of templates.
+
+        Returns:
+        - int: the number of templates
+        """
+        return self.num_templates
+
+    def __enter__(self) -> "TemplateLibrary":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmap the library file.
+        """
+        self.map.close()
+
+    def get_record(
+        self, template_id: int
+    ) -> Tuple[bytes, int, int, int, int, int, int]:
+        """
+        Read the record of a template.
+
+        Args:
+        - template_id (int): the template ID
+
+        Returns:
+        - tuple: the hash, text byte and character offsets, text byte and character lengths, first slot, and slot count
+        """
+        if not 0 <= template_id < self.num_templates:
+            raise IndexError(f"Template ID out of range: {template_id}")
+        return TEMPLATE_RECORD.unpack_from(
+            self.map, self.offsets["templates"] + template_id * TEMPLATE_RECORD.size
+        )
+
+    def get_template(self, template_id: int) -> str:
+        """
+        Get the text of a template.
+
+        Args:
+        - template_id (int): the template ID
+
+        Returns:
+        - str: the template string
+        """
+        _, text_offset, _, text_length, _, _, _ = self.get_record(template_id)
+        return self.map[text_offset : text_offset + text_length].decode("utf-8")
+
+    def get_hash(self, template_id: int) -> bytes:
+        """
+        Get the content hash of a template.
+
+        Args:
+        - template_id (int): the template ID
+
+        Returns:
+        - bytes: the 16-byte hash
+        """
+        return self.get_record(template_id)[0]
+
+    def get_compiled(self, template_id: int) -> CompiledTemplate:
+        """
+        Build the compiled form of a template from its stored slots, without scanning it.
+
+        Args:
+        - template_id (int): the template ID
+
+        Returns:
+        - CompiledTemplate: the compiled template
+        """
+        _, text_offset, _, text_length, _, first_slot, slot_count = self.get_record(
+            template_id
+        )
+        template = self.map[text_offset : text_offset + text_length].decode("utf-8")
+        slot_offset = self.offsets["slots"] + first_slot * SLOT_RECORD.size
+        return self.build_compiled(
+            template,
+            SLOT_RECORD.iter_unpack(
+                self.map[slot_offset : slot_offset + slot_count * SLOT_RECORD.size]
+            ),
+        )
+
+    def build_compiled(
+        self, template: str, slot_records: Iterable[Tuple[int, int, int, int]]
+    ) -> CompiledTemplate:
+        """
+        Build a compiled template from its text and slot records.
+
+        Args:
+        - template (str): the template string
+        - slot_records (Iterable[tuple]): the slot records, in template order
+
+        Returns:
+        - CompiledTemplate: the compiled template
+        """
+        tags = self.tags
+        indices = self.indices
+        segments = []
+        slots = []
+        position = 0
+        for start, end, tag_id, index_id in slot_records:
+            segments.append(template[position:start])
+            slots.append((tags[tag_id], indices[index_id]))
+            position = end
+        segments.append(template[position:])
+        return CompiledTemplate.from_parts(template, segments, slots)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over the template strings in library order.
+
+        Yields:
+        - str: the templates
+        """
+        for template_id in range(self.num_templates):
+            yield self.get_template(template_id)
+
+    def iter_compiled(
+        self, template_ids: Optional[Iterable[int]] = None
+    ) -> Iterator[CompiledTemplate]:
+        """
+        Iterate over compiled templates.
+
+        Args:
+        - template_ids (Iterable[int]): the template IDs; defaults to every template
+
+        Yields:
+        - CompiledTemplate: the compiled templates
+        """
+        if template_ids is not None:
+            for template_id in template_ids:
+                yield self.get_compiled(template_id)
+            return
+
+        # read the whole library sequentially, decoding the text section once
+        offsets = self.offsets
+        text = self.map[offsets["text"] : len(self.map)].decode("utf-8")
+        slot_records = SLOT_RECORD.iter_unpack(
+            self.map[
+                offsets["slots"] : offsets["slots"] + self.num_slots * SLOT_RECORD.size
+            ]
+        )
+        for (
+            _,
+            _,
+            char_offset,
+            _,
+            char_length,
+            _,
+            slot_count,
+        ) in TEMPLATE_RECORD.iter_unpack(
+            self.map[
+                offsets["templates"] : offsets["templates"]
+                + self.num_templates * TEMPLATE_RECORD.size
+            ]
+        ):
+            yield self.build_compiled(
+                text[char_offset : char_offset + char_length],
+                itertools.islice(slot_records, slot_count),
+            )
+
+    def find(self, template: str | bytes) -> Optional[int]:
+        """
+        Find a template by its text or content hash with a binary search of the hash index.
+
+        Args:
+        - template (str | bytes): the template string or its 16-byte hash
+
+        Returns:
+        - int | None: the template ID, or None if the library does not contain it
+        """
+        template_hash = (
+            get_template_hash(template) if isinstance(template, str) else template
+        )
+        low, high = 0, self.num_templates
+        while low < high:
+            middle = (low + high) // 2
+            middle_hash, template_id = HASH_RECORD.unpack_from(
+                self.map, self.offsets["hashes"] + middle * HASH_RECORD.size
+            )
+            if middle_hash == template_hash:
+                return template_id
+            if middle_hash < template_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __contains__(self, template: Any) -> bool:
+        """
+        Check whether the library contains a template.
+
+        Args:
+        - template (str | bytes): the template string or its 16-byte hash
+
+        Returns:
+        - bool: whether the template is in the library
+        """
+        return self.find(template) is not None
+
+    def get_posting(self, tag: str) -> array:
+        """
+        Get the sorted IDs of the templates that use a tag.
+
+        Args:
+        - tag (str): the tag
+
+        Returns:
+        - array: the template IDs, as unsigned 32-bit integers
+        """
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            raise ValueError(f"Invalid tag: {tag}")
+        offset, length = TAG_RECORD.unpack_from(
+            self.map, self.offsets["tags"] + tag_id * TAG_RECORD.size
+        )
+        posting = array("I")
+        posting.frombytes(self.map[offset : offset + 4 * length])
+        if sys.byteorder == "big":
+            posting.byteswap()
+        return posting
+
+    def find_by_tags(self, tags: Iterable[str]) -> List[int]:
+        """
+        Find the templates that use every one of a set of tags.
+
+        Args:
+        - tags (Iterable[str]): the required tags
+
+        Returns:
+        - list: the matching template IDs, in library order
+        """
+        postings = sorted((self.get_posting(tag) for tag in set(tags)), key=len)
+        if not postings:
+            return list(range(self.num_templates))
+
+        # intersect starting from the shortest posting list
+        template_ids = set(postings[0])
+        for posting in postings[1:]:
+            template_ids.intersection_update(posting)
+            if not template_ids:
+                break
+        return sorted(template_ids)
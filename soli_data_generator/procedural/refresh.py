@@ -0,0 +1,215 @@
+"""
+Diffing and compaction between versions of the SOLI graph, for refreshing derived structures.
+
+When the upstream ontology changes, a long-running formatter only needs to rebuild what
+the change touches.  `diff_graphs` compares an old and a new graph by class IRI, and
+`get_affected_tags` maps the added, removed, and changed classes to the SOLI tags whose
+class pools can contain them, through each tag's root class.  `GraphSharer` replaces the
+unchanged classes and repeated strings of a new graph with the instances already held,
+so that several versions held side by side share memory.
+"""
+
+# imports
+from typing import Any, Dict, Iterable, List, Set
+
+# packages
+from soli import SOLI, OWLClass
+
+
+class GraphSharer:
+    """
+    Tables of the classes and strings of loaded graphs, for compacting a new graph against them.
+    """
+
+    def __init__(self, graphs: Iterable[SOLI] = ()):
+        """
+        Build the tables from the graphs already held.
+
+        Args:
+        - graphs (Iterable[SOLI]): the graphs to share with
+        """
+        self.strings: Dict[str, str] = {}
+        self.classes: Dict[str, List[OWLClass]] = {}
+        for graph in graphs:
+            for owl_class in graph.classes:
+                self.add_class(owl_class)
+
+    def share_value(self, value: Any) -> Any:
+        """
+        Deduplicate the strings in a value, recursing into lists and dicts.
+
+        Args:
+        - value (Any): the value
+
+        Returns:
+        - Any: the value with shared strings
+        """
+        if isinstance(value, str):
+            return self.strings.setdefault(value, value)
+        if isinstance(value, list):
+            return [self.share_value(item) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self.share_value(item) for item in value)
+        if isinstance(value, dict):
+            return {
+                self.share_value(key): self.share_value(item)
+                for key, item in value.items()
+            }
+        return value
+
+    def add_class(self, owl_class: OWLClass) -> None:
+        """
+        Record a class, and its strings, as available for sharing.
+
+        Args:
+        - owl_class (OWLClass): the class
+        """
+        variants = self.classes.setdefault(owl_class.iri, [])
+        if not any(variant is owl_class for variant in variants):
+            variants.append(owl_class)
+        for value in owl_class.__dict__.values():
+            self.share_value(value)
+
+    def share_class(self, owl_class: OWLClass) -> OWLClass:
+        """
+        Get the shared instance of a class equal to this one, or compact and record this one.
+
+        Args:
+        - owl_class (OWLClass): the class of a newly loaded graph
+
+        Returns:
+        - OWLClass: the shared class
+        """
+        for variant in self.classes.get(owl_class.iri, []):
+            if variant == owl_class:
+                return variant
+        for name, value in owl_class.__dict__.items():
+            owl_class.__dict__[name] = self.share_value(value)
+        self.classes.setdefault(owl_class.iri, []).append(owl_class)
+        return owl_class
+
+    def share_graph(self, graph: SOLI) -> None:
+        """
+        Compact a newly loaded graph in place against the tables.
+
+        Args:
+        - graph (SOLI): the graph, before it is used
+        """
+        graph.classes = [self.share_class(owl_class) for owl_class in graph.classes]
+        graph.iri_to_index = self.share_value(graph.iri_to_index)
+        graph.label_to_index = self.share_value(graph.label_to_index)
+        graph.alt_label_to_index = self.share_value(graph.alt_label_to_index)
+        graph.class_edges = self.share_value(graph.class_edges)
+        graph.triples = self.share_value(graph.triples)
+        # pylint: disable=protected-access
+        graph._cached_triples = tuple(graph.triples)
+
+        # the parsed XML tree is only used while parsing
+        graph.tree = None
+        graph.parser = None
+
+
+def diff_graphs(
+    old_graph: SOLI, new_graph: SOLI, adopt: bool = False
+) -> Dict[str, List[str]]:
+    """
+    Compare two versions of a graph by class IRI.
+
+    Classes shared between the graphs are unchanged without comparing their fields, so
+    diffing a graph compacted against the old one with GraphSharer is cheap.
+
+    Args:
+    - old_graph (SOLI): the graph in use
+    - new_graph (SOLI): the updated graph
+    - adopt (bool): whether to replace the unchanged classes of the updated graph with the old instances, so pools built from either graph hold the same objects
+
+    Returns:
+    - dict: the IRIs of the added, removed, and changed classes
+    """
+    old_index = old_graph.iri_to_index
+    new_index = new_graph.iri_to_index
+    changed = []
+    for iri, index in new_index.items():
+        old_position = old_index.get(iri)
+        if old_position is None:
+            continue
+        old_class = old_graph.classes[old_position]
+        new_class = new_graph.classes[index]
+        if old_class is new_class:
+            continue
+        if old_class != new_class:
+            changed.append(iri)
+        elif adopt:
+            new_graph.classes[index] = old_class
+
+    return {
+        "added": [iri for iri in new_index if iri not in old_index],
+        "removed": [iri for iri in old_index if iri not in new_index],
+        "changed": changed,
+    }
+
+
+def get_ancestors(graph: SOLI, iri: str) -> Set[str]:
+    """
+    Get a class and every class it descends from.
+
+    Args:
+    - graph (SOLI): the graph
+    - iri (str): the normalized IRI of the class
+
+    Returns:
+    - set: the IRIs of the class and its ancestors in the graph
+    """
+    ancestors = set()
+    stack = [iri]
+    while stack:
+        current = stack.pop()
+        if current in ancestors:
+            continue
+        ancestors.add(current)
+        index = graph.iri_to_index.get(current)
+        if index is not None:
+            stack.extend(
+                SOLI.normalize_iri(parent)
+                for parent in graph.classes[index].sub_class_of
+            )
+    return ancestors
+
+
+def get_affected_tags(
+    old_graph: SOLI,
+    new_graph: SOLI,
+    diff: Dict[str, List[str]],
+    roots: Dict[str, str],
+) -> Set[str]:
+    """
+    Get the tags whose class pools can differ between two versions of a graph.
+
+    A tag is affected when a class that was added, removed, or changed is its root or
+    descends from it in either graph.  Moving a subtree changes the parent links of its
+    old and new parents, so the tags on both sides of the move are affected.
+
+    Args:
+    - old_graph (SOLI): the graph in use
+    - new_graph (SOLI): the updated graph
+    - diff (dict): the diff of the graphs from diff_graphs
+    - roots (dict): the IRI of each tag's root class
+
+    Returns:
+    - set: the affected tags
+    """
+    root_tags: Dict[str, List[str]] = {}
+    for tag, root in roots.items():
+        root_tags.setdefault(SOLI.normalize_iri(root), []).append(tag)
+
+    tags: Set[str] = set()
+    for name, graphs in (
+        ("added", (new_graph,)),
+        ("removed", (old_graph,)),
+        ("changed", (old_graph, new_graph)),
+    ):
+        for iri in diff[name]:
+            for graph in graphs:
+                for ancestor in get_ancestors(graph, iri):
+                    tags.update(root_tags.get(ancestor, ()))
+    return tags
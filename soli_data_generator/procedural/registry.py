@@ -0,0 +1,417 @@
+"""
+Registry of SOLI graphs by ontology version, bounded by an estimated memory ceiling.
+
+Regression datasets are generated against several ontology versions side by side, and
+each SOLI instance and its class pools are large.  A GraphRegistry loads a graph the
+first time its version is requested, keeps it with a warm TemplateFormatter, and evicts
+the least recently used versions once the estimated memory of the graphs it holds
+exceeds the ceiling.
+
+Versions mostly repeat one another, so each newly loaded graph is compacted against
+the graphs already held: classes equal to one in another version are replaced by that
+shared instance, IRIs, labels, and other strings are deduplicated, and the parsed XML
+tree, which is only needed while parsing, is released.  When an upstream branch changes,
+`refresh` updates a held version in place, rebuilding only the class pools it affects.
+"""
+
+# imports
+import functools
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# packages
+from pydantic import BaseModel
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural.refresh import GraphSharer
+from soli_data_generator.procedural.sampling import ClassSampler
+from soli_data_generator.procedural.template import TemplateFormatter
+
+# default ontology version
+DEFAULT_VERSION = "1.0.0"
+
+
+def load_graph(
+    version: str,
+    source_type: str = "github",
+    http_url: Optional[str] = None,
+    github_repo_owner: str = "alea-institute",
+    github_repo_name: str = "soli",
+    use_cache: bool = True,
+) -> SOLI:
+    """
+    Load the SOLI graph of an ontology version.
+
+    Args:
+    - version (str): the ontology version, as a GitHub branch or tag
+    - source_type (str): the source type for the SOLI knowledge graph
+    - http_url (str): the URL to load the ontology from when source_type is http
+    - github_repo_owner (str): the owner of the GitHub repository
+    - github_repo_name (str): the name of the GitHub repository
+    - use_cache (bool): whether to use the cache for the SOLI knowledge graph
+
+    Returns:
+    - SOLI: the graph
+    """
+    return SOLI(
+        source_type=source_type,
+        http_url=http_url,
+        github_repo_owner=github_repo_owner,
+        github_repo_name=github_repo_name,
+        github_repo_branch=version,
+        use_cache=use_cache,
+    )
+
+
+def get_deep_size(roots: Iterable[Any], seen: set) -> int:
+    """
+    Estimate the memory of objects and the containers, strings, and models they reach.
+
+    Args:
+    - roots (Iterable): the objects to measure
+    - seen (set): the ids of objects already counted, updated in place; objects shared with earlier calls are not counted again
+
+    Returns:
+    - int: the estimated size in bytes
+    """
+    size = 0
+    stack = list(roots)
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif isinstance(value, BaseModel):
+            stack.append(value.__dict__)
+    return size
+
+
+class GraphEntry:
+    """
+    A loaded ontology version: its graph, a formatter with warm class pools, and a lock.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        graph: SOLI,
+        formatter: TemplateFormatter,
+        sampler: Optional[ClassSampler] = None,
+    ):
+        """
+        Initialize the entry.
+
+        Args:
+        - version (str): the ontology version
+        - graph (SOLI): the graph
+        - formatter (TemplateFormatter): the formatter over the graph
+        - sampler (ClassSampler): the version's own sampler, or None for uniform sampling
+        """
+        self.version = version
+        self.graph = graph
+        self.formatter = formatter
+        self.sampler = sampler
+
+        # estimated bytes not shared with the entries measured before this one
+        self.bytes = 0
+
+        # serializes sampling from the formatter across the generators sharing it
+        self.lock = threading.Lock()
+
+    def get_roots(self) -> List[Any]:
+        """
+        Get the objects that hold the memory of the entry.
+
+        Returns:
+        - list: the graph's classes, indexes, and triples, and the formatter's pools
+        """
+        # pylint: disable=protected-access
+        return [
+            self.graph.classes,
+            self.graph.iri_to_index,
+            self.graph.label_to_index,
+            self.graph.alt_label_to_index,
+            self.graph.class_edges,
+            self.graph.triples,
+            self.graph._cached_triples,
+            self.formatter.pools,
+        ]
+
+
+class GraphRegistry:
+    """
+    Thread-safe, least-recently-used registry of SOLI graphs by ontology version.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        loader: Callable[[str], SOLI] = load_graph,
+        share: bool = True,
+        sampler: Optional[ClassSampler] = None,
+        correlated: bool = False,
+        compact_spans: bool = False,
+        reloader: Optional[Callable[[str], SOLI]] = None,
+    ):
+        """
+        Initialize an empty registry.
+
+        Args:
+        - max_bytes (int): the estimated memory ceiling for the graphs held, or None for no limit; the most recently used graph is always kept
+        - loader (Callable): loads the graph of a version; defaults to load_graph
+        - share (bool): whether to compact new graphs against the graphs already held
+        - sampler (ClassSampler): the sampling policy; each version draws from its own spawned copy, so draw state such as coverage counts is kept per version
+        - correlated (bool): whether the formatters jointly draw related classes
+        - compact_spans (bool): whether the formatters return AnnotatedSample objects
+        - reloader (Callable): loads the updated graph of a version for refresh; defaults to load_graph without the local cache
+        """
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.share = share
+        self.sampler = sampler
+        self.correlated = correlated
+        self.compact_spans = compact_spans
+        self.reloader = (
+            reloader
+            if reloader is not None
+            else functools.partial(load_graph, use_cache=False)
+        )
+
+        self.entries: OrderedDict[str, GraphEntry] = OrderedDict()
+        self.samplers: Dict[str, ClassSampler] = {}
+        self.loading: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.seen: set = set()
+        self.changes = 0
+        self.total_bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def get(self, version: str = DEFAULT_VERSION) -> GraphEntry:
+        """
+        Get the entry of a version, loading it and evicting older versions if needed.
+
+        Graphs load, and are compacted and given warm pools, outside the registry lock, so
+        versions already held stay available while another loads; concurrent requests for
+        the same version share one load.
+
+        Args:
+        - version (str): the ontology version
+
+        Returns:
+        - GraphEntry: the entry
+        """
+        with self.lock:
+            entry = self.entries.get(version)
+            if entry is not None:
+                self.entries.move_to_end(version)
+                self.hits += 1
+                return entry
+            future = self.loading.get(version)
+            owner = future is None
+            if owner:
+                future = self.loading[version] = Future()
+                graphs = [entry.graph for entry in self.entries.values()]
+        if not owner:
+            return future.result()
+
+        try:
+            graph = self.loader(version)
+            if self.share:
+                GraphSharer(graphs).share_graph(graph)
+            sampler = self.get_sampler(version)
+            entry = GraphEntry(
+                version,
+                graph,
+                TemplateFormatter(
+                    soli_graph=graph,
+                    sampler=sampler,
+                    correlated=self.correlated,
+                    compact_spans=self.compact_spans,
+                ),
+                sampler,
+            )
+            entry.formatter.load_pools()
+            with self.lock:
+                self.entries[version] = entry
+                self.loads += 1
+                self.changes += 1
+                entry.bytes = get_deep_size(entry.get_roots(), self.seen)
+                self.total_bytes += entry.bytes
+                evicted = self.evict()
+                del self.loading[version]
+        except BaseException as error:
+            with self.lock:
+                self.loading.pop(version, None)
+            future.set_exception(error)
+            raise
+
+        future.set_result(entry)
+        if evicted:
+            self.remeasure()
+        return entry
+
+    def get_sampler(self, version: str, locked: bool = False) -> Optional[ClassSampler]:
+        """
+        Get the sampler of a version, spawning it from the registry's sampler on first use.
+
+        Samplers outlive eviction, so the draw state of a version, such as its coverage
+        counts, carries over to the classes of the version when it is loaded again.
+
+        Args:
+        - version (str): the ontology version
+        - locked (bool): whether the caller already holds the lock
+
+        Returns:
+        - ClassSampler | None: the sampler, or None for uniform sampling
+        """
+        if self.sampler is None:
+            return None
+        if not locked:
+            with self.lock:
+                return self.get_sampler(version, locked=True)
+        sampler = self.samplers.get(version)
+        if sampler is None:
+            sampler = self.samplers[version] = self.sampler.spawn()
+        return sampler
+
+    def get_formatter(self, version: str = DEFAULT_VERSION) -> TemplateFormatter:
+        """
+        Get the formatter of a version.
+
+        Args:
+        - version (str): the ontology version
+
+        Returns:
+        - TemplateFormatter: the formatter with warm class pools
+        """
+        return self.get(version).formatter
+
+    def refresh(self, version: str, graph: Optional[SOLI] = None) -> dict:
+        """
+        Update a held version to its current upstream graph in place.
+
+        Only the class pools that the update changes are rebuilt, and generators holding
+        the version's formatter pick up the update without reloading.  The update is
+        compacted and applied outside the registry lock; refreshes run one at a time.
+
+        Args:
+        - version (str): the ontology version
+        - graph (SOLI): the updated graph; defaults to loading it with the reloader
+
+        Returns:
+        - dict: the IRIs of the added, removed, and changed classes, and the refreshed tags
+        """
+        if version not in self:
+            raise ValueError(f"Version is not held by the registry: {version}")
+        if graph is None:
+            graph = self.reloader(version)
+
+        with self.refresh_lock:
+            with self.lock:
+                entry = self.entries.get(version)
+                if entry is None:
+                    raise ValueError(f"Version is not held by the registry: {version}")
+                # prefer the version's own classes, so unchanged pools stay identical
+                graphs = [entry.graph] + [
+                    other.graph for other in self.entries.values() if other is not entry
+                ]
+            if self.share:
+                GraphSharer(graphs).share_graph(graph)
+            diff = entry.formatter.refresh(graph, share=False)
+            with self.lock:
+                entry.graph = entry.formatter.graph
+                self.refreshes += 1
+                self.changes += 1
+        self.remeasure()
+        return diff
+
+    def evict(self) -> bool:
+        """
+        Evict least recently used versions until the estimate fits the ceiling.  The caller must hold the lock.
+
+        The bytes of an evicted entry are subtracted from the estimate, which undercounts
+        the objects it shared with newer versions until the next remeasure.
+
+        Returns:
+        - bool: whether any version was evicted
+        """
+        evicted = False
+        while (
+            self.max_bytes is not None
+            and self.total_bytes > self.max_bytes
+            and len(self.entries) > 1
+        ):
+            _, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry.bytes
+            self.evictions += 1
+            self.changes += 1
+            evicted = True
+        return evicted
+
+    def remeasure(self) -> None:
+        """
+        Estimate the memory of the graphs held from scratch, evicting until it fits the ceiling.
+
+        Loads only measure the new entry against the objects already counted, but the ids
+        of objects freed by an eviction or a refresh can be reused by new objects, so the
+        counted ids are rebuilt after either.  The walk runs outside the lock and is
+        repeated if the entries change meanwhile.
+        """
+        while True:
+            with self.lock:
+                entries = list(self.entries.values())
+                changes = self.changes
+            seen: set = set()
+            sizes = [get_deep_size(entry.get_roots(), seen) for entry in entries]
+            with self.lock:
+                if self.changes != changes:
+                    continue
+                for entry, size in zip(entries, sizes):
+                    entry.bytes = size
+                self.seen = seen
+                self.total_bytes = sum(sizes)
+                if not self.evict():
+                    return
+
+    def __contains__(self, version: str) -> bool:
+        with self.lock:
+            return version in self.entries
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def stats(self) -> dict:
+        """
+        Get the registry statistics.
+
+        Returns:
+        - dict: the versions held from least to most recently used, the estimated bytes, and the hit, load, eviction, and refresh counts
+        """
+        with self.lock:
+            return {
+                "versions": list(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+            }
@@ -0,0 +1,393 @@
+"""
+Relation index over the SOLI graph and correlated multi-slot sampling.
+
+The relation index stores an undirected adjacency over SOLI classes (parent/child,
+seeAlso, and any other triple linking two classes) in compressed sparse row form, so
+that co-occurring template slots can be drawn from classes related to each other in a
+single step instead of rejection-filtering independent draws.
+"""
+
+# imports
+import weakref
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# packages
+from soli import SOLI, OWLClass
+from soli.graph import OWL_THING, SOLI_TYPE_IRIS
+
+# project
+from soli_data_generator.procedural.sampling import ClassSampler, is_same_pool
+
+# triple predicates that link two classes
+DEFAULT_RELATION_PREDICATES = ("rdfs:subClassOf", "rdfs:seeAlso", "rdfs:isDefinedBy")
+
+# default number of hops for related candidates
+DEFAULT_MAX_HOPS = 2
+
+
+class RelationIndex:
+    """
+    Compact undirected adjacency index over the classes of a SOLI graph.
+
+    Node ids are the class positions in `soli_graph.classes`.  Category roots and
+    owl:Thing are left out so that every class in a category is not trivially related
+    through its root.
+    """
+
+    def __init__(
+        self,
+        soli_graph: SOLI,
+        predicates: Iterable[str] = DEFAULT_RELATION_PREDICATES,
+    ):
+        """
+        Build the index from the graph's class relations and triples.
+
+        Args:
+        - soli_graph (SOLI): the SOLI knowledge graph
+        - predicates (Iterable[str]): the triple predicates to treat as relations
+        """
+        self.iri_to_index: Dict[str, int] = dict(soli_graph.iri_to_index)
+        self.size = len(soli_graph.classes)
+
+        # hubs that would connect everything in a category
+        excluded = {
+            soli_graph.normalize_iri(iri) for iri in SOLI_TYPE_IRIS.values()
+        } | {OWL_THING}
+        excluded_ids = {
+            self.iri_to_index[iri] for iri in excluded if iri in self.iri_to_index
+        }
+
+        # collect the undirected edges
+        neighbors: List[Set[int]] = [set() for _ in range(self.size)]
+
+        def add_edge(source_iri: str, target_iri: str) -> None:
+            source = self.iri_to_index.get(SOLI.normalize_iri(source_iri))
+            target = self.iri_to_index.get(SOLI.normalize_iri(target_iri))
+            if source is None or target is None or source == target:
+                return
+            if source in excluded_ids or target in excluded_ids:
+                return
+            neighbors[source].add(target)
+            neighbors[target].add(source)
+
+        predicate_set = set(predicates)
+        for subject, predicate, obj in soli_graph.triples:
+            if predicate in predicate_set and obj:
+                add_edge(subject, obj)
+
+        # store as CSR arrays
+        self.offsets = array("I", [0])
+        self.targets = array("I")
+        for node_neighbors in neighbors:
+            self.targets.extend(sorted(node_neighbors))
+            self.offsets.append(len(self.targets))
+
+    def neighbors(self, node: int) -> Sequence[int]:
+        """
+        Get the direct neighbors of a node.
+
+        Args:
+        - node (int): the node id
+
+        Returns:
+        - Sequence[int]: the neighbor node ids
+        """
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def neighborhood(self, nodes: Iterable[int], max_hops: int) -> Set[int]:
+        """
+        Get every node within max_hops of any of the given nodes, excluding the nodes themselves.
+
+        Args:
+        - nodes (Iterable[int]): the starting node ids
+        - max_hops (int): the maximum number of hops
+
+        Returns:
+        - set: the related node ids
+        """
+        start = set(nodes)
+        visited = set(start)
+        frontier = list(start)
+        for _ in range(max_hops):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self.neighbors(node):
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        return visited - start
+
+    def get_node(self, owl_class: OWLClass) -> Optional[int]:
+        """
+        Get the node id for an OWL class.
+
+        Args:
+        - owl_class (OWLClass): the OWL class
+
+        Returns:
+        - int | None: the node id, or None if the class is not in the index
+        """
+        return self.iri_to_index.get(owl_class.iri)
+
+    @property
+    def num_edges(self) -> int:
+        """
+        Get the number of undirected edges.
+
+        Returns:
+        - int: the edge count
+        """
+        return len(self.targets) // 2
+
+
+# relation indices by graph, built once per graph
+_RELATION_INDICES: "weakref.WeakKeyDictionary[SOLI, RelationIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_relation_index(soli_graph: SOLI) -> RelationIndex:
+    """
+    Get the relation index for a graph, building it on first use.
+
+    Args:
+    - soli_graph (SOLI): the SOLI knowledge graph
+
+    Returns:
+    - RelationIndex: the relation index
+    """
+    index = _RELATION_INDICES.get(soli_graph)
+    if index is None:
+        index = _RELATION_INDICES[soli_graph] = RelationIndex(soli_graph)
+    return index
+
+
+def get_pool_positions(
+    index: RelationIndex, pool: Sequence[OWLClass]
+) -> Dict[int, int]:
+    """
+    Map the node ids of a pool's classes to their first position in the pool.
+
+    Args:
+    - index (RelationIndex): the relation index
+    - pool (Sequence[OWLClass]): the class pool
+
+    Returns:
+    - dict: the pool position for each node id in the pool
+    """
+    positions: Dict[int, int] = {}
+    for position, owl_class in enumerate(pool):
+        node = index.get_node(owl_class)
+        if node is not None:
+            positions.setdefault(node, position)
+    return positions
+
+
+class CorrelatedSampler(ClassSampler):
+    """
+    Joint sampling policy for the SOLI slots of a template.
+
+    The first slot is drawn by the base sampler; each later slot is drawn from the
+    classes in its pool that are within `max_hops` of the classes already drawn,
+    falling back to the base sampler when no related class exists.
+    """
+
+    def __init__(
+        self,
+        index: RelationIndex,
+        max_hops: int = DEFAULT_MAX_HOPS,
+        base: Optional[ClassSampler] = None,
+    ):
+        """
+        Initialize the correlated sampler.
+
+        Args:
+        - index (RelationIndex): the relation index for the graph
+        - max_hops (int): the maximum number of hops between related classes
+        - base (ClassSampler): the sampler for unconstrained draws and labels; defaults to uniform
+        """
+        self.base = base if base is not None else ClassSampler()
+        super().__init__(rng=self.base.rng)
+        self.index = index
+        self.max_hops = max_hops
+        self.pool_nodes: Dict[str, Tuple[Sequence[OWLClass], Dict[int, int]]] = {}
+
+    def get_pool_nodes(self, tag: str, pool: Sequence[OWLClass]) -> Dict[int, int]:
+        """
+        Get the mapping from node id to pool position for a tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - dict: the pool position for each node id in the pool
+        """
+        entry = self.pool_nodes.get(tag)
+        if entry is None or not is_same_pool(entry[0], pool):
+            entry = self.pool_nodes[tag] = (
+                pool,
+                get_pool_positions(self.index, pool),
+            )
+        return entry[1]
+
+    def spawn(self) -> "CorrelatedSampler":
+        """
+        Create a sampler over the same relation index with a spawned base sampler and no pool mappings.
+
+        Returns:
+        - CorrelatedSampler: the new sampler
+        """
+        return CorrelatedSampler(
+            self.index, max_hops=self.max_hops, base=self.base.spawn()
+        )
+
+    def set_index(
+        self, index: RelationIndex, pools: Dict[str, Sequence[OWLClass]]
+    ) -> None:
+        """
+        Switch to the relation index of an updated graph, remapping the pools to its node ids.
+
+        Args:
+        - index (RelationIndex): the relation index for the updated graph
+        - pools (dict): the class pools by tag, as they will be after the update
+        """
+        pool_nodes = {
+            tag: (pool, get_pool_positions(index, pool)) for tag, pool in pools.items()
+        }
+        self.index = index
+        self.pool_nodes = pool_nodes
+
+    def refresh(self, tag: str, pool: Sequence[OWLClass]) -> None:
+        """
+        Rebuild the base sampler's state and the node mapping of a tag for its new class pool.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the tag's new class pool
+        """
+        self.base.refresh(tag, pool)
+        self.pool_nodes[tag] = (pool, get_pool_positions(self.index, pool))
+
+    def sample(self, tag: str, pool: Sequence[OWLClass]) -> OWLClass:
+        """
+        Sample a single class with the base sampler.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - OWLClass: the sampled class
+        """
+        return self.base.sample(tag, pool)
+
+    def sample_label(self, tag: str, owl_class: OWLClass) -> str:
+        """
+        Sample a label with the base sampler.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+
+        Returns:
+        - str: the sampled label
+        """
+        return self.base.sample_label(tag, owl_class)
+
+    def record(self, tag: str, owl_class: OWLClass) -> None:
+        """
+        Record a draw with the base sampler.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+        """
+        self.base.record(tag, owl_class)
+
+    def sample_slots(
+        self,
+        slots: Sequence[Tuple[str, str]],
+        get_pool: Callable[[str], Sequence[OWLClass]],
+        distinct: bool = True,
+    ) -> Dict[Tuple[str, str], OWLClass]:
+        """
+        Jointly sample related classes for the SOLI slots of a template.
+
+        Args:
+        - slots (Sequence[tuple]): the (tag, index) slot keys, in template order
+        - get_pool (Callable): returns the candidate classes for a tag
+        - distinct (bool): whether slots sharing a tag get distinct classes
+
+        Returns:
+        - dict: the sampled class for each slot
+        """
+        sampled_classes = {}
+        related: Set[int] = set()
+        drawn: Set[int] = set()
+        drawn_by_tag: Dict[str, List[OWLClass]] = {}
+        for tag, index in slots:
+            pool = get_pool(tag)
+            tag_draws = drawn_by_tag.setdefault(tag, [])
+            excluded = {owl_class.iri for owl_class in tag_draws} if distinct else set()
+            sampled_class = None
+            if related:
+                pool_nodes = self.get_pool_nodes(tag, pool)
+                if len(related) < len(pool_nodes):
+                    candidates = sorted(node for node in related if node in pool_nodes)
+                else:
+                    candidates = sorted(node for node in pool_nodes if node in related)
+                if excluded:
+                    candidates = [
+                        node
+                        for node in candidates
+                        if pool[pool_nodes[node]].iri not in excluded
+                    ]
+                if candidates:
+                    sampled_class = pool[pool_nodes[self.rng.choice(candidates)]]
+                    self.base.record(tag, sampled_class)
+
+            if sampled_class is None:
+                if excluded:
+                    sampled_class = self.base.sample_distinct_by_rejection(
+                        tag, pool, len(tag_draws) + 1, tag_draws
+                    )[-1]
+                else:
+                    sampled_class = self.base.sample(tag, pool)
+
+            tag_draws.append(sampled_class)
+            sampled_classes[(tag, index)] = sampled_class
+
+            # extend the related set with the new class's neighborhood
+            node = self.index.get_node(sampled_class)
+            if node is not None and node not in drawn:
+                drawn.add(node)
+                related |= self.index.neighborhood([node], self.max_hops)
+
+        return sampled_classes
+
+    def sample_slots_many(
+        self,
+        slots: Sequence[Tuple[str, str]],
+        get_pool: Callable[[str], Sequence[OWLClass]],
+        k: int,
+        distinct: bool = True,
+    ) -> List[Dict[Tuple[str, str], OWLClass]]:
+        """
+        Jointly sample k sets of related classes for the SOLI slots of a template.
+
+        Args:
+        - slots (Sequence[tuple]): the (tag, index) slot keys, in template order
+        - get_pool (Callable): returns the candidate classes for a tag
+        - k (int): the number of samples
+        - distinct (bool): whether slots sharing a tag get distinct classes within each sample
+
+        Returns:
+        - list: the sampled class for each slot, one mapping per sample
+        """
+        return [self.sample_slots(slots, get_pool, distinct) for _ in range(k)]
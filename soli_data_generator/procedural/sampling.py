@@ -0,0 +1,1085 @@
+"""
+Sampling policies for drawing SOLI classes from the per-tag class pools.
+
+The default policy is the uniform draw used by the template formatter; the coverage
+sampler tracks how often each class has been drawn and prefers classes that are still
+below the coverage target, so that every class in a category is reached with far fewer
+samples than uniform sampling needs.  The weighted sampler applies per-tag policies
+(depth, label variant, and target class weights) through precomputed alias tables.
+"""
+
+# imports
+import copy
+import json
+import random
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# packages
+from soli import OWLClass
+
+
+# redraws allowed per requested value when drawing distinct values
+MAX_DISTINCT_ATTEMPTS = 16
+
+# label variants, in the order they are offered by get_owl_label_choices
+LABEL_VARIANTS = ("label", "preferred_label", "alternative_label")
+
+# SOLI tag to SOLI graph getter method
+SOLI_TAG_GETTERS = {
+    "actor_player": "get_player_actors",
+    "area_of_law": "get_areas_of_law",
+    "asset_type": "get_asset_types",
+    "communication_modality": "get_communication_modalities",
+    "currency": "get_currencies",
+    "data_format": "get_data_formats",
+    "document_artifact": "get_document_artifacts",
+    "engagement_terms": "get_engagement_terms",
+    "event": "get_events",
+    "forums_and_venues": "get_forum_venues",
+    "governmental_body": "get_governmental_bodies",
+    "industry": "get_industries",
+    "language": "get_languages",
+    "soli_type": "get_soli_types",
+    "legal_authorities": "get_legal_authorities",
+    "legal_entity": "get_legal_entities",
+    "location": "get_locations",
+    "matter_narrative": "get_matter_narratives",
+    "matter_narrative_format": "get_matter_narrative_formats",
+    "objectives": "get_objectives",
+    "service": "get_services",
+    "standards_compatibility": "get_standards_compatibilities",
+    "status": "get_statuses",
+    "system_identifiers": "get_system_identifiers",
+}
+
+
+def get_owl_label_choices(owl_class: OWLClass) -> List[Tuple[str, str]]:
+    """
+    Get the candidate labels for an OWL class with their label variant.
+
+    Args:
+    - owl_class (OWLClass): the OWL class to get labels for
+
+    Returns:
+    - list: (variant, label) tuples for the label, preferred label, and alternative labels
+    """
+    label_choices = []
+    if owl_class.label:
+        label_choices.append(("label", owl_class.label))
+
+    if owl_class.preferred_label:
+        label_choices.append(("preferred_label", owl_class.preferred_label))
+
+    if owl_class.alternative_labels:
+        label_choices.extend(
+            ("alternative_label", label) for label in owl_class.alternative_labels
+        )
+
+    return label_choices
+
+
+def is_same_pool(old_pool: Sequence[OWLClass], pool: Sequence[OWLClass]) -> bool:
+    """
+    Check whether state built for one class pool applies to another.
+
+    Pools are compared by identity rather than size, so state built for a pool that was
+    replaced by a refresh is never reused for a different pool of the same size.  Fresh
+    lists holding the same class instances, as returned by the graph getters, still match.
+
+    Args:
+    - old_pool (Sequence[OWLClass]): the pool the state was built for
+    - pool (Sequence[OWLClass]): the pool being drawn from
+
+    Returns:
+    - bool: whether the pools hold the same classes in the same order
+    """
+    if old_pool is pool:
+        return True
+    return len(old_pool) == len(pool) and all(
+        old_class is owl_class for old_class, owl_class in zip(old_pool, pool)
+    )
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table for O(1) draws from a fixed discrete distribution.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the alias table in O(n).
+
+        Args:
+        - weights (Sequence[float]): the non-negative weights; at least one must be positive
+        """
+        size = len(weights)
+        total = float(sum(weights))
+        if size == 0 or total <= 0:
+            raise ValueError("AliasTable requires at least one positive weight.")
+
+        # scale so that the mean probability is 1
+        scaled = [weight * size / total for weight in weights]
+        self.size = size
+        self.probability = [1.0] * size
+        self.alias = list(range(size))
+
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # anything left over is 1 up to rounding error
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def sample(self, rng=random) -> int:
+        """
+        Draw an index.
+
+        Args:
+        - rng (random.Random): the random number generator
+
+        Returns:
+        - int: the sampled index
+        """
+        column = rng.randrange(self.size)
+        if rng.random() < self.probability[column]:
+            return column
+        return self.alias[column]
+
+    def sample_many(self, k: int, rng=random) -> List[int]:
+        """
+        Draw k indices.
+
+        Args:
+        - k (int): the number of indices to draw
+        - rng (random.Random): the random number generator
+
+        Returns:
+        - list: the sampled indices
+        """
+        probability = self.probability
+        alias = self.alias
+        size = self.size
+        draws = []
+        for _ in range(k):
+            column = int(rng.random() * size)
+            draws.append(
+                column if rng.random() < probability[column] else alias[column]
+            )
+        return draws
+
+
+class FenwickTree:
+    """
+    Fenwick (binary indexed) tree over non-negative weights.
+
+    Supports O(log n) point updates, prefix sums, and weighted index search, which makes
+    it suitable for weights that change after every draw.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the tree in O(n) from an initial weight sequence.
+
+        Args:
+        - weights (Sequence[float]): the initial non-negative weights
+        """
+        self.size = len(weights)
+        self.tree = [0.0] * (self.size + 1)
+        for i, weight in enumerate(weights, start=1):
+            self.tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+        # highest power of two <= size for the search descent
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size > 0 else 0
+
+    def add(self, index: int, delta: float) -> None:
+        """
+        Add a delta to the weight at an index.
+
+        Args:
+        - index (int): the zero-based index to update
+        - delta (float): the amount to add
+        """
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index: int) -> float:
+        """
+        Get the sum of the weights in [0, index).
+
+        Args:
+        - index (int): the exclusive upper bound
+
+        Returns:
+        - float: the prefix sum
+        """
+        total = 0.0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    @property
+    def total(self) -> float:
+        """
+        Get the sum of all weights.
+
+        Returns:
+        - float: the total weight
+        """
+        return self.prefix_sum(self.size)
+
+    def find(self, value: float) -> int:
+        """
+        Find the index whose cumulative weight interval contains the value.
+
+        Args:
+        - value (float): a value in [0, total)
+
+        Returns:
+        - int: the smallest zero-based index i with prefix_sum(i + 1) > value
+        """
+        position = 0
+        remaining = value
+        step = self._top_bit
+        while step > 0:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= remaining:
+                position = next_position
+                remaining -= self.tree[next_position]
+            step >>= 1
+
+        # guard against float rounding at the upper edge
+        return min(position, self.size - 1)
+
+
+class ClassSampler:
+    """
+    Uniform sampling policy over a tag's class pool.
+
+    Subclasses override `sample` to change how classes are drawn for a tag.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        """
+        Initialize the sampler.
+
+        Args:
+        - rng (random.Random): the random number generator; defaults to the global `random` state
+        """
+        self.rng = rng if rng is not None else random
+
+    def spawn(self) -> "ClassSampler":
+        """
+        Create a shallow copy of the sampler that shares its random source.
+
+        The base sampler keeps no per-tag state, so a copy is enough here; subclasses with
+        per-tag state must override spawn to start that state empty.
+
+        Returns:
+        - ClassSampler: the new sampler
+        """
+        return copy.copy(self)
+
+    def sample(self, tag: str, pool: Sequence[OWLClass]) -> OWLClass:
+        """
+        Sample a class from the pool for a tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - OWLClass: the sampled class
+        """
+        return self.rng.choice(pool)
+
+    def sample_many(self, tag: str, pool: Sequence[OWLClass], k: int) -> List[OWLClass]:
+        """
+        Sample k classes from the pool for a tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+
+        Returns:
+        - list: the sampled classes
+        """
+        return [self.sample(tag, pool) for _ in range(k)]
+
+    def sample_label(self, tag: str, owl_class: OWLClass) -> str:
+        """
+        Sample a label for a class drawn for a tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+
+        Returns:
+        - str: the sampled label
+        """
+        return self.rng.choice(get_owl_label_choices(owl_class))[1]
+
+    def record(self, tag: str, owl_class: OWLClass) -> None:
+        """
+        Record a class draw made on this sampler's behalf; no-op for stateless samplers.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+        """
+
+    def refresh(self, tag: str, pool: Sequence[OWLClass]) -> None:
+        """
+        Rebuild the state kept for a tag whose class pool changed with the graph; no-op for stateless samplers.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the tag's new class pool
+        """
+
+    def sample_distinct(
+        self, tag: str, pool: Sequence[OWLClass], k: int
+    ) -> List[OWLClass]:
+        """
+        Sample k distinct classes from the pool for a tag.
+
+        Uses a partial shuffle over pool positions; pools can list a class more than once,
+        so repeated IRIs are redrawn.  If the pool has fewer than k distinct classes, the
+        remaining draws repeat classes.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+
+        Returns:
+        - list: the sampled classes
+        """
+        sampled_classes = [
+            pool[i] for i in self.rng.sample(range(len(pool)), min(k, len(pool)))
+        ]
+        if len({owl_class.iri for owl_class in sampled_classes}) == k:
+            return sampled_classes
+
+        return self.sample_distinct_by_rejection(tag, pool, k, sampled_classes)
+
+    def sample_distinct_by_rejection(
+        self,
+        tag: str,
+        pool: Sequence[OWLClass],
+        k: int,
+        candidates: Iterable[OWLClass] = (),
+    ) -> List[OWLClass]:
+        """
+        Sample k distinct classes by redrawing repeated IRIs with `sample`.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+        - candidates (Iterable[OWLClass]): classes already drawn to keep if distinct
+
+        Returns:
+        - list: the sampled classes
+        """
+        sampled_classes: List[OWLClass] = []
+        seen = set()
+        for owl_class in candidates:
+            if owl_class.iri not in seen and len(sampled_classes) < k:
+                seen.add(owl_class.iri)
+                sampled_classes.append(owl_class)
+
+        attempts = 0
+        max_attempts = MAX_DISTINCT_ATTEMPTS * k
+        while len(sampled_classes) < k:
+            owl_class = self.sample(tag, pool)
+            attempts += 1
+            if owl_class.iri not in seen or attempts > max_attempts:
+                seen.add(owl_class.iri)
+                sampled_classes.append(owl_class)
+
+        return sampled_classes
+
+    def sample_slots(
+        self,
+        slots: Sequence[Tuple[str, str]],
+        get_pool: Callable[[str], Sequence[OWLClass]],
+        distinct: bool = True,
+    ) -> Dict[Tuple[str, str], OWLClass]:
+        """
+        Sample a class for each SOLI slot of a template.
+
+        Args:
+        - slots (Sequence[tuple]): the (tag, index) slot keys, in template order
+        - get_pool (Callable): returns the candidate classes for a tag
+        - distinct (bool): whether slots sharing a tag (e.g. <|name:1|> and <|name:2|>) get distinct classes
+
+        Returns:
+        - dict: the sampled class for each slot
+        """
+        sampled_classes = {}
+        for tag, tag_slots in group_slots(slots).items():
+            pool = get_pool(tag)
+            if distinct and len(tag_slots) > 1:
+                draws = self.sample_distinct(tag, pool, len(tag_slots))
+            else:
+                draws = [self.sample(tag, pool) for _ in tag_slots]
+            sampled_classes.update(zip(tag_slots, draws))
+
+        # keep template order
+        return {slot: sampled_classes[slot] for slot in slots}
+
+    def sample_slots_many(
+        self,
+        slots: Sequence[Tuple[str, str]],
+        get_pool: Callable[[str], Sequence[OWLClass]],
+        k: int,
+        distinct: bool = True,
+    ) -> List[Dict[Tuple[str, str], OWLClass]]:
+        """
+        Sample k classes for each SOLI slot of a template, one tag at a time.
+
+        Args:
+        - slots (Sequence[tuple]): the (tag, index) slot keys, in template order
+        - get_pool (Callable): returns the candidate classes for a tag
+        - k (int): the number of samples
+        - distinct (bool): whether slots sharing a tag get distinct classes within each sample
+
+        Returns:
+        - list: the sampled class for each slot, one mapping per sample
+        """
+        samples: List[Dict[Tuple[str, str], OWLClass]] = [{} for _ in range(k)]
+        for tag, tag_slots in group_slots(slots).items():
+            pool = get_pool(tag)
+            if distinct and len(tag_slots) > 1:
+                for sample in samples:
+                    sample.update(
+                        zip(tag_slots, self.sample_distinct(tag, pool, len(tag_slots)))
+                    )
+            else:
+                for slot in tag_slots:
+                    for sample, owl_class in zip(
+                        samples, self.sample_many(tag, pool, k)
+                    ):
+                        sample[slot] = owl_class
+
+        # keep template order
+        return [{slot: sample[slot] for slot in slots} for sample in samples]
+
+
+def group_slots(slots: Sequence[Tuple[str, str]]) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Group template slot keys by tag, keeping template order within each group.
+
+    Args:
+    - slots (Sequence[tuple]): the (tag, index) slot keys
+
+    Returns:
+    - dict: the slot keys for each tag
+    """
+    groups: Dict[str, List[Tuple[str, str]]] = {}
+    for slot in slots:
+        groups.setdefault(slot[0], []).append(slot)
+    return groups
+
+
+class SamplingPolicy:
+    """
+    Per-tag weighting policy for the weighted sampler.
+
+    A class's weight is its target weight (from `class_weights`, by IRI or label, or
+    `default_weight`) multiplied by `depth ** depth_exponent`, where depth is the
+    distance from the top of the tag's pool.  Labels are drawn by `label_weights`
+    over the label variants.
+    """
+
+    def __init__(
+        self,
+        depth_exponent: float = 0.0,
+        class_weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0,
+        label_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+        - depth_exponent (float): the exponent applied to class depth; positive prefers deeper classes
+        - class_weights (dict): target weights keyed by class IRI or label, e.g. from production data
+        - default_weight (float): the weight for classes missing from class_weights
+        - label_weights (dict): weights keyed by label variant (label, preferred_label, alternative_label)
+        """
+        self.depth_exponent = depth_exponent
+        self.class_weights = class_weights or {}
+        self.default_weight = default_weight
+        self.label_weights = label_weights
+
+        # validate label variants early so config typos surface at load time
+        for variant in self.label_weights or {}:
+            if variant not in LABEL_VARIANTS:
+                raise ValueError(
+                    f"Invalid label variant: {variant}; must be one of {LABEL_VARIANTS}"
+                )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SamplingPolicy":
+        """
+        Create a policy from a configuration dictionary.
+
+        Args:
+        - data (dict): the policy configuration
+
+        Returns:
+        - SamplingPolicy: the policy
+        """
+        return cls(
+            depth_exponent=data.get("depth_exponent", 0.0),
+            class_weights=data.get("class_weights"),
+            default_weight=data.get("default_weight", 1.0),
+            label_weights=data.get("label_weights"),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Convert the policy to a configuration dictionary.
+
+        Returns:
+        - dict: the policy configuration
+        """
+        return {
+            "depth_exponent": self.depth_exponent,
+            "class_weights": self.class_weights,
+            "default_weight": self.default_weight,
+            "label_weights": self.label_weights,
+        }
+
+    def get_class_weights(self, pool: Sequence[OWLClass]) -> List[float]:
+        """
+        Compute the weight of each class in a pool.
+
+        Args:
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - list: the class weights, aligned with the pool
+        """
+        depths = get_pool_depths(pool) if self.depth_exponent != 0.0 else None
+        weights = []
+        for i, owl_class in enumerate(pool):
+            weight = self.class_weights.get(owl_class.iri)
+            if weight is None:
+                weight = self.class_weights.get(owl_class.label, self.default_weight)
+            if depths is not None:
+                weight *= depths[i] ** self.depth_exponent
+            weights.append(weight)
+
+        return weights
+
+
+def get_pool_depths(pool: Sequence[OWLClass]) -> List[int]:
+    """
+    Get the depth of each class within its pool, where classes whose parents are
+    outside the pool have depth 1.
+
+    Args:
+    - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+    Returns:
+    - list: the class depths, aligned with the pool
+    """
+    by_iri = {owl_class.iri: owl_class for owl_class in pool}
+    depths: Dict[str, int] = {}
+
+    def get_depth(iri: str) -> int:
+        # iterative walk up the parents to avoid deep recursion
+        path = []
+        current = iri
+        while current not in depths:
+            parents = [p for p in by_iri[current].sub_class_of if p in by_iri]
+            if not parents or current in path:
+                depths[current] = 1
+                break
+            path.append(current)
+            current = parents[0]
+        depth = depths[current]
+        for node in reversed(path):
+            depth += 1
+            depths[node] = depth
+        return depths[iri]
+
+    return [get_depth(owl_class.iri) for owl_class in pool]
+
+
+class WeightedSampler(ClassSampler):
+    """
+    Weighted sampling policy with per-tag policies backed by alias tables.
+
+    Tags without a policy are sampled uniformly.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, SamplingPolicy]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initialize the weighted sampler.
+
+        Args:
+        - policies (dict): the sampling policy for each SOLI tag
+        - rng (random.Random): the random number generator; defaults to the global `random` state
+        """
+        super().__init__(rng=rng)
+        self.policies: Dict[str, SamplingPolicy] = {}
+        self.tables: Dict[str, Tuple[Sequence[OWLClass], AliasTable]] = {}
+        self.label_tables: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+        for tag, policy in (policies or {}).items():
+            self.set_policy(tag, policy)
+
+    def set_policy(self, tag: str, policy: Optional[SamplingPolicy]) -> None:
+        """
+        Set or clear the policy for a tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - policy (SamplingPolicy): the policy, or None to sample the tag uniformly
+        """
+        if tag not in SOLI_TAG_GETTERS:
+            raise ValueError(f"Invalid SOLI tag for sampling policy: {tag}")
+
+        if policy is None:
+            self.policies.pop(tag, None)
+        else:
+            self.policies[tag] = policy
+
+        # drop the precomputed tables for the tag
+        self.tables.pop(tag, None)
+        for key in [key for key in self.label_tables if key[0] == tag]:
+            del self.label_tables[key]
+
+    def get_table(self, tag: str, pool: Sequence[OWLClass]) -> Optional[AliasTable]:
+        """
+        Get the alias table for a tag, building it on first use.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - AliasTable | None: the alias table, or None if the tag has no policy
+        """
+        policy = self.policies.get(tag)
+        if policy is None:
+            return None
+
+        entry = self.tables.get(tag)
+        if entry is None or not is_same_pool(entry[0], pool):
+            entry = (pool, AliasTable(policy.get_class_weights(pool)))
+            self.tables[tag] = entry
+        return entry[1]
+
+    def spawn(self) -> "WeightedSampler":
+        """
+        Create a sampler with the same policies and random source but no alias tables.
+
+        Returns:
+        - WeightedSampler: the new sampler
+        """
+        return WeightedSampler(self.policies, rng=self.rng)
+
+    def refresh(self, tag: str, pool: Sequence[OWLClass]) -> None:
+        """
+        Rebuild the alias table of a tag for its new class pool, before the pool is swapped in.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the tag's new class pool
+        """
+        policy = self.policies.get(tag)
+        if policy is not None:
+            self.tables[tag] = (pool, AliasTable(policy.get_class_weights(pool)))
+
+    def sample(self, tag: str, pool: Sequence[OWLClass]) -> OWLClass:
+        """
+        Sample a class using the tag's alias table.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - OWLClass: the sampled class
+        """
+        table = self.get_table(tag, pool)
+        if table is None:
+            return self.rng.choice(pool)
+        return pool[table.sample(self.rng)]
+
+    def sample_many(self, tag: str, pool: Sequence[OWLClass], k: int) -> List[OWLClass]:
+        """
+        Sample k classes using the tag's alias table.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+
+        Returns:
+        - list: the sampled classes
+        """
+        table = self.get_table(tag, pool)
+        if table is None:
+            return [self.rng.choice(pool) for _ in range(k)]
+        return [pool[i] for i in table.sample_many(k, self.rng)]
+
+    def sample_distinct(
+        self, tag: str, pool: Sequence[OWLClass], k: int
+    ) -> List[OWLClass]:
+        """
+        Sample k distinct classes, redrawing repeats from the tag's alias table.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+
+        Returns:
+        - list: the sampled classes
+        """
+        if tag not in self.policies:
+            return super().sample_distinct(tag, pool, k)
+        return self.sample_distinct_by_rejection(tag, pool, k)
+
+    def sample_label(self, tag: str, owl_class: OWLClass) -> str:
+        """
+        Sample a label using the tag's label variant weights.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+
+        Returns:
+        - str: the sampled label
+        """
+        policy = self.policies.get(tag)
+        if policy is None or policy.label_weights is None:
+            return super().sample_label(tag, owl_class)
+
+        label_choices = get_owl_label_choices(owl_class)
+        weights = [
+            policy.label_weights.get(variant, 0.0) for variant, _ in label_choices
+        ]
+        if sum(weights) <= 0:
+            return self.rng.choice(label_choices)[1]
+        return self.rng.choices(label_choices, weights=weights)[0][1]
+
+
+def load_sampling_policies(path: str | Path) -> Dict[str, SamplingPolicy]:
+    """
+    Load per-tag sampling policies from a JSON configuration file.
+
+    The file maps tag names to policy dictionaries, e.g.:
+
+        {"area_of_law": {"depth_exponent": 1.0, "label_weights": {"label": 3, "alternative_label": 1}}}
+
+    Args:
+    - path (str | Path): the path to the JSON configuration file
+
+    Returns:
+    - dict: the sampling policy for each tag
+    """
+    with Path(path).open("rt", encoding="utf-8") as input_file:
+        config = json.load(input_file)
+
+    return {tag: SamplingPolicy.from_dict(data) for tag, data in config.items()}
+
+
+class _CoverageState:
+    """
+    Per-tag coverage counts and deficit weights.
+    """
+
+    def __init__(self, pool: Sequence[OWLClass], target: int):
+        """
+        Build the coverage state for a pool, deduplicating classes by IRI.
+
+        Args:
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - target (int): the number of draws needed for a class to be covered
+        """
+        self.pool = pool
+        self.classes: List[OWLClass] = []
+        self.iri_to_index: Dict[str, int] = {}
+        for owl_class in pool:
+            if owl_class.iri not in self.iri_to_index:
+                self.iri_to_index[owl_class.iri] = len(self.classes)
+                self.classes.append(owl_class)
+
+        self.counts = [0] * len(self.classes)
+        self.covered = 0 if target > 0 else len(self.classes)
+        self.deficits = FenwickTree([target] * len(self.classes))
+
+    def carry_over(self, old_state: "_CoverageState", target: int) -> None:
+        """
+        Copy the counts of the classes that are also in an earlier state of the tag.
+
+        Args:
+        - old_state (_CoverageState): the state built for the tag's previous pool
+        - target (int): the number of draws needed for a class to be covered
+        """
+        for index, owl_class in enumerate(self.classes):
+            old_index = old_state.iri_to_index.get(owl_class.iri)
+            if old_index is None:
+                continue
+            count = old_state.counts[old_index]
+            self.counts[index] = count
+            credited = min(count, target)
+            if credited > 0:
+                self.deficits.add(index, -credited)
+            if count >= target > 0:
+                self.covered += 1
+
+
+class CoverageSampler(ClassSampler):
+    """
+    Coverage-guided sampling policy.
+
+    Each class is drawn with probability proportional to how far it is below the
+    coverage target, so classes that have already reached the target are not drawn
+    again until every class in the tag's pool is covered; after that, draws fall back
+    to uniform sampling.
+    """
+
+    def __init__(
+        self,
+        target: int = 1,
+        tags: Optional[Iterable[str]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initialize the coverage sampler.
+
+        Args:
+        - target (int): the number of times each class should be drawn
+        - tags (Iterable[str]): the tags that must be covered; defaults to every tag drawn so far
+        - rng (random.Random): the random number generator; defaults to the global `random` state
+        """
+        super().__init__(rng=rng)
+        self.target = target
+        self.tags = set(tags) if tags is not None else None
+        self.states: Dict[str, _CoverageState] = {}
+
+    def get_state(self, tag: str, pool: Sequence[OWLClass]) -> _CoverageState:
+        """
+        Get the coverage state for a tag, building it on the first draw.
+
+        When the pool differs from the one the state was built for, the state is rebuilt
+        for the pool and keeps the counts of the classes still in it, so a draw that races
+        a refresh with the previous pool does not reset coverage.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - _CoverageState: the coverage state
+        """
+        state = self.states.get(tag)
+        if state is None or not is_same_pool(state.pool, pool):
+            new_state = _CoverageState(pool, self.target)
+            if state is not None:
+                new_state.carry_over(state, self.target)
+            state = self.states[tag] = new_state
+        return state
+
+    def register(self, tag: str, pool: Sequence[OWLClass]) -> None:
+        """
+        Register a tag's pool up front so it counts towards coverage before it is drawn.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        """
+        self.get_state(tag, pool)
+
+    def spawn(self) -> "CoverageSampler":
+        """
+        Create a sampler with the same target, tags, and random source but no draw counts.
+
+        Returns:
+        - CoverageSampler: the new sampler
+        """
+        return CoverageSampler(target=self.target, tags=self.tags, rng=self.rng)
+
+    def refresh(self, tag: str, pool: Sequence[OWLClass]) -> None:
+        """
+        Rebuild the coverage state of a tag for its new class pool, keeping the counts of classes still in it.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the tag's new class pool
+        """
+        if tag in self.states:
+            self.get_state(tag, pool)
+
+    def sample(self, tag: str, pool: Sequence[OWLClass]) -> OWLClass:
+        """
+        Sample a class, preferring classes below the coverage target, and record the draw.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+
+        Returns:
+        - OWLClass: the sampled class
+        """
+        state = self.get_state(tag, pool)
+        remaining = state.deficits.total
+        if remaining > 0:
+            index = state.deficits.find(self.rng.random() * remaining)
+        else:
+            index = self.rng.randrange(len(state.classes))
+
+        self.record_index(state, index)
+        return state.classes[index]
+
+    def sample_distinct(
+        self, tag: str, pool: Sequence[OWLClass], k: int
+    ) -> List[OWLClass]:
+        """
+        Sample k distinct classes, preferring classes below the coverage target.
+
+        Classes drawn earlier in the group have their remaining deficit removed from the
+        tree until the group is complete, so they cannot be drawn twice.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - pool (Sequence[OWLClass]): the candidate classes for the tag
+        - k (int): the number of classes to sample
+
+        Returns:
+        - list: the sampled classes
+        """
+        state = self.get_state(tag, pool)
+        indices: List[int] = []
+        removed: List[Tuple[int, int]] = []
+        for _ in range(k):
+            remaining = state.deficits.total
+            if remaining > 0:
+                index = state.deficits.find(self.rng.random() * remaining)
+            else:
+                # every remaining class is covered; draw uniformly, redrawing repeats
+                index = self.rng.randrange(len(state.classes))
+                attempts = 1
+                while index in indices and attempts < MAX_DISTINCT_ATTEMPTS:
+                    index = self.rng.randrange(len(state.classes))
+                    attempts += 1
+
+            self.record_index(state, index)
+            indices.append(index)
+
+            # hide the rest of this class's deficit for the remaining draws
+            deficit = max(self.target - state.counts[index], 0)
+            if deficit > 0:
+                state.deficits.add(index, -deficit)
+                removed.append((index, deficit))
+
+        for index, deficit in removed:
+            state.deficits.add(index, deficit)
+
+        return [state.classes[index] for index in indices]
+
+    def record(self, tag: str, owl_class: OWLClass) -> None:
+        """
+        Record a class draw that happened outside of this sampler.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - owl_class (OWLClass): the drawn class
+        """
+        state = self.states.get(tag)
+        if state is None:
+            return
+
+        index = state.iri_to_index.get(owl_class.iri)
+        if index is not None:
+            self.record_index(state, index)
+
+    def record_index(self, state: _CoverageState, index: int) -> None:
+        """
+        Increment the count for a class and update its deficit weight.
+
+        Args:
+        - state (_CoverageState): the coverage state for the tag
+        - index (int): the class index in the state
+        """
+        state.counts[index] += 1
+        if state.counts[index] <= self.target:
+            state.deficits.add(index, -1)
+            if state.counts[index] == self.target:
+                state.covered += 1
+
+    def progress(self) -> Dict[str, dict]:
+        """
+        Get the coverage progress for each tracked tag.
+
+        Returns:
+        - dict: the covered class count, total class count, and covered fraction by tag
+        """
+        progress = {}
+        for tag, state in self.states.items():
+            total = len(state.classes)
+            progress[tag] = {
+                "covered": state.covered,
+                "total": total,
+                "fraction": state.covered / total if total > 0 else 1.0,
+            }
+
+        return progress
+
+    def coverage(self) -> float:
+        """
+        Get the fraction of tracked classes that have reached the coverage target.
+
+        Returns:
+        - float: the overall covered fraction
+        """
+        covered = sum(state.covered for state in self.states.values())
+        total = sum(len(state.classes) for state in self.states.values())
+        return covered / total if total > 0 else 0.0
+
+    def is_complete(self) -> bool:
+        """
+        Check whether every class in the required tags has reached the coverage target.
+
+        Returns:
+        - bool: True if the coverage target has been met
+        """
+        tags = self.tags if self.tags is not None else self.states.keys()
+        if not tags:
+            return False
+
+        for tag in tags:
+            state = self.states.get(tag)
+            if state is None or state.covered < len(state.classes):
+                return False
+
+        return True
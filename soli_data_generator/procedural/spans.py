@@ -0,0 +1,215 @@
+"""
+Compact span annotations for formatted templates.
+
+A formatted template with spans is normally a dict holding a list of span dicts, each
+with a reference to its OWL class.  An AnnotatedSample keeps the same information in
+parallel arrays: span offsets in integer arrays, and tags and IRIs as tuples of interned
+strings shared by every sample, with span values sliced from the text on demand.  It
+converts to the dict format lazily and serializes straight to JSON with IRIs.
+"""
+
+# imports
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# packages
+from soli import SOLI, OWLClass
+
+
+class AnnotatedSample:
+    """
+    A formatted template with its span annotations stored as parallel arrays.
+    """
+
+    __slots__ = ("text", "starts", "ends", "tags", "iris")
+
+    def __init__(
+        self,
+        text: str,
+        starts: Iterable[int],
+        ends: Iterable[int],
+        tags: Iterable[str],
+        iris: Iterable[Optional[str]],
+    ):
+        """
+        Build a sample from its text and per-span fields.
+
+        Args:
+        - text (str): the formatted text
+        - starts (Iterable[int]): the span start offsets
+        - ends (Iterable[int]): the span end offsets
+        - tags (Iterable[str]): the span tags
+        - iris (Iterable[str | None]): the span OWL class IRIs, or None for untyped values
+        """
+        self.text = text
+        self.starts = array("I", starts)
+        self.ends = array("I", ends)
+        self.tags: Tuple[str, ...] = tuple(sys.intern(tag) for tag in tags)
+        self.iris: Tuple[Optional[str], ...] = tuple(
+            sys.intern(iri) if iri is not None else None for iri in iris
+        )
+
+    @classmethod
+    def from_spans(cls, text: str, spans: List[Dict]) -> "AnnotatedSample":
+        """
+        Build a sample from the dict span format.
+
+        Args:
+        - text (str): the formatted text
+        - spans (list): the span dicts, with OWL classes or IRIs
+
+        Returns:
+        - AnnotatedSample: the compact sample
+        """
+        return cls(
+            text,
+            [span["start"] for span in spans],
+            [span["end"] for span in spans],
+            [span["tag"] for span in spans],
+            [get_span_iri(span.get("owl_class")) for span in spans],
+        )
+
+    def __len__(self) -> int:
+        """
+        Get the number of spans.
+
+        Returns:
+        - int: the number of spans
+        """
+        return len(self.starts)
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Compare two samples field by field.
+
+        Args:
+        - other (Any): the other object
+
+        Returns:
+        - bool: whether the samples are equal
+        """
+        if not isinstance(other, AnnotatedSample):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        Read the text or spans like the dict format, with IRIs for OWL classes.
+
+        Args:
+        - key (str): text or spans
+
+        Returns:
+        - str | list: the text or the span dicts
+        """
+        if key == "text":
+            return self.text
+        if key == "spans":
+            return self.get_spans()
+        raise KeyError(key)
+
+    def __getstate__(self) -> tuple:
+        """
+        Get the pickled state of the sample.
+
+        Returns:
+        - tuple: the slot values
+        """
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Restore a pickled sample, re-interning its tags and IRIs in this process.
+
+        Args:
+        - state (tuple): the slot values
+        """
+        self.text, self.starts, self.ends, tags, iris = state
+        self.tags = tuple(sys.intern(tag) for tag in tags)
+        self.iris = tuple(sys.intern(iri) if iri is not None else None for iri in iris)
+
+    def get_spans(self, soli_graph: Optional[SOLI] = None) -> List[Dict]:
+        """
+        Expand the spans to the dict format.
+
+        Args:
+        - soli_graph (SOLI): the graph to resolve IRIs to OWL classes; without it, spans hold IRIs
+
+        Returns:
+        - list: the span dicts
+        """
+        return [
+            {
+                "start": start,
+                "end": end,
+                "tag": tag,
+                "value": self.text[start:end],
+                "owl_class": (
+                    soli_graph[iri]
+                    if soli_graph is not None and iri is not None
+                    else iri
+                ),
+            }
+            for start, end, tag, iri in zip(
+                self.starts, self.ends, self.tags, self.iris
+            )
+        ]
+
+    def to_dict(self, soli_graph: Optional[SOLI] = None) -> dict:
+        """
+        Expand the sample to the dict format.
+
+        Args:
+        - soli_graph (SOLI): the graph to resolve IRIs to OWL classes; without it, spans hold IRIs
+
+        Returns:
+        - dict: the text and span dicts
+        """
+        return {"text": self.text, "spans": self.get_spans(soli_graph)}
+
+    def to_json(self) -> str:
+        """
+        Serialize the sample as a JSON object with IRIs for OWL classes.
+
+        Returns:
+        - str: the JSON text
+        """
+        return json.dumps(self.to_dict())
+
+
+def get_span_iri(owl_class: Optional[OWLClass | str]) -> Optional[str]:
+    """
+    Get the IRI stored for a span's OWL class.
+
+    Args:
+    - owl_class (OWLClass | str | None): the OWL class, an IRI, or None
+
+    Returns:
+    - str | None: the IRI
+    """
+    if isinstance(owl_class, OWLClass):
+        return owl_class.iri
+    return owl_class
+
+
+def get_output_record(output: str | dict | AnnotatedSample) -> dict:
+    """
+    Convert a formatted output to a JSON-serializable record with IRIs for OWL classes.
+
+    Dict outputs are converted through AnnotatedSample, so the caller's dict is left as is.
+
+    Args:
+    - output (str | dict | AnnotatedSample): the formatted output, with or without spans
+
+    Returns:
+    - dict: the record
+    """
+    if isinstance(output, str):
+        return {"text": output}
+    if isinstance(output, dict):
+        output = AnnotatedSample.from_spans(output["text"], output["spans"])
+    return output.to_dict()
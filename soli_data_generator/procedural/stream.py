@@ -0,0 +1,259 @@
+"""
+Ordered parallel rendering for template streams.
+
+Templates are read lazily in chunks and rendered in forked worker processes; at most a
+fixed number of chunks per worker are in flight, so memory stays bounded regardless of
+the length of the input, and outputs are yielded in input order.
+
+Seeded streams split the templates into fixed-size units and reseed the formatter from
+the job seed and unit index before each unit, so that any unit can be rendered on its own
+(for example by a distributed worker) with the same outputs as a full run.
+
+Templates are read from text or JSONL files, and outputs are written as JSON lines.
+"""
+
+# imports
+import hashlib
+import itertools
+import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Iterable, Iterator, List, TextIO
+
+# project
+from soli_data_generator.procedural.spans import AnnotatedSample, get_output_record
+
+# default number of templates sent to a worker at a time
+DEFAULT_STREAM_CHUNK_SIZE = 64
+
+# default number of templates per seeded unit
+DEFAULT_UNIT_SIZE = 10000
+
+# number of chunks in flight per worker
+MAX_PENDING_CHUNKS_PER_WORKER = 2
+
+# the formatter used by a worker process, set by init_stream_worker
+_WORKER_FORMATTER: Any = None
+
+
+def iter_chunks(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of at most size items without reading ahead.
+
+    Args:
+    - iterable (Iterable): the items to split
+    - size (int): the maximum chunk size
+
+    Yields:
+    - list: the next chunk of items
+    """
+    if size < 1:
+        raise ValueError("chunk size must be at least 1")
+
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def init_stream_worker(formatter: Any) -> None:
+    """
+    Set up a worker process with the parent's formatter.
+
+    Forked workers start with copies of the parent's random states, so each worker is
+    reseeded to avoid rendering the same values as its siblings.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter inherited from the parent process
+    """
+    global _WORKER_FORMATTER  # pylint: disable=global-statement
+    _WORKER_FORMATTER = formatter
+    _WORKER_FORMATTER.reseed()
+
+
+def render_stream_chunk(
+    templates: List[str], renders_per_template: int, spans: bool
+) -> List[Any]:
+    """
+    Render a chunk of templates in a worker process.
+
+    Args:
+    - templates (list): the template strings
+    - renders_per_template (int): the number of formatted outputs per template
+    - spans (bool): whether to return span annotations with each output
+
+    Returns:
+    - list: the formatted templates, in input order
+    """
+    outputs = []
+    for template in templates:
+        outputs.extend(
+            _WORKER_FORMATTER.format_batch(template, renders_per_template, spans)
+        )
+    return outputs
+
+
+def stream_parallel(
+    formatter: Any,
+    templates: Iterable[str],
+    renders_per_template: int,
+    spans: bool,
+    workers: int,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> Iterator[Any]:
+    """
+    Render a stream of templates in worker processes, yielding outputs in input order.
+
+    The SOLI graph cannot be pickled, so workers are forked and inherit the formatter
+    instead of receiving a copy.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter to render with
+    - templates (Iterable[str]): the template strings
+    - renders_per_template (int): the number of formatted outputs per template
+    - spans (bool): whether to yield span annotations with each output
+    - workers (int): the number of worker processes
+    - chunk_size (int): the number of templates sent to a worker at a time
+
+    Yields:
+    - str | dict: the formatted templates
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise ValueError("Parallel template streaming requires the fork start method")
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_stream_worker,
+        initargs=(formatter,),
+    )
+    pending: Deque[Future] = deque()
+    try:
+        for chunk in iter_chunks(templates, chunk_size):
+            pending.append(
+                executor.submit(render_stream_chunk, chunk, renders_per_template, spans)
+            )
+            if len(pending) >= workers * MAX_PENDING_CHUNKS_PER_WORKER:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_unit_seed(seed: int, unit_index: int) -> int:
+    """
+    Derive the seed for a unit of a seeded stream.
+
+    Args:
+    - seed (int): the stream seed
+    - unit_index (int): the unit index
+
+    Returns:
+    - int: the 63-bit unit seed
+    """
+    digest = hashlib.sha256(f"{seed}:{unit_index}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
+
+def render_seeded_unit(
+    formatter: Any,
+    templates: Iterable[str],
+    unit_seed: int,
+    renders_per_template: int = 1,
+    spans: bool = True,
+) -> Iterator[Any]:
+    """
+    Render the templates of one unit after reseeding the formatter with the unit seed.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter to render with
+    - templates (Iterable[str]): the unit's template strings
+    - unit_seed (int): the unit seed
+    - renders_per_template (int): the number of formatted outputs per template
+    - spans (bool): whether to yield span annotations with each output
+
+    Yields:
+    - str | dict: the formatted templates
+    """
+    formatter.reseed(unit_seed)
+    for template in templates:
+        yield from formatter.format_batch(template, renders_per_template, spans)
+
+
+def stream_seeded(
+    formatter: Any,
+    templates: Iterable[str],
+    seed: int,
+    renders_per_template: int = 1,
+    spans: bool = True,
+    unit_size: int = DEFAULT_UNIT_SIZE,
+) -> Iterator[Any]:
+    """
+    Render a stream of templates reproducibly, reseeding the formatter for each unit.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter to render with
+    - templates (Iterable[str]): the template strings
+    - seed (int): the stream seed
+    - renders_per_template (int): the number of formatted outputs per template
+    - spans (bool): whether to yield span annotations with each output
+    - unit_size (int): the number of templates per unit
+
+    Yields:
+    - str | dict: the formatted templates
+    """
+    for unit_index, unit in enumerate(iter_chunks(templates, unit_size)):
+        yield from render_seeded_unit(
+            formatter,
+            unit,
+            get_unit_seed(seed, unit_index),
+            renders_per_template,
+            spans,
+        )
+
+
+def read_templates(
+    input_file: TextIO, input_format: str, field: str = "template"
+) -> Iterator[str]:
+    """
+    Lazily read templates from a text or JSONL file.
+
+    Args:
+    - input_file (TextIO): the open input file
+    - input_format (str): text for one template per line, or jsonl for JSON strings or objects
+    - field (str): the template field of JSONL objects
+
+    Yields:
+    - str: the next template
+    """
+    for line in input_file:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+
+        if input_format == "text":
+            yield line
+            continue
+
+        record = json.loads(line)
+        if isinstance(record, str):
+            yield record
+        elif isinstance(record, dict) and isinstance(record.get(field), str):
+            yield record[field]
+        else:
+            raise ValueError(f"Invalid template record; expected a string or {field}")
+
+
+def serialize_output(output: str | dict | AnnotatedSample) -> str:
+    """
+    Serialize a formatted template as a JSON line, replacing OWL classes with their IRIs.
+
+    Args:
+    - output (str | dict | AnnotatedSample): the formatted template, with or without spans
+
+    Returns:
+    - str: the JSON line
+    """
+    return json.dumps(get_output_record(output))
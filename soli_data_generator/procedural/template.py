@@ -53,17 +53,45 @@ Examples:
 """
 
 # imports
+import copy
+import functools
+import itertools
 import random
 import re
+import threading
 from enum import Enum
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 # packages
 from faker import Faker
 from soli import SOLI, OWLClass, SOLITypes
+from soli.graph import SOLI_TYPE_IRIS
 
 # project
+from soli_data_generator.procedural.refresh import diff_graphs, get_affected_tags
+from soli_data_generator.procedural.relations import (
+    DEFAULT_MAX_HOPS,
+    CorrelatedSampler,
+    get_relation_index,
+)
+from soli_data_generator.procedural.sampling import (
+    MAX_DISTINCT_ATTEMPTS,
+    SOLI_TAG_GETTERS,
+    ClassSampler,
+    CoverageSampler,
+    SamplingPolicy,
+    WeightedSampler,
+    get_owl_label_choices,
+    group_slots,
+    load_sampling_policies,
+)
+from soli_data_generator.procedural.spans import AnnotatedSample, get_span_iri
+from soli_data_generator.procedural.stream import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    get_unit_seed,
+    stream_parallel,
+)
 
 
 class FakerTag(Enum):
@@ -84,6 +112,12 @@ class FakerTag(Enum):
     JOB = "job"
 
 
+# Faker tag to the SOLI class IRI used for span annotations
+FAKER_TAG_IRIS = {
+    "company": "R7oBWHStfmqTLn2MypkW3Pj",
+    "date": "R7sBKqCcmlK1Dw9HBvKenYy",
+}
+
 # TODO: decide where/how we want to set seed
 # TODO: decide if we want to switch to numpy RNG
 # TODO: enhanced configuration for this
@@ -92,6 +126,9 @@ class FakerTag(Enum):
 # set up Faker instance
 FAKER_INSTANCE = Faker()
 
+# number of compiled templates kept by compile_template
+TEMPLATE_CACHE_SIZE = 4096
+
 
 def normalize_soli_tag(tag: str) -> str:
     """
@@ -122,6 +159,13 @@ def get_all_tags() -> list[str]:
     ]
 
 
+# SOLI tag to the IRI of the root class its pool descends from
+SOLI_TAG_ROOTS = {
+    normalize_soli_tag(soli_type.value): iri
+    for soli_type, iri in SOLI_TYPE_IRIS.items()
+}
+
+
 def build_regex_pattern():
     """
     Combine all SOLI taxonomic categories and Faker methods into a single regex pattern for matching SOLI tags.
@@ -167,6 +211,153 @@ def build_pattern_map(template: str, pattern: re.Pattern = RE_PATTERN_MAP) -> di
     return pattern_map
 
 
+class CompiledTemplate:
+    """
+    A template parsed once into its literal text segments and slot keys, so that it can
+    be rendered repeatedly without re-scanning the template.
+    """
+
+    def __init__(self, template: str, pattern: re.Pattern = RE_PATTERN_MAP):
+        """
+        Parse a template into segments and slots.
+
+        Args:
+        - template (str): the template string containing SOLI tags
+        - pattern (re.Pattern): the compiled regex pattern for matching SOLI tags
+        """
+        self.template = template
+        self.segments: List[str] = []
+        self.slots: List[Tuple[str, str]] = []
+
+        position = 0
+        for match in pattern.finditer(template):
+            self.segments.append(template[position : match.start()])
+            self.slots.append((match.group("tag"), match.group("index")))
+            position = match.end()
+        self.segments.append(template[position:])
+
+        # the unique slot keys, in template order
+        self.pattern_map: Dict[Tuple[str, str], Any] = dict.fromkeys(self.slots)
+
+    @classmethod
+    def from_parts(
+        cls,
+        template: str,
+        segments: List[str],
+        slots: List[Tuple[str, Optional[str]]],
+    ) -> "CompiledTemplate":
+        """
+        Build a compiled template from already parsed segments and slots.
+
+        Args:
+        - template (str): the template string
+        - segments (list): the literal text around the slots, one more than the slots
+        - slots (list): the (tag, index) key of each slot, in template order
+
+        Returns:
+        - CompiledTemplate: the compiled template
+        """
+        if len(segments) != len(slots) + 1:
+            raise ValueError("A compiled template needs one more segment than slots")
+
+        compiled = cls.__new__(cls)
+        compiled.template = template
+        compiled.segments = list(segments)
+        compiled.slots = list(slots)
+        compiled.pattern_map = dict.fromkeys(compiled.slots)
+        return compiled
+
+    def render(self, value_map: Dict[Tuple[str, str], int | float | str]) -> str:
+        """
+        Render the template with a value for each slot.
+
+        Args:
+        - value_map (dict): the mapping of slot keys to their sampled values
+
+        Returns:
+        - str: the rendered template
+        """
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(str(value_map[slot]))
+            parts.append(segment)
+        return "".join(parts)
+
+    def render_spans(self, value_map: Dict[Tuple[str, str], Dict]) -> dict:
+        """
+        Render the template with a value for each slot and the span annotation for each value.
+
+        Args:
+        - value_map (dict): the mapping of slot keys to their sampled values and OWL classes
+
+        Returns:
+        - dict: the rendered template and its span annotations
+        """
+        parts = [self.segments[0]]
+        position = len(self.segments[0])
+        spans = []
+        for (tag, index), segment in zip(self.slots, self.segments[1:]):
+            value_info = value_map[(tag, index)]
+            value = str(value_info["value"])
+            spans.append(
+                {
+                    "start": position,
+                    "end": position + len(value),
+                    "tag": tag,
+                    "value": value,
+                    "owl_class": value_info.get("owl_class"),
+                }
+            )
+            parts.append(value)
+            parts.append(segment)
+            position += len(value) + len(segment)
+
+        return {"text": "".join(parts), "spans": spans}
+
+    def render_compact(self, value_map: Dict[Tuple[str, str], Dict]) -> AnnotatedSample:
+        """
+        Render the template with a value for each slot and compact span annotations.
+
+        Args:
+        - value_map (dict): the mapping of slot keys to their sampled values and OWL classes
+
+        Returns:
+        - AnnotatedSample: the rendered template and its span annotations
+        """
+        parts = [self.segments[0]]
+        position = len(self.segments[0])
+        starts, ends, tags, iris = [], [], [], []
+        for (tag, index), segment in zip(self.slots, self.segments[1:]):
+            value_info = value_map[(tag, index)]
+            value = str(value_info["value"])
+            starts.append(position)
+            ends.append(position + len(value))
+            tags.append(tag)
+            iris.append(get_span_iri(value_info.get("owl_class")))
+            parts.append(value)
+            parts.append(segment)
+            position += len(value) + len(segment)
+
+        return AnnotatedSample("".join(parts), starts, ends, tags, iris)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(
+    template: str, pattern: re.Pattern = RE_PATTERN_MAP
+) -> CompiledTemplate:
+    """
+    Compile a template, reusing the compiled form of recently seen templates.
+
+    Args:
+    - template (str): the template string containing SOLI tags
+    - pattern (re.Pattern): the compiled regex pattern for matching SOLI tags
+
+    Returns:
+    - CompiledTemplate: the compiled template
+    """
+    return CompiledTemplate(template, pattern)
+
+
 def get_template_tag(tag: str, index: str) -> str:
     """
     Get the template tag for a SOLI taxonomic category or Faker method.
@@ -191,149 +382,291 @@ def get_random_owl_label(owl_class: OWLClass) -> str:
     Returns:
     - str: a random label for the OWL class
     """
-    # store label set
-    label_choices = []
-    if owl_class.label:
-        label_choices.append(owl_class.label)
+    return random.choice(get_owl_label_choices(owl_class))[1]
+
+
+def get_soli_pool(
+    soli_graph: SOLI,
+    tag: str,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+) -> List[OWLClass]:
+    """
+    Get the pool of OWL classes that can be sampled for a SOLI tag.
+
+    Args:
+    - soli_graph (SOLI): the SOLI knowledge graph
+    - tag (str): the normalized SOLI tag
+    - pools (dict): an optional cache of OWL class pools by tag, filled on first use
 
-    if owl_class.preferred_label:
-        label_choices.append(owl_class.preferred_label)
+    Returns:
+    - list: the OWL classes for the SOLI tag
+    """
+    if pools is None:
+        return getattr(soli_graph, SOLI_TAG_GETTERS[tag])()
 
-    if owl_class.alternative_labels:
-        label_choices.extend(owl_class.alternative_labels)
+    pool = pools.get(tag)
+    if pool is None:
+        pool = pools[tag] = getattr(soli_graph, SOLI_TAG_GETTERS[tag])()
+    return pool
 
-    return random.choice(label_choices)
+
+def sample_owl_class(
+    tag: str,
+    soli_graph: SOLI,
+    sampler: Optional[ClassSampler] = None,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+) -> OWLClass:
+    """
+    Sample an OWL class for a SOLI tag.
+
+    Args:
+    - tag (str): the normalized SOLI tag
+    - soli_graph (SOLI): the SOLI knowledge graph
+    - sampler (ClassSampler): the sampling policy; defaults to uniform sampling
+    - pools (dict): an optional cache of OWL class pools by tag, filled on first use
+
+    Returns:
+    - OWLClass: the sampled OWL class
+    """
+    pool = get_soli_pool(soli_graph, tag, pools=pools)
+    if sampler is None:
+        return random.choice(pool)
+
+    return sampler.sample(tag, pool)
+
+
+def sample_owl_classes(
+    slots: List[Tuple[str, str]],
+    soli_graph: SOLI,
+    sampler: Optional[ClassSampler] = None,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+    distinct: bool = True,
+) -> Dict[Tuple[str, str], OWLClass]:
+    """
+    Sample an OWL class for each SOLI slot of a template, letting the sampler draw the slots jointly.
+
+    Args:
+    - slots (list): the (tag, index) keys of the SOLI slots, in template order
+    - soli_graph (SOLI): the SOLI knowledge graph
+    - sampler (ClassSampler): the sampling policy; defaults to uniform sampling
+    - pools (dict): an optional cache of OWL class pools by tag, filled on first use
+    - distinct (bool): whether slots sharing a tag get distinct classes
+
+    Returns:
+    - dict: the sampled OWL class for each slot
+    """
+    if sampler is None:
+        sampler = ClassSampler()
+
+    return sampler.sample_slots(
+        slots, lambda tag: get_soli_pool(soli_graph, tag, pools=pools), distinct
+    )
+
+
+def sample_owl_label(
+    tag: str, owl_class: OWLClass, sampler: Optional[ClassSampler] = None
+) -> str:
+    """
+    Sample a label for an OWL class drawn for a SOLI tag.
+
+    Args:
+    - tag (str): the normalized SOLI tag
+    - owl_class (OWLClass): the OWL class to get a label for
+    - sampler (ClassSampler): the sampling policy; defaults to uniform sampling over labels
+
+    Returns:
+    - str: the sampled label
+    """
+    if sampler is None:
+        return get_random_owl_label(owl_class)
+
+    return sampler.sample_label(tag, owl_class)
+
+
+def sample_faker_value(
+    tag: str, faker: Optional[Faker] = None, rng: Optional[random.Random] = None
+) -> Any:
+    """
+    Sample a value for a Faker tag.
+
+    Args:
+    - tag (str): the Faker tag
+    - faker (Faker): the Faker instance; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator; defaults to the global `random` state
+
+    Returns:
+    - Any: the sampled value
+    """
+    if faker is None:
+        faker = FAKER_INSTANCE
+    if rng is None:
+        rng = random
+
+    if tag == "address":
+        return faker.address()
+    if tag == "amount":
+        return faker.random_number(digits=rng.randint(1, 5))
+    if tag == "company":
+        return faker.company()
+    if tag == "date":
+        date_type = rng.choice(["past", "future", "decade"])
+        if date_type == "past":
+            return faker.past_date()
+        if date_type == "future":
+            return faker.future_date()
+        return faker.date_this_decade()
+    if tag == "time":
+        return faker.time()
+    if tag == "email":
+        return faker.email()
+    if tag == "filename":
+        return faker.file_name()
+    if tag == "first_name":
+        return faker.first_name()
+    if tag == "last_name":
+        return faker.last_name()
+    if tag == "name":
+        return faker.name()
+    if tag == "job":
+        return faker.job()
+
+    raise ValueError(f"Invalid Faker tag: {tag}")
+
+
+def sample_faker_values(
+    tag: str,
+    k: int,
+    distinct: bool = True,
+    faker: Optional[Faker] = None,
+    rng: Optional[random.Random] = None,
+) -> List[Any]:
+    """
+    Sample k values for a Faker tag, redrawing repeated values if requested.
+
+    Faker providers can only be redrawn, so repeats are rejected on draw; after
+    MAX_DISTINCT_ATTEMPTS redraws per value, a repeated value is accepted.
+
+    Args:
+    - tag (str): the Faker tag
+    - k (int): the number of values to sample
+    - distinct (bool): whether the values must be distinct
+    - faker (Faker): the Faker instance; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator; defaults to the global `random` state
+
+    Returns:
+    - list: the sampled values
+    """
+    if not distinct or k < 2:
+        return [sample_faker_value(tag, faker, rng) for _ in range(k)]
+
+    values: List[Any] = []
+    seen = set()
+    attempts = 0
+    while len(values) < k:
+        value = sample_faker_value(tag, faker, rng)
+        attempts += 1
+        if str(value) not in seen or attempts > MAX_DISTINCT_ATTEMPTS * k:
+            seen.add(str(value))
+            values.append(value)
+
+    return values
+
+
+def sample_faker_slots(
+    slots: List[Tuple[str, str]],
+    distinct: bool = True,
+    faker: Optional[Faker] = None,
+    rng: Optional[random.Random] = None,
+) -> Dict[Tuple[str, str], Any]:
+    """
+    Sample a value for each Faker slot of a template, one tag at a time.
+
+    Args:
+    - slots (list): the (tag, index) keys of the Faker slots, in template order
+    - distinct (bool): whether slots sharing a tag get distinct values
+    - faker (Faker): the Faker instance; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator; defaults to the global `random` state
+
+    Returns:
+    - dict: the sampled value for each slot
+    """
+    values = {}
+    for tag, tag_slots in group_slots(slots).items():
+        values.update(
+            zip(
+                tag_slots,
+                sample_faker_values(tag, len(tag_slots), distinct, faker, rng),
+            )
+        )
+    return values
+
+
+def get_faker_owl_class(tag: str, soli_graph: SOLI) -> Optional[OWLClass]:
+    """
+    Get the OWL class used to annotate values for a Faker tag, if any.
+
+    Args:
+    - tag (str): the Faker tag
+    - soli_graph (SOLI): the SOLI knowledge graph
+
+    Returns:
+    - OWLClass | None: the OWL class for the Faker tag
+    """
+    iri = FAKER_TAG_IRIS.get(tag)
+    return soli_graph[iri] if iri is not None else None
 
 
-# pylint: disable=too-many-branches,too-many-statements
 def sample_values(
     pattern_map: Dict[Tuple[str, str], Any],
     soli_graph: SOLI,
+    sampler: Optional[ClassSampler] = None,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+    distinct: bool = True,
+    faker: Optional[Faker] = None,
+    rng: Optional[random.Random] = None,
 ) -> Dict[Tuple[str, str], int | float | str]:
     """
     Sample values for each SOLI taxonomic category or Faker method in the pattern map.
 
     Args:
     - pattern_map (dict): the mapping of SOLI tags to their corresponding taxonomic categories or Faker methods
+    - soli_graph (SOLI): the SOLI knowledge graph
+    - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+    - pools (dict): an optional cache of OWL class pools by tag
+    - distinct (bool): whether slots sharing a tag (e.g. <|name:1|> and <|name:2|>) get distinct values
+    - faker (Faker): the Faker instance for Faker slots; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator for Faker slots; defaults to the global `random` state
 
     Returns:
     - dict: the mapping of SOLI tags to their corresponding sampled values
     """
+    # sample the SOLI classes for all SOLI slots together
+    sampled_classes = sample_owl_classes(
+        [key for key in pattern_map.keys() if key[0] in SOLI_TAG_GETTERS],
+        soli_graph,
+        sampler=sampler,
+        pools=pools,
+        distinct=distinct,
+    )
+
+    # sample the Faker values by tag
+    faker_values = sample_faker_slots(
+        [key for key in pattern_map.keys() if key[0] not in SOLI_TAG_GETTERS],
+        distinct=distinct,
+        faker=faker,
+        rng=rng,
+    )
+
     # sample values for each tag
     value_map = {}
     for tag, index in pattern_map.keys():
-        # Faker sampling
-        if tag == "address":
-            value_map[(tag, index)] = FAKER_INSTANCE.address()
-        elif tag == "amount":
-            value_map[(tag, index)] = FAKER_INSTANCE.random_number(
-                digits=random.randint(1, 5)
-            )
-        elif tag == "company":
-            value_map[(tag, index)] = FAKER_INSTANCE.company()
-        elif tag == "date":
-            date_type = random.choice(["past", "future", "decade"])
-            if date_type == "past":
-                value_map[(tag, index)] = FAKER_INSTANCE.past_date()
-            elif date_type == "future":
-                value_map[(tag, index)] = FAKER_INSTANCE.future_date()
-            elif date_type == "decade":
-                value_map[(tag, index)] = FAKER_INSTANCE.date_this_decade()
-        elif tag == "time":
-            value_map[(tag, index)] = FAKER_INSTANCE.time()
-        elif tag == "email":
-            value_map[(tag, index)] = FAKER_INSTANCE.email()
-        elif tag == "filename":
-            value_map[(tag, index)] = FAKER_INSTANCE.file_name()
-        elif tag == "first_name":
-            value_map[(tag, index)] = FAKER_INSTANCE.first_name()
-        elif tag == "last_name":
-            value_map[(tag, index)] = FAKER_INSTANCE.last_name()
-        elif tag == "name":
-            value_map[(tag, index)] = FAKER_INSTANCE.name()
-        elif tag == "job":
-            value_map[(tag, index)] = FAKER_INSTANCE.job()
         # SOLI sampling
-        elif tag == "actor_player":
-            sampled_class: OWLClass = random.choice(soli_graph.get_player_actors())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "area_of_law":
-            sampled_class: OWLClass = random.choice(soli_graph.get_areas_of_law())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "asset_type":
-            sampled_class: OWLClass = random.choice(soli_graph.get_asset_types())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "communication_modality":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_communication_modalities()
-            )
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "currency":
-            sampled_class: OWLClass = random.choice(soli_graph.get_currencies())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "data_format":
-            sampled_class: OWLClass = random.choice(soli_graph.get_data_formats())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "document_artifact":
-            sampled_class: OWLClass = random.choice(soli_graph.get_document_artifacts())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "engagement_terms":
-            sampled_class: OWLClass = random.choice(soli_graph.get_engagement_terms())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "event":
-            sampled_class: OWLClass = random.choice(soli_graph.get_events())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "forums_and_venues":
-            sampled_class: OWLClass = random.choice(soli_graph.get_forum_venues())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "governmental_body":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_governmental_bodies()
-            )
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "industry":
-            sampled_class: OWLClass = random.choice(soli_graph.get_industries())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "language":
-            sampled_class: OWLClass = random.choice(soli_graph.get_languages())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "soli_type":
-            sampled_class: OWLClass = random.choice(soli_graph.get_soli_types())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "legal_authorities":
-            sampled_class: OWLClass = random.choice(soli_graph.get_legal_authorities())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "legal_entity":
-            sampled_class: OWLClass = random.choice(soli_graph.get_legal_entities())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "location":
-            sampled_class: OWLClass = random.choice(soli_graph.get_locations())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "matter_narrative":
-            sampled_class: OWLClass = random.choice(soli_graph.get_matter_narratives())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "matter_narrative_format":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_matter_narrative_formats()
-            )
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "objectives":
-            sampled_class: OWLClass = random.choice(soli_graph.get_objectives())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "service":
-            sampled_class: OWLClass = random.choice(soli_graph.get_services())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "standards_compatibility":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_standards_compatibilities()
-            )
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "status":
-            sampled_class: OWLClass = random.choice(soli_graph.get_statuses())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
-        elif tag == "system_identifiers":
-            sampled_class: OWLClass = random.choice(soli_graph.get_system_identifiers())
-            value_map[(tag, index)] = get_random_owl_label(sampled_class)
+        if tag in SOLI_TAG_GETTERS:
+            sampled_class = sampled_classes[(tag, index)]
+            value_map[(tag, index)] = sample_owl_label(tag, sampled_class, sampler)
+        # Faker sampling
+        else:
+            value_map[(tag, index)] = faker_values[(tag, index)]
 
     return value_map
 
@@ -341,6 +674,11 @@ def sample_values(
 def sample_value_details(
     pattern_map: Dict[Tuple[str, str], Any],
     soli_graph: SOLI,
+    sampler: Optional[ClassSampler] = None,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+    distinct: bool = True,
+    faker: Optional[Faker] = None,
+    rng: Optional[random.Random] = None,
 ) -> Dict[Tuple[str, str], Dict]:
     """
     Sample values for each SOLI taxonomic category or Faker method in the pattern map with additional details.
@@ -348,232 +686,115 @@ def sample_value_details(
     Args:
     - pattern_map (dict): the mapping of SOLI tags to their corresponding taxonomic categories or Faker methods
     - soli_graph (SOLI): the SOLI knowledge graph
+    - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+    - pools (dict): an optional cache of OWL class pools by tag
+    - distinct (bool): whether slots sharing a tag (e.g. <|name:1|> and <|name:2|>) get distinct values
+    - faker (Faker): the Faker instance for Faker slots; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator for Faker slots; defaults to the global `random` state
 
     Returns:
     - dict: the mapping of SOLI tags to their corresponding sampled values with additional details
     """
+    # sample the SOLI classes for all SOLI slots together
+    sampled_classes = sample_owl_classes(
+        [key for key in pattern_map.keys() if key[0] in SOLI_TAG_GETTERS],
+        soli_graph,
+        sampler=sampler,
+        pools=pools,
+        distinct=distinct,
+    )
+
+    # sample the Faker values by tag
+    faker_values = sample_faker_slots(
+        [key for key in pattern_map.keys() if key[0] not in SOLI_TAG_GETTERS],
+        distinct=distinct,
+        faker=faker,
+        rng=rng,
+    )
+
     value_map = {}
     for tag, index in pattern_map.keys():
-        # Faker sampling
-        if tag == "address":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.address(),
-                "owl_class": None,
-            }
-        elif tag == "amount":
+        # SOLI sampling
+        if tag in SOLI_TAG_GETTERS:
+            sampled_class = sampled_classes[(tag, index)]
             value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.random_number(digits=random.randint(1, 5)),
-                "owl_class": None,
+                "value": sample_owl_label(tag, sampled_class, sampler),
+                "owl_class": sampled_class,
             }
-        elif tag == "company":
+        # Faker sampling
+        else:
             value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.company(),
-                "owl_class": soli_graph["R7oBWHStfmqTLn2MypkW3Pj"],
+                "value": faker_values[(tag, index)],
+                "owl_class": get_faker_owl_class(tag, soli_graph),
             }
-        elif tag == "date":
-            date_type = random.choice(["past", "future", "decade"])
-            if date_type == "past":
-                value_map[(tag, index)] = {
-                    "value": FAKER_INSTANCE.past_date(),
-                    "owl_class": soli_graph["R7sBKqCcmlK1Dw9HBvKenYy"],
-                }
-            elif date_type == "future":
+
+    return value_map
+
+
+def sample_value_details_many(
+    pattern_map: Dict[Tuple[str, str], Any],
+    soli_graph: SOLI,
+    num_samples: int,
+    sampler: Optional[ClassSampler] = None,
+    pools: Optional[Dict[str, List[OWLClass]]] = None,
+    distinct: bool = True,
+    faker: Optional[Faker] = None,
+    rng: Optional[random.Random] = None,
+) -> List[Dict[Tuple[str, str], Dict]]:
+    """
+    Sample a batch of value maps for the same pattern map, drawing each tag's values in one step.
+
+    Args:
+    - pattern_map (dict): the mapping of SOLI tags to their corresponding taxonomic categories or Faker methods
+    - soli_graph (SOLI): the SOLI knowledge graph
+    - num_samples (int): the number of value maps to sample
+    - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+    - pools (dict): an optional cache of OWL class pools by tag
+    - distinct (bool): whether slots sharing a tag (e.g. <|name:1|> and <|name:2|>) get distinct values
+    - faker (Faker): the Faker instance for Faker slots; defaults to the shared FAKER_INSTANCE
+    - rng (random.Random): the random number generator for Faker slots; defaults to the global `random` state
+
+    Returns:
+    - list: the value maps with additional details, one per sample
+    """
+    if sampler is None:
+        sampler = ClassSampler()
+
+    # sample the SOLI classes for all SOLI slots and samples together
+    sampled_classes = sampler.sample_slots_many(
+        [key for key in pattern_map.keys() if key[0] in SOLI_TAG_GETTERS],
+        lambda tag: get_soli_pool(soli_graph, tag, pools=pools),
+        num_samples,
+        distinct,
+    )
+
+    # sample the Faker values by tag for each sample
+    faker_slots = [key for key in pattern_map.keys() if key[0] not in SOLI_TAG_GETTERS]
+    faker_values = [
+        sample_faker_slots(faker_slots, distinct=distinct, faker=faker, rng=rng)
+        for _ in range(num_samples)
+    ]
+
+    value_maps: List[Dict[Tuple[str, str], Dict]] = [{} for _ in range(num_samples)]
+    for tag, index in pattern_map.keys():
+        # SOLI sampling
+        if tag in SOLI_TAG_GETTERS:
+            for value_map, sample_classes in zip(value_maps, sampled_classes):
+                sampled_class = sample_classes[(tag, index)]
                 value_map[(tag, index)] = {
-                    "value": FAKER_INSTANCE.future_date(),
-                    "owl_class": soli_graph["R7sBKqCcmlK1Dw9HBvKenYy"],
+                    "value": sampler.sample_label(tag, sampled_class),
+                    "owl_class": sampled_class,
                 }
-            elif date_type == "decade":
+        # Faker sampling
+        else:
+            owl_class = get_faker_owl_class(tag, soli_graph)
+            for value_map, faker_row in zip(value_maps, faker_values):
                 value_map[(tag, index)] = {
-                    "value": FAKER_INSTANCE.date_this_decade(),
-                    "owl_class": soli_graph["R7sBKqCcmlK1Dw9HBvKenYy"],
+                    "value": faker_row[(tag, index)],
+                    "owl_class": owl_class,
                 }
-        elif tag == "time":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.time(),
-                "owl_class": None,
-            }
-        elif tag == "email":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.email(),
-                "owl_class": None,
-            }
-        elif tag == "filename":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.file_name(),
-                "owl_class": None,
-            }
-        elif tag == "first_name":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.first_name(),
-                "owl_class": None,
-            }
-        elif tag == "last_name":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.last_name(),
-                "owl_class": None,
-            }
-        elif tag == "name":
-            value_map[(tag, index)] = {
-                "value": FAKER_INSTANCE.name(),
-                "owl_class": None,
-            }
-        elif tag == "job":
-            value_map[(tag, index)] = {"value": FAKER_INSTANCE.job(), "owl_class": None}
-        # SOLI sampling
-        elif tag == "actor_player":
-            sampled_class: OWLClass = random.choice(soli_graph.get_player_actors())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "area_of_law":
-            sampled_class: OWLClass = random.choice(soli_graph.get_areas_of_law())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "asset_type":
-            sampled_class: OWLClass = random.choice(soli_graph.get_asset_types())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "communication_modality":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_communication_modalities()
-            )
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "currency":
-            sampled_class: OWLClass = random.choice(soli_graph.get_currencies())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "data_format":
-            sampled_class: OWLClass = random.choice(soli_graph.get_data_formats())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "document_artifact":
-            sampled_class: OWLClass = random.choice(soli_graph.get_document_artifacts())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "engagement_terms":
-            sampled_class: OWLClass = random.choice(soli_graph.get_engagement_terms())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "event":
-            sampled_class: OWLClass = random.choice(soli_graph.get_events())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "forums_and_venues":
-            sampled_class: OWLClass = random.choice(soli_graph.get_forum_venues())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "governmental_body":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_governmental_bodies()
-            )
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "industry":
-            sampled_class: OWLClass = random.choice(soli_graph.get_industries())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "language":
-            sampled_class: OWLClass = random.choice(soli_graph.get_languages())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "soli_type":
-            sampled_class: OWLClass = random.choice(soli_graph.get_soli_types())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "legal_authorities":
-            sampled_class: OWLClass = random.choice(soli_graph.get_legal_authorities())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "legal_entity":
-            sampled_class: OWLClass = random.choice(soli_graph.get_legal_entities())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "location":
-            sampled_class: OWLClass = random.choice(soli_graph.get_locations())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "matter_narrative":
-            sampled_class: OWLClass = random.choice(soli_graph.get_matter_narratives())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "matter_narrative_format":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_matter_narrative_formats()
-            )
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "objectives":
-            sampled_class: OWLClass = random.choice(soli_graph.get_objectives())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "service":
-            sampled_class: OWLClass = random.choice(soli_graph.get_services())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "standards_compatibility":
-            sampled_class: OWLClass = random.choice(
-                soli_graph.get_standards_compatibilities()
-            )
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "status":
-            sampled_class: OWLClass = random.choice(soli_graph.get_statuses())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
-        elif tag == "system_identifiers":
-            sampled_class: OWLClass = random.choice(soli_graph.get_system_identifiers())
-            value_map[(tag, index)] = {
-                "value": get_random_owl_label(sampled_class),
-                "owl_class": sampled_class,
-            }
 
-    return value_map
+    return value_maps
 
 
 def apply_template_map(
@@ -691,6 +912,59 @@ def format_template_spans(
     return apply_template_map_spans(template, value_map)
 
 
+def copy_sampler(sampler: Optional[ClassSampler], rng: random.Random) -> ClassSampler:
+    """
+    Copy a sampler for use by one thread with its own random number generator.
+
+    The copy shares the sampler's policies and lazily built tables, which are only ever
+    replaced wholesale, but draws from its own generator.
+
+    Args:
+    - sampler (ClassSampler): the sampler to copy, or None for uniform sampling
+    - rng (random.Random): the thread's random number generator
+
+    Returns:
+    - ClassSampler: the thread's sampler
+    """
+    if sampler is None:
+        return ClassSampler(rng=rng)
+
+    thread_sampler = copy.copy(sampler)
+    thread_sampler.rng = rng
+    if isinstance(sampler, CorrelatedSampler):
+        thread_sampler.base = copy_sampler(sampler.base, rng)
+    return thread_sampler
+
+
+class FormatterState:
+    """
+    The random sources used by one thread of a thread-local TemplateFormatter.
+    """
+
+    __slots__ = ("sampler", "faker", "rng", "generation")
+
+    def __init__(
+        self,
+        sampler: Optional[ClassSampler],
+        faker: Faker,
+        rng: random.Random | Any,
+        generation: int = 0,
+    ):
+        """
+        Store a thread's sampler, Faker instance, and random number generator.
+
+        Args:
+        - sampler (ClassSampler): the sampler, or None for uniform sampling
+        - faker (Faker): the Faker instance
+        - rng (random.Random): the random number generator for Faker slots
+        - generation (int): the formatter generation the state was built for
+        """
+        self.sampler = sampler
+        self.faker = faker
+        self.rng = rng
+        self.generation = generation
+
+
 # class-based version for easier SOLI graph setup
 class TemplateFormatter:
     """
@@ -706,6 +980,14 @@ class TemplateFormatter:
         github_repo_name: Optional[str] = "soli",
         github_repo_branch: Optional[str] = "1.0.0",
         use_cache: bool = True,
+        soli_graph: Optional[SOLI] = None,
+        sampler: Optional[ClassSampler] = None,
+        policies: Optional[Dict[str, SamplingPolicy]] = None,
+        correlated: bool = False,
+        max_hops: int = DEFAULT_MAX_HOPS,
+        distinct: bool = True,
+        compact_spans: bool = False,
+        thread_local: bool = False,
     ):
         """
         Initialize the TemplateFormatter from the SOLI knowledge graph.
@@ -717,57 +999,425 @@ class TemplateFormatter:
         - github_repo_name (str): the name of the GitHub repository
         - github_repo_branch (str): the branch of the GitHub repository
         - use_cache (bool): whether to use the cache for the SOLI knowledge graph
+        - soli_graph (SOLI): an existing SOLI knowledge graph to reuse instead of loading one
+        - sampler (ClassSampler): the sampling policy for SOLI classes; defaults to uniform sampling
+        - policies (dict): per-tag weighted sampling policies, applied through a WeightedSampler
+        - correlated (bool): whether to jointly draw related classes for co-occurring SOLI slots
+        - max_hops (int): the maximum relation distance between correlated classes
+        - distinct (bool): whether indexed slots sharing a tag (e.g. <|name:1|> and <|name:2|>) get distinct values
+        - compact_spans (bool): whether span outputs are AnnotatedSample objects instead of dicts
+        - thread_local (bool): whether each thread draws from its own sampler copy, Faker instance, and random number generator
         """
         # store the pattern mapper
         self.pattern = pattern_mapper
+        self.distinct = distinct
+        self.compact_spans = compact_spans
+
+        # per-thread random sources, rebuilt when the generation changes
+        self.thread_local = thread_local
+        self.local = threading.local()
+        self.seed: Optional[int] = None
+        self.generation = 0
+        self.thread_indices = itertools.count()
+        self.lock = threading.Lock()
+
+        # store the sampling policy and the per-tag class pools
+        self.sampler = sampler
+        self.pools: Dict[str, List[OWLClass]] = {}
+        for tag, policy in (policies or {}).items():
+            self.set_policy(tag, policy)
 
         # create the SOLI graph
-        self.graph = SOLI(
-            source_type=source_type,
-            http_url=http_url,
-            github_repo_owner=github_repo_owner,
-            github_repo_name=github_repo_name,
-            github_repo_branch=github_repo_branch,
-            use_cache=use_cache,
+        if soli_graph is not None:
+            self.graph = soli_graph
+        else:
+            self.graph = SOLI(
+                source_type=source_type,
+                http_url=http_url,
+                github_repo_owner=github_repo_owner,
+                github_repo_name=github_repo_name,
+                github_repo_branch=github_repo_branch,
+                use_cache=use_cache,
+            )
+
+        # wrap the sampler in the joint sampler over the graph's relation index
+        if correlated:
+            self.sampler = CorrelatedSampler(
+                get_relation_index(self.graph), max_hops=max_hops, base=self.sampler
+            )
+
+        # threads share the class pools read-only, so build them all up front
+        if thread_local:
+            base = (
+                self.sampler.base
+                if isinstance(self.sampler, CorrelatedSampler)
+                else self.sampler
+            )
+            if isinstance(base, CoverageSampler):
+                raise ValueError(
+                    "CoverageSampler tracks shared draw counts and cannot be used with thread_local"
+                )
+            self.load_pools()
+
+    def get_pool(self, tag: str) -> List[OWLClass]:
+        """
+        Get the cached pool of OWL classes for a SOLI tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+
+        Returns:
+        - list: the OWL classes for the SOLI tag
+        """
+        pool = self.pools.get(tag)
+        if pool is None:
+            pool = self.pools[tag] = get_soli_pool(self.graph, tag)
+        return pool
+
+    def get_compiled(self, template: str | CompiledTemplate) -> CompiledTemplate:
+        """
+        Get the compiled form of a template, passing already compiled templates through.
+
+        Args:
+        - template (str | CompiledTemplate): the template string or compiled template
+
+        Returns:
+        - CompiledTemplate: the compiled template
+        """
+        if isinstance(template, CompiledTemplate):
+            return template
+        return compile_template(template, self.pattern)
+
+    def load_pools(self) -> None:
+        """
+        Build the class pool for every SOLI tag.
+        """
+        for tag in SOLI_TAG_GETTERS:
+            self.get_pool(tag)
+
+    def refresh(self, soli_graph: SOLI, share: bool = True) -> dict:
+        """
+        Switch to an updated version of the SOLI graph, rebuilding only the class pools it changes.
+
+        The affected pools and their sampler state are built beside the ones in use and
+        swapped in per tag, so formatting continues from the current pools meanwhile.
+        Coverage counts carry over for classes that remain in a pool.
+
+        Args:
+        - soli_graph (SOLI): the updated graph
+        - share (bool): whether to replace the updated graph's unchanged classes with the instances in use
+
+        Returns:
+        - dict: the IRIs of the added, removed, and changed classes, and the refreshed tags
+        """
+        with self.lock:
+            old_graph = self.graph
+            diff = diff_graphs(old_graph, soli_graph, adopt=share)
+            tags = get_affected_tags(old_graph, soli_graph, diff, SOLI_TAG_ROOTS)
+            diff["tags"] = sorted(tags)
+            if not any(diff.values()):
+                return diff
+
+            # build the affected pools and their sampler state before swapping them in
+            pools = {
+                tag: get_soli_pool(soli_graph, tag)
+                for tag in diff["tags"]
+                if tag in self.pools
+            }
+            if self.sampler is not None:
+                for tag, pool in pools.items():
+                    self.sampler.refresh(tag, pool)
+                if isinstance(self.sampler, CorrelatedSampler):
+                    self.sampler.set_index(
+                        get_relation_index(soli_graph), {**self.pools, **pools}
+                    )
+            self.pools.update(pools)
+            self.graph = soli_graph
+
+            # thread-local samplers hold their own reference to the relation index
+            if self.thread_local and isinstance(self.sampler, CorrelatedSampler):
+                self.generation += 1
+        return diff
+
+    def get_state(self) -> FormatterState:
+        """
+        Get the random sources for the calling thread.
+
+        Without thread-local state, every thread shares the formatter's sampler, the
+        shared FAKER_INSTANCE, and the global `random` state.  With it, each thread
+        lazily builds its own, seeded from the formatter seed and the order in which
+        threads first format after the last reseed.
+
+        Returns:
+        - FormatterState: the thread's sampler, Faker instance, and random number generator
+        """
+        if not self.thread_local:
+            return FormatterState(self.sampler, FAKER_INSTANCE, random)
+
+        state = getattr(self.local, "state", None)
+        if state is None or state.generation != self.generation:
+            with self.lock:
+                generation = self.generation
+                thread_seed = (
+                    get_unit_seed(self.seed, next(self.thread_indices))
+                    if self.seed is not None
+                    else None
+                )
+            rng = random.Random(thread_seed)
+            faker = Faker()
+            faker.seed_instance(thread_seed)
+            state = self.local.state = FormatterState(
+                copy_sampler(self.sampler, rng), faker, rng, generation
+            )
+        return state
+
+    def set_policy(self, tag: str, policy: Optional[SamplingPolicy]) -> None:
+        """
+        Set or clear the weighted sampling policy for a SOLI tag.
+
+        Args:
+        - tag (str): the normalized SOLI tag
+        - policy (SamplingPolicy): the policy, or None to sample the tag uniformly
+        """
+        if tag not in SOLI_TAG_GETTERS:
+            raise ValueError(f"Invalid SOLI tag for sampling policy: {tag}")
+
+        # policies apply to the base sampler of a joint sampler
+        sampler = (
+            self.sampler.base
+            if isinstance(self.sampler, CorrelatedSampler)
+            else self.sampler
         )
+        if sampler is None or type(sampler) is ClassSampler:
+            sampler = WeightedSampler(rng=sampler.rng if sampler is not None else None)
+            if isinstance(self.sampler, CorrelatedSampler):
+                self.sampler.base = sampler
+            else:
+                self.sampler = sampler
+        elif not isinstance(sampler, WeightedSampler):
+            raise ValueError(
+                f"Sampling policies require a WeightedSampler; formatter uses {type(sampler).__name__}"
+            )
+
+        sampler.set_policy(tag, policy)
+        self.generation += 1
+
+    def load_policies(self, path: str) -> None:
+        """
+        Load per-tag weighted sampling policies from a JSON configuration file.
+
+        Args:
+        - path (str): the path to the JSON configuration file
+        """
+        for tag, policy in load_sampling_policies(path).items():
+            self.set_policy(tag, policy)
 
-    def format(self, template: str) -> str:
+    def format(self, template: str | CompiledTemplate) -> str:
         """
         Format a template string by sampling values for each SOLI taxonomic category or Faker method.
 
         Args:
-        - template (str): the template string containing SOLI tags
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
 
         Returns:
         - str: the formatted template with the SOLI tags replaced by their corresponding taxonomic categories or Faker methods
         """
-        # build a pattern map from the template
-        pattern_map = build_pattern_map(template=template, pattern=self.pattern)
+        # compile the template
+        compiled = self.get_compiled(template)
 
         # sample values for each tag
-        value_map = sample_values(pattern_map=pattern_map, soli_graph=self.graph)
+        state = self.get_state()
+        value_map = sample_values(
+            pattern_map=compiled.pattern_map,
+            soli_graph=self.graph,
+            sampler=state.sampler,
+            pools=self.pools,
+            distinct=self.distinct,
+            faker=state.faker,
+            rng=state.rng,
+        )
 
         # apply the value map to the template
-        return apply_template_map(template=template, value_map=value_map)
+        return compiled.render(value_map)
 
-    def format_spans(self, template: str) -> dict:
+    def format_spans(self, template: str | CompiledTemplate) -> dict | AnnotatedSample:
         """
         Format a template string by sampling values for each SOLI taxonomic category or Faker method with span annotations.
 
         Args:
-        - template (str): the template string containing SOLI tags
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
 
         Returns:
-        - dict: the formatted template with the SOLI tags replaced by their corresponding taxonomic categories or Faker methods with span annotations
+        - dict | AnnotatedSample: the formatted template with the SOLI tags replaced by their corresponding taxonomic categories or Faker methods with span annotations
         """
-        # build a pattern map from the template
-        pattern_map = build_pattern_map(template=template, pattern=self.pattern)
+        # compile the template
+        compiled = self.get_compiled(template)
 
         # sample values for each tag
-        value_map = sample_value_details(pattern_map=pattern_map, soli_graph=self.graph)
+        state = self.get_state()
+        value_map = sample_value_details(
+            pattern_map=compiled.pattern_map,
+            soli_graph=self.graph,
+            sampler=state.sampler,
+            pools=self.pools,
+            distinct=self.distinct,
+            faker=state.faker,
+            rng=state.rng,
+        )
 
         # apply the value map to the template
-        return apply_template_map_spans(template=template, value_map=value_map)
+        if self.compact_spans:
+            return compiled.render_compact(value_map)
+        return compiled.render_spans(value_map)
+
+    def format_many(
+        self, template: str | CompiledTemplate, num_samples: int
+    ) -> List[str]:
+        """
+        Format a template string multiple times, sampling each tag's values in one batch.
+
+        Args:
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
+        - num_samples (int): the number of formatted outputs to generate
+
+        Returns:
+        - list: the formatted templates
+        """
+        # compile the template once
+        compiled = self.get_compiled(template)
+
+        # sample values for each tag in batches
+        state = self.get_state()
+        value_maps = sample_value_details_many(
+            pattern_map=compiled.pattern_map,
+            soli_graph=self.graph,
+            num_samples=num_samples,
+            sampler=state.sampler,
+            pools=self.pools,
+            distinct=self.distinct,
+            faker=state.faker,
+            rng=state.rng,
+        )
+
+        # apply each value map to the template
+        return [
+            compiled.render({key: value["value"] for key, value in value_map.items()})
+            for value_map in value_maps
+        ]
+
+    def format_spans_many(
+        self, template: str | CompiledTemplate, num_samples: int
+    ) -> List[dict | AnnotatedSample]:
+        """
+        Format a template string multiple times with span annotations, sampling each tag's values in one batch.
+
+        Args:
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
+        - num_samples (int): the number of formatted outputs to generate
+
+        Returns:
+        - list: the formatted templates with span annotations
+        """
+        # compile the template once
+        compiled = self.get_compiled(template)
+
+        # sample values for each tag in batches
+        state = self.get_state()
+        value_maps = sample_value_details_many(
+            pattern_map=compiled.pattern_map,
+            soli_graph=self.graph,
+            num_samples=num_samples,
+            sampler=state.sampler,
+            pools=self.pools,
+            distinct=self.distinct,
+            faker=state.faker,
+            rng=state.rng,
+        )
+
+        # apply each value map to the template
+        if self.compact_spans:
+            return [compiled.render_compact(value_map) for value_map in value_maps]
+        return [compiled.render_spans(value_map) for value_map in value_maps]
+
+    def format_batch(
+        self, template: str | CompiledTemplate, num_samples: int = 1, spans: bool = True
+    ) -> List[str | dict]:
+        """
+        Format a template string one or more times, with or without span annotations.
+
+        Args:
+        - template (str | CompiledTemplate): the template string containing SOLI tags, or its compiled form
+        - num_samples (int): the number of formatted outputs to generate
+        - spans (bool): whether to return span annotations with each output
+
+        Returns:
+        - list: the formatted templates
+        """
+        if num_samples == 1:
+            return [self.format_spans(template) if spans else self.format(template)]
+        if spans:
+            return self.format_spans_many(template, num_samples)
+        return self.format_many(template, num_samples)
+
+    def stream(
+        self,
+        templates: Iterable[str | CompiledTemplate],
+        renders_per_template: int = 1,
+        spans: bool = True,
+        workers: int = 0,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ) -> Iterator[str | dict]:
+        """
+        Lazily format a stream of templates, yielding outputs in input order.
+
+        Only a bounded number of templates is held in memory at once.  With workers,
+        chunks of templates are rendered in forked worker processes; each worker samples
+        with its own copy of the sampler, so stateful samplers such as CoverageSampler
+        do not see the draws made in other workers.
+
+        Args:
+        - templates (Iterable[str | CompiledTemplate]): the template strings containing SOLI tags, or their compiled forms
+        - renders_per_template (int): the number of formatted outputs per template
+        - spans (bool): whether to yield span annotations with each output
+        - workers (int): the number of worker processes; 0 renders in this process
+        - chunk_size (int): the number of templates sent to a worker at a time
+
+        Yields:
+        - str | dict: the formatted templates, renders_per_template per template
+        """
+        if renders_per_template < 1:
+            raise ValueError("renders_per_template must be at least 1")
+        if workers < 0:
+            raise ValueError("workers must be non-negative")
+
+        if workers > 0:
+            yield from stream_parallel(
+                self, templates, renders_per_template, spans, workers, chunk_size
+            )
+            return
+
+        for template in templates:
+            yield from self.format_batch(template, renders_per_template, spans)
+
+    def reseed(self, seed: Optional[int] = None) -> None:
+        """
+        Reseed the random sources used by the formatter.
+
+        Args:
+        - seed (int): the seed, or None to seed from system entropy
+        """
+        if self.thread_local:
+            # threads rebuild their random sources from the new seed
+            with self.lock:
+                self.seed = seed
+                self.thread_indices = itertools.count()
+                self.generation += 1
+            return
+
+        random.seed(seed)
+        FAKER_INSTANCE.seed_instance(seed)
+        if self.sampler is not None and self.sampler.rng is not random:
+            self.sampler.rng.seed(seed)
 
     def __call__(self, *args, **kwargs):
         """
@@ -0,0 +1,297 @@
+"""
+Built-in CPU and memory profiling for generation runs.
+
+A SampleProfiler wraps individual samples of a generation loop, profiling every Nth
+sample so that overhead stays low on long runs:
+
+ - cpu: cProfile statistics (pstats and a top-N text report) plus collapsed stacks
+   from a background stack sampler, ready for flamegraph.pl or speedscope
+ - memory: tracemalloc allocations that are still alive at the end of each sample,
+   as a top-N report by line and as collapsed stacks weighted by bytes
+"""
+
+# imports
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# profiling modes
+PROFILE_MODES = ("cpu", "memory")
+
+# default interval between stack samples, in seconds
+DEFAULT_STACK_INTERVAL = 0.005
+
+# default number of entries in the top-N reports
+DEFAULT_TOP_N = 25
+
+# number of frames stored for each traced allocation
+TRACEMALLOC_FRAMES = 32
+
+
+def get_frame_name(frame: FrameType) -> str:
+    """
+    Get the collapsed-stack name for a frame.
+
+    Args:
+    - frame (FrameType): the frame
+
+    Returns:
+    - str: the function name with its file and line
+    """
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Background thread that periodically records the stack of one thread.
+    """
+
+    def __init__(self, interval: float = DEFAULT_STACK_INTERVAL):
+        """
+        Initialize the stack sampler.
+
+        Args:
+        - interval (float): the seconds between stack samples
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.thread_id: Optional[int] = None
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start sampling the calling thread.
+        """
+        self.thread_id = threading.get_ident()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop sampling.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self) -> None:
+        """
+        Record the target thread's stack until stopped.
+        """
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                self.thread_id
+            )
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(get_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: Path) -> None:
+        """
+        Write the sampled stacks in collapsed-stack format.
+
+        Args:
+        - path (Path): the output path
+        """
+        with open(path, "wt", encoding="utf-8") as output_file:
+            for stack, count in self.stacks.most_common():
+                output_file.write(f"{stack} {count}\n")
+
+
+class SampleProfiler:
+    """
+    Profile every Nth sample of a generation loop and write the reports at the end.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        output_prefix: str | Path,
+        every: int = 1,
+        top_n: int = DEFAULT_TOP_N,
+        stack_interval: float = DEFAULT_STACK_INTERVAL,
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+        - mode (str): cpu or memory
+        - output_prefix (str | Path): the path prefix for the report files
+        - every (int): profile one sample out of every this many
+        - top_n (int): the number of entries in the top-N reports
+        - stack_interval (float): the seconds between stack samples in cpu mode
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Invalid profile mode: {mode}; must be one of {PROFILE_MODES}"
+            )
+        if every < 1:
+            raise ValueError("every must be at least 1")
+
+        self.mode = mode
+        self.output_prefix = Path(output_prefix)
+        self.every = every
+        self.top_n = top_n
+        self.num_samples = 0
+        self.num_profiled = 0
+
+        # cpu state
+        self.profile = cProfile.Profile() if mode == "cpu" else None
+        self.stack_sampler = StackSampler(stack_interval) if mode == "cpu" else None
+
+        # memory state: bytes and counts by line, and bytes by stack
+        self.line_sizes: Counter = Counter()
+        self.line_counts: Counter = Counter()
+        self.stack_sizes: Counter = Counter()
+
+    def sample(self) -> "ProfiledSample":
+        """
+        Get a context manager for the next sample, which profiles it if it is due.
+
+        Returns:
+        - ProfiledSample: the context manager
+        """
+        active = self.num_samples % self.every == 0
+        self.num_samples += 1
+        return ProfiledSample(self, active)
+
+    def start(self) -> None:
+        """
+        Start profiling a sample.
+        """
+        self.num_profiled += 1
+        if self.mode == "cpu":
+            self.stack_sampler.start()
+            self.profile.enable()
+        else:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def stop(self) -> None:
+        """
+        Stop profiling a sample and accumulate its results.
+        """
+        if self.mode == "cpu":
+            self.profile.disable()
+            self.stack_sampler.stop()
+            return
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        for trace in snapshot.traces:
+            # tracebacks are ordered from the oldest frame to the allocating frame
+            frame = trace.traceback[-1]
+            self.line_sizes[(frame.filename, frame.lineno)] += trace.size
+            self.line_counts[(frame.filename, frame.lineno)] += 1
+            stack = ";".join(
+                f"{frame.filename}:{frame.lineno}" for frame in trace.traceback
+            )
+            self.stack_sizes[stack] += trace.size
+
+    def get_output_paths(self) -> Dict[str, Path]:
+        """
+        Get the report paths for the profiling mode.
+
+        Returns:
+        - dict: the report paths by report name
+        """
+        prefix = str(self.output_prefix)
+        if self.mode == "cpu":
+            return {
+                "pstats": Path(f"{prefix}.cpu.pstats"),
+                "collapsed": Path(f"{prefix}.cpu.collapsed"),
+                "report": Path(f"{prefix}.cpu.txt"),
+            }
+        return {
+            "collapsed": Path(f"{prefix}.memory.collapsed"),
+            "report": Path(f"{prefix}.memory.txt"),
+        }
+
+    def iter_top_allocations(self) -> Iterator[Tuple[str, int, int, int]]:
+        """
+        Iterate over the lines with the most bytes still allocated after their sample.
+
+        Yields:
+        - tuple: the filename, line number, bytes, and allocation count
+        """
+        for (filename, lineno), size in self.line_sizes.most_common(self.top_n):
+            yield filename, lineno, size, self.line_counts[(filename, lineno)]
+
+    def write(self) -> Dict[str, Path]:
+        """
+        Write the profiling reports.
+
+        Returns:
+        - dict: the report paths by report name
+        """
+        paths = self.get_output_paths()
+        header = f"Profiled {self.num_profiled} of {self.num_samples} samples (every {self.every})\n\n"
+
+        if self.mode == "cpu":
+            self.profile.dump_stats(str(paths["pstats"]))
+            self.stack_sampler.write_collapsed(paths["collapsed"])
+
+            report = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=report)
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            paths["report"].write_text(header + report.getvalue(), encoding="utf-8")
+            return paths
+
+        with open(paths["collapsed"], "wt", encoding="utf-8") as output_file:
+            for stack, size in self.stack_sizes.most_common():
+                output_file.write(f"{stack} {size}\n")
+
+        lines: List[str] = [
+            header.rstrip("\n"),
+            "",
+            f"{'bytes':>12} {'count':>8}  line",
+        ]
+        for filename, lineno, size, count in self.iter_top_allocations():
+            lines.append(f"{size:>12} {count:>8}  {filename}:{lineno}")
+        paths["report"].write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return paths
+
+
+class ProfiledSample:
+    """
+    Context manager for one sample of a SampleProfiler.
+    """
+
+    __slots__ = ("profiler", "active")
+
+    def __init__(self, profiler: SampleProfiler, active: bool):
+        """
+        Initialize the sample context.
+
+        Args:
+        - profiler (SampleProfiler): the profiler
+        - active (bool): whether this sample is profiled
+        """
+        self.profiler = profiler
+        self.active = active
+
+    def __enter__(self) -> "ProfiledSample":
+        if self.active:
+            self.profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.active:
+            self.profiler.stop()
@@ -0,0 +1,625 @@
+"""
+Long-lived local render server with micro-batching.
+
+The server loads the SOLI graph and warms the per-tag class pools once, then renders
+templates on demand over HTTP on a TCP port or a Unix socket.  Concurrent requests are
+queued to a single MicroBatcher thread, which waits briefly to coalesce them and renders
+requests for the same template in one batched `format_batch` call.  Everything runs
+from the local SOLI cache and Faker, so no network access is needed once the graph has
+been cached.
+
+When the server is given a reloader, it also takes ontology updates without a restart:
+a GraphRefresher loads the current upstream graph on request or on an interval and
+refreshes the formatter in place, rebuilding only the class pools the update changes
+while the batcher keeps rendering from the current ones.
+
+Endpoints:
+ - POST /render: {"template": str, "n": int = 1, "spans": bool = true} -> {"outputs": [...]}
+ - POST /refresh: reload the graph and refresh the formatter -> the added, removed, and changed class counts and the refreshed tags
+ - GET /health: status, uptime, and graph size
+ - GET /stats: request counts, batch sizes, and latency histograms as JSON
+ - GET /metrics: the same statistics as Prometheus text
+"""
+
+# imports
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.procedural.spans import get_output_record
+from soli_data_generator.procedural.template import TemplateFormatter
+
+# default address for the TCP server
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# default batching limits: outputs per batch and seconds to wait for more requests
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT = 0.002
+
+# maximum outputs per request and request body size in bytes
+MAX_RENDERS_PER_REQUEST = 10000
+MAX_REQUEST_BYTES = 1 << 20
+
+
+class RenderRequest:
+    """
+    A queued render request and the future for its outputs.
+    """
+
+    __slots__ = ("template", "num_samples", "spans", "future", "queued")
+
+    def __init__(self, template: str, num_samples: int, spans: bool):
+        """
+        Initialize the request.
+
+        Args:
+        - template (str): the template string
+        - num_samples (int): the number of outputs to render
+        - spans (bool): whether to return span annotations
+        """
+        self.template = template
+        self.num_samples = num_samples
+        self.spans = spans
+        self.future: Future = Future()
+        self.queued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent render requests into batched formatter calls on one thread.
+    """
+
+    def __init__(
+        self,
+        formatter: TemplateFormatter,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the batcher and start its thread.
+
+        Args:
+        - formatter (TemplateFormatter): the formatter to render with
+        - max_batch_size (int): the maximum number of outputs rendered per batch
+        - max_wait (float): the seconds to wait for more requests after the first
+        - metrics (Metrics): the metrics to record batch sizes and timings to
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.formatter = formatter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.queue: queue.Queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, template: str, num_samples: int = 1, spans: bool = True) -> Future:
+        """
+        Queue a render request.
+
+        Args:
+        - template (str): the template string
+        - num_samples (int): the number of outputs to render
+        - spans (bool): whether to return span annotations
+
+        Returns:
+        - Future: the future for the list of outputs
+        """
+        request = RenderRequest(template, num_samples, spans)
+        self.queue.put(request)
+        return request.future
+
+    def render(
+        self, template: str, num_samples: int = 1, spans: bool = True
+    ) -> List[str | dict]:
+        """
+        Render a template through the batcher and wait for the outputs.
+
+        Args:
+        - template (str): the template string
+        - num_samples (int): the number of outputs to render
+        - spans (bool): whether to return span annotations
+
+        Returns:
+        - list: the formatted outputs
+        """
+        return self.submit(template, num_samples, spans).result()
+
+    def next_batch(self) -> Optional[List[RenderRequest]]:
+        """
+        Wait for a request, then collect more until the batch is full or max_wait passes.
+
+        Returns:
+        - list: the requests in the batch, or None once the batcher is closed
+        """
+        request = self.queue.get()
+        if request is None:
+            return None
+
+        batch = [request]
+        size = request.num_samples
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # finish this batch, then stop
+                self.queue.put(None)
+                break
+            batch.append(request)
+            size += request.num_samples
+        return batch
+
+    def process(self, batch: List[RenderRequest]) -> None:
+        """
+        Render a batch, with one formatter call per distinct template and span setting.
+
+        Args:
+        - batch (list): the requests in the batch
+        """
+        now = time.perf_counter()
+        groups: Dict[Tuple[str, bool], List[RenderRequest]] = {}
+        for request in batch:
+            self.metrics.observe("queue_wait", now - request.queued)
+            groups.setdefault((request.template, request.spans), []).append(request)
+
+        self.metrics.count("batches")
+        self.metrics.count("batched_requests", len(batch))
+        for (template, spans), requests in groups.items():
+            try:
+                with self.metrics.timer("format"):
+                    outputs = self.formatter.format_batch(
+                        template,
+                        sum(request.num_samples for request in requests),
+                        spans=spans,
+                    )
+            except Exception as error:  # pylint: disable=broad-except
+                for request in requests:
+                    request.future.set_exception(error)
+                continue
+
+            self.metrics.count("formatter_calls")
+            self.metrics.count("outputs", len(outputs))
+            offset = 0
+            for request in requests:
+                request.future.set_result(
+                    outputs[offset : offset + request.num_samples]
+                )
+                offset += request.num_samples
+
+    def run(self) -> None:
+        """
+        Process batches until closed.
+        """
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+            self.process(batch)
+
+    def stats(self) -> dict:
+        """
+        Get the batching statistics.
+
+        Returns:
+        - dict: the queue depth and mean requests and outputs per batch
+        """
+        counters = self.metrics.summary()["counters"]
+        batches = counters.get("batches", 0)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait,
+            "mean_requests_per_batch": (
+                counters.get("batched_requests", 0) / batches if batches else 0.0
+            ),
+            "mean_outputs_per_batch": (
+                counters.get("outputs", 0) / batches if batches else 0.0
+            ),
+        }
+
+    def close(self) -> None:
+        """
+        Stop the batcher thread after the queued requests are processed.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+
+class GraphRefresher:
+    """
+    Refresh a formatter from updated versions of its graph, on request or on an interval.
+    """
+
+    def __init__(
+        self,
+        formatter: TemplateFormatter,
+        reloader: Callable[[], SOLI],
+        interval: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the refresher, starting its thread if an interval is given.
+
+        Args:
+        - formatter (TemplateFormatter): the formatter to refresh
+        - reloader (Callable): loads the current upstream graph
+        - interval (float): the seconds between refreshes, or None to refresh only on request
+        - metrics (Metrics): the metrics to record refresh counts and timings to
+        """
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.formatter = formatter
+        self.reloader = reloader
+        self.interval = interval
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.lock = threading.Lock()
+        self.last_refresh: Optional[float] = None
+        self.last_diff: Optional[dict] = None
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        if interval is not None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def refresh(self) -> dict:
+        """
+        Load the current graph and refresh the formatter from it.
+
+        Returns:
+        - dict: the added, removed, and changed class counts and the refreshed tags
+        """
+        with self.lock, self.metrics.timer("refresh"):
+            with self.metrics.timer("reload"):
+                graph = self.reloader()
+            diff = self.formatter.refresh(graph)
+            self.metrics.count("refreshes")
+            self.last_refresh = time.time()
+            self.last_diff = {
+                "added": len(diff["added"]),
+                "removed": len(diff["removed"]),
+                "changed": len(diff["changed"]),
+                "tags": diff["tags"],
+            }
+            return self.last_diff
+
+    def run(self) -> None:
+        """
+        Refresh on the interval until closed, counting failed refreshes.
+        """
+        while not self.stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:  # pylint: disable=broad-except
+                self.metrics.count("refresh_errors")
+
+    def stats(self) -> dict:
+        """
+        Get the refresh statistics.
+
+        Returns:
+        - dict: the interval, the time of the last refresh, and its diff
+        """
+        return {
+            "interval": self.interval,
+            "last_refresh": self.last_refresh,
+            "last_diff": self.last_diff,
+        }
+
+    def close(self) -> None:
+        """
+        Stop the refresh thread.
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler for the render server.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        # request logging is replaced by the /stats and /metrics endpoints
+        pass
+
+    def send_body(
+        self, status: int, body: bytes, content_type: str = "application/json"
+    ) -> None:
+        """
+        Send a response with a body.
+
+        Args:
+        - status (int): the HTTP status code
+        - body (bytes): the response body
+        - content_type (str): the content type
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, payload: dict) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+        - status (int): the HTTP status code
+        - payload (dict): the response payload
+        """
+        self.send_body(status, json.dumps(payload).encode("utf-8"))
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve the health, stats, and metrics endpoints.
+        """
+        metrics = self.server.metrics
+        if self.path == "/health":
+            self.send_json(
+                200,
+                {
+                    "status": "ok",
+                    "uptime": metrics.elapsed,
+                    "classes": len(self.server.formatter.graph.classes),
+                },
+            )
+        elif self.path == "/stats":
+            summary = metrics.summary()
+            summary["batching"] = self.server.batcher.stats()
+            if self.server.refresher is not None:
+                summary["refresh"] = self.server.refresher.stats()
+            self.send_json(200, summary)
+        elif self.path == "/metrics":
+            self.send_body(
+                200,
+                metrics.to_prometheus().encode("utf-8"),
+                content_type="text/plain; version=0.0.4",
+            )
+        else:
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Serve the render and refresh endpoints.
+        """
+        if self.path == "/refresh":
+            self.handle_refresh()
+            return
+        if self.path != "/render":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+
+        metrics = self.server.metrics
+        with metrics.timer("request"):
+            try:
+                template, num_samples, spans = self.read_render_request()
+            except ValueError as error:
+                metrics.count("bad_requests")
+                self.send_json(400, {"error": str(error)})
+                return
+
+            try:
+                outputs = self.server.batcher.render(template, num_samples, spans)
+            except Exception as error:  # pylint: disable=broad-except
+                metrics.count("errors")
+                self.send_json(500, {"error": str(error)})
+                return
+
+            metrics.count("requests")
+            self.send_json(
+                200, {"outputs": [get_output_record(output) for output in outputs]}
+            )
+
+    def handle_refresh(self) -> None:
+        """
+        Refresh the formatter from the current upstream graph.
+        """
+        if self.server.refresher is None:
+            self.send_json(404, {"error": "Refresh is not enabled on this server"})
+            return
+        try:
+            self.send_json(200, self.server.refresher.refresh())
+        except Exception as error:  # pylint: disable=broad-except
+            self.server.metrics.count("refresh_errors")
+            self.send_json(500, {"error": str(error)})
+
+    def read_render_request(self) -> Tuple[str, int, bool]:
+        """
+        Read and validate a render request body.
+
+        Returns:
+        - tuple: the template, number of outputs, and whether to return spans
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise ValueError(f"Request body exceeds {MAX_REQUEST_BYTES} bytes")
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid JSON: {error}") from error
+
+        if not isinstance(request, dict) or not isinstance(
+            request.get("template"), str
+        ):
+            raise ValueError("Request must be a JSON object with a template string")
+        num_samples = request.get("n", 1)
+        if not isinstance(num_samples, int) or not (
+            1 <= num_samples <= MAX_RENDERS_PER_REQUEST
+        ):
+            raise ValueError(
+                f"n must be an integer between 1 and {MAX_RENDERS_PER_REQUEST}"
+            )
+        spans = request.get("spans", True)
+        if not isinstance(spans, bool):
+            raise ValueError("spans must be a boolean")
+        return request["template"], num_samples, spans
+
+
+class RenderServerMixIn:
+    """
+    Mix-in that holds the formatter, metrics, batcher, and refresher the request handlers use.
+    """
+
+    daemon_threads = True
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        server_address: Any,
+        handler_class: type,
+        formatter: TemplateFormatter,
+        batcher: MicroBatcher,
+        metrics: Metrics,
+        refresher: Optional[GraphRefresher] = None,
+    ):
+        """
+        Bind the server and attach the components it renders with.
+
+        Args:
+        - server_address (Any): the (host, port) pair or Unix socket path to bind
+        - handler_class (type): the request handler class
+        - formatter (TemplateFormatter): the formatter to render with
+        - batcher (MicroBatcher): the micro-batcher that renders requests
+        - metrics (Metrics): the metrics to record to
+        - refresher (GraphRefresher): the graph refresher, or None to disable refreshes
+        """
+        super().__init__(server_address, handler_class)
+        self.formatter = formatter
+        self.batcher = batcher
+        self.metrics = metrics
+        self.refresher = refresher
+
+
+class RenderHTTPServer(RenderServerMixIn, ThreadingHTTPServer):
+    """
+    Threaded render server on a TCP port.
+    """
+
+
+class RenderUnixServer(RenderServerMixIn, socketserver.ThreadingUnixStreamServer):
+    """
+    Threaded render server on a Unix socket.
+    """
+
+    def get_request(self):
+        # unix socket peers have no address; handlers expect a (host, port) pair
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def warm_formatter(formatter: TemplateFormatter) -> None:
+    """
+    Build the class pool for every SOLI tag so that the first requests do not pay for it.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter
+    """
+    formatter.load_pools()
+
+
+def create_server(
+    formatter: TemplateFormatter,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait: float = DEFAULT_MAX_WAIT,
+    metrics: Optional[Metrics] = None,
+    reloader: Optional[Callable[[], SOLI]] = None,
+    refresh_interval: Optional[float] = None,
+) -> RenderHTTPServer | RenderUnixServer:
+    """
+    Create a render server with a warm formatter and a running micro-batcher.
+
+    Args:
+    - formatter (TemplateFormatter): the formatter to render with
+    - host (str): the TCP host to bind
+    - port (int): the TCP port to bind; 0 picks a free port
+    - socket_path (str): a Unix socket path to bind instead of a TCP port
+    - max_batch_size (int): the maximum number of outputs rendered per batch
+    - max_wait (float): the seconds to wait for more requests after the first
+    - metrics (Metrics): the metrics to record to
+    - reloader (Callable): loads the current upstream graph for POST /refresh, or None to disable refreshes
+    - refresh_interval (float): the seconds between automatic refreshes, or None to refresh only on request
+
+    Returns:
+    - RenderHTTPServer | RenderUnixServer: the server, ready for serve_forever
+    """
+    if refresh_interval is not None and reloader is None:
+        raise ValueError("refresh_interval requires a reloader")
+    warm_formatter(formatter)
+
+    if metrics is None:
+        metrics = Metrics()
+    batcher = MicroBatcher(
+        formatter,
+        max_batch_size=max_batch_size,
+        max_wait=max_wait,
+        metrics=metrics,
+    )
+    refresher = None
+    if reloader is not None:
+        refresher = GraphRefresher(
+            formatter, reloader, interval=refresh_interval, metrics=metrics
+        )
+
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server_class, server_address = RenderUnixServer, socket_path
+    else:
+        server_class, server_address = RenderHTTPServer, (host, port)
+    try:
+        return server_class(
+            server_address,
+            RenderRequestHandler,
+            formatter,
+            batcher,
+            metrics,
+            refresher=refresher,
+        )
+    except BaseException:
+        batcher.close()
+        if refresher is not None:
+            refresher.close()
+        raise
+
+
+def close_server(server: RenderHTTPServer | RenderUnixServer) -> None:
+    """
+    Close a render server, its batcher, and its Unix socket file.
+
+    Args:
+    - server (RenderHTTPServer | RenderUnixServer): the server
+    """
+    server.server_close()
+    server.batcher.close()
+    if server.refresher is not None:
+        server.refresher.close()
+    if isinstance(server, RenderUnixServer) and os.path.exists(server.server_address):
+        os.unlink(server.server_address)
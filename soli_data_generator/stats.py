@@ -0,0 +1,574 @@
+"""
+Streaming, mergeable statistics over generated datasets.
+
+A DatasetStats accumulator is fed each sample as it is written and keeps only fixed-size
+state: counters of spans by tag, class, and label variant, quantile sketches of text
+length and spans per sample, and HyperLogLog sketches of distinct texts and span values.
+Class counters are bounded by the ontology, not the dataset, so memory does not grow with
+the number of samples.  Every part merges exactly, so per-worker or per-shard
+accumulators combine into the report of the whole run.
+
+The quantile sketch buckets values on a logarithmic scale, so every quantile is within
+the relative accuracy of a value in the data.  The HyperLogLog sketch estimates distinct
+counts with a standard error of about 1.04 / sqrt(2 ^ precision), 1.6% by default.
+"""
+
+# imports
+import base64
+import json
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+# packages
+from soli import SOLI
+
+# project
+from soli_data_generator.dedup import hash_text
+from soli_data_generator.procedural.sampling import get_owl_label_choices
+from soli_data_generator.procedural.spans import AnnotatedSample
+from soli_data_generator.procedural.template import SOLI_TAG_GETTERS, get_soli_pool
+
+# default HyperLogLog precision, for 4096 registers
+DEFAULT_HLL_PRECISION = 12
+
+# default relative accuracy of the quantile sketches
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# quantiles in the report
+REPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+# stats file format version
+STATS_VERSION = 1
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch of the number of distinct strings.
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        """
+        Create an empty sketch.
+
+        Args:
+        - precision (int): the number of index bits, from 4 to 16
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """
+        Add a string to the sketch.
+
+        Args:
+        - value (str): the string
+        """
+        key = hash_text(value)
+        bits = 64 - self.precision
+        index = key >> bits
+        rank = bits - (key & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """
+        Estimate the number of distinct strings added.
+
+        Returns:
+        - int: the estimated distinct count
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0**-rank for rank in self.registers)
+
+        # linear counting is more accurate for small counts
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        Merge another sketch into this one.
+
+        Args:
+        - other (HyperLogLog): the sketch to merge, with the same precision
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the sketch.
+
+        Returns:
+        - dict: the precision and base64 registers
+        """
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "HyperLogLog":
+        """
+        Restore a serialized sketch.
+
+        Args:
+        - state (dict): the serialized sketch
+
+        Returns:
+        - HyperLogLog: the sketch
+        """
+        sketch = cls(state["precision"])
+        registers = base64.b64decode(state["registers"])
+        if len(registers) != len(sketch.registers):
+            raise ValueError("Invalid HyperLogLog registers")
+        sketch.registers = bytearray(registers)
+        return sketch
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmic buckets and bounded relative error.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        Create an empty sketch.
+
+        Args:
+        - relative_accuracy (float): the relative error bound of every quantile
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """
+        Add a value to the sketch.
+
+        Args:
+        - value (float): the non-negative value
+        """
+        if value < 0:
+            raise ValueError("QuantileSketch values must be non-negative")
+        if value == 0:
+            self.zeros += 1
+        else:
+            self.bins[math.ceil(math.log(value) / self.log_gamma)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+        - q (float): the quantile, from 0 to 1
+
+        Returns:
+        - float | None: the estimated value, or None if the sketch is empty
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return None
+
+        # the extremes are tracked exactly
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma**key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Merge another sketch into this one.
+
+        Args:
+        - other (QuantileSketch): the sketch to merge, with the same relative accuracy
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                "Cannot merge quantile sketches of different relative accuracy"
+            )
+        self.bins.update(other.bins)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Summarize the distribution.
+
+        Returns:
+        - dict: the count, mean, min, max, and report quantiles
+        """
+        if self.count == 0:
+            return {"count": 0}
+        summary = {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+        for q in REPORT_QUANTILES:
+            summary[f"p{round(q * 100)}"] = self.quantile(q)
+        return summary
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the sketch.
+
+        Returns:
+        - dict: the accuracy, bucket counts, and running totals
+        """
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(key): count for key, count in self.bins.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        """
+        Restore a serialized sketch.
+
+        Args:
+        - state (dict): the serialized sketch
+
+        Returns:
+        - QuantileSketch: the sketch
+        """
+        sketch = cls(state["relative_accuracy"])
+        sketch.bins = Counter({int(key): count for key, count in state["bins"].items()})
+        sketch.zeros = state["zeros"]
+        sketch.count = state["count"]
+        sketch.total = state["total"]
+        if sketch.count:
+            sketch.min = state["min"]
+            sketch.max = state["max"]
+        return sketch
+
+
+class DatasetStats:
+    """
+    Constant-memory accumulator of tag, class, label variant, and length statistics.
+    """
+
+    def __init__(
+        self,
+        soli_graph: Optional[SOLI] = None,
+        precision: int = DEFAULT_HLL_PRECISION,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    ):
+        """
+        Create an empty accumulator.
+
+        Args:
+        - soli_graph (SOLI): the graph for label variants and class coverage; without it, both are skipped
+        - precision (int): the HyperLogLog precision
+        - relative_accuracy (float): the relative accuracy of the quantile sketches
+        """
+        self.graph = soli_graph
+        self.precision = precision
+        self.relative_accuracy = relative_accuracy
+        self.samples = 0
+        self.spans = 0
+        self.tags: Counter = Counter()
+        self.classes: Dict[str, Counter] = {}
+        self.variants: Dict[str, Counter] = {}
+        self.text_lengths = QuantileSketch(relative_accuracy)
+        self.spans_per_sample = QuantileSketch(relative_accuracy)
+        self.distinct_texts = HyperLogLog(precision)
+        self.distinct_values: Dict[str, HyperLogLog] = {}
+
+        # label to variant maps, cached per class IRI
+        self.label_variants: Dict[str, Dict[str, str]] = {}
+
+    def get_variant(self, iri: str, value: str) -> str:
+        """
+        Get the label variant a span value was drawn from.
+
+        Args:
+        - iri (str): the span's class IRI
+        - value (str): the span value
+
+        Returns:
+        - str: label, preferred_label, alternative_label, or other for values that match no label
+        """
+        variants = self.label_variants.get(iri)
+        if variants is None:
+            variants = self.label_variants[iri] = {}
+            owl_class = self.graph[iri]
+            if owl_class is not None:
+                for variant, label in get_owl_label_choices(owl_class):
+                    variants.setdefault(label, variant)
+        return variants.get(value, "other")
+
+    def add(self, sample: str | dict | AnnotatedSample) -> None:
+        """
+        Add a sample to the statistics.
+
+        Args:
+        - sample (str | dict | AnnotatedSample): the sample, as text, a dict, or a compact sample
+        """
+        if isinstance(sample, str):
+            text, spans = sample, []
+        elif isinstance(sample, AnnotatedSample):
+            text = sample.text
+            spans = [
+                (tag, iri, text[start:end])
+                for start, end, tag, iri in zip(
+                    sample.starts, sample.ends, sample.tags, sample.iris
+                )
+            ]
+        else:
+            text = sample["text"]
+            spans = []
+            for span in sample.get("spans") or []:
+                owl_class = span.get("owl_class")
+                iri = getattr(owl_class, "iri", owl_class)
+                value = span.get("value", text[span["start"] : span["end"]])
+                spans.append((span["tag"], iri, str(value)))
+
+        self.samples += 1
+        self.spans += len(spans)
+        self.text_lengths.add(len(text))
+        self.spans_per_sample.add(len(spans))
+        self.distinct_texts.add(text)
+
+        for tag, iri, value in spans:
+            self.tags[tag] += 1
+            values = self.distinct_values.get(tag)
+            if values is None:
+                values = self.distinct_values[tag] = HyperLogLog(self.precision)
+            values.add(value)
+            if iri is None:
+                continue
+
+            classes = self.classes.get(tag)
+            if classes is None:
+                classes = self.classes[tag] = Counter()
+            classes[iri] += 1
+            if self.graph is not None:
+                variants = self.variants.get(tag)
+                if variants is None:
+                    variants = self.variants[tag] = Counter()
+                variants[self.get_variant(iri, value)] += 1
+
+    def update(self, samples: Iterable[str | dict | AnnotatedSample]) -> None:
+        """
+        Add every sample in a stream.
+
+        Args:
+        - samples (Iterable[str | dict | AnnotatedSample]): the samples
+        """
+        for sample in samples:
+            self.add(sample)
+
+    def merge(self, other: "DatasetStats") -> None:
+        """
+        Merge another accumulator into this one.
+
+        Args:
+        - other (DatasetStats): the accumulator to merge
+        """
+        self.samples += other.samples
+        self.spans += other.spans
+        self.tags.update(other.tags)
+        for field in ("classes", "variants"):
+            counters = getattr(self, field)
+            for tag, counter in getattr(other, field).items():
+                counters.setdefault(tag, Counter()).update(counter)
+        self.text_lengths.merge(other.text_lengths)
+        self.spans_per_sample.merge(other.spans_per_sample)
+        self.distinct_texts.merge(other.distinct_texts)
+        for tag, sketch in other.distinct_values.items():
+            if tag in self.distinct_values:
+                self.distinct_values[tag].merge(sketch)
+            else:
+                self.distinct_values[tag] = HyperLogLog.from_dict(sketch.to_dict())
+
+    def get_coverage(self, tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the share of a SOLI tag's class pool that appeared in the samples.
+
+        Args:
+        - tag (str): the SOLI tag
+
+        Returns:
+        - dict | None: the seen and pool class counts and their ratio, or None without a graph or for Faker tags
+        """
+        if self.graph is None or tag not in SOLI_TAG_GETTERS:
+            return None
+        pool = {owl_class.iri for owl_class in get_soli_pool(self.graph, tag)}
+        seen = len(pool.intersection(self.classes.get(tag, ())))
+        return {
+            "seen": seen,
+            "pool": len(pool),
+            "coverage": seen / len(pool) if pool else 0.0,
+        }
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Summarize the statistics.
+
+        Args:
+        - top (int): the number of most frequent classes to list per tag
+
+        Returns:
+        - dict: the JSON-serializable report
+        """
+        tags = {}
+        for tag, count in self.tags.most_common():
+            classes = self.classes.get(tag, Counter())
+            tag_report = {
+                "spans": count,
+                "distinct_values": self.distinct_values[tag].count(),
+                "distinct_classes": len(classes),
+            }
+            coverage = self.get_coverage(tag)
+            if coverage is not None:
+                tag_report["coverage"] = coverage
+            if tag in self.variants:
+                tag_report["label_variants"] = dict(self.variants[tag].most_common())
+            if classes:
+                tag_report["top_classes"] = [
+                    {
+                        "iri": iri,
+                        "label": (
+                            getattr(self.graph[iri], "label", None)
+                            if self.graph is not None
+                            else None
+                        ),
+                        "spans": class_count,
+                    }
+                    for iri, class_count in classes.most_common(top)
+                ]
+            tags[tag] = tag_report
+
+        return {
+            "samples": self.samples,
+            "spans": self.spans,
+            "distinct_texts": self.distinct_texts.count(),
+            "text_length": self.text_lengths.summary(),
+            "spans_per_sample": self.spans_per_sample.summary(),
+            "tags": tags,
+        }
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the accumulator state for merging.
+
+        Returns:
+        - dict: the counters and sketches
+        """
+        return {
+            "version": STATS_VERSION,
+            "precision": self.precision,
+            "relative_accuracy": self.relative_accuracy,
+            "samples": self.samples,
+            "spans": self.spans,
+            "tags": dict(self.tags),
+            "classes": {tag: dict(counter) for tag, counter in self.classes.items()},
+            "variants": {tag: dict(counter) for tag, counter in self.variants.items()},
+            "text_lengths": self.text_lengths.to_dict(),
+            "spans_per_sample": self.spans_per_sample.to_dict(),
+            "distinct_texts": self.distinct_texts.to_dict(),
+            "distinct_values": {
+                tag: sketch.to_dict() for tag, sketch in self.distinct_values.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(
+        cls, state: dict, soli_graph: Optional[SOLI] = None
+    ) -> "DatasetStats":
+        """
+        Restore a serialized accumulator.
+
+        Args:
+        - state (dict): the serialized state
+        - soli_graph (SOLI): the graph for label variants and class coverage
+
+        Returns:
+        - DatasetStats: the accumulator
+        """
+        if state.get("version") != STATS_VERSION:
+            raise ValueError(f"Unsupported stats version: {state.get('version')}")
+        stats = cls(soli_graph, state["precision"], state["relative_accuracy"])
+        stats.samples = state["samples"]
+        stats.spans = state["spans"]
+        stats.tags = Counter(state["tags"])
+        stats.classes = {tag: Counter(c) for tag, c in state["classes"].items()}
+        stats.variants = {tag: Counter(c) for tag, c in state["variants"].items()}
+        stats.text_lengths = QuantileSketch.from_dict(state["text_lengths"])
+        stats.spans_per_sample = QuantileSketch.from_dict(state["spans_per_sample"])
+        stats.distinct_texts = HyperLogLog.from_dict(state["distinct_texts"])
+        stats.distinct_values = {
+            tag: HyperLogLog.from_dict(sketch)
+            for tag, sketch in state["distinct_values"].items()
+        }
+        return stats
+
+    def write(self, path: str, top: int = 10) -> None:
+        """
+        Write the report and the mergeable state as JSON.
+
+        Args:
+        - path (str): the output path
+        - top (int): the number of most frequent classes to list per tag
+        """
+        with open(path, "wt", encoding="utf-8") as output_file:
+            json.dump(
+                {"report": self.report(top), "state": self.to_dict()},
+                output_file,
+                indent=2,
+            )
+
+    @classmethod
+    def read(cls, path: str, soli_graph: Optional[SOLI] = None) -> "DatasetStats":
+        """
+        Read the state from a stats file written by `write`.
+
+        Args:
+        - path (str): the stats file path
+        - soli_graph (SOLI): the graph for label variants and class coverage
+
+        Returns:
+        - DatasetStats: the accumulator
+        """
+        with open(path, "rt", encoding="utf-8") as input_file:
+            return cls.from_dict(json.load(input_file)["state"], soli_graph)
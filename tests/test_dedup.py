@@ -0,0 +1,67 @@
+# project
+from soli_data_generator.dedup import BloomFilter, Deduplicator, MinHasher
+from soli_data_generator.instrumentation import Metrics
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    assert not bloom.add(1)
+    assert bloom.add(1)
+    assert 1 in bloom
+
+    # the false positive rate stays near the target at capacity
+    for key in range(2, 1000):
+        bloom.add(key * 0x9E3779B97F4A7C15 & (2**64 - 1))
+    false_positives = sum(
+        (key * 0x9E3779B97F4A7C15 + 12345) & (2**64 - 1) in bloom
+        for key in range(10000)
+    )
+    assert false_positives < 300
+
+
+def test_minhash_similarity():
+    hasher = MinHasher(num_perm=128)
+    base = "the client is a regional bank facing a dispute over a commercial lease " * 3
+    near = base + "in the state of delaware"
+    other = "an unrelated engagement about patent licensing for a software startup"
+
+    def similarity(first, second):
+        return (
+            sum(
+                a == b
+                for a, b in zip(hasher.signature(first), hasher.signature(second))
+            )
+            / 128
+        )
+
+    assert similarity(base, base) == 1.0
+    assert similarity(base, near) > 0.6
+    assert similarity(base, other) < 0.2
+
+
+def test_deduplicator():
+    metrics = Metrics()
+    deduplicator = Deduplicator(capacity=1000, window=4, metrics=metrics)
+    text = (
+        "Our client, a mid-sized manufacturer, received a demand letter alleging "
+        "breach of a supply agreement and seeks advice on potential defenses."
+    )
+    assert deduplicator.check(text) is None
+    assert deduplicator.check("  " + text.upper() + " ") == "exact"
+    assert deduplicator.check(text.replace("mid-sized", "mid sized")) == "near"
+    assert (
+        deduplicator.check("A landlord asks whether a tenant may sublet the premises.")
+        is None
+    )
+
+    stats = deduplicator.stats()
+    assert stats["checked"] == 4
+    assert stats["duplicates"] == {"exact": 1, "near": 1}
+    assert deduplicator.is_window_full()
+    assert deduplicator.recent_duplicate_rate() == 0.5
+    assert metrics.summary()["counters"]["duplicates_exact"] == 1
+
+    # exact-only mode ignores rephrasings
+    exact_only = Deduplicator(capacity=1000, near=False)
+    assert exact_only.check(text) is None
+    assert exact_only.check(text.replace("mid-sized", "mid sized")) is None
@@ -0,0 +1,147 @@
+# imports
+import io
+
+# packages
+import pytest
+
+# project
+from soli_data_generator.distributed import (
+    WorkQueue,
+    iter_template_offsets,
+    merge_shards,
+    merge_stats,
+    read_unit_lines,
+    run_worker,
+)
+from soli_data_generator.procedural import TemplateFormatter
+from soli_data_generator.procedural.stream import serialize_output, stream_seeded
+from soli_data_generator.stats import DatasetStats
+
+TEMPLATES = [
+    "<|company|> hired <|name|>.",
+    "Filed on <|date|> in <|location|>.",
+    "<|name:1|> sued <|name:2|>.",
+    "A <|industry|> firm.",
+    "Über <|area_of_law|> practice.",
+]
+
+
+@pytest.fixture(scope="module")
+def formatter():
+    return TemplateFormatter()
+
+
+@pytest.fixture
+def template_path(tmp_path):
+    path = tmp_path / "templates.txt"
+    # blank lines are skipped, and offsets are in bytes
+    path.write_text("\n".join(TEMPLATES[:2] + [""] + TEMPLATES[2:]) + "\n")
+    return path
+
+
+def create_job(
+    queue_path, template_path, output_dir, unit_size=2, clock=None, stats=False
+):
+    work_queue = WorkQueue(queue_path, clock=clock) if clock else WorkQueue(queue_path)
+    job = {
+        "input": str(template_path),
+        "input_format": "text",
+        "field": "template",
+        "output_dir": str(output_dir),
+        "seed": 42,
+        "renders": 2,
+        "spans": True,
+        "sampling_policies": None,
+        "correlated": False,
+        "stats": stats,
+    }
+    work_queue.create_job(job, iter_template_offsets(template_path), unit_size)
+    return work_queue
+
+
+def test_read_unit_lines(template_path):
+    offsets = list(iter_template_offsets(template_path))
+    assert len(offsets) == 5
+    assert read_unit_lines(template_path, offsets[2], 2) == [
+        TEMPLATES[2] + "\n",
+        TEMPLATES[3] + "\n",
+    ]
+    assert read_unit_lines(template_path, offsets[4], 2) == [TEMPLATES[4] + "\n"]
+
+
+def test_leases_expire_and_are_reassigned(tmp_path, template_path):
+    now = [1000.0]
+    work_queue = create_job(
+        tmp_path / "queue.db", template_path, tmp_path, clock=lambda: now[0]
+    )
+    assert work_queue.progress() == {
+        "pending": 3,
+        "leased": 0,
+        "expired": 0,
+        "done": 0,
+        "total": 3,
+    }
+    with pytest.raises(ValueError):
+        create_job(tmp_path / "queue.db", template_path, tmp_path)
+
+    first = work_queue.claim("a", lease_seconds=10)
+    second = work_queue.claim("b", lease_seconds=10)
+    assert (first["index"], first["start"], first["end"]) == (0, 0, 2)
+    assert second["index"] == 1
+    assert work_queue.complete(1, "b")
+
+    # worker a stalls, and its unit goes to worker c once the lease expires
+    now[0] += 11
+    assert work_queue.progress()["expired"] == 1
+    assert work_queue.claim("c", lease_seconds=10)["index"] == 0
+    assert not work_queue.renew(0, "a")
+    assert not work_queue.complete(0, "a")
+    assert work_queue.complete(0, "c")
+
+    third = work_queue.claim("c")
+    assert (third["index"], third["start"], third["end"]) == (2, 4, 5)
+    assert work_queue.claim("c") is None
+    work_queue.close()
+
+
+def test_workers_match_single_node_run(tmp_path, template_path, formatter):
+    queue_path = tmp_path / "queue.db"
+    work_queue = create_job(queue_path, template_path, tmp_path / "shards")
+
+    assert run_worker(queue_path, formatter=formatter, worker="a", max_units=1) == 1
+    with pytest.raises(ValueError):
+        merge_shards(work_queue, io.StringIO())
+    assert run_worker(queue_path, formatter=formatter, worker="b") == 2
+
+    merged = io.StringIO()
+    assert merge_shards(work_queue, merged) == 3
+    work_queue.close()
+
+    single = "".join(
+        serialize_output(output) + "\n"
+        for output in stream_seeded(
+            formatter, TEMPLATES, 42, renders_per_template=2, unit_size=2
+        )
+    )
+    assert merged.getvalue() == single
+    assert len(merged.getvalue().splitlines()) == 10
+
+
+def test_worker_stats_merge_to_single_node_stats(tmp_path, template_path, formatter):
+    queue_path = tmp_path / "queue.db"
+    work_queue = create_job(queue_path, template_path, tmp_path / "shards", stats=True)
+
+    # a retried unit replaces its statistics instead of adding to them
+    assert run_worker(queue_path, formatter=formatter, worker="a", max_units=1) == 1
+    work_queue.connection.execute("UPDATE units SET status = 'pending' WHERE id = 0")
+    assert run_worker(queue_path, formatter=formatter, worker="b") == 3
+
+    merged = merge_stats(work_queue)
+    work_queue.close()
+
+    single = DatasetStats(formatter.graph)
+    single.update(
+        stream_seeded(formatter, TEMPLATES, 42, renders_per_template=2, unit_size=2)
+    )
+    assert merged.samples == 10
+    assert merged.to_dict() == single.to_dict()
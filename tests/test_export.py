@@ -0,0 +1,72 @@
+# imports
+import io
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.export import (
+    BIO_LABEL_IDS,
+    label_sample,
+    read_bio_examples,
+    whitespace_tokenizer,
+    write_bio_examples,
+)
+from soli_data_generator.procedural import AnnotatedSample, TemplateFormatter
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_label_sample():
+    sample = {
+        "text": "Ann Lee joined Acme Corp.",
+        "spans": [
+            {"start": 0, "end": 7, "tag": "name"},
+            {"start": 15, "end": 24, "tag": "company"},
+        ],
+    }
+    example = label_sample(sample)
+    assert example.get_tokens() == ["Ann", "Lee", "joined", "Acme", "Corp", "."]
+    assert example.get_label_names() == [
+        "B-name",
+        "I-name",
+        "O",
+        "B-company",
+        "I-company",
+        "O",
+    ]
+    assert example.misaligned == 0
+
+    # "Corp." is one whitespace token, so the company span ends inside it
+    example = label_sample(sample, tokenizer=whitespace_tokenizer)
+    assert example.misaligned == 1
+    assert example.labels[3] == BIO_LABEL_IDS["B-company"]
+    assert example.get_label_names()[3:] == ["B-company", "I-company"]
+    with pytest.raises(ValueError):
+        label_sample(sample, tokenizer=whitespace_tokenizer, strict=True)
+
+
+def test_bio_roundtrip(soli):
+    formatter = TemplateFormatter(soli_graph=soli, compact_spans=True)
+    samples = formatter.format_spans_many(
+        "<|name:1|> advised a <|industry|> client with <|name:2|>.", 20
+    )
+    assert all(isinstance(sample, AnnotatedSample) for sample in samples)
+    examples = [label_sample(sample) for sample in samples]
+
+    buffer = io.BytesIO()
+    counts = write_bio_examples(examples, buffer)
+    assert counts["examples"] == 20
+    assert counts["misaligned"] == 0
+
+    buffer.seek(0)
+    restored = list(read_bio_examples(buffer))
+    assert [example.text for example in restored] == [sample.text for sample in samples]
+    for example, original in zip(restored, examples):
+        assert example.starts == original.starts
+        assert example.labels == original.labels
+        assert example.get_label_names().count("B-name") == 2
@@ -0,0 +1,101 @@
+# imports
+import json
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.index import DatasetIndex, DatasetIndexer, index_dataset
+from soli_data_generator.procedural import TemplateFormatter
+from soli_data_generator.procedural.stream import serialize_output
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def write_dataset(path, samples, indexer=None):
+    with open(path, "wt", encoding="utf-8", newline="\n") as output_file:
+        for sample in samples:
+            line = serialize_output(sample) + "\n"
+            output_file.write(line)
+            if indexer is not None:
+                indexer.add(sample, len(line.encode("utf-8")))
+
+
+def test_index_while_writing(soli, tmp_path):
+    formatter = TemplateFormatter(soli_graph=soli, compact_spans=True)
+    formatter.reseed(3)
+    samples = [
+        formatter.format_spans(
+            "Ms. <|name|> advised on <|area_of_law|> matters for <|industry|>."
+        )
+        for _ in range(50)
+    ] + ["A sample without spans é."]
+
+    path = str(tmp_path / "samples.jsonl")
+    indexer = DatasetIndexer(soli)
+    write_dataset(path, samples, indexer)
+    indexer.write(path + ".sidx")
+
+    with DatasetIndex(path) as index:
+        assert len(index) == 51
+        assert index.get_sample(50) == {"text": "A sample without spans é."}
+        for sample_id, sample in enumerate(samples[:50]):
+            assert index.get_sample(sample_id) == json.loads(sample.to_json())
+
+        # exact classes and tags
+        iri = samples[0].iris[1]
+        expected = [i for i, sample in enumerate(samples[:50]) if iri in sample.iris]
+        assert index.find([iri], descendants=False) == expected
+        assert index.find(tags=["area_of_law"]) == list(range(50))
+        assert index.find(tags=["area_of_law", "name"]) == list(range(50))
+        assert index.find(tags=["location"]) == []
+        assert index.find([iri], tags=["location"]) == []
+
+        # a common ancestor matches every sample with one of its subclasses
+        ancestor = next(
+            parent.iri
+            for parent in soli.get_parents(iri)
+            if parent.iri != iri
+            and parent.iri in {area.iri for area in soli.get_areas_of_law()}
+        )
+        matches = index.find([ancestor])
+        assert set(expected) <= set(matches)
+        for sample_id in matches:
+            assert any(
+                ancestor in {parent.iri for parent in soli.get_parents(span_iri)}
+                for span_iri in samples[sample_id].iris
+                if span_iri is not None
+            )
+        assert [sample["text"] for sample in index.query([ancestor])] == [
+            samples[sample_id].text for sample_id in matches
+        ]
+
+
+def test_index_existing_dataset(soli, tmp_path):
+    formatter = TemplateFormatter(soli_graph=soli)
+    formatter.reseed(5)
+    samples = [
+        formatter.format_spans("<|industry|> and <|location|>") for _ in range(20)
+    ]
+    path = str(tmp_path / "samples.jsonl")
+    write_dataset(path, samples)
+
+    # a scan of the file matches indexing while writing
+    assert index_dataset(path, soli_graph=None) == 20
+    with DatasetIndex(path) as index:
+        assert not index.has_ancestors
+        iri = samples[0]["spans"][0]["owl_class"].iri
+        assert 0 in index.find([iri], descendants=False)
+        with pytest.raises(ValueError):
+            index.find([iri])
+        assert index.get_sample(19)["text"] == samples[19]["text"]
+
+    # appending to the dataset leaves the index stale
+    with open(path, "at", encoding="utf-8") as output_file:
+        output_file.write(json.dumps({"text": "more"}) + "\n")
+    with pytest.raises(ValueError):
+        DatasetIndex(path)
@@ -0,0 +1,67 @@
+# imports
+import json
+
+# packages
+import pytest
+
+# project
+from soli_data_generator.instrumentation import (
+    NULL_METRICS,
+    LatencyHistogram,
+    Metrics,
+    PeriodicExporter,
+)
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0, 10.0))
+    for seconds in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(seconds)
+    assert histogram.counts == [1, 2, 1, 0]
+    assert 0.1 <= histogram.quantile(0.5) <= 1.0
+    assert histogram.quantile(1.0) == 5.0
+    assert histogram.to_dict()["mean"] == pytest.approx(6.05 / 4)
+
+
+def test_metrics_timers_and_counters():
+    metrics = Metrics()
+    with metrics.timer("chat"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.timer("chat"):
+            raise RuntimeError("failed")
+    metrics.count("samples")
+    metrics.count("chars", 120)
+
+    summary = metrics.summary()
+    assert summary["stages"]["chat"]["count"] == 2
+    assert summary["counters"] == {"chat_errors": 1, "samples": 1, "chars": 120}
+    assert summary["rates"]["chars_per_second"] > 0
+    assert "chat" in metrics.format_summary()
+
+
+def test_null_metrics_record_nothing():
+    with NULL_METRICS.timer("chat"):
+        NULL_METRICS.count("samples")
+    assert not NULL_METRICS.enabled
+    assert NULL_METRICS.summary()["stages"] == {}
+    assert NULL_METRICS.summary()["counters"] == {}
+
+
+def test_metrics_export(tmp_path):
+    metrics = Metrics(buckets=(0.5, 1.0))
+    metrics.observe("chat", 0.75)
+    metrics.count("samples", 3)
+
+    prometheus_path = tmp_path / "metrics.prom"
+    exporter = PeriodicExporter(metrics, prometheus_path, interval=60.0)
+    assert exporter.maybe_export()
+    assert not exporter.maybe_export()
+    text = prometheus_path.read_text()
+    assert 'soli_data_generator_stage_seconds_bucket{stage="chat",le="0.5"} 0' in text
+    assert 'soli_data_generator_stage_seconds_bucket{stage="chat",le="+Inf"} 1' in text
+    assert "soli_data_generator_samples_total 3" in text
+
+    json_path = tmp_path / "metrics.json"
+    metrics.export(json_path)
+    assert json.loads(json_path.read_text())["counters"]["samples"] == 3
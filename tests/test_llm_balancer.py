@@ -0,0 +1,67 @@
+# packages
+from alea_llm_client.core.exceptions import ALEAModelError
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.llm.balancer import LoadBalancedModel
+
+
+class ScriptedModel:
+    """
+    Model stand-in that fails while `down` is set.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.down = False
+        self.calls = 0
+
+    def chat(self, prompt):
+        self.calls += 1
+        if self.down:
+            raise ALEAModelError("Error connecting to the API: refused")
+        return ModelResponse(text=self.endpoint, choices=[self.endpoint], metadata={})
+
+
+def test_least_outstanding_selection():
+    balancer = LoadBalancedModel([ScriptedModel("a"), ScriptedModel("b")])
+    first = balancer.select()
+    second = balancer.select()
+    assert first is not second
+    balancer.record(first, 0.1, None)
+    assert balancer.select() is first
+
+
+def test_unhealthy_endpoint_ejected_and_probed():
+    now = [0.0]
+    models = [ScriptedModel("a"), ScriptedModel("b")]
+    balancer = LoadBalancedModel(
+        models, failure_threshold=2, eject_seconds=10.0, clock=lambda: now[0]
+    )
+    models[0].down = True
+    for _ in range(10):
+        try:
+            balancer.chat("hello")
+        except ALEAModelError:
+            pass
+    assert models[0].calls == 2
+    stats = {stats["name"]: stats for stats in balancer.stats()}
+    assert not stats["a"]["healthy"] and stats["a"]["ejections"] == 1
+
+    # a failed probe doubles the ejection period
+    now[0] = 11.0
+    while models[0].calls == 2:
+        try:
+            balancer.chat("hello")
+        except ALEAModelError:
+            pass
+    assert balancer.endpoints[0].eject_seconds == 20.0
+    assert not balancer.stats()[0]["healthy"]
+
+    # a successful probe restores the endpoint
+    models[0].down = False
+    now[0] = 32.0
+    texts = {balancer.chat("hello").text for _ in range(4)}
+    assert texts == {"a", "b"}
+    assert balancer.stats()[0]["healthy"]
+    assert "ejected" not in balancer.format_stats()
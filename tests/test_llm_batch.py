@@ -0,0 +1,132 @@
+# imports
+import io
+import json
+
+# packages
+import pytest
+from alea_llm_client.core.exceptions import ALEAModelError
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.cli.batch import get_generator
+from soli_data_generator.llm import AnnotatedTextGenerator, TextGenerator
+from soli_data_generator.llm.batch import (
+    build_batch_request,
+    get_response_text,
+    process_batch_responses,
+    read_batch_requests,
+    read_batch_responses,
+    run_batch_requests,
+    write_batch_requests,
+)
+
+
+class EchoModel:
+    """
+    Model stand-in that answers with a fixed template and fails on "fail" prompts.
+    """
+
+    def chat(self, prompt):
+        if prompt == "fail":
+            raise ALEAModelError("Error in request: Client error '400 Bad Request'")
+        text = "The <|industry|> company filed on <|date|>."
+        return ModelResponse(text=text, choices=[text], metadata={})
+
+
+@pytest.fixture(scope="module")
+def annotated_generator():
+    return AnnotatedTextGenerator(None)
+
+
+def test_build_batch_request():
+    request = build_batch_request("sample-0", "hello", "gpt-4o-mini", max_tokens=64)
+    assert request["custom_id"] == "sample-0"
+    assert request["url"] == "/v1/chat/completions"
+    assert request["body"]["messages"] == [{"role": "user", "content": "hello"}]
+    assert request["body"]["max_tokens"] == 64
+
+
+def test_write_and_read_batch_requests():
+    generator = TextGenerator(None)
+    output_file = io.StringIO()
+    assert write_batch_requests(generator, 12, output_file, "model") == 12
+
+    requests = list(read_batch_requests(io.StringIO(output_file.getvalue())))
+    assert len(requests) == 12
+    assert requests[0][0] == "sample-00" and requests[-1][0] == "sample-11"
+    assert all("Document Type:" in prompt for _, prompt in requests)
+
+
+def test_get_response_text_formats():
+    openai_record = {
+        "custom_id": "a",
+        "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"content": "hi"}}]},
+        },
+        "error": None,
+    }
+    assert get_response_text(openai_record) == ("hi", None)
+
+    failed_record = {"custom_id": "b", "response": {"status_code": 500, "body": {}}}
+    text, error = get_response_text(failed_record)
+    assert text is None and error.startswith("HTTP 500")
+
+    anthropic_record = {
+        "custom_id": "c",
+        "result": {
+            "type": "succeeded",
+            "message": {"content": [{"type": "text", "text": "hello"}]},
+        },
+    }
+    assert get_response_text(anthropic_record) == ("hello", None)
+    assert get_response_text({"custom_id": "d", "text": "plain"}) == ("plain", None)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_process_batch_responses(annotated_generator, workers):
+    responses = [
+        ("sample-0", "The <|industry|> firm.", None),
+        ("sample-1", None, "HTTP 500"),
+        ("sample-2", "Filed on <|date|>.", None),
+    ]
+    results = list(
+        process_batch_responses(
+            annotated_generator, responses, workers=workers, chunk_size=1
+        )
+    )
+    assert [custom_id for custom_id, _, _ in results] == [
+        "sample-0",
+        "sample-2",
+        "sample-1",
+    ]
+    assert results[0][1]["spans"][0]["tag"] == "industry"
+    assert results[1][1]["text"].startswith("Filed on ")
+    assert results[2][1] is None and results[2][2] == "HTTP 500"
+
+
+def test_run_batch_requests_round_trip(annotated_generator):
+    output_file = io.StringIO()
+    num_succeeded, num_failed = run_batch_requests(
+        EchoModel(), [("a", "prompt"), ("b", "fail"), ("c", "prompt")], output_file, 2
+    )
+    assert (num_succeeded, num_failed) == (2, 1)
+
+    responses = read_batch_responses(io.StringIO(output_file.getvalue()))
+    results = {
+        custom_id: (sample, error)
+        for custom_id, sample, error in process_batch_responses(
+            annotated_generator, responses
+        )
+    }
+    assert set(results) == {"a", "b", "c"}
+    assert results["b"][0] is None and "400" in results["b"][1]
+    assert json.dumps(results["a"][0]["text"]).count("<|") == 0
+
+
+def test_get_generator_rejects_unknown_policy_tags(tmp_path):
+    config_path = tmp_path / "policies.json"
+    config_path.write_text(json.dumps({"area_of_laws": {"depth_exponent": 2.0}}))
+
+    with pytest.raises(ValueError):
+        get_generator("annotated", str(config_path))
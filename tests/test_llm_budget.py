@@ -0,0 +1,135 @@
+# imports
+import threading
+
+# packages
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.llm.budget import (
+    Budget,
+    BudgetExhausted,
+    UsageTracker,
+    get_usage_counts,
+    read_manifest,
+    update_manifest,
+    write_manifest,
+)
+from soli_data_generator.llm.concurrency import (
+    RateLimitedModel,
+    iter_concurrent,
+    iter_sequential,
+)
+from soli_data_generator.llm.pipeline import iter_pipeline
+
+
+class UsageModel:
+    """
+    Model stand-in that echoes prompts, reporting usage unless told not to.
+    """
+
+    def __init__(self, usage=True):
+        self.usage = usage
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def chat(self, prompt, **kwargs):
+        with self.lock:
+            self.calls += 1
+        metadata = {}
+        if self.usage:
+            metadata["usage"] = {"prompt_tokens": 30, "completion_tokens": 10}
+        return ModelResponse(text=prompt, choices=[prompt], metadata=metadata)
+
+
+class EchoGenerator:
+    """
+    Generator stand-in for the pipeline.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.metrics = Metrics()
+
+    def build_prompt(self):
+        return "prompt"
+
+    def process_response(self, text):
+        return text
+
+
+def test_get_usage_counts():
+    assert get_usage_counts(ModelResponse(metadata={})) is None
+    assert get_usage_counts(
+        ModelResponse(metadata={"usage": {"input_tokens": 5, "output_tokens": 2}})
+    ) == (5, 2)
+    assert get_usage_counts(ModelResponse(metadata={"usage": {"total_tokens": 9}})) == (
+        0,
+        9,
+    )
+
+
+def test_usage_tracker_records_and_estimates():
+    metrics = Metrics()
+    usage = UsageTracker()
+    model = RateLimitedModel(UsageModel(), metrics=metrics, usage=usage)
+    model.chat("hello")
+    assert (usage.prompt_tokens, usage.completion_tokens) == (30, 10)
+    assert usage.in_flight_tokens == 0
+    assert metrics.summary()["counters"]["prompt_tokens"] == 30
+
+    # without reported usage, tokens are estimated from the text
+    usage = UsageTracker()
+    model = RateLimitedModel(UsageModel(usage=False), usage=usage)
+    model.chat("x" * 40)
+    assert usage.summary()["estimated_requests"] == 1
+    assert (usage.prompt_tokens, usage.completion_tokens) == (10, 10)
+
+
+def test_budget_stops_schedulers():
+    # each call uses 40 tokens, so 100 tokens afford two calls
+    for run in (
+        lambda model, stop: iter_sequential(lambda: model.chat("p"), 10, stop),
+        lambda model, stop: iter_concurrent(lambda: model.chat("p"), 10, 1, stop),
+        lambda model, stop: iter_pipeline(
+            EchoGenerator(model), 10, 1, prefetch=2, should_stop=stop
+        ),
+    ):
+        usage = UsageTracker()
+        budget = Budget(usage, token_budget=100)
+        model = RateLimitedModel(UsageModel(), completion_tokens=10, budget=budget)
+        results = list(run(model, lambda: budget.exhausted() is not None))
+
+        # calls queued before the budget ran out are refused rather than sent
+        assert sum(error is None for _, error in results) == 2
+        assert all(isinstance(error, BudgetExhausted) for _, error in results if error)
+        assert model.model.calls == 2
+        assert usage.total_tokens <= 100
+        assert budget.exhausted() == "token_budget"
+
+    # the time budget stops once the clock passes it
+    now = [0.0]
+    usage = UsageTracker(clock=lambda: now[0])
+    budget = Budget(usage, time_budget=5.0)
+    assert budget.exhausted() is None
+    now[0] = 5.0
+    assert budget.exhausted() == "time_budget"
+
+
+def test_manifest_accumulates_runs(tmp_path):
+    output_path = str(tmp_path / "samples.jsonl")
+    assert read_manifest(output_path) is None
+
+    usage = UsageTracker()
+    RateLimitedModel(UsageModel(), usage=usage).chat("p")
+    manifest = update_manifest(None, output_path, 10, 4, usage, "token_budget")
+    write_manifest(output_path, manifest)
+    assert (tmp_path / "samples.manifest.json").exists()
+
+    manifest = update_manifest(
+        read_manifest(output_path), output_path, 10, 6, usage, "completed"
+    )
+    assert manifest["written_samples"] == 10
+    assert manifest["remaining_samples"] == 0
+    assert manifest["runs"] == 2
+    assert manifest["usage"]["total_tokens"] == 80
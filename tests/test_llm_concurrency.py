@@ -0,0 +1,150 @@
+# imports
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# packages
+import pytest
+from alea_llm_client import VLLMModel
+from alea_llm_client.core.exceptions import ALEAModelError
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.llm.concurrency import (
+    AdaptiveLimiter,
+    RateLimitedModel,
+    TokenBucket,
+    is_transient_error,
+)
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI-compatible chat endpoint that replays a scripted list of (status, delay).
+    """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            status, delay = (
+                self.server.script.pop(0) if self.server.script else (200, 0.0)
+            )
+            self.server.requests += 1
+        time.sleep(delay)
+
+        body = {
+            "choices": [{"message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        }
+        payload = json.dumps(body if status == 200 else {"error": {}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeChatHandler)
+    server.lock = threading.Lock()
+    server.script = []
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_model(server, tmp_path):
+    return VLLMModel(
+        api_key="test",
+        model="fake",
+        endpoint=f"http://127.0.0.1:{server.server_address[1]}/",
+        cache_path=tmp_path,
+        ignore_cache=True,
+        retry_limit=1,
+    )
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    bucket = TokenBucket(60, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    now[0] = 1.0
+    assert bucket.try_acquire() == 0.0
+
+    # usage reconciliation can overdraw the bucket
+    bucket.adjust(3)
+    assert bucket.try_acquire() == pytest.approx(4.0)
+
+
+def test_adaptive_limiter_aimd():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=8, clock=lambda: 100.0)
+    for _ in range(20):
+        assert limiter.acquire(timeout=0)
+        limiter.release(0.1)
+    assert limiter.current_limit > 2
+
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == pytest.approx(before / 2)
+
+    # a second overload within the same baseline latency does not decrease again
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == pytest.approx(before / 2)
+
+
+def test_is_transient_error():
+    assert is_transient_error(
+        ALEAModelError("Error in request: Client error '429 Too Many Requests'")
+    )
+    assert is_transient_error(ALEAModelError("Error connecting to the API: refused"))
+    assert not is_transient_error(ALEAModelError("Model error: bad prompt"))
+    assert not is_transient_error(
+        ALEAModelError("Error in request: Client error '422 Unprocessable Entity'")
+    )
+
+
+def test_rate_limited_model_retries(fake_server, tmp_path):
+    fake_server.script = [(429, 0.0), (503, 0.0)]
+    metrics = Metrics()
+    model = RateLimitedModel(
+        get_model(fake_server, tmp_path),
+        tokens_per_minute=100000,
+        metrics=metrics,
+        sleep=lambda seconds: None,
+    )
+    assert model.chat("hello").text == "ok"
+    assert fake_server.requests == 3
+    assert metrics.counters["retries"] == 2
+    assert metrics.counters["overloaded"] == 2
+
+    # non-transient errors are raised without retrying
+    fake_server.script = [(400, 0.0)]
+    with pytest.raises(ALEAModelError):
+        model.chat("hello")
+    assert fake_server.requests == 4
+
+
+def test_rate_limited_model_hedges_slow_requests(fake_server, tmp_path):
+    fake_server.script = [(200, 2.0)]
+    metrics = Metrics()
+    model = RateLimitedModel(
+        get_model(fake_server, tmp_path), hedge_after=0.1, metrics=metrics
+    )
+    start = time.perf_counter()
+    assert model.chat("hello").text == "ok"
+    assert time.perf_counter() - start < 1.5
+    assert metrics.counters["hedges"] == 1
+    assert metrics.counters["hedge_wins"] == 1
+    model.close()
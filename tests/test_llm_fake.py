@@ -0,0 +1,87 @@
+# imports
+import json
+import random
+import urllib.request
+
+# packages
+import pytest
+from alea_llm_client import VLLMModel
+
+# project
+from soli_data_generator.llm.concurrency import RateLimitedModel, is_transient_error
+from soli_data_generator.llm.fake import (
+    FAKE_RESPONSES,
+    FakeBackend,
+    FakeModel,
+    LatencyDistribution,
+    start_fake_server,
+)
+from soli_data_generator.llm.models import get_model
+
+
+@pytest.fixture
+def fake_server():
+    server, endpoint = start_fake_server(FakeBackend(seed=1))
+    yield server, endpoint
+    server.shutdown()
+    server.server_close()
+
+
+def test_latency_distribution():
+    rng = random.Random(0)
+    assert LatencyDistribution.parse("0.25").sample(rng) == 0.25
+    uniform = LatencyDistribution.parse("uniform:0.1,0.2")
+    assert all(0.1 <= uniform.sample(rng) <= 0.2 for _ in range(100))
+    assert all(
+        LatencyDistribution.parse("normal:0,1").sample(rng) >= 0 for _ in range(100)
+    )
+    assert repr(LatencyDistribution.parse("lognormal:0.2,0.5")) == "lognormal:0.2,0.5"
+    for spec in ("gamma:1", "uniform:0.1", "fixed:-1", "fixed:abc"):
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse(spec)
+
+
+def test_fake_model():
+    model = get_model("fake")
+    assert isinstance(model, FakeModel)
+    response = model.chat("x" * 40)
+    assert response.text in FAKE_RESPONSES
+    assert response.metadata["usage"]["prompt_tokens"] == 10
+
+    # seeded backends are reproducible
+    texts = [
+        [FakeModel(seed=3).chat("p").text for _ in range(5)],
+        [FakeModel(seed=3).chat("p").text for _ in range(5)],
+    ]
+    assert texts[0] == texts[1]
+
+    # injected errors are transient, so the rate-limited wrapper retries them
+    failing = FakeModel(error_rate=1.0)
+    with pytest.raises(Exception) as error:
+        failing.chat("p")
+    assert is_transient_error(error.value)
+
+    slept = []
+    model = RateLimitedModel(
+        FakeModel(error_rate=1.0), max_retries=2, sleep=slept.append
+    )
+    with pytest.raises(Exception):
+        model.chat("p")
+    assert len(slept) == 2
+
+
+def test_fake_server(fake_server):
+    server, endpoint = fake_server
+    model = VLLMModel(model="fake", endpoint=endpoint, ignore_cache=True)
+    response = model.chat("hello")
+    assert response.text in FAKE_RESPONSES
+    assert response.metadata["usage"]["completion_tokens"] > 0
+
+    with urllib.request.urlopen(f"{endpoint}stats", timeout=10) as stats_response:
+        assert json.loads(stats_response.read())["counters"]["requests"] == 1
+
+    # injected errors reach the client as transient HTTP errors
+    server.backend.error_rate = 1.0
+    with pytest.raises(Exception) as error:
+        model.chat("hello")
+    assert is_transient_error(error.value)
@@ -0,0 +1,102 @@
+# imports
+import threading
+import time
+
+# packages
+from alea_llm_client.core.exceptions import ALEAModelError
+from alea_llm_client.llms.models.base_ai_model import ModelResponse
+
+# project
+from soli_data_generator.instrumentation import Metrics
+from soli_data_generator.llm import TextGenerator
+from soli_data_generator.llm.pipeline import PromptQueue, iter_pipeline
+
+
+class SlowModel:
+    """
+    Model stand-in that echoes prompts after a delay and fails on "fail" prompts.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = set()
+
+    def chat(self, prompt):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if prompt == "fail":
+            raise ALEAModelError("Error in request: Client error '400 Bad Request'")
+        return ModelResponse(text=prompt, choices=[prompt], metadata={})
+
+
+class CountingGenerator:
+    """
+    Generator stand-in with numbered prompts.
+    """
+
+    def __init__(self, model, prompts=None):
+        self.model = model
+        self.metrics = Metrics()
+        self.prompts = iter(prompts) if prompts is not None else None
+        self.built = 0
+
+    def build_prompt(self):
+        self.built += 1
+        if self.prompts is not None:
+            return next(self.prompts)
+        return f"prompt {self.built}"
+
+    def process_response(self, text):
+        return text.upper()
+
+
+def test_prompt_queue_is_bounded():
+    built = []
+    prompts = PromptQueue(lambda: built.append(1) or "p", 100, max_size=4)
+    time.sleep(0.2)
+    # the queue holds 4 prompts and the producer blocks on the fifth
+    assert len(built) == 5
+    assert next(iter(prompts)) == ("p", None)
+    prompts.close()
+    assert len(built) < 100
+
+
+def test_iter_pipeline_generates_all_samples():
+    model = SlowModel(delay=0.01)
+    generator = CountingGenerator(model)
+    results = list(iter_pipeline(generator, 20, max_workers=4, prefetch=8))
+    assert len(results) == 20
+    assert sorted(sample for sample, _ in results) == sorted(
+        f"PROMPT {index}" for index in range(1, 21)
+    )
+    assert len(model.threads) > 1
+    summary = generator.metrics.summary()
+    assert summary["stages"]["chat"]["count"] == 20
+    assert summary["stages"]["prompt_wait"]["count"] == 21
+
+
+def test_iter_pipeline_reports_errors():
+    generator = CountingGenerator(SlowModel(), prompts=["a", "fail", "b"])
+    results = list(iter_pipeline(generator, 4, max_workers=2, prefetch=2))
+    samples = sorted(sample for sample, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    assert samples == ["A", "B"]
+    # one failed model call and one failed prompt build
+    assert len(errors) == 2
+    assert any(isinstance(error, StopIteration) for error in errors)
+
+
+def test_iter_pipeline_stops_early():
+    generator = CountingGenerator(SlowModel())
+    results = iter_pipeline(generator, 1000, max_workers=2, prefetch=4)
+    for _ in range(5):
+        next(results)
+    results.close()
+    assert generator.built < 1000
+
+
+def test_iter_pipeline_with_text_generator():
+    generator = TextGenerator(SlowModel())
+    results = list(iter_pipeline(generator, 5, max_workers=2, prefetch=2))
+    assert len(results) == 5
+    assert all(error is None and "Document Type:" in text for text, error in results)
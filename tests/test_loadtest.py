@@ -0,0 +1,46 @@
+# imports
+import resource
+
+# packages
+import pytest
+
+# project
+from soli_data_generator.llm.fake import FakeBackend
+from soli_data_generator.loadtest import format_load_test, get_rss_mb, run_load_test
+
+
+def test_run_load_test():
+    reports = run_load_test(
+        ["text", "annotated"],
+        [1, 4],
+        10,
+        FakeBackend(latency="0.005", error_rate=0.2, seed=4),
+    )
+    assert [(report["target"], report["concurrency"]) for report in reports] == [
+        ("text", 1),
+        ("text", 4),
+        ("annotated", 1),
+        ("annotated", 4),
+    ]
+    for report in reports:
+        # failed requests are retried; samples that still fail are counted as errors
+        assert report["samples"] + report["errors"] == 10
+        assert report["samples_per_second"] > 0
+        assert report["latency"]["p50"] >= 0.005
+        assert report["peak_rss_mb"] > 0
+    assert sum(report["retries"] for report in reports) > 0
+    assert "annotated" in format_load_test(reports)
+
+    with pytest.raises(ValueError):
+        run_load_test(["gpu"], [1], 10, FakeBackend())
+
+
+def test_levels_report_their_own_peak_memory():
+    # raise this process's peak, then free it; the level runs in its own process
+    ballast = bytearray(256 << 20)
+    ballast[::4096] = b"\x01" * len(range(0, len(ballast), 4096))
+    del ballast
+    process_peak = get_rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+
+    (report,) = run_load_test(["text"], [1], 5, FakeBackend(latency="0", seed=1))
+    assert 0 < report["peak_rss_mb"] < process_peak - 128
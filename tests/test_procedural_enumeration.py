@@ -0,0 +1,73 @@
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural import TemplateSpace
+from soli_data_generator.procedural.enumeration import get_radical_inverse
+from soli_data_generator.procedural.template import TemplateFormatter
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_template_space_unranking(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    formatter.pools["industry"] = formatter.get_pool("industry")[:4]
+    formatter.pools["area_of_law"] = formatter.get_pool("area_of_law")[:3]
+    template = "<|industry:1|> and <|industry:2|> on <|area_of_law|>"
+
+    space = TemplateSpace(formatter, template)
+    assert space.radices == [4, 3, 3]
+    assert space.size == 36
+
+    # every index is a distinct, valid combination
+    combinations = set()
+    for index in range(space.size):
+        classes = space.get_classes(index)
+        first, second = classes[("industry", "1")], classes[("industry", "2")]
+        assert first is not second
+        combinations.add(tuple(owl_class.iri for owl_class in classes.values()))
+    assert len(combinations) == 36
+
+    # the last slot varies fastest, and rendering is deterministic per index
+    assert space.get_digits(1) == [0, 0, 1]
+    assert space.render(7) == space.render(7)
+    assert list(space.iter_range(5, 8, spans=False)) == [
+        space.render(index, spans=False) for index in range(5, 8)
+    ]
+    with pytest.raises(IndexError):
+        space.get_classes(36)
+
+
+def test_template_space_orderings(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    formatter.pools["industry"] = formatter.get_pool("industry")[:6]
+    template = "<|industry:1|> and <|industry:2|>"
+
+    # the permutation is a seeded bijection
+    permuted = TemplateSpace(formatter, template, ordering="permuted", seed=3)
+    digits = [tuple(permuted.get_digits(index)) for index in range(permuted.size)]
+    assert len(set(digits)) == permuted.size == 30
+    assert digits != sorted(digits)
+    assert TemplateSpace(formatter, template, "permuted", seed=3).get_digits(4) == list(
+        digits[4]
+    )
+
+    # halton points stay within the radices
+    halton = TemplateSpace(formatter, template, ordering="halton")
+    assert all(
+        digit < radix
+        for index in range(halton.size)
+        for digit, radix in zip(halton.get_digits(index), halton.radices)
+    )
+    assert get_radical_inverse(1, 2) == 0.5
+    assert get_radical_inverse(3, 2) == 0.75
+
+    with pytest.raises(ValueError):
+        TemplateSpace(formatter, template, ordering="random")
+    formatter.pools["industry"] = formatter.pools["industry"][:1]
+    with pytest.raises(ValueError):
+        TemplateSpace(formatter, template)
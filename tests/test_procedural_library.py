@@ -0,0 +1,71 @@
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural.library import (
+    TemplateLibrary,
+    build_library,
+    get_template_hash,
+)
+from soli_data_generator.procedural.template import TemplateFormatter, compile_template
+
+TEMPLATES = [
+    "<|name:1|> and <|name:2|> advised a <|industry|> client.",
+    "A dispute about <|area_of_law|> in <|location|>, filed <|date|>.",
+    "<|name:1|> and <|name:2|> advised a <|industry|> client.",
+    "No tags at all — just text.",
+    "The <|industry|> company <|company|> hired counsel for <|area_of_law|>.",
+]
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_template_library(tmp_path):
+    path = str(tmp_path / "templates.stpl")
+    assert build_library(TEMPLATES, path) == 4
+
+    with TemplateLibrary(path) as library:
+        assert len(library) == 4
+        assert list(library) == [TEMPLATES[0], TEMPLATES[1], TEMPLATES[3], TEMPLATES[4]]
+
+        # the stored parse matches a fresh compile
+        for template_id, template in enumerate(library):
+            compiled = library.get_compiled(template_id)
+            expected = compile_template(template)
+            assert compiled.segments == expected.segments
+            assert compiled.slots == expected.slots
+            assert compiled.pattern_map == expected.pattern_map
+
+        # hash and tag lookups
+        assert library.find(TEMPLATES[4]) == 3
+        assert library.find(get_template_hash(TEMPLATES[1])) == 1
+        assert "<|name|>" not in library
+        assert library.find_by_tags(["industry"]) == [0, 3]
+        assert library.find_by_tags(["industry", "area_of_law"]) == [3]
+        assert library.find_by_tags(["industry", "date"]) == []
+        assert library.find_by_tags([]) == [0, 1, 2, 3]
+        with pytest.raises(ValueError):
+            library.find_by_tags(["not_a_tag"])
+
+
+def test_template_library_render(tmp_path, soli):
+    path = str(tmp_path / "templates.stpl")
+    build_library(TEMPLATES, path)
+    formatter = TemplateFormatter(soli_graph=soli)
+
+    with TemplateLibrary(path) as library:
+        outputs = list(
+            formatter.stream(library.iter_compiled(), renders_per_template=2)
+        )
+    assert len(outputs) == 8
+    assert outputs[4]["text"] == "No tags at all — just text."
+    assert [span["tag"] for span in outputs[0]["spans"]] == ["name", "name", "industry"]
+
+    with open(path, "r+b") as library_file:
+        library_file.write(b"NOTALIB!")
+    with pytest.raises(ValueError):
+        TemplateLibrary(path)
@@ -0,0 +1,155 @@
+# imports
+import random
+
+# packages
+import pytest
+from soli import SOLI, OWLClass
+
+# project
+from soli_data_generator.llm import AnnotatedTextGenerator
+from soli_data_generator.llm.fake import FakeModel
+from soli_data_generator.procedural import (
+    CoverageSampler,
+    GraphRegistry,
+    SamplingPolicy,
+    TemplateFormatter,
+    WeightedSampler,
+)
+from soli_data_generator.procedural.refresh import diff_graphs, get_affected_tags
+from soli_data_generator.procedural.template import SOLI_TAG_ROOTS, get_soli_pool
+
+
+def get_updated_graph():
+    """
+    Load the cached graph and apply an upstream-style update to it: an industry leaf is
+    removed, a location is added, and an area of law is renamed.
+    """
+    graph = SOLI()
+    leaf = next(
+        owl_class
+        for owl_class in graph.get_industries()
+        if not owl_class.parent_class_of
+    )
+    graph[leaf.sub_class_of[0]].parent_class_of.remove(leaf.iri)
+    graph.classes = [
+        owl_class for owl_class in graph.classes if owl_class.iri != leaf.iri
+    ]
+
+    root = graph[SOLI_TAG_ROOTS["location"]]
+    location = OWLClass(
+        iri=root.iri + "Atlantis", label="Atlantis", sub_class_of=[root.iri]
+    )
+    root.parent_class_of.append(location.iri)
+    graph.classes.append(location)
+    graph.iri_to_index = {
+        owl_class.iri: index for index, owl_class in enumerate(graph.classes)
+    }
+
+    graph.get_areas_of_law()[3].label = "Renamed Law"
+    return graph
+
+
+def test_diff_graphs():
+    old_graph, new_graph = SOLI(), get_updated_graph()
+    assert not any(diff_graphs(old_graph, SOLI()).values())
+
+    diff = diff_graphs(old_graph, new_graph)
+    assert len(diff["added"]) == 1 and len(diff["removed"]) == 1
+    # the renamed class and the parents of the removed and added classes
+    assert len(diff["changed"]) == 3
+    assert get_affected_tags(old_graph, new_graph, diff, SOLI_TAG_ROOTS) == {
+        "area_of_law",
+        "industry",
+        "location",
+    }
+
+
+def test_formatter_refresh():
+    sampler = CoverageSampler(rng=random.Random(0))
+    formatter = TemplateFormatter(soli_graph=SOLI(), sampler=sampler)
+    formatter.load_pools()
+    for _ in range(300):
+        formatter.format("<|industry|> and <|event|>")
+    covered = sampler.progress()["industry"]["covered"]
+    pools = dict(formatter.pools)
+
+    new_graph = get_updated_graph()
+    diff = formatter.refresh(new_graph)
+    assert diff["tags"] == ["area_of_law", "industry", "location"]
+    assert formatter.graph is new_graph
+
+    # only the affected pools are rebuilt, and they match a full rebuild
+    for tag, pool in formatter.pools.items():
+        assert (pool is pools[tag]) == (tag not in diff["tags"])
+        assert [owl_class.iri for owl_class in pool] == [
+            owl_class.iri for owl_class in get_soli_pool(new_graph, tag)
+        ]
+
+    # coverage carries over for the classes that remain
+    progress = sampler.progress()["industry"]
+    assert progress["total"] == len(pools["industry"]) - 1
+    assert progress["covered"] >= covered - 1
+    assert "Atlantis" in {owl_class.label for owl_class in formatter.pools["location"]}
+
+    # refreshing with an identical graph changes nothing
+    assert not any(formatter.refresh(get_updated_graph()).values())
+    assert formatter.graph is new_graph
+
+
+def test_formatter_refresh_weighted_and_correlated():
+    formatter = TemplateFormatter(
+        soli_graph=SOLI(),
+        policies={"location": SamplingPolicy(depth_exponent=1.0)},
+        correlated=True,
+        thread_local=True,
+    )
+    generation = formatter.generation
+    formatter.refresh(get_updated_graph())
+
+    # the alias table and relation index are rebuilt before the pools are swapped in
+    pool = formatter.pools["location"]
+    assert formatter.sampler.base.tables["location"][0] is pool
+    assert formatter.sampler.index.size == len(formatter.graph.classes)
+    assert formatter.generation == generation + 1
+    assert formatter.format_spans("<|location|> and <|industry|>")["spans"]
+
+
+def test_registry_and_generator_refresh():
+    registry = GraphRegistry(loader=lambda version: SOLI())
+    generator = AnnotatedTextGenerator(
+        FakeModel(seed=1), registry=registry, github_repo_branch="1.0.0"
+    )
+    registry.reloader = lambda version: get_updated_graph()
+    diff = generator.refresh()
+    assert diff["tags"] == ["area_of_law", "industry", "location"]
+    assert generator.graph is registry.get("1.0.0").graph
+    assert generator.graph is generator.formatter.graph
+    assert registry.stats()["refreshes"] == 1
+    assert generator.generate()["spans"]
+
+    with pytest.raises(ValueError):
+        registry.refresh("2.0.0")
+    with pytest.raises(ValueError):
+        AnnotatedTextGenerator(FakeModel()).refresh()
+
+
+def test_sampler_draws_racing_refresh():
+    # a draw that still passes the previous pool keeps coverage and matching tables
+    sampler = CoverageSampler(rng=random.Random(0))
+    old_pool = get_soli_pool(SOLI(), "industry")
+    for _ in range(100):
+        sampler.sample("industry", old_pool)
+    covered = sampler.progress()["industry"]["covered"]
+    new_pool = list(reversed(old_pool))
+    sampler.refresh("industry", new_pool)
+    sampler.sample("industry", old_pool)
+    assert sampler.progress()["industry"]["covered"] >= covered
+    assert sampler.sample("industry", new_pool) in new_pool
+    assert sampler.states["industry"].pool is new_pool
+
+    weighted = WeightedSampler({"industry": SamplingPolicy(class_weights={})})
+    weighted.refresh("industry", new_pool)
+    weighted.sample("industry", old_pool)
+    assert weighted.tables["industry"][0] is old_pool
+    weighted.sample("industry", new_pool)
+    assert weighted.tables["industry"][0] is new_pool
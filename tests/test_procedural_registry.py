@@ -0,0 +1,157 @@
+# imports
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.llm import AnnotatedTextGenerator, TextGenerator
+from soli_data_generator.llm.fake import FakeModel
+from soli_data_generator.procedural import (
+    CoverageSampler,
+    GraphRegistry,
+    SamplingPolicy,
+    WeightedSampler,
+)
+
+
+class CountingLoader:
+    """
+    Loader stand-in that loads the cached graph for every version and counts the loads.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.loads = []
+        self.lock = threading.Lock()
+
+    def __call__(self, version):
+        with self.lock:
+            self.loads.append(version)
+        time.sleep(self.delay)
+        return SOLI()
+
+
+def test_registry_shares_versions():
+    registry = GraphRegistry(loader=CountingLoader())
+    first, second = registry.get("1.0.0"), registry.get("1.1.0")
+    assert registry.get("1.0.0") is first
+
+    # identical classes and strings are shared across versions
+    assert all(
+        left is right for left, right in zip(first.graph.classes, second.graph.classes)
+    )
+    assert first.graph.tree is None
+    shared_bytes = registry.stats()["bytes"]
+
+    # loads only measure the new version, and agree with measuring everything again
+    assert 0 < second.bytes < first.bytes
+    registry.remeasure()
+    assert registry.stats()["bytes"] == shared_bytes
+
+    unshared = GraphRegistry(loader=CountingLoader(), share=False)
+    unshared.get("1.0.0")
+    unshared.get("1.1.0")
+    assert shared_bytes < 0.75 * unshared.stats()["bytes"]
+
+    # the formatters draw from their own version's pools
+    sample = second.formatter.format_spans("<|industry|> in <|location|>")
+    assert len(sample["spans"]) == 2
+
+
+def test_registry_evicts_least_recently_used():
+    loader = CountingLoader()
+    probe = GraphRegistry(loader=loader)
+    probe.get("probe")
+    one_graph = probe.stats()["bytes"]
+
+    # room for one graph and a little more, so every new version evicts the oldest
+    registry = GraphRegistry(max_bytes=int(one_graph * 1.1), loader=loader)
+    registry.get("a")
+    registry.get("b")
+    assert "a" not in registry and "b" in registry
+    registry.get("a")
+    stats = registry.stats()
+    assert stats["versions"] == ["a"]
+    assert stats["loads"] == 3 and stats["evictions"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+
+    # without a ceiling nothing is evicted, and recently used versions move last
+    registry = GraphRegistry(loader=loader)
+    for version in ("a", "b", "c", "a"):
+        registry.get(version)
+    assert registry.stats()["versions"] == ["b", "c", "a"]
+
+
+def test_registry_concurrent_loads():
+    loader = CountingLoader(delay=0.1)
+    registry = GraphRegistry(loader=loader)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        entries = list(executor.map(registry.get, ["a"] * 8))
+    assert loader.loads == ["a"]
+    assert all(entry is entries[0] for entry in entries)
+
+    # failed loads are raised to every waiter and retried on the next request
+    failing = GraphRegistry(loader=lambda version: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failing.get("a")
+    assert len(failing) == 0
+
+
+def test_generators_draw_versions_per_sample():
+    registry = GraphRegistry(loader=CountingLoader())
+    generator = AnnotatedTextGenerator(
+        FakeModel(seed=1), registry=registry, github_repo_branch="1.0.0"
+    )
+    assert generator.graph is registry.get("1.0.0").graph
+    sample = generator.generate(version="1.1.0")
+    assert sample["spans"]
+    assert registry.stats()["versions"] == ["1.0.0", "1.1.0"]
+
+    text_generator = TextGenerator(
+        FakeModel(seed=1), registry=registry, github_repo_branch="1.1.0"
+    )
+    assert text_generator.lock is registry.get("1.1.0").lock
+    assert "Instructions" in text_generator.build_prompt(version="1.0.0")
+
+    with pytest.raises(ValueError):
+        TextGenerator(FakeModel()).generate(version="1.1.0")
+
+
+def test_registry_samplers_per_version():
+    def load_relabeled(version):
+        graph = SOLI()
+        if version == "b":
+            for owl_class in graph.get_areas_of_law():
+                owl_class.label = f"B {owl_class.label}"
+        return graph
+
+    # coverage counts and drawn classes stay with their version
+    registry = GraphRegistry(loader=load_relabeled, sampler=CoverageSampler(target=1))
+    first, second = registry.get("a"), registry.get("b")
+    assert first.sampler is not second.sampler
+    assert registry.get_sampler("b") is second.sampler
+    pool_ids = {id(owl_class) for owl_class in second.formatter.pools["area_of_law"]}
+    for _ in range(200):
+        first.formatter.format_spans("<|area_of_law|>")
+        span = second.formatter.format_spans("<|area_of_law|>")["spans"][0]
+        assert id(span["owl_class"]) in pool_ids
+        assert span["owl_class"].label.startswith("B ")
+    assert first.sampler.is_complete() and second.sampler.is_complete()
+    assert first.sampler.progress() == second.sampler.progress()
+
+    # alias tables are built per version
+    registry = GraphRegistry(
+        loader=load_relabeled,
+        sampler=WeightedSampler({"area_of_law": SamplingPolicy(depth_exponent=1.0)}),
+    )
+    first, second = registry.get("a"), registry.get("b")
+    for entry in (first, second):
+        entry.formatter.format("<|area_of_law|>")
+    assert (
+        first.sampler.tables["area_of_law"] is not second.sampler.tables["area_of_law"]
+    )
+    assert registry.sampler.tables == {}
@@ -0,0 +1,64 @@
+# imports
+import random
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural.relations import (
+    CorrelatedSampler,
+    RelationIndex,
+    get_relation_index,
+)
+from soli_data_generator.procedural.sampling import CoverageSampler
+from soli_data_generator.procedural.template import TemplateFormatter
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_relation_index_symmetric(soli):
+    index = RelationIndex(soli)
+    assert len(index.offsets) == len(soli.classes) + 1
+    for node in range(index.size):
+        for neighbor in index.neighbors(node):
+            assert node in index.neighbors(neighbor)
+
+
+def test_relation_index_parent_child(soli):
+    index = get_relation_index(soli)
+    assert get_relation_index(soli) is index
+
+    # parent/child edges are present, except through the category roots
+    for owl_class in soli.get_areas_of_law():
+        for child_iri in owl_class.parent_class_of:
+            assert index.iri_to_index[child_iri] in index.neighbors(
+                index.get_node(owl_class)
+            )
+
+
+def test_correlated_sampler_draws_related(soli):
+    index = get_relation_index(soli)
+    formatter = TemplateFormatter(soli_graph=soli, correlated=True, max_hops=2)
+    assert isinstance(formatter.sampler, CorrelatedSampler)
+
+    pool_nodes = {
+        index.get_node(owl_class) for owl_class in formatter.get_pool("area_of_law")
+    }
+    for _ in range(20):
+        sample = formatter.format_spans("<|area_of_law:1|> and <|area_of_law:2|>")
+        first, second = [span["owl_class"] for span in sample["spans"]]
+        related = index.neighborhood([index.get_node(first)], 2) & pool_nodes
+        if related:
+            assert index.get_node(second) in related
+
+
+def test_correlated_sampler_base_policy(soli):
+    base = CoverageSampler(target=1, rng=random.Random(0))
+    formatter = TemplateFormatter(soli_graph=soli, sampler=base, correlated=True)
+    for text in formatter.format_many("<|industry|> in <|location|>", 5):
+        assert "<|" not in text
+    assert base.progress()["industry"]["covered"] > 0
@@ -0,0 +1,161 @@
+# imports
+import json
+import random
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural.sampling import (
+    AliasTable,
+    ClassSampler,
+    CoverageSampler,
+    FenwickTree,
+    SamplingPolicy,
+    WeightedSampler,
+    load_sampling_policies,
+)
+from soli_data_generator.procedural.template import TemplateFormatter
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_fenwick_tree_prefix_sums():
+    weights = [3, 0, 2, 5, 1]
+    tree = FenwickTree(weights)
+    for i in range(len(weights) + 1):
+        assert tree.prefix_sum(i) == sum(weights[:i])
+
+    tree.add(1, 4)
+    assert tree.total == 15
+    assert tree.prefix_sum(2) == 7
+
+
+def test_fenwick_tree_find():
+    tree = FenwickTree([3, 0, 2, 5, 1])
+    assert tree.find(0) == 0
+    assert tree.find(2.9) == 0
+    assert tree.find(3) == 2
+    assert tree.find(4.9) == 2
+    assert tree.find(5) == 3
+    assert tree.find(10) == 4
+
+
+def test_coverage_sampler_covers_pool(soli):
+    sampler = CoverageSampler(target=2, rng=random.Random(0))
+    formatter = TemplateFormatter(soli_graph=soli, sampler=sampler)
+    pool = formatter.get_pool("industry")
+    num_classes = len({owl_class.iri for owl_class in pool})
+
+    # every draw goes to a class below the target, so coverage needs exactly target * n draws
+    for _ in range(2 * num_classes):
+        assert not sampler.is_complete()
+        formatter.format("The company operates in the <|industry|> industry.")
+
+    assert sampler.is_complete()
+    assert sampler.progress()["industry"]["covered"] == num_classes
+    assert sampler.coverage() == 1.0
+
+
+def test_coverage_sampler_required_tags(soli):
+    sampler = CoverageSampler(target=1, tags=["industry", "location"])
+    formatter = TemplateFormatter(soli_graph=soli, sampler=sampler)
+    for _ in range(len(formatter.get_pool("industry"))):
+        formatter.format("<|industry|>")
+
+    # location has not been drawn yet
+    assert not sampler.is_complete()
+
+
+def test_alias_table_distribution():
+    table = AliasTable([1, 0, 3])
+    rng = random.Random(0)
+    draws = table.sample_many(40000, rng)
+    assert draws.count(1) == 0
+    assert abs(draws.count(2) / len(draws) - 0.75) < 0.02
+
+
+def test_weighted_sampler_class_weights(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    target = formatter.get_pool("industry")[0]
+    formatter.set_policy(
+        "industry", SamplingPolicy(class_weights={target.iri: 1.0}, default_weight=0.0)
+    )
+
+    # scalar and batched paths both draw only the weighted class
+    for _ in range(10):
+        sample = formatter.format_spans("<|industry|>")
+        assert sample["spans"][0]["owl_class"].iri == target.iri
+    for sample in formatter.format_spans_many("<|industry|> and <|location|>", 10):
+        assert sample["spans"][0]["owl_class"].iri == target.iri
+        assert "<|location|>" not in sample["text"]
+
+
+def test_weighted_sampler_label_weights(soli):
+    sampler = WeightedSampler(
+        {"industry": SamplingPolicy(label_weights={"label": 1.0})}
+    )
+    formatter = TemplateFormatter(soli_graph=soli, sampler=sampler)
+    labels = {owl_class.label for owl_class in formatter.get_pool("industry")}
+    for text in formatter.format_many("<|industry|>", 20):
+        assert text in labels
+
+
+def test_load_sampling_policies(tmp_path, soli):
+    config_path = tmp_path / "policies.json"
+    config_path.write_text(
+        json.dumps({"area_of_law": {"depth_exponent": 2.0, "default_weight": 0.5}})
+    )
+    policies = load_sampling_policies(config_path)
+    assert policies["area_of_law"].depth_exponent == 2.0
+
+    formatter = TemplateFormatter(soli_graph=soli)
+    formatter.load_policies(str(config_path))
+    assert "<|area_of_law|>" not in formatter.format("<|area_of_law|>")
+
+
+def test_weighted_sampler_rejects_unknown_tags(tmp_path):
+    config_path = tmp_path / "policies.json"
+    config_path.write_text(json.dumps({"area_of_laws": {"depth_exponent": 2.0}}))
+
+    with pytest.raises(ValueError):
+        WeightedSampler(load_sampling_policies(config_path))
+    with pytest.raises(ValueError):
+        WeightedSampler().set_policy("area_of_laws", SamplingPolicy())
+
+
+def test_distinct_indexed_slots(soli):
+    formatter = TemplateFormatter(
+        soli_graph=soli, sampler=ClassSampler(random.Random(7))
+    )
+    template = "<|area_of_law:1|>, <|area_of_law:2|> and <|area_of_law:3|>"
+
+    # scalar and batched paths both draw distinct classes within a sample
+    for _ in range(20):
+        spans = formatter.format_spans(template)["spans"]
+        assert len({span["owl_class"].iri for span in spans}) == 3
+    for sample in formatter.format_spans_many(template, 20):
+        assert len({span["owl_class"].iri for span in sample["spans"]}) == 3
+
+
+def test_distinct_faker_slots(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    for sample in formatter.format_spans_many("<|name:1|> and <|name:2|>", 20):
+        assert sample["spans"][0]["value"] != sample["spans"][1]["value"]
+
+
+def test_distinct_coverage_and_weighted_samplers(soli):
+    pool = soli.get_industries()
+    for sampler in (
+        CoverageSampler(target=2, rng=random.Random(3)),
+        WeightedSampler(
+            {"industry": SamplingPolicy(depth_exponent=1.0)}, rng=random.Random(3)
+        ),
+    ):
+        for _ in range(20):
+            draws = sampler.sample_distinct("industry", pool, 3)
+            assert len({owl_class.iri for owl_class in draws}) == 3
@@ -0,0 +1,70 @@
+# imports
+import json
+import pickle
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.cli.generate import serialize_sample
+from soli_data_generator.llm import AnnotatedTextGenerator
+from soli_data_generator.llm.fake import FakeModel
+from soli_data_generator.procedural import AnnotatedSample, TemplateFormatter
+from soli_data_generator.procedural.spans import get_output_record
+from soli_data_generator.procedural.stream import serialize_output
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_compact_spans_match_dict_spans(soli):
+    template = (
+        "<|name:1|> advised a <|industry|> client on <|area_of_law|> with <|name:2|>."
+    )
+    formatter = TemplateFormatter(soli_graph=soli)
+    compact_formatter = TemplateFormatter(soli_graph=soli, compact_spans=True)
+
+    formatter.reseed(11)
+    expected = formatter.format_spans_many(template, 5)
+    compact_formatter.reseed(11)
+    samples = compact_formatter.format_spans_many(template, 5)
+
+    for sample, output in zip(samples, expected):
+        assert isinstance(sample, AnnotatedSample)
+        assert len(sample) == 4
+        assert sample.to_dict(soli) == output
+        assert sample["spans"][1]["owl_class"] == output["spans"][1]["owl_class"].iri
+        assert serialize_output(sample) == serialize_output(output)
+        assert AnnotatedSample.from_spans(output["text"], output["spans"]) == sample
+
+        # serializing a dict output leaves its OWL classes in place
+        assert get_output_record(output) == sample.to_dict()
+        assert sample.to_dict(soli) == output
+
+
+def test_compact_spans_pickle(soli):
+    formatter = TemplateFormatter(soli_graph=soli, compact_spans=True)
+    sample = formatter.format_spans("<|industry:1|> and <|industry:2|> for <|name|>")
+
+    restored = pickle.loads(pickle.dumps(sample))
+    assert restored == sample
+    assert restored.iris[0] is sample.iris[0]
+    assert json.loads(restored.to_json())["spans"][2]["owl_class"] is None
+
+
+def test_annotated_generator_compact_spans():
+    generator = AnnotatedTextGenerator(FakeModel(seed=3), compact_spans=True)
+    sample = generator.generate()
+    assert isinstance(sample, AnnotatedSample) and len(sample) > 0
+
+    # samples are written with span IRIs, and extra fields expand them to a dict
+    assert serialize_sample(sample) == sample.to_json() + "\n"
+    record = json.loads(serialize_sample(sample, {"duplicate": None}))
+    assert record == {**sample.to_dict(), "duplicate": None}
+    assert json.loads(serialize_sample("text", {"soli_version": "1.0.0"})) == {
+        "text": "text",
+        "soli_version": "1.0.0",
+    }
@@ -0,0 +1,97 @@
+# imports
+import json
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.cli import render
+from soli_data_generator.procedural.stream import (
+    get_unit_seed,
+    iter_chunks,
+    render_seeded_unit,
+    stream_seeded,
+)
+from soli_data_generator.procedural.template import (
+    TemplateFormatter,
+    compile_template,
+)
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_compiled_template_spans():
+    compiled = compile_template("<|name:1|> works in <|industry|> with <|name:2|>.")
+    assert compile_template(compiled.template) is compiled
+    assert list(compiled.pattern_map) == [
+        ("name", "1"),
+        ("industry", None),
+        ("name", "2"),
+    ]
+
+    value_map = {
+        ("name", "1"): {"value": "Ann", "owl_class": None},
+        ("industry", None): {"value": "Banking", "owl_class": None},
+        ("name", "2"): {"value": "Bo", "owl_class": None},
+    }
+    output = compiled.render_spans(value_map)
+    assert output["text"] == "Ann works in Banking with Bo."
+    for span in output["spans"]:
+        assert output["text"][span["start"] : span["end"]] == span["value"]
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_stream_keeps_order(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    templates = (f"{i}: <|industry|> and <|name|>" for i in range(10))
+    outputs = list(formatter.stream(templates, renders_per_template=3))
+    assert len(outputs) == 30
+    for i, output in enumerate(outputs):
+        assert output["text"].startswith(f"{i // 3}: ")
+        assert len(output["spans"]) == 2
+
+
+def test_stream_parallel_keeps_order(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    templates = [f"{i}: <|area_of_law|>" for i in range(50)]
+    outputs = list(formatter.stream(templates, spans=False, workers=2, chunk_size=4))
+    assert [output.split(":")[0] for output in outputs] == [str(i) for i in range(50)]
+
+
+def test_stream_seeded_units_are_reproducible(soli):
+    formatter = TemplateFormatter(soli_graph=soli)
+    templates = [f"{i}: <|industry|> and <|name|>" for i in range(7)]
+    outputs = list(stream_seeded(formatter, templates, 5, spans=False, unit_size=3))
+    assert outputs == list(
+        stream_seeded(formatter, templates, 5, spans=False, unit_size=3)
+    )
+    assert outputs != list(
+        stream_seeded(formatter, templates, 6, spans=False, unit_size=3)
+    )
+
+    # any unit renders the same on its own
+    unit = render_seeded_unit(formatter, templates[3:6], get_unit_seed(5, 1), 1, False)
+    assert list(unit) == outputs[3:6]
+
+
+def test_render_cli(tmp_path, soli):
+    input_path = tmp_path / "templates.jsonl"
+    input_path.write_text(
+        json.dumps({"template": "<|industry|> matter"}) + "\n" + json.dumps("<|date|>")
+    )
+    output_path = tmp_path / "output.jsonl"
+    render.main(
+        ["--input", str(input_path), "--output", str(output_path), "--renders", "2"]
+    )
+
+    records = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert len(records) == 4
+    assert records[0]["text"].endswith(" matter")
+    assert isinstance(records[0]["spans"][0]["owl_class"], str)
@@ -0,0 +1,76 @@
+# imports
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural import CoverageSampler, TemplateFormatter
+
+TEMPLATE = "<|name:1|> and <|name:2|> advised a <|industry|> client on <|area_of_law|> in <|location|>."
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def is_free_threaded() -> bool:
+    return (
+        bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+        and not getattr(sys, "_is_gil_enabled", lambda: True)()
+    )
+
+
+def test_thread_local_formatter(soli):
+    formatter = TemplateFormatter(soli_graph=soli, thread_local=True)
+    assert set(formatter.pools) >= {"industry", "area_of_law", "location"}
+
+    # each thread draws from its own Faker instance and generator
+    states = {}
+
+    def render(_):
+        states[threading.get_ident()] = formatter.get_state()
+        return formatter.format_spans(TEMPLATE)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(render, range(200)))
+    assert len(outputs) == 200
+    assert all(len(output["spans"]) == 5 for output in outputs)
+    assert len({id(state.faker) for state in states.values()}) == len(states)
+    assert len({id(state.rng) for state in states.values()}) == len(states)
+
+    # reseeding rebuilds the calling thread's sources deterministically
+    formatter.reseed(7)
+    first = formatter.format_many(TEMPLATE, 5)
+    formatter.reseed(7)
+    assert formatter.format_many(TEMPLATE, 5) == first
+
+    with pytest.raises(ValueError):
+        TemplateFormatter(soli_graph=soli, sampler=CoverageSampler(), thread_local=True)
+
+
+@pytest.mark.skipif(not is_free_threaded(), reason="requires free-threaded CPython")
+def test_thread_local_scaling(soli):
+    formatter = TemplateFormatter(soli_graph=soli, thread_local=True)
+    num_samples = 2000
+
+    def get_throughput(num_threads: int) -> float:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            list(executor.map(lambda _: formatter.format(TEMPLATE), range(num_threads)))
+            start = time.perf_counter()
+            list(
+                executor.map(
+                    lambda _: formatter.format_many(TEMPLATE, num_samples),
+                    range(num_threads),
+                )
+            )
+        return num_threads * num_samples / (time.perf_counter() - start)
+
+    # near-linear scaling, allowing for scheduling noise
+    assert get_throughput(4) > 2.5 * get_throughput(1)
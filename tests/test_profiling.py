@@ -0,0 +1,48 @@
+# imports
+import pstats
+
+# packages
+import pytest
+
+# project
+from soli_data_generator.profiling import SampleProfiler
+
+
+def allocate():
+    return [list(range(100)) for _ in range(100)]
+
+
+def busy():
+    return sum(i * i for i in range(200000))
+
+
+def test_cpu_profiler_every_nth(tmp_path):
+    profiler = SampleProfiler("cpu", tmp_path / "output", every=2, stack_interval=0.001)
+    for _ in range(4):
+        with profiler.sample():
+            busy()
+    assert profiler.num_profiled == 2
+
+    paths = profiler.write()
+    assert pstats.Stats(str(paths["pstats"])).total_calls > 0
+    assert "busy" in paths["report"].read_text()
+    for line in paths["collapsed"].read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+def test_memory_profiler_top_allocations(tmp_path):
+    profiler = SampleProfiler("memory", tmp_path / "output", top_n=5)
+    kept = []
+    with profiler.sample():
+        kept.append(allocate())
+
+    paths = profiler.write()
+    assert __file__ in paths["report"].read_text()
+    assert paths["collapsed"].read_text()
+    assert any(filename == __file__ for filename, *_ in profiler.iter_top_allocations())
+
+
+def test_profiler_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        SampleProfiler("wall", tmp_path / "output")
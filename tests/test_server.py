@@ -0,0 +1,189 @@
+# imports
+import json
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural import TemplateFormatter
+from soli_data_generator.procedural.template import SOLI_TAG_ROOTS
+from soli_data_generator.server import MicroBatcher, close_server, create_server
+
+
+class CountingFormatter:
+    """
+    Formatter stand-in that records each batched call.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def format_batch(self, template, num_samples=1, spans=True):
+        self.calls.append((template, num_samples, spans))
+        time.sleep(self.delay)
+        if template == "fail":
+            raise ValueError("bad template")
+        return [f"{template} {index}" for index in range(num_samples)]
+
+
+@pytest.fixture(scope="module")
+def formatter():
+    return TemplateFormatter()
+
+
+@pytest.fixture(scope="module")
+def server(formatter):
+    server = create_server(formatter, port=0, max_wait=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    close_server(server)
+
+
+def request(server, path, payload=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    data = json.dumps(payload).encode() if payload is not None else None
+    with urllib.request.urlopen(url, data=data, timeout=10) as response:
+        body = response.read().decode()
+    return json.loads(body) if path != "/metrics" else body
+
+
+def test_micro_batcher_coalesces_requests():
+    formatter = CountingFormatter(delay=0.05)
+    batcher = MicroBatcher(formatter, max_batch_size=100, max_wait=0.005)
+    # the first request occupies the batcher while the rest queue up
+    first = batcher.submit("slow")
+    time.sleep(0.02)
+    futures = [batcher.submit("a", 2) for _ in range(5)] + [batcher.submit("b")]
+    assert first.result() == ["slow 0"]
+    outputs = [future.result() for future in futures]
+    batcher.close()
+
+    assert outputs[0] == ["a 0", "a 1"] and outputs[4] == ["a 8", "a 9"]
+    assert outputs[5] == ["b 0"]
+    assert formatter.calls[1:] == [("a", 10, True), ("b", 1, True)]
+    assert batcher.stats()["mean_requests_per_batch"] == 3.5
+
+
+def test_micro_batcher_errors_and_limits():
+    formatter = CountingFormatter()
+    batcher = MicroBatcher(formatter, max_batch_size=3, max_wait=0.05)
+    with pytest.raises(ValueError):
+        batcher.render("fail")
+    futures = [batcher.submit("a", 2) for _ in range(3)]
+    assert [len(future.result()) for future in futures] == [2, 2, 2]
+    batcher.close()
+    # batches stop growing once they reach max_batch_size outputs
+    assert all(num_samples <= 4 for _, num_samples, _ in formatter.calls)
+
+
+def test_server_render_and_stats(server):
+    health = request(server, "/health")
+    assert health["status"] == "ok" and health["classes"] > 0
+
+    template = "The <|industry|> firm hired <|name|> on <|date|>."
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(
+            executor.map(
+                lambda _: request(server, "/render", {"template": template, "n": 2}),
+                range(16),
+            )
+        )
+    for response in responses:
+        assert len(response["outputs"]) == 2
+        spans = response["outputs"][0]["spans"]
+        assert [span["tag"] for span in spans] == ["industry", "name", "date"]
+        assert spans[0]["owl_class"].startswith("https://")
+
+    text = request(server, "/render", {"template": "On <|date|>.", "spans": False})
+    assert text["outputs"][0]["text"].startswith("On ")
+
+    stats = request(server, "/stats")
+    assert stats["counters"]["requests"] == 17
+    assert stats["counters"]["outputs"] == 33
+    assert stats["batching"]["mean_requests_per_batch"] >= 1
+    assert 'stage="request"' in request(server, "/metrics")
+
+
+def test_server_rejects_bad_requests(server):
+    with pytest.raises(HTTPError) as error:
+        request(server, "/render", {"template": 1})
+    assert error.value.code == 400
+    with pytest.raises(HTTPError) as error:
+        request(server, "/render", {"template": "x", "n": 0})
+    assert error.value.code == 400
+    with pytest.raises(HTTPError) as error:
+        request(server, "/render", {"template": "x", "spans": "false"})
+    assert error.value.code == 400
+    with pytest.raises(HTTPError) as error:
+        request(server, "/missing")
+    assert error.value.code == 404
+
+    # refreshes need a reloader
+    with pytest.raises(HTTPError) as error:
+        request(server, "/refresh", {})
+    assert error.value.code == 404
+
+
+def test_server_unix_socket(formatter, tmp_path):
+    socket_path = str(tmp_path / "render.sock")
+    server = create_server(formatter, socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = json.dumps({"template": "On <|date|>."}).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(
+                b"POST /render HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            response = b""
+            while chunk := client.recv(65536):
+                response += chunk
+        assert response.startswith(b"HTTP/1.1 200")
+        payload = json.loads(response.split(b"\r\n\r\n", 1)[1])
+        assert payload["outputs"][0]["spans"][0]["tag"] == "date"
+    finally:
+        server.shutdown()
+        close_server(server)
+
+
+def test_server_refresh():
+    def reload_graph():
+        graph = SOLI()
+        root = graph[SOLI_TAG_ROOTS["currency"]]
+        graph[root.parent_class_of[0]].label = "Refreshed Currency"
+        return graph
+
+    server = create_server(
+        TemplateFormatter(soli_graph=SOLI()),
+        port=0,
+        reloader=reload_graph,
+        refresh_interval=60,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        diff = request(server, "/refresh", {})
+        assert diff["changed"] == 1 and diff["tags"] == ["currency"]
+        labels = {owl_class.label for owl_class in server.formatter.pools["currency"]}
+        assert "Refreshed Currency" in labels
+        assert request(server, "/render", {"template": "<|currency|>"})["outputs"]
+
+        stats = request(server, "/stats")
+        assert stats["counters"]["refreshes"] == 1
+        assert stats["refresh"]["last_diff"]["tags"] == ["currency"]
+    finally:
+        server.shutdown()
+        close_server(server)
@@ -0,0 +1,111 @@
+# imports
+import json
+
+# packages
+import pytest
+from soli import SOLI
+
+# project
+from soli_data_generator.procedural import TemplateFormatter
+from soli_data_generator.stats import DatasetStats, HyperLogLog, QuantileSketch
+
+
+@pytest.fixture
+def soli():
+    return SOLI()
+
+
+def test_hyperloglog():
+    first, second = HyperLogLog(), HyperLogLog()
+    for value in range(20000):
+        first.add(f"value {value}")
+        second.add(f"value {value + 10000}")
+    assert abs(first.count() - 20000) / 20000 < 0.05
+
+    # small counts are close to exact, and duplicates are not counted twice
+    small = HyperLogLog()
+    for value in list(range(100)) * 3:
+        small.add(str(value))
+    assert abs(small.count() - 100) <= 2
+
+    first.merge(second)
+    assert abs(first.count() - 30000) / 30000 < 0.05
+    assert HyperLogLog.from_dict(first.to_dict()).registers == first.registers
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(precision=10))
+
+
+def test_quantile_sketch():
+    values = list(range(1, 10001))
+    sketch, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in values:
+        sketch.add(value)
+        (first if value % 2 else second).add(value)
+    sketch.add(0)
+
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[round(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+    assert sketch.quantile(0) == 0
+    assert sketch.quantile(1) == 10000
+
+    # merging is exact
+    first.merge(second)
+    first.add(0)
+    assert first.to_dict() == sketch.to_dict()
+    assert QuantileSketch.from_dict(sketch.to_dict()).to_dict() == sketch.to_dict()
+    assert QuantileSketch().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        sketch.add(-1)
+
+
+def test_dataset_stats(soli):
+    formatter = TemplateFormatter(soli_graph=soli, compact_spans=True)
+    formatter.reseed(7)
+    samples = [
+        formatter.format_spans("<|name|> works in <|industry|> and <|area_of_law|>.")
+        for _ in range(200)
+    ] + ["plain text"]
+
+    stats, first, second = (DatasetStats(soli) for _ in range(3))
+    stats.update(samples)
+    first.update(samples[:100])
+    second.update(samples[100:])
+    first.merge(second)
+    assert first.to_dict() == stats.to_dict()
+
+    report = stats.report()
+    assert report["samples"] == 201
+    assert report["spans"] == 600
+    assert report["spans_per_sample"]["min"] == 0
+    assert report["spans_per_sample"]["max"] == 3
+    assert set(report["tags"]) == {"name", "industry", "area_of_law"}
+
+    # every SOLI value is one of its class's labels
+    industry = report["tags"]["industry"]
+    assert sum(industry["label_variants"].values()) == 200
+    assert "other" not in industry["label_variants"]
+    assert 0 < industry["coverage"]["seen"] <= industry["coverage"]["pool"]
+    assert industry["distinct_classes"] == industry["coverage"]["seen"]
+    assert "coverage" not in report["tags"]["name"]
+
+    # dict samples give the same statistics as compact samples
+    from_dicts = DatasetStats(soli)
+    from_dicts.update(
+        json.loads(sample.to_json()) if not isinstance(sample, str) else sample
+        for sample in samples
+    )
+    assert from_dicts.to_dict() == stats.to_dict()
+
+
+def test_dataset_stats_file(soli, tmp_path):
+    formatter = TemplateFormatter(soli_graph=soli)
+    formatter.reseed(8)
+    stats = DatasetStats(soli)
+    stats.update(formatter.format_spans("<|location|>") for _ in range(20))
+
+    path = str(tmp_path / "stats.json")
+    stats.write(path)
+    with open(path, "rt", encoding="utf-8") as input_file:
+        assert json.load(input_file)["report"]["samples"] == 20
+    assert DatasetStats.read(path).to_dict() == stats.to_dict()